@@ -158,3 +158,47 @@ EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "nao-responder@example.com")
 FRONTEND_RESET_URL = os.environ.get("FRONTEND_RESET_URL", "http://localhost:5173/reset-password")
+
+# Cache compartilhado entre processos (versões dos cadastros, throttling). Sem
+# REDIS_URL cada processo usa a própria memória: ok para um único processo.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+# Delta da listagem de alocações (?alterado_desde=) e quadro ao vivo (SSE): o log
+# de alterações é mantido por N dias; a folga reenvia linhas gravadas por
+# transações longas.
+ALOCACOES_TOMBSTONES_DIAS = int(os.environ.get("ALOCACOES_TOMBSTONES_DIAS", "30"))
+ALOCACOES_DELTA_FOLGA_SEGUNDOS = int(os.environ.get("ALOCACOES_DELTA_FOLGA_SEGUNDOS", "30"))
+SSE_INTERVALO_SEGUNDOS = float(os.environ.get("SSE_INTERVALO_SEGUNDOS", "1"))
+SSE_HEARTBEAT_SEGUNDOS = float(os.environ.get("SSE_HEARTBEAT_SEGUNDOS", "15"))
+SSE_FILA_MAXIMA = int(os.environ.get("SSE_FILA_MAXIMA", "500"))
+
+# Google Calendar
+GOOGLE_CALENDAR_CLIENT = os.environ.get("GOOGLE_CALENDAR_CLIENT", "")
+GOOGLE_CALENDAR_WEBHOOK_URL = os.environ.get("GOOGLE_CALENDAR_WEBHOOK_URL", "")
+CALENDAR_WEBHOOK_DEBOUNCE_SEGUNDOS = int(os.environ.get("CALENDAR_WEBHOOK_DEBOUNCE_SEGUNDOS", "5"))
+
+# Fila de jobs (escala.jobs / manage.py worker_jobs)
+JOB_LEASE_SEGUNDOS = int(os.environ.get("JOB_LEASE_SEGUNDOS", "300"))
+JOB_MAX_TENTATIVAS = int(os.environ.get("JOB_MAX_TENTATIVAS", "5"))
+JOB_BACKOFF_BASE_SEGUNDOS = int(os.environ.get("JOB_BACKOFF_BASE_SEGUNDOS", "30"))
+JOB_BACKOFF_MAX_SEGUNDOS = int(os.environ.get("JOB_BACKOFF_MAX_SEGUNDOS", "3600"))
+# Ritmo do reprocessamento em lote de dead-letters (jobs liberados por minuto).
+JOB_REPROCESSAMENTO_POR_MINUTO = int(os.environ.get("JOB_REPROCESSAMENTO_POR_MINUTO", "30"))
+# Máximo de jobs executando ao mesmo tempo por tipo (tipos ausentes não têm limite).
+JOB_CONCORRENCIA = {
+    "geracao_semanal": 1,
+    "confirmacao_diaria": 1,
+    "sync_google": int(os.environ.get("JOB_CONCORRENCIA_SYNC", "8")),
+    "publicacao_google": int(os.environ.get("JOB_CONCORRENCIA_PUBLICACAO", "4")),
+    "renovacao_webhook": 1,
+    "polling_google": 1,
+}
+# Disparos atrasados além disso contam como perdidos (ver AgendamentoJob.recuperacao).
+AGENDADOR_TOLERANCIA_SEGUNDOS = int(os.environ.get("AGENDADOR_TOLERANCIA_SEGUNDOS", "300"))
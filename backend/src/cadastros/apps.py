@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CadastrosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "cadastros"
+
+    def ready(self) -> None:
+        from .signals import conectar
+
+        conectar()
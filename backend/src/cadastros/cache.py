@@ -0,0 +1,205 @@
+"""Cache versionado dos cadastros de referência.
+
+Local, Sala, CapacidadeSala e PremissasGlobais mudam pouco e são lidos o
+tempo todo; de Profissional ficam em memória só a disponibilidade em bitsets
+(`disponibilidade.py`), invalidada também pelas mudanças de locais
+proibidos/preferidos, e o índice de nomes (`nomes.py`). Cada modelo tem um
+contador de versão no cache compartilhado (CACHES["default"]), incrementado
+pelos sinais de save/delete (`signals.py`). As tabelas ficam em memória no
+processo e só são relidas do banco quando a versão muda: uma leitura quente
+custa um `get_many` no cache e nenhuma consulta. Os objetos devolvidos são
+compartilhados e não devem ser alterados.
+
+`QuerySet.update()` e `bulk_create()` não disparam sinais: quem os usar
+nesses modelos deve chamar `invalidar`.
+
+Dentro de uma transação que alterou um dos modelos, a tabela é lida do banco
+sem ser guardada: se a transação for desfeita, nada não confirmado fica em
+memória.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from decimal import Decimal
+from typing import Any
+
+from django.core.cache import cache
+from django.db import connection, models
+
+from . import disponibilidade, nomes
+from .models import CapacidadeSala, DuracaoTurno, Local, PremissasGlobais, Profissional, Sala
+
+MODELOS_VERSIONADOS: tuple[type[models.Model], ...] = (
+    Local,
+    Sala,
+    CapacidadeSala,
+    PremissasGlobais,
+    Profissional,
+)
+
+_memoria: dict[str, tuple[tuple[int, ...], Any]] = {}
+_lock = threading.Lock()
+_transacao = threading.local()
+
+
+def _chave_versao(modelo: type[models.Model]) -> str:
+    return f"cadastros:versao:{modelo._meta.label_lower}"
+
+
+def _chave_alterado(modelo: type[models.Model]) -> str:
+    return f"cadastros:alterado:{modelo._meta.label_lower}"
+
+
+def _versao_inicial() -> int:
+    # Baseada no relógio: se a chave for despejada do cache, a versão recriada
+    # fica acima de qualquer valor anterior e as cópias em memória são relidas.
+    return time.time_ns() // 1000
+
+
+def invalidar(*modelos: type[models.Model]) -> None:
+    """Avança a versão dos modelos; os processos relêem as tabelas na próxima leitura."""
+    agora = time.time()
+    for modelo in modelos:
+        chave = _chave_versao(modelo)
+        try:
+            cache.incr(chave)
+        except ValueError:
+            cache.set(chave, _versao_inicial(), None)
+        cache.set(_chave_alterado(modelo), agora, None)
+
+
+def _alterados_na_transacao() -> set[type[models.Model]]:
+    if not connection.in_atomic_block:
+        # Fora de transação: o que sobrou veio de uma transação desfeita.
+        _transacao.alterados = set()
+    return _transacao.__dict__.setdefault("alterados", set())
+
+
+def marcar_alterado(modelo: type[models.Model]) -> None:
+    """Registra alteração ainda não confirmada do modelo na transação corrente."""
+    if connection.in_atomic_block:
+        _alterados_na_transacao().add(modelo)
+
+
+def confirmar_alterado(modelo: type[models.Model]) -> None:
+    _alterados_na_transacao().discard(modelo)
+
+
+def _estado(modelos: tuple[type[models.Model], ...]) -> list[tuple[int, float]]:
+    """(versão, momento da última alteração) de cada modelo, numa ida ao cache."""
+    chaves = [
+        chave for modelo in modelos for chave in (_chave_versao(modelo), _chave_alterado(modelo))
+    ]
+    valores = cache.get_many(chaves)
+    if len(valores) < len(chaves):
+        agora = time.time()
+        for modelo in modelos:
+            cache.add(_chave_versao(modelo), _versao_inicial(), None)
+            cache.add(_chave_alterado(modelo), agora, None)
+        valores = cache.get_many(chaves)
+    return [
+        (int(valores[_chave_versao(modelo)]), float(valores[_chave_alterado(modelo)]))
+        for modelo in modelos
+    ]
+
+
+def versao(*modelos: type[models.Model]) -> str:
+    """Identificador da combinação de versões dos modelos (usado como ETag)."""
+    return "-".join(str(numero) for numero, _ in _estado(modelos))
+
+
+def ultima_alteracao(*modelos: type[models.Model]) -> datetime:
+    """Momento da alteração mais recente entre os modelos (Last-Modified)."""
+    momento = max(alterado for _, alterado in _estado(modelos))
+    return datetime.fromtimestamp(momento, tz=UTC)
+
+
+def em_memoria(
+    nome: str, modelos: tuple[type[models.Model], ...], carregar: Callable[[], Any]
+) -> Any:
+    """Valor mantido no processo enquanto as versões dos `modelos` não mudarem."""
+    if _alterados_na_transacao().intersection(modelos):
+        return carregar()
+    atual = tuple(numero for numero, _ in _estado(modelos))
+    guardado = _memoria.get(nome)
+    if guardado is not None and guardado[0] == atual:
+        return guardado[1]
+    # A versão é lida antes da consulta: uma alteração no meio do caminho só
+    # faz a próxima leitura recarregar de novo.
+    with _lock:
+        guardado = _memoria.get(nome)
+        if guardado is not None and guardado[0] == atual:
+            return guardado[1]
+        valor = carregar()
+        _memoria[nome] = (atual, valor)
+    return valor
+
+
+def limpar_memoria() -> None:
+    """Descarta as cópias em memória do processo (testes e comandos longos)."""
+    _memoria.clear()
+
+
+def locais() -> dict[int, Local]:
+    return em_memoria(
+        "locais", (Local,), lambda: {local.pk: local for local in Local.objects.all()}
+    )
+
+
+def salas() -> dict[int, Sala]:
+    return em_memoria(
+        "salas",
+        (Sala, Local),
+        lambda: {sala.pk: sala for sala in Sala.objects.select_related("local")},
+    )
+
+
+def capacidades() -> dict[tuple[int, int, str], int]:
+    """Capacidade por (sala_id, dia_semana, turno)."""
+    return em_memoria(
+        "capacidades",
+        (CapacidadeSala,),
+        lambda: {
+            (sala_id, dia_semana, turno): capacidade
+            for sala_id, dia_semana, turno, capacidade in CapacidadeSala.objects.values_list(
+                "sala_id", "dia_semana", "turno", "capacidade"
+            )
+        },
+    )
+
+
+def duracoes() -> dict[tuple[int, str, int], Decimal]:
+    """Horas por (local_id, turno, dia_semana); regravadas com o Local, versão de Local."""
+    return em_memoria(
+        "duracoes",
+        (Local,),
+        lambda: {
+            (local_id, turno, dia_semana): horas
+            for local_id, turno, dia_semana, horas in DuracaoTurno.objects.values_list(
+                "local_id", "turno", "dia_semana", "horas"
+            )
+        },
+    )
+
+
+def disponibilidades() -> dict[int, disponibilidade.Disponibilidade]:
+    """Bitsets de turnos e locais por profissional_id."""
+    return em_memoria("disponibilidades", (Profissional,), disponibilidade.carregar)
+
+
+def indice_nomes() -> nomes.IndiceNomes:
+    """Nomes e celulares dos profissionais ativos (importações)."""
+    return em_memoria("indice_nomes", (Profissional,), nomes.carregar)
+
+
+def premissas() -> PremissasGlobais:
+    """Premissas globais; sem registro salvo, uma instância com os valores padrão."""
+    return em_memoria(
+        "premissas",
+        (PremissasGlobais,),
+        lambda: PremissasGlobais.objects.filter(singleton=True).first() or PremissasGlobais(),
+    )
@@ -0,0 +1,48 @@
+"""Disponibilidade dos profissionais em bitsets.
+
+Cada profissional vira três inteiros: a máscara de 14 bits de dia × turno
+(`Profissional.turnos_disponiveis`, derivada das indisponibilidades no save)
+e os bitsets de locais proibidos e preferidos, com o bit `1 << local_id`.
+A tabela fica em memória pelo cache versionado (`cache.disponibilidades`):
+cada verificação vira uma operação bit a bit, sem consulta e sem varrer a
+lista de indisponibilidades.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from .models import TODOS_OS_TURNOS, Profissional, bit_turno
+
+
+@dataclass(frozen=True)
+class Disponibilidade:
+    turnos: int = TODOS_OS_TURNOS
+    proibidos: int = 0
+    preferidos: int = 0
+
+    def livre(self, dia_semana: int, turno: str) -> bool:
+        return bool(self.turnos & bit_turno(dia_semana, turno))
+
+    def proibido(self, local_id: int) -> bool:
+        return bool(self.proibidos >> local_id & 1)
+
+    def preferido(self, local_id: int) -> bool:
+        return bool(self.preferidos >> local_id & 1)
+
+
+def carregar() -> dict[int, Disponibilidade]:
+    """Bitsets de todos os profissionais: uma consulta por tabela."""
+    proibidos: dict[int, int] = defaultdict(int)
+    preferidos: dict[int, int] = defaultdict(int)
+    for relacao, bits in (
+        (Profissional.locais_proibidos.through, proibidos),
+        (Profissional.locais_preferidos.through, preferidos),
+    ):
+        for profissional_id, local_id in relacao.objects.values_list("profissional_id", "local_id"):
+            bits[profissional_id] |= 1 << local_id
+    return {
+        pk: Disponibilidade(turnos, proibidos[pk], preferidos[pk])
+        for pk, turnos in Profissional.objects.values_list("pk", "turnos_disponiveis")
+    }
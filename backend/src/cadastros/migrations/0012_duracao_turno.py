@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-19 01:05
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _horas(inicio, fim):
+    segundos = (datetime.combine(date.min, fim) - datetime.combine(date.min, inicio)).total_seconds()
+    return round(Decimal(max(segundos, 0)) / 3600, 2)
+
+
+def preencher_duracoes(apps, schema_editor):
+    """Mesma regra de `Local.horario`: sábado usa `sabado_*` nos dois turnos."""
+    Local = apps.get_model("cadastros", "Local")
+    DuracaoTurno = apps.get_model("cadastros", "DuracaoTurno")
+    linhas = []
+    for local in Local.objects.all():
+        for dia in range(7):
+            for turno in ("manha", "tarde"):
+                if dia == 5:
+                    horario = (local.sabado_inicio, local.sabado_fim)
+                elif turno == "tarde":
+                    horario = (local.tarde_inicio, local.tarde_fim)
+                else:
+                    horario = (local.manha_inicio, local.manha_fim)
+                linhas.append(
+                    DuracaoTurno(local=local, dia_semana=dia, turno=turno, horas=_horas(*horario))
+                )
+    DuracaoTurno.objects.bulk_create(linhas, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0011_alter_profissional_options_profissional_destacado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuracaoTurno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia_semana', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')])),
+                ('turno', models.CharField(choices=[('manha', 'Manhã'), ('tarde', 'Tarde')], max_length=12)),
+                ('horas', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('local', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duracoes_turno', to='cadastros.local')),
+            ],
+            options={
+                'ordering': ['local', 'dia_semana', 'turno'],
+                'constraints': [models.UniqueConstraint(fields=('local', 'dia_semana', 'turno'), name='unica_duracao_turno')],
+            },
+        ),
+        migrations.RunPython(preencher_duracoes, migrations.RunPython.noop),
+    ]
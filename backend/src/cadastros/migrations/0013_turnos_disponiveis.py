@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 01:40
+
+from django.db import migrations, models
+
+
+def preencher_mascara(apps, schema_editor):
+    """Mesma regra de `cadastros.models.mascara_turnos`."""
+    Profissional = apps.get_model("cadastros", "Profissional")
+    alterados = []
+    for profissional in Profissional.objects.exclude(indisponibilidades=[]):
+        mascara = (1 << 14) - 1
+        for indisponivel in profissional.indisponibilidades or []:
+            if (
+                not isinstance(indisponivel, dict)
+                or indisponivel.get("dia_semana") not in range(7)
+                or indisponivel.get("turno") not in ("manha", "tarde")
+            ):
+                continue
+            mascara &= ~(1 << (indisponivel["dia_semana"] * 2 + (indisponivel["turno"] == "tarde")))
+        profissional.turnos_disponiveis = mascara
+        alterados.append(profissional)
+    Profissional.objects.bulk_update(alterados, ["turnos_disponiveis"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0012_duracao_turno'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profissional',
+            name='turnos_disponiveis',
+            field=models.PositiveSmallIntegerField(default=16383, editable=False, help_text='Máscara de dia × turno derivada de indisponibilidades'),
+        ),
+        migrations.RunPython(preencher_mascara, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from datetime import time
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
 
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -28,6 +31,36 @@ class DiaSemana(models.IntegerChoices):
     DOMINGO = 6, _("Domingo")
 
 
+# Disponibilidade semanal em 14 bits: o bit `dia_semana * 2 + turno`
+# (manhã 0, tarde 1) ligado quando o profissional pode trabalhar.
+TODOS_OS_TURNOS = (1 << 14) - 1
+
+
+def bit_turno(dia_semana: int, turno: str) -> int:
+    return 1 << (dia_semana * 2 + (turno == TurnoChoices.TARDE))
+
+
+def indisponibilidade_valida(indisponivel: Any) -> bool:
+    return (
+        isinstance(indisponivel, dict)
+        and indisponivel.get("dia_semana") in DiaSemana.values
+        and indisponivel.get("turno") in TurnoChoices.values
+    )
+
+
+def mascara_turnos(indisponibilidades: list[dict[str, Any]]) -> int:
+    """Máscara de turnos disponíveis a partir da lista de indisponibilidades.
+
+    Entradas malformadas (o admin grava o JSON sem passar pelo serializer)
+    são ignoradas; `Profissional.clean` as rejeita nos formulários.
+    """
+    mascara = TODOS_OS_TURNOS
+    for indisponivel in indisponibilidades or []:
+        if indisponibilidade_valida(indisponivel):
+            mascara &= ~bit_turno(indisponivel["dia_semana"], indisponivel["turno"])
+    return mascara
+
+
 class Local(models.Model):
     class TipoLocal(models.TextChoices):
         ASSOCIACAO = "associacao", _("Associação")
@@ -61,6 +94,54 @@ class Local(models.Model):
     def __str__(self) -> str:
         return self.nome
 
+    def horario(self, dia_semana: int, turno: str) -> tuple[time, time]:
+        """(início, fim) do turno no dia da semana; sábados usam `sabado_*`."""
+        if dia_semana == DiaSemana.SABADO:
+            return self.sabado_inicio, self.sabado_fim
+        if turno == TurnoChoices.TARDE:
+            return self.tarde_inicio, self.tarde_fim
+        return self.manha_inicio, self.manha_fim
+
+    def duracoes(self) -> list[DuracaoTurno]:
+        """Linhas de DuracaoTurno (não salvas) para cada dia da semana e turno."""
+        linhas = []
+        for dia in DiaSemana.values:
+            for turno in TurnoChoices.values:
+                inicio, fim = self.horario(dia, turno)
+                segundos = (
+                    datetime.combine(date.min, fim) - datetime.combine(date.min, inicio)
+                ).total_seconds()
+                horas = Decimal(max(segundos, 0)) / 3600
+                linhas.append(
+                    DuracaoTurno(local=self, dia_semana=dia, turno=turno, horas=round(horas, 2))
+                )
+        return linhas
+
+
+class DuracaoTurno(models.Model):
+    """Duração em horas de cada turno por local e dia da semana.
+
+    Derivada dos horários do Local e regravada a cada save dele (`signals.py`);
+    serve às somas de horas em SQL (join por local/turno/dia) e, em memória,
+    às verificações em Python (`cache.duracoes`).
+    """
+
+    local = models.ForeignKey(Local, on_delete=models.CASCADE, related_name="duracoes_turno")
+    dia_semana = models.PositiveSmallIntegerField(choices=DiaSemana.choices)
+    turno = models.CharField(max_length=12, choices=TurnoChoices.choices)
+    horas = models.DecimalField(max_digits=4, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["local", "dia_semana", "turno"], name="unica_duracao_turno"
+            ),
+        ]
+        ordering = ["local", "dia_semana", "turno"]
+
+    def __str__(self) -> str:
+        return f"{self.local_id} {self.get_dia_semana_display()} ({self.turno}): {self.horas}h"
+
 
 class Profissional(models.Model):
     nome = models.CharField(max_length=150)
@@ -133,6 +214,11 @@ class Profissional(models.Model):
     inscricao_municipal = models.CharField(max_length=30, blank=True)
     data_contrato = models.DateField(null=True, blank=True)
     indisponibilidades = models.JSONField(default=list, blank=True)
+    turnos_disponiveis = models.PositiveSmallIntegerField(
+        default=TODOS_OS_TURNOS,
+        editable=False,
+        help_text="Máscara de dia × turno derivada de indisponibilidades",
+    )
     destacado = models.BooleanField(default=False, help_text="Se aparece no topo da lista")
     locais_preferidos = models.ManyToManyField(
         Local, related_name="profissionais_preferidos", blank=True
@@ -159,6 +245,22 @@ class Profissional(models.Model):
     def __str__(self) -> str:
         return self.nome
 
+    def clean(self) -> None:
+        super().clean()
+        if not isinstance(self.indisponibilidades, list) or not all(
+            indisponibilidade_valida(indisponivel) for indisponivel in self.indisponibilidades
+        ):
+            raise ValidationError(
+                {"indisponibilidades": _("Dia/turno inválido em indisponibilidades.")}
+            )
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        self.turnos_disponiveis = mascara_turnos(self.indisponibilidades)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "indisponibilidades" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "turnos_disponiveis"}
+        super().save(*args, **kwargs)
+
 
 class Sala(models.Model):
     local = models.ForeignKey(Local, on_delete=models.CASCADE, related_name="salas")
@@ -0,0 +1,97 @@
+"""Índice de nomes dos profissionais ativos.
+
+Importações (conversas do WhatsApp, planilhas de sábado) citam profissionais
+pelo nome como foi digitado: com ou sem acento, só o primeiro nome, ou o
+celular do remetente. O índice guarda as chaves normalizadas (minúsculas,
+sem acentos) de cada profissional ativo: nome completo, primeiro e último
+nome, primeiro nome quando não é ambíguo e os 11 últimos dígitos do
+celular. Fica em memória pelo cache versionado (`cache.indice_nomes`).
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import defaultdict
+from collections.abc import Iterable
+
+from .models import Profissional
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^\w/:+ ]", " ", sem_acento.lower()).split())
+
+
+def _digitos(texto: str) -> str:
+    return re.sub(r"\D", "", texto)
+
+
+class IndiceNomes:
+    """Nomes e celulares normalizados dos profissionais ativos -> id."""
+
+    def __init__(self, profissionais: Iterable[tuple[int, str, str]]) -> None:
+        self.nomes: dict[str, int] = {}
+        self.celulares: dict[str, int] = {}
+        primeiros: dict[str, set[int]] = defaultdict(set)
+        for pk, nome, celular in profissionais:
+            partes = normalizar(nome).split()
+            if not partes:
+                continue
+            self.nomes[" ".join(partes)] = pk
+            if len(partes) > 2:
+                self.nomes[f"{partes[0]} {partes[-1]}"] = pk
+            primeiros[partes[0]].add(pk)
+            if celular:
+                self.celulares[_digitos(celular)[-11:]] = pk
+        for primeiro, ids in primeiros.items():
+            if len(ids) == 1:
+                self.nomes.setdefault(primeiro, next(iter(ids)))
+        self.maior = max((len(nome.split()) for nome in self.nomes), default=1)
+
+    def profissional(self, nome: str) -> int | None:
+        """Id pelo nome exato (normalizado) ou celular; None se ausente ou ambíguo."""
+        digitos = _digitos(nome)
+        if len(digitos) >= 10:
+            return self.celulares.get(digitos[-11:])
+        return self.nomes.get(normalizar(nome))
+
+    def autor(self, autor: str) -> tuple[int | None, bool]:
+        """(id, casou pelo nome completo ou celular) do remetente."""
+        digitos = _digitos(autor)
+        if len(digitos) >= 10:
+            return self.celulares.get(digitos[-11:]), True
+        nome = normalizar(autor)
+        if nome in self.nomes:
+            return self.nomes[nome], len(nome.split()) > 1
+        citados = self.citados(nome)
+        return (citados[0][0], False) if citados else (None, False)
+
+    def citados(self, texto: str) -> list[tuple[int, bool]]:
+        """Profissionais citados no texto, na ordem, com (id, nome completo)."""
+        palavras = texto.split()
+        encontrados: list[tuple[int, bool]] = []
+        posicao = 0
+        while posicao < len(palavras):
+            for tamanho in range(min(self.maior, len(palavras) - posicao), 0, -1):
+                trecho = " ".join(palavras[posicao : posicao + tamanho])
+                pk = self.nomes.get(trecho)
+                if pk is not None:
+                    if pk not in (encontrado for encontrado, _ in encontrados):
+                        encontrados.append((pk, tamanho > 1))
+                    posicao += tamanho
+                    break
+            else:
+                posicao += 1
+        return encontrados
+
+
+def carregar() -> IndiceNomes:
+    """Índice dos profissionais ativos, numa consulta."""
+    return IndiceNomes(
+        Profissional.objects.filter(ativo=True)
+        .order_by()
+        .values_list("pk", "nome", "celular")
+        .iterator()
+    )
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, Mapping
+from collections.abc import Callable, Iterable, Mapping
 from typing import Any
 
 from django.core.validators import validate_email
-from django.db import transaction
+from django.db import models, transaction
 from rest_framework import serializers
 
+from . import cache
 from .models import (
     CapacidadeSala,
     ClassificacaoProfissional,
@@ -29,6 +30,24 @@ def _normalize_string_list(raw: Any) -> list[str]:
     return normalized
 
 
+class CadastroCacheadoField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que resolve o id pela tabela em memória de `cadastros.cache`."""
+
+    def __init__(self, tabela: Callable[[], Mapping[int, models.Model]], **kwargs: Any) -> None:
+        self.tabela = tabela
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data: Any) -> models.Model:
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return self.tabela()[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
 class LocalSerializer(serializers.ModelSerializer):
     class Meta:
         model = Local
@@ -138,11 +157,11 @@ class CapacidadeSalaSerializer(serializers.ModelSerializer):
 
 
 class ProfissionalSerializer(serializers.ModelSerializer):
-    locais_preferidos = serializers.PrimaryKeyRelatedField(
-        queryset=Local.objects.all(), many=True, required=False, allow_empty=True
+    locais_preferidos = CadastroCacheadoField(
+        cache.locais, queryset=Local.objects.all(), many=True, required=False, allow_empty=True
     )
-    locais_proibidos = serializers.PrimaryKeyRelatedField(
-        queryset=Local.objects.all(), many=True, required=False, allow_empty=True
+    locais_proibidos = CadastroCacheadoField(
+        cache.locais, queryset=Local.objects.all(), many=True, required=False, allow_empty=True
     )
 
     class Meta:
@@ -0,0 +1,62 @@
+"""Invalidação do cache versionado (`cadastros.cache`) a cada save/delete.
+
+O save de Local também regrava a tabela de durações dos turnos (DuracaoTurno),
+e as mudanças de locais proibidos/preferidos invalidam a versão de Profissional.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import Any
+
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .cache import MODELOS_VERSIONADOS, confirmar_alterado, invalidar, marcar_alterado
+from .models import DuracaoTurno, Local, Profissional
+
+
+def _confirmar(modelo: type[models.Model]) -> None:
+    confirmar_alterado(modelo)
+    # De novo no commit: outro processo que releu a tabela antes do commit
+    # guardou os dados antigos sob a versão nova.
+    invalidar(modelo)
+
+
+def _invalidar(sender: type[models.Model], **kwargs: Any) -> None:
+    invalidar(sender)
+    marcar_alterado(sender)
+    transaction.on_commit(partial(_confirmar, sender))
+
+
+def _gravar_duracoes(
+    sender: type[Local], instance: Local, raw: bool = False, **kwargs: Any
+) -> None:
+    """Regrava a tabela de durações do local a partir dos horários (mesma transação)."""
+    if raw:
+        return
+    DuracaoTurno.objects.bulk_create(
+        instance.duracoes(),
+        update_conflicts=True,
+        unique_fields=["local", "dia_semana", "turno"],
+        update_fields=["horas"],
+    )
+
+
+def _invalidar_profissional(action: str, **kwargs: Any) -> None:
+    """m2m_changed de locais proibidos/preferidos: entram nos bitsets do Profissional."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidar(Profissional)
+
+
+def conectar() -> None:
+    post_save.connect(_gravar_duracoes, sender=Local, dispatch_uid="duracoes-local")
+    for relacao in (Profissional.locais_proibidos, Profissional.locais_preferidos):
+        m2m_changed.connect(
+            _invalidar_profissional,
+            sender=relacao.through,
+            dispatch_uid=f"versao-m2m-{relacao.through.__name__}",
+        )
+    for modelo in MODELOS_VERSIONADOS:
+        post_save.connect(_invalidar, sender=modelo, dispatch_uid=f"versao-{modelo.__name__}")
+        post_delete.connect(_invalidar, sender=modelo, dispatch_uid=f"versao-del-{modelo.__name__}")
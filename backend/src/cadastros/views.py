@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+from typing import Any
+
+from django.db import models
 from django.db.models import QuerySet
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from .cache import em_memoria, ultima_alteracao, versao
 from .models import CapacidadeSala, Local, PremissasGlobais, Profissional, Sala
 from .serializers import (
     CapacidadeSalaSerializer,
@@ -14,37 +21,69 @@ from .serializers import (
 )
 
 
+class ListagemVersionadaMixin:
+    """Listagem servida do cache versionado, com ETag/Last-Modified e 304.
+
+    O navegador revalida a cada uso (`no-cache`) e recebe 304 enquanto a
+    versão dos `modelos_versionados` não mudar; sem banco nos dois casos.
+    """
+
+    modelos_versionados: tuple[type[models.Model], ...] = ()
+
+    def list(self, request: Any, *args: Any, **kwargs: Any) -> Any:
+        etag = f'"{versao(*self.modelos_versionados)}"'
+        alterado = int(ultima_alteracao(*self.modelos_versionados).timestamp())
+        response = get_conditional_response(request._request, etag=etag, last_modified=alterado)
+        if response is None:
+            viewset: Any = self
+            dados = em_memoria(
+                f"listagem:{type(self).__name__}",
+                self.modelos_versionados,
+                lambda: list(viewset.get_serializer(viewset.get_queryset(), many=True).data),
+            )
+            response = Response(dados)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(alterado)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
 class ProfissionalViewSet(viewsets.ModelViewSet):
     queryset = Profissional.objects.prefetch_related("locais_preferidos", "locais_proibidos")
     serializer_class = ProfissionalSerializer
     permission_classes = [IsAuthenticated]
 
 
-class LocalViewSet(viewsets.ModelViewSet):
+class LocalViewSet(ListagemVersionadaMixin, viewsets.ModelViewSet):
+    modelos_versionados = (Local,)
     queryset = Local.objects.all()
     serializer_class = LocalSerializer
     permission_classes = [IsAuthenticated]
 
 
-class SalaViewSet(viewsets.ModelViewSet):
+class SalaViewSet(ListagemVersionadaMixin, viewsets.ModelViewSet):
+    modelos_versionados = (Sala,)
     queryset = Sala.objects.select_related("local")
     serializer_class = SalaSerializer
     permission_classes = [IsAuthenticated]
 
 
-class CapacidadeSalaViewSet(viewsets.ModelViewSet):
+class CapacidadeSalaViewSet(ListagemVersionadaMixin, viewsets.ModelViewSet):
+    modelos_versionados = (CapacidadeSala,)
     queryset = CapacidadeSala.objects.select_related("sala", "sala__local")
     serializer_class = CapacidadeSalaSerializer
     permission_classes = [IsAuthenticated]
 
 
 class PremissasGlobaisViewSet(
+    ListagemVersionadaMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
+    modelos_versionados = (PremissasGlobais,)
     queryset = PremissasGlobais.objects.all()
     serializer_class = PremissasGlobaisSerializer
     permission_classes = [IsAuthenticated]
@@ -1,12 +1,18 @@
 """Admin para gestão de escalas."""
 
+from typing import Any
+
 from django.contrib import admin
 
 from .models import (
     AgendaGoogle,
+    AgendamentoJob,
     Alocacao,
+    AuditoriaAlocacao,
     EventoCalendar,
     ExecucaoJob,
+    ItemModeloSemana,
+    ModeloSemana,
     PromptHistory,
     Troca,
 )
@@ -23,17 +29,75 @@ class AlocacaoAdmin(admin.ModelAdmin):
     ordering = ["-data", "turno"]
 
 
+@admin.register(AuditoriaAlocacao)
+class AuditoriaAlocacaoAdmin(admin.ModelAdmin):
+    """Admin (somente leitura) para a auditoria de alocações."""
+
+    list_display = ["criada_em", "alocacao_id", "data", "turno", "fonte", "autor", "job_id"]
+    list_filter = ["fonte", "turno", "criada_em"]
+    search_fields = ["autor", "motivo"]
+    date_hierarchy = "criada_em"
+    ordering = ["-criada_em"]
+
+    def has_add_permission(self, request: Any) -> bool:
+        return False
+
+    def has_change_permission(self, request: Any, obj: Any = None) -> bool:
+        return False
+
+    def has_delete_permission(self, request: Any, obj: Any = None) -> bool:
+        return False
+
+
+class ItemModeloSemanaInline(admin.TabularInline):
+    model = ItemModeloSemana
+    extra = 0
+
+
+@admin.register(ModeloSemana)
+class ModeloSemanaAdmin(admin.ModelAdmin):
+    """Admin para Modelo de semana."""
+
+    list_display = ["nome", "updated_at"]
+    search_fields = ["nome"]
+    inlines = [ItemModeloSemanaInline]
+
+
 @admin.register(ExecucaoJob)
 class ExecucaoJobAdmin(admin.ModelAdmin):
     """Admin para Execução de Job."""
 
-    list_display = ["tipo", "status", "iniciou_em", "terminou_em", "autor"]
+    list_display = ["tipo", "status", "iniciou_em", "terminou_em", "tentativas", "worker", "autor"]
     list_filter = ["tipo", "status", "iniciou_em"]
-    search_fields = ["autor", "diff_resumo"]
+    search_fields = ["autor", "diff_resumo", "worker"]
     date_hierarchy = "iniciou_em"
     ordering = ["-iniciou_em"]
 
 
+@admin.register(AgendamentoJob)
+class AgendamentoJobAdmin(admin.ModelAdmin):
+    """Admin para Agendamento de Job."""
+
+    list_display = [
+        "nome",
+        "tipo",
+        "cron",
+        "ativo",
+        "recuperacao",
+        "proxima_execucao",
+        "ultima_execucao",
+    ]
+    list_filter = ["tipo", "ativo"]
+    search_fields = ["nome"]
+    readonly_fields = ["proxima_execucao", "ultima_execucao", "ultimo_job"]
+
+    def save_model(self, request: Any, obj: AgendamentoJob, form: Any, change: bool) -> None:
+        if "cron" in form.changed_data:
+            # O agendador recalcula o próximo disparo a partir da nova expressão.
+            obj.proxima_execucao = None
+        super().save_model(request, obj, form, change)
+
+
 @admin.register(PromptHistory)
 class PromptHistoryAdmin(admin.ModelAdmin):
     """Admin para Histórico de Prompts."""
@@ -72,8 +136,17 @@ class TrocaAdmin(admin.ModelAdmin):
 class AgendaGoogleAdmin(admin.ModelAdmin):
     """Admin para Agendas Google."""
 
-    list_display = ["nome", "profissional", "calendar_id", "ultima_sync", "pode_publicar", "ativa"]
-    list_filter = ["pode_publicar", "ativa", "ultima_sync"]
+    list_display = [
+        "nome",
+        "profissional",
+        "calendar_id",
+        "ultima_sync",
+        "status",
+        "webhook_expiracao",
+        "pode_publicar",
+        "ativa",
+    ]
+    list_filter = ["status", "pode_publicar", "ativa", "ultima_sync"]
     search_fields = ["nome", "calendar_id", "profissional__nome"]
     ordering = ["profissional__nome"]
 
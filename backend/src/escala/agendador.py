@@ -0,0 +1,135 @@
+"""Agendador das rotinas periódicas: transforma disparos cron em jobs na fila.
+
+Várias instâncias podem rodar (`manage.py agendador_jobs`), mas só a dona
+do lease em LiderancaAgendador enfileira; as outras ficam de reserva e
+assumem quando o lease expira.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cron import Cron
+from .jobs import enfileirar
+from .models import (
+    AgendamentoJob,
+    ExecucaoJob,
+    LiderancaAgendador,
+    RecuperacaoAtrasos,
+    StatusJob,
+)
+
+NOME_LIDERANCA = "agendador"
+# Teto de disparos perdidos examinados de uma vez (ex.: a cada minuto por uma semana).
+MAX_DISPAROS_VERIFICADOS = 10_000
+
+
+@dataclass
+class ResultadoDisparo:
+    enfileirados: list[int] = field(default_factory=list)
+    # Disparos não enfileirados porque o job anterior do mesmo tipo não terminou.
+    ignorados_em_execucao: int = 0
+    # Disparos perdidos descartados pela política de recuperação.
+    descartados: int = 0
+
+
+def obter_lideranca(dono: str, duracao: timedelta) -> bool:
+    """Adquire ou renova o lease do agendador; False se outra instância o detém."""
+    agora = timezone.now()
+    renovou = (
+        LiderancaAgendador.objects.filter(nome=NOME_LIDERANCA)
+        .filter(Q(dono=dono) | Q(expira_em__lt=agora))
+        .update(dono=dono, expira_em=agora + duracao)
+    )
+    if renovou:
+        return True
+    try:
+        with transaction.atomic():
+            LiderancaAgendador.objects.create(
+                nome=NOME_LIDERANCA, dono=dono, expira_em=agora + duracao
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def liberar_lideranca(dono: str) -> None:
+    LiderancaAgendador.objects.filter(nome=NOME_LIDERANCA, dono=dono).update(
+        expira_em=timezone.now()
+    )
+
+
+def _tolerancia() -> timedelta:
+    return timedelta(seconds=getattr(settings, "AGENDADOR_TOLERANCIA_SEGUNDOS", 300))
+
+
+def _a_enfileirar(
+    agendamento: AgendamentoJob, vencidos: list[datetime], agora: datetime
+) -> list[datetime]:
+    """Aplica a política de recuperação aos disparos vencidos."""
+    if agendamento.recuperacao == RecuperacaoAtrasos.TODOS:
+        return vencidos[-agendamento.max_atrasados :] if agendamento.max_atrasados else []
+    if agendamento.recuperacao == RecuperacaoAtrasos.ULTIMO:
+        return vencidos[-1:]
+    return [momento for momento in vencidos[-1:] if agora - momento <= _tolerancia()]
+
+
+def _disparar(agendamento: AgendamentoJob, agora: datetime, resultado: ResultadoDisparo) -> None:
+    cron = Cron.parse(agendamento.cron)
+    if agendamento.proxima_execucao is None:
+        agendamento.proxima_execucao = cron.proxima(agora)
+        agendamento.save(update_fields=["proxima_execucao"])
+        return
+    if agendamento.proxima_execucao > agora:
+        return
+
+    vencidos = [agendamento.proxima_execucao] + cron.disparos(
+        agendamento.proxima_execucao, agora, limite=MAX_DISPAROS_VERIFICADOS
+    )
+    momentos = _a_enfileirar(agendamento, vencidos, agora)
+    resultado.descartados += len(vencidos) - len(momentos)
+
+    em_andamento = ExecucaoJob.objects.filter(
+        tipo=agendamento.tipo, status__in=[StatusJob.PENDENTE, StatusJob.EXECUTANDO]
+    ).exists()
+    if momentos and em_andamento:
+        resultado.ignorados_em_execucao += len(momentos)
+        momentos = []
+
+    for momento in momentos:
+        job = enfileirar(
+            agendamento.tipo,
+            payload={
+                **agendamento.payload,
+                "agendamento": agendamento.nome,
+                "previsto_para": momento.isoformat(),
+            },
+            autor=f"agendador:{agendamento.nome}",
+        )
+        resultado.enfileirados.append(job.pk)
+        agendamento.ultimo_job = job
+        agendamento.ultima_execucao = momento
+
+    agendamento.proxima_execucao = cron.proxima(agora)
+    agendamento.save(update_fields=["proxima_execucao", "ultima_execucao", "ultimo_job"])
+
+
+def disparar_vencidos(agora: datetime | None = None) -> ResultadoDisparo:
+    """Enfileira os jobs dos agendamentos ativos cujo horário chegou."""
+    agora = agora or timezone.now()
+    resultado = ResultadoDisparo()
+    pendentes = AgendamentoJob.objects.filter(ativo=True).filter(
+        Q(proxima_execucao__isnull=True) | Q(proxima_execucao__lte=agora)
+    )
+    for agendamento_id in pendentes.values_list("id", flat=True):
+        with transaction.atomic():
+            # O lock protege contra dois líderes momentâneos (lease recém-expirado).
+            agendamento = AgendamentoJob.objects.select_for_update().get(pk=agendamento_id)
+            _disparar(agendamento, agora, resultado)
+    return resultado
@@ -0,0 +1,271 @@
+"""Validador e delta da listagem de alocações.
+
+O quadro consulta a mesma janela de semanas várias vezes por minuto. A
+marca de um período (contagem + maiores `updated_at` das alocações, dos
+eventos Google e dos profissionais) sai de uma única consulta agregada e
+vira o ETag da listagem: sem mudança, a resposta é 304. No modo delta o
+cliente manda o cursor recebido e leva só o que mudou depois dele, mais os
+ids das alocações apagadas.
+
+Toda criação, edição, remoção e troca aplicada grava uma linha em
+AlteracaoAlocacao na mesma transação da edição (sinais post_save e
+post_delete; `registrar_em_lote` para quem grava com `bulk_update`). As
+entradas `removida` são os tombstones do delta; o log inteiro alimenta o
+stream do quadro ao vivo (`transmissao.py`). Os mesmos pontos mantêm o
+livro de carga semanal (`carga.py`) e a auditoria (AuditoriaAlocacao): o
+estado de antes e de depois de cada mudança, com a autoria do contexto
+aberto por `auditando` (fonte, autor, motivo e job). Sem contexto, a fonte
+é `sistema`.
+
+Edições pela API usam controle otimista de concorrência: `Alocacao.version`
+avança a cada gravação e `atualizar_com_versao` só grava se a linha ainda
+estiver na versão que o cliente leu (`UPDATE ... WHERE version = ?`).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from cadastros.models import Profissional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, QuerySet, Subquery
+from django.utils import timezone
+
+from . import carga
+from .models import (
+    Alocacao,
+    AlteracaoAlocacao,
+    AuditoriaAlocacao,
+    EventoCalendar,
+    FonteAlteracao,
+    TipoAlteracao,
+)
+
+
+@dataclass(frozen=True)
+class Autoria:
+    fonte: str = FonteAlteracao.SISTEMA
+    autor: str = ""
+    motivo: str = ""
+    job_id: int | None = None
+
+
+_contexto: ContextVar[tuple[str, dict[str, Any]] | None] = ContextVar(
+    "alteracao_alocacao", default=None
+)
+_autoria: ContextVar[Autoria | None] = ContextVar("autoria_alocacao", default=None)
+
+
+class VersaoDesatualizada(Exception):
+    """A alocação foi alterada depois da versão lida pelo cliente."""
+
+
+class CursorExpirado(Exception):
+    """Cursor anterior à retenção do log de alterações: o cliente precisa recarregar tudo."""
+
+
+@dataclass(frozen=True)
+class MarcaAlocacoes:
+    total: int
+    alocacoes: datetime | None
+    eventos: datetime | None
+    profissionais: datetime | None
+
+    @property
+    def ultima_alteracao(self) -> datetime | None:
+        momentos = [m for m in (self.alocacoes, self.eventos, self.profissionais) if m]
+        return max(momentos) if momentos else None
+
+    def etag(self, sufixo: str = "") -> str:
+        partes = [str(self.total)] + [
+            f"{momento.timestamp():.6f}" if momento else "-"
+            for momento in (self.alocacoes, self.eventos, self.profissionais)
+        ]
+        return '"' + ":".join(partes + ([sufixo] if sufixo else [])) + '"'
+
+
+def _maior_global(modelo: type[EventoCalendar] | type[Profissional], campo: str) -> Subquery:
+    return Subquery(modelo.objects.order_by(f"-{campo}").values(campo)[:1])
+
+
+def marca(alocacoes: QuerySet[Alocacao]) -> MarcaAlocacoes:
+    """Contagem e maiores `updated_at` do período, numa só consulta.
+
+    Eventos Google e profissionais entram na marca porque os conflitos e os
+    detalhes serializados com cada alocação dependem deles.
+    """
+    resultado = alocacoes.order_by().aggregate(
+        total=Count("id"),
+        alocacoes=Max("updated_at"),
+        eventos=Max(_maior_global(EventoCalendar, "data_sync")),
+        profissionais=Max(_maior_global(Profissional, "updated_at")),
+    )
+    return MarcaAlocacoes(**resultado)
+
+
+def _folga() -> timedelta:
+    # `updated_at` é gravado antes do commit: transações longas confirmam linhas
+    # com horário anterior ao cursor já entregue. A folga reenvia esse trecho.
+    return timedelta(seconds=getattr(settings, "ALOCACOES_DELTA_FOLGA_SEGUNDOS", 30))
+
+
+def _retencao() -> timedelta:
+    return timedelta(days=getattr(settings, "ALOCACOES_TOMBSTONES_DIAS", 30))
+
+
+def delta(
+    alocacoes: QuerySet[Alocacao], desde: datetime, filtros: dict[str, Any]
+) -> tuple[QuerySet[Alocacao], QuerySet[AlteracaoAlocacao]]:
+    """Alocações alteradas e remoções do filtro posteriores ao cursor."""
+    if desde < timezone.now() - _retencao():
+        raise CursorExpirado(desde.isoformat())
+    inicio = desde - _folga()
+    removidas = AlteracaoAlocacao.objects.filter(
+        tipo=TipoAlteracao.REMOVIDA, criada_em__gt=inicio, **filtros
+    )
+    return alocacoes.filter(updated_at__gt=inicio), removidas
+
+
+@contextmanager
+def registrando_como(tipo: str, **detalhes: Any) -> Iterator[None]:
+    """Marca as gravações de alocação do bloco com `tipo` (ex.: troca aplicada)."""
+    token = _contexto.set((tipo, detalhes))
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+@contextmanager
+def auditando(
+    fonte: str, autor: str = "", motivo: str = "", job_id: int | None = None
+) -> Iterator[Autoria]:
+    """Autoria das alterações de alocação feitas no bloco, para a auditoria."""
+    autoria = Autoria(fonte=fonte, autor=autor[:100], motivo=motivo, job_id=job_id)
+    token = _autoria.set(autoria)
+    try:
+        yield autoria
+    finally:
+        _autoria.reset(token)
+
+
+def auditoria(
+    alocacao: Alocacao, *, criada: bool = False, removida: bool = False
+) -> AuditoriaAlocacao:
+    """Linha de auditoria (não salva): estado lido -> estado atual, com a autoria do contexto."""
+    autoria = _autoria.get() or Autoria()
+    return AuditoriaAlocacao(
+        alocacao_id=alocacao.pk,
+        antes=None if criada else alocacao.estado_lido,
+        depois=None if removida else alocacao.estado(),
+        sala_id=alocacao.sala_id,
+        data=alocacao.data,
+        turno=alocacao.turno,
+        autor=autoria.autor,
+        motivo=autoria.motivo,
+        fonte=autoria.fonte,
+        job_id=autoria.job_id,
+    )
+
+
+def entrada(
+    alocacao: Alocacao, tipo: str, detalhes: dict[str, Any] | None = None
+) -> AlteracaoAlocacao:
+    """Linha do log (não salva) com o estado atual da alocação."""
+    return AlteracaoAlocacao(
+        alocacao_id=alocacao.pk,
+        tipo=tipo,
+        profissional_id=alocacao.profissional_id,
+        local_id=alocacao.local_id,
+        sala_id=alocacao.sala_id,
+        data=alocacao.data,
+        turno=alocacao.turno,
+        detalhes=detalhes or {},
+    )
+
+
+def registrar_em_lote(
+    entradas: Iterable[AlteracaoAlocacao],
+    chaves_carga: Iterable[tuple[int, date]] = (),
+    auditorias: Iterable[AuditoriaAlocacao] = (),
+) -> int:
+    """Grava as entradas de um lote; chamar na transação do `bulk_update`.
+
+    Lotes que mudam profissional ou data informam em `chaves_carga` as chaves
+    (profissional_id, data) de antes e de depois, para o livro de carga, e em
+    `auditorias` as linhas de `auditoria` de cada alocação.
+    """
+    total = len(AlteracaoAlocacao.objects.bulk_create(entradas, batch_size=500))
+    AuditoriaAlocacao.objects.bulk_create(auditorias, batch_size=500)
+    carga.recalcular(chaves_carga)
+    return total
+
+
+def _recalcular_carga(alocacao: Alocacao) -> None:
+    carga.recalcular(carga.chaves_da_alocacao(alocacao))
+    alocacao.chave_carga_lida = (alocacao.profissional_id, alocacao.data)
+
+
+def _auditar(alocacao: Alocacao, criada: bool = False) -> None:
+    auditoria(alocacao, criada=criada).save()
+    alocacao.estado_lido = alocacao.estado()
+
+
+def _tipo(criada: bool) -> tuple[str, dict[str, Any]]:
+    return _contexto.get() or (TipoAlteracao.CRIADA if criada else TipoAlteracao.ALTERADA, {})
+
+
+def atualizar_com_versao(alocacao: Alocacao, versao: int, campos: Iterable[str]) -> None:
+    """Grava `campos` da alocação só se a linha ainda estiver em `versao`.
+
+    Um único UPDATE condicional, sem lock de linha: se outra edição gravou
+    antes, nenhuma linha casa e levanta VersaoDesatualizada (nada é gravado).
+    """
+    agora = timezone.now()
+    valores = {campo: getattr(alocacao, campo) for campo in campos}
+    with transaction.atomic(savepoint=False):
+        gravadas = Alocacao.objects.filter(pk=alocacao.pk, version=versao).update(
+            **valores, version=versao + 1, updated_at=agora
+        )
+        if gravadas:
+            alocacao.version = versao + 1
+            alocacao.updated_at = agora
+            entrada(alocacao, *_tipo(criada=False)).save()
+            _auditar(alocacao)
+            _recalcular_carga(alocacao)
+    # Fora do bloco: a exceção não marca a transação externa para rollback.
+    if not gravadas:
+        raise VersaoDesatualizada(alocacao.pk)
+
+
+def registrar_gravacao(
+    sender: type[Alocacao], instance: Alocacao, created: bool, raw: bool = False, **kwargs: Any
+) -> None:
+    """post_save de Alocacao: grava a entrada na transação do save."""
+    if raw:
+        return
+    entrada(instance, *_tipo(created)).save()
+    _auditar(instance, criada=created)
+    _recalcular_carga(instance)
+
+
+def registrar_remocao(sender: type[Alocacao], instance: Alocacao, **kwargs: Any) -> None:
+    """post_delete de Alocacao: grava o tombstone na transação do delete."""
+    entrada(instance, TipoAlteracao.REMOVIDA).save()
+    auditoria(instance, removida=True).save()
+    carga.recalcular(carga.chaves_da_alocacao(instance))
+
+
+def limpar_tombstones() -> int:
+    """Apaga o log além da retenção; cursores mais antigos recebem 410.
+
+    A auditoria (AuditoriaAlocacao) não é tocada.
+    """
+    total, _ = AlteracaoAlocacao.objects.filter(criada_em__lt=timezone.now() - _retencao()).delete()
+    return total
@@ -9,3 +9,21 @@ class EscalaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "escala"
     verbose_name = "Gestão de Escalas"
+
+    def ready(self) -> None:
+        from cadastros.models import Local
+        from django.db.models.signals import post_delete, post_save
+
+        from .alteracoes import registrar_gravacao, registrar_remocao
+        from .carga import recalcular_local
+        from .models import Alocacao
+        from .vagas import MODELOS_DE_ORIGEM, regenerar
+
+        post_save.connect(registrar_gravacao, sender=Alocacao, dispatch_uid="log-alocacao")
+        post_delete.connect(registrar_remocao, sender=Alocacao, dispatch_uid="tombstone-alocacao")
+        post_save.connect(recalcular_local, sender=Local, dispatch_uid="carga-local")
+        for modelo in MODELOS_DE_ORIGEM:
+            post_save.connect(regenerar, sender=modelo, dispatch_uid=f"vagas-{modelo.__name__}")
+            post_delete.connect(
+                regenerar, sender=modelo, dispatch_uid=f"vagas-del-{modelo.__name__}"
+            )
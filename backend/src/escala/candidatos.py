@@ -0,0 +1,166 @@
+"""Candidatos a assumir um turno (data, turno, sala), ordenados pela heurística.
+
+Tudo sai de índices já mantidos: disponibilidade em bitsets
+(`cadastros.cache.disponibilidades`), carga semanal do livro (`carga.py`)
+e duração do turno em memória; do banco vêm só leituras agrupadas das
+alocações do dia e da semana anterior. Nenhuma validação por profissional.
+
+A pontuação segue `docs/regras-escala.md`: favorece quem tem menos horas na
+janela de quatro semanas, premia local e turno preferidos e penaliza
+repetir o local da semana anterior e fazer dobra. Bloqueios (indisponível,
+local proibido, já alocado no turno) e estouros de horas ou dobras não
+eliminam o candidato: ele é marcado e vai para o fim da lista.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from cadastros import cache
+from cadastros.disponibilidade import Disponibilidade
+from cadastros.models import Profissional, Sala
+from django.db.models import Sum
+
+from .carga import duracao, semana_de
+from .models import Alocacao, CargaSemanal
+
+SEMANAS_JANELA = 4
+PESO_CARGA = 40
+BONUS_LOCAL_PREFERIDO = 15
+BONUS_TURNO_PREFERIDO = 10
+PENALIDADE_TURNO_CONTRARIO = 10
+PENALIDADE_LOCAL_REPETIDO = 20
+PENALIDADE_DOBRA = 25
+
+INDISPONIVEL = "indisponivel"
+LOCAL_PROIBIDO = "local_proibido"
+OCUPADO = "ocupado"
+EXCEDE_HORAS = "excede_horas"
+EXCEDE_DOBRAS = "excede_dobras"
+BLOQUEIOS = frozenset({INDISPONIVEL, LOCAL_PROIBIDO, OCUPADO})
+
+
+@dataclass
+class Candidato:
+    profissional_id: int
+    nome: str
+    pontuacao: float
+    horas_semana: Decimal
+    dobras_semana: int
+    violacoes: list[str] = field(default_factory=list)
+
+    @property
+    def bloqueado(self) -> bool:
+        return not BLOQUEIOS.isdisjoint(self.violacoes)
+
+
+def _ordem(candidato: Candidato) -> tuple[bool, int, float, str]:
+    return (
+        candidato.bloqueado,
+        len(candidato.violacoes),
+        -candidato.pontuacao,
+        candidato.nome,
+    )
+
+
+def candidatos_para(data: date, turno: str, sala: Sala) -> list[Candidato]:
+    """Profissionais ativos para cobrir o turno, do melhor para o pior.
+
+    Quem já ocupa a sala no turno fica de fora (é quem está saindo).
+    """
+    local_id = sala.local_id
+    semana = semana_de(data)
+    horas_turno = duracao(local_id, data, turno)
+    disponibilidades = cache.disponibilidades()
+
+    no_dia: dict[int, set[str]] = defaultdict(set)
+    saindo = None
+    do_dia = Alocacao.objects.filter(data=data).order_by()
+    for profissional_id, turno_alocado, sala_id in do_dia.values_list(
+        "profissional_id", "turno", "sala_id"
+    ):
+        no_dia[profissional_id].add(turno_alocado)
+        if sala_id == sala.pk and turno_alocado == turno:
+            saindo = profissional_id
+
+    cargas = {
+        profissional_id: (horas, dobras)
+        for profissional_id, horas, dobras in CargaSemanal.objects.filter(semana=semana)
+        .order_by()
+        .values_list("profissional_id", "horas", "dobras")
+    }
+    inicio_janela = semana - timedelta(weeks=SEMANAS_JANELA)
+    carga_janela = dict(
+        CargaSemanal.objects.filter(semana__gte=inicio_janela, semana__lt=semana)
+        .order_by()
+        .values("profissional_id")
+        .annotate(total=Sum("horas"))
+        .values_list("profissional_id", "total")
+    )
+    repetem_local = set(
+        Alocacao.objects.filter(
+            local_id=local_id, data__gte=semana - timedelta(weeks=1), data__lt=semana
+        )
+        .order_by()
+        .values_list("profissional_id", flat=True)
+    )
+
+    resultado = []
+    profissionais = (
+        Profissional.objects.filter(ativo=True)
+        .order_by()
+        .values_list(
+            "pk", "nome", "carga_semanal_alvo", "limite_dobras_semana", "turno_preferencial"
+        )
+    )
+    for pk, nome, alvo, limite_dobras, turno_preferencial in profissionais:
+        if pk == saindo:
+            continue
+        disponibilidade = disponibilidades.get(pk, Disponibilidade())
+        horas, dobras = cargas.get(pk, (Decimal(0), 0))
+        turnos_no_dia = no_dia.get(pk, set())
+        faz_dobra = bool(turnos_no_dia) and turno not in turnos_no_dia
+        horas += horas_turno
+        dobras += faz_dobra
+
+        violacoes = []
+        if not disponibilidade.livre(data.weekday(), turno):
+            violacoes.append(INDISPONIVEL)
+        if disponibilidade.proibido(local_id):
+            violacoes.append(LOCAL_PROIBIDO)
+        if turno in turnos_no_dia:
+            violacoes.append(OCUPADO)
+        if horas > alvo:
+            violacoes.append(EXCEDE_HORAS)
+        if dobras > limite_dobras:
+            violacoes.append(EXCEDE_DOBRAS)
+
+        pontuacao = 100.0
+        if alvo:
+            ocupacao = float(carga_janela.get(pk) or 0) / (alvo * SEMANAS_JANELA)
+            pontuacao -= PESO_CARGA * min(ocupacao, 1.5)
+        if disponibilidade.preferido(local_id):
+            pontuacao += BONUS_LOCAL_PREFERIDO
+        if turno_preferencial == turno:
+            pontuacao += BONUS_TURNO_PREFERIDO
+        elif turno_preferencial:
+            pontuacao -= PENALIDADE_TURNO_CONTRARIO
+        if pk in repetem_local:
+            pontuacao -= PENALIDADE_LOCAL_REPETIDO
+        if faz_dobra:
+            pontuacao -= PENALIDADE_DOBRA
+
+        resultado.append(
+            Candidato(
+                profissional_id=pk,
+                nome=nome,
+                pontuacao=round(pontuacao, 1),
+                horas_semana=horas,
+                dobras_semana=dobras,
+                violacoes=violacoes,
+            )
+        )
+    return sorted(resultado, key=_ordem)
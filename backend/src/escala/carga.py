@@ -0,0 +1,270 @@
+"""Livro de carga semanal por profissional (CargaSemanal).
+
+Turnos, horas, dobras e sábados de cada (profissional, semana ISO) ficam
+numa linha mantida pelas gravações de alocação, na mesma transação: os
+pontos que gravam o log de alterações (`alteracoes.py`) chamam `recalcular`
+com as chaves afetadas (a de antes e a de depois da edição). Só as semanas
+tocadas são recontadas, numa consulta pelo índice (profissional, data); as
+dobras dependem dos outros turnos do dia, por isso a semana é recontada em
+vez de ajustada por incremento.
+
+As horas de cada turno vêm da tabela de durações por (local, turno, dia da
+semana) (`cadastros.DuracaoTurno`): nas contagens em SQL por junção, nas
+verificações em Python pela cópia em memória (`cadastros.cache.duracoes`).
+
+Gravações concorrentes do mesmo profissional recontam uma de cada vez (lock
+na linha do profissional), para que uma não sobrescreva o total da outra.
+As verificações de limite semanal passam a ler uma linha pela chave única.
+Salvar um Local reconta, da semana corrente em diante, as semanas com
+alocações nele. `manage.py reconstruir_carga_semanal` refaz o livro a partir
+das alocações.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
+
+from cadastros import cache
+from cadastros.models import DiaSemana, Local, Profissional
+from django.db import transaction
+from django.db.models import Count, F, FilteredRelation, Q, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import Alocacao, CargaSemanal
+
+# Turno de local sem linha na tabela de durações (horário padrão 8h-14h).
+HORAS_POR_TURNO = Decimal(6)
+TAMANHO_LOTE = 500
+TAMANHO_BLOCO = 200
+
+
+def semana_de(data: date) -> date:
+    """Segunda-feira da semana ISO da data."""
+    return data - timedelta(days=data.weekday())
+
+
+def duracao(local_id: int, data: date, turno: str) -> Decimal:
+    """Horas do turno no local e dia, sem consulta (tabela de durações em memória)."""
+    return cache.duracoes().get((local_id, turno, data.weekday()), HORAS_POR_TURNO)
+
+
+@dataclass(frozen=True)
+class Carga:
+    turnos: int = 0
+    horas: Decimal = Decimal(0)
+    dobras: int = 0
+    sabados: int = 0
+
+    def __add__(self, outra: Carga) -> Carga:
+        return Carga(
+            turnos=self.turnos + outra.turnos,
+            horas=self.horas + outra.horas,
+            dobras=self.dobras + outra.dobras,
+            sabados=self.sabados + outra.sabados,
+        )
+
+
+def _contar(dias: dict[date, tuple[int, Decimal]]) -> Carga:
+    """Carga da semana a partir de (turnos, horas) de cada dia."""
+    return Carga(
+        turnos=sum(turnos for turnos, _ in dias.values()),
+        horas=sum((horas for _, horas in dias.values()), Decimal(0)),
+        dobras=sum(1 for turnos, _ in dias.values() if turnos >= 2),
+        sabados=sum(
+            turnos for dia, (turnos, _) in dias.items() if dia.weekday() == DiaSemana.SABADO
+        ),
+    )
+
+
+def _por_dia(alocacoes: QuerySet[Alocacao]) -> QuerySet[Alocacao, tuple[int, date, int, Decimal]]:
+    """(profissional_id, data, turnos, horas) agrupados no banco.
+
+    As horas saem da junção com a duração do turno no local e dia da semana
+    (`ExtractIsoWeekDay` vai de 1 a 7; `DiaSemana`, de 0 a 6).
+    """
+    return (
+        alocacoes.annotate(
+            duracao=FilteredRelation(
+                "local__duracoes_turno",
+                condition=Q(
+                    local__duracoes_turno__turno=F("turno"),
+                    local__duracoes_turno__dia_semana=ExtractIsoWeekDay("data") - 1,
+                ),
+            )
+        )
+        .order_by()
+        .values("profissional_id", "data")
+        .annotate(
+            turnos=Count("id"),
+            horas=Sum(Coalesce("duracao__horas", Value(HORAS_POR_TURNO))),
+        )
+        .values_list("profissional_id", "data", "turnos", "horas")
+    )
+
+
+def _gravar(cargas: dict[tuple[int, date], Carga]) -> None:
+    vazias = [chave for chave, carga in cargas.items() if not carga.turnos]
+    if vazias:
+        filtro = Q()
+        for profissional_id, semana in vazias:
+            filtro |= Q(profissional_id=profissional_id, semana=semana)
+        CargaSemanal.objects.filter(filtro).delete()
+    linhas = [
+        CargaSemanal(
+            profissional_id=profissional_id,
+            semana=semana,
+            turnos=carga.turnos,
+            horas=carga.horas,
+            dobras=carga.dobras,
+            sabados=carga.sabados,
+        )
+        for (profissional_id, semana), carga in cargas.items()
+        if carga.turnos
+    ]
+    CargaSemanal.objects.bulk_create(
+        linhas,
+        batch_size=TAMANHO_LOTE,
+        update_conflicts=True,
+        unique_fields=["profissional", "semana"],
+        update_fields=["turnos", "horas", "dobras", "sabados", "atualizada_em"],
+    )
+
+
+def _recontar(semanas: list[tuple[int, date]]) -> dict[tuple[int, date], Carga]:
+    filtro = Q()
+    for profissional_id, semana in semanas:
+        filtro |= Q(
+            profissional_id=profissional_id, data__gte=semana, data__lt=semana + timedelta(days=7)
+        )
+    por_dia: dict[tuple[int, date], dict[date, tuple[int, Decimal]]] = {
+        chave: {} for chave in semanas
+    }
+    for profissional_id, data, turnos, horas in _por_dia(Alocacao.objects.filter(filtro)):
+        por_dia[profissional_id, semana_de(data)][data] = (turnos, horas)
+    return {chave: _contar(dias) for chave, dias in por_dia.items()}
+
+
+def _bloquear(profissionais: set[int]) -> None:
+    """Serializa as recontagens por profissional até o fim da transação.
+
+    Cada transação reconta a semana inteira e grava o total: sem o lock, duas
+    gravações concorrentes (READ COMMITTED) veriam só a própria alocação e a
+    última sobrescreveria a outra. A recontagem, depois do lock, já enxerga o
+    que a outra confirmou. FOR NO KEY UPDATE não conflita com o KEY SHARE
+    que as FKs das alocações gravadas tomam no profissional.
+    """
+    list(
+        Profissional.objects.select_for_update(no_key=True)
+        .filter(pk__in=profissionais)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def recalcular(chaves: Iterable[tuple[int, date]]) -> int:
+    """Reconta as semanas das chaves (profissional_id, data) e grava o livro.
+
+    Chamar dentro da transação da gravação das alocações.
+    """
+    semanas = sorted({(profissional_id, semana_de(data)) for profissional_id, data in chaves})
+    with transaction.atomic(savepoint=False):
+        if semanas:
+            _bloquear({profissional_id for profissional_id, _ in semanas})
+        # Em blocos: o filtro por semana é um OR de condições.
+        for inicio in range(0, len(semanas), TAMANHO_BLOCO):
+            _gravar(_recontar(semanas[inicio : inicio + TAMANHO_BLOCO]))
+    return len(semanas)
+
+
+def recalcular_local(
+    sender: type[Local], instance: Local, raw: bool = False, **kwargs: Any
+) -> None:
+    """post_save de Local: horários novos mudam as horas da semana corrente em diante.
+
+    Semanas passadas ficam como estavam; `reconstruir_carga_semanal` as refaz.
+    """
+    if raw:
+        return
+    chaves = (
+        Alocacao.objects.filter(local=instance, data__gte=semana_de(timezone.localdate()))
+        .order_by()
+        .values_list("profissional_id", "data")
+        .distinct()
+    )
+    recalcular(chaves)
+
+
+def chaves_da_alocacao(alocacao: Alocacao) -> set[tuple[int, date]]:
+    """Chave atual e, se mudou, a lida do banco."""
+    chaves = {(alocacao.profissional_id, alocacao.data)}
+    if alocacao.chave_carga_lida is not None:
+        chaves.add(alocacao.chave_carga_lida)
+    return chaves
+
+
+def carga(profissional_id: int, semana: date) -> Carga:
+    """Linha do livro pela chave única; semana sem alocações vale zero."""
+    linha = (
+        CargaSemanal.objects.filter(profissional_id=profissional_id, semana=semana_de(semana))
+        .values_list("turnos", "horas", "dobras", "sabados")
+        .first()
+    )
+    return Carga(*linha) if linha else Carga()
+
+
+def carga_no_periodo(inicio: date, fim: date) -> dict[int, Carga]:
+    """Carga por profissional de `inicio` a `fim` (inclusive).
+
+    As semanas ISO inteiras do período vêm do livro; os dias das semanas
+    parciais nas pontas são contados nas alocações.
+    """
+    primeira = semana_de(inicio + timedelta(days=6))
+    apos_ultima = semana_de(fim + timedelta(days=1))
+    cargas: dict[int, Carga] = defaultdict(Carga)
+    pontas = Q(data__gte=inicio, data__lte=fim)
+    if primeira < apos_ultima:
+        linhas = (
+            CargaSemanal.objects.filter(semana__gte=primeira, semana__lt=apos_ultima)
+            .values("profissional_id")
+            .annotate(Sum("turnos"), Sum("horas"), Sum("dobras"), Sum("sabados"))
+            .values_list(
+                "profissional_id", "turnos__sum", "horas__sum", "dobras__sum", "sabados__sum"
+            )
+            .order_by()
+        )
+        for profissional_id, *totais in linhas:
+            cargas[profissional_id] = Carga(*totais)
+        pontas = Q(data__gte=inicio, data__lt=primeira) | Q(data__gte=apos_ultima, data__lte=fim)
+
+    por_dia: dict[int, dict[date, tuple[int, Decimal]]] = defaultdict(dict)
+    for profissional_id, data, turnos, horas in _por_dia(Alocacao.objects.filter(pontas)):
+        por_dia[profissional_id][data] = (turnos, horas)
+    for profissional_id, dias in por_dia.items():
+        cargas[profissional_id] += _contar(dias)
+    return dict(cargas)
+
+
+def reconstruir(inicio: date | None = None, fim: date | None = None) -> int:
+    """Refaz o livro a partir das alocações (no período, se informado)."""
+    alocacoes = Alocacao.objects.all()
+    existentes = CargaSemanal.objects.all()
+    if inicio:
+        alocacoes = alocacoes.filter(data__gte=semana_de(inicio))
+        existentes = existentes.filter(semana__gte=semana_de(inicio))
+    if fim:
+        alocacoes = alocacoes.filter(data__lt=semana_de(fim) + timedelta(days=7))
+        existentes = existentes.filter(semana__lte=semana_de(fim))
+
+    por_dia: dict[tuple[int, date], dict[date, tuple[int, Decimal]]] = defaultdict(dict)
+    for profissional_id, data, turnos, horas in _por_dia(alocacoes).iterator(chunk_size=2000):
+        por_dia[profissional_id, semana_de(data)][data] = (turnos, horas)
+    with transaction.atomic():
+        existentes.delete()
+        _gravar({chave: _contar(dias) for chave, dias in por_dia.items()})
+    return len(por_dia)
@@ -0,0 +1,502 @@
+"""Confirmação diária: reconcilia alocações com os eventos do Google Calendar.
+
+Os dois lados são lidos em streaming, ordenados por profissional e início, e
+cruzados em uma única passada (sort-merge join). A memória fica limitada ao
+horizonte de um profissional por vez, e as mudanças de status são gravadas em
+lotes com `bulk_update`.
+
+Execuções incrementais guardam em `ExecucaoJob.log_json` a marca d'água
+(maiores `EventoCalendar.data_sync` e `Alocacao.updated_at` vistos) e só
+revisitam os slots (profissional, data) alterados depois dela. As linhas que
+a própria confirmação gravou levam todas o mesmo `updated_at`, guardado na
+marca (`gravacoes`), e não contam como alteração na rodada seguinte.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import Any
+
+from cadastros import cache
+from cadastros.models import Local
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from .alteracoes import auditando, auditoria, entrada, registrar_em_lote
+from .horarios import janela_turno
+from .models import (
+    Alocacao,
+    AlteracaoAlocacao,
+    AuditoriaAlocacao,
+    EventoCalendar,
+    ExecucaoJob,
+    FonteAlteracao,
+    OrigemEvento,
+    StatusAlocacao,
+    StatusEvento,
+    StatusJob,
+    TipoAlteracao,
+    TipoJob,
+)
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 500
+LIMITE_AMOSTRAS = 50
+
+# Folga aplicada à marca d'água para cobrir transações que gravaram antes da
+# leitura da marca mas só confirmaram depois dela.
+MARGEM_MARCA_DAGUA = timedelta(minutes=2)
+
+# Alocações manuais (sábados Savassi/Lourdes) são apenas lidas pela confirmação.
+STATUS_SOMENTE_LEITURA = {StatusAlocacao.MANUAL}
+
+
+@dataclass(frozen=True)
+class _AlocacaoStream:
+    id: int
+    profissional_id: int
+    local_id: int
+    sala_id: int
+    data: date
+    turno: str
+    status: str
+    metadata: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class _EventoStream:
+    id: int
+    profissional_id: int
+    alocacao_id: int | None
+    titulo: str
+    inicio: datetime
+    fim: datetime
+    status: str
+    origem: str
+
+
+@dataclass
+class ResultadoConfirmacao:
+    """Contadores e amostras da reconciliação."""
+
+    inicio: date
+    fim: date
+    alocacoes_lidas: int = 0
+    eventos_lidos: int = 0
+    confirmadas: int = 0
+    ajustadas: int = 0
+    conflitos: int = 0
+    sem_evento: int = 0
+    status_alterados: int = 0
+    gravado_em: datetime | None = None
+    amostras: dict[str, list[int]] = field(default_factory=dict)
+
+    def registrar(self, categoria: str, alocacao_id: int) -> None:
+        setattr(self, categoria, getattr(self, categoria) + 1)
+        amostra = self.amostras.setdefault(categoria, [])
+        if len(amostra) < LIMITE_AMOSTRAS:
+            amostra.append(alocacao_id)
+
+    def resumo(self) -> str:
+        return (
+            f"{self.confirmadas} confirmadas, {self.ajustadas} ajustadas, "
+            f"{self.conflitos} conflitos, {self.sem_evento} sem evento "
+            f"({self.status_alterados} status alterados)"
+        )
+
+    def como_log(self) -> dict[str, Any]:
+        return {
+            "periodo": {"inicio": self.inicio.isoformat(), "fim": self.fim.isoformat()},
+            "alocacoes_lidas": self.alocacoes_lidas,
+            "eventos_lidos": self.eventos_lidos,
+            "confirmadas": self.confirmadas,
+            "ajustadas": self.ajustadas,
+            "conflitos": self.conflitos,
+            "sem_evento": self.sem_evento,
+            "status_alterados": self.status_alterados,
+            "amostras": self.amostras,
+        }
+
+
+class _Gravador:
+    """Acumula mudanças e grava com `bulk_update` a cada lote."""
+
+    def __init__(self, resultado: ResultadoConfirmacao) -> None:
+        self.resultado = resultado
+        self.alocacoes: list[Alocacao] = []
+        self.alteracoes: list[AlteracaoAlocacao] = []
+        self.auditorias: list[AuditoriaAlocacao] = []
+        self.eventos: list[EventoCalendar] = []
+        self.agora = timezone.now()
+
+    def alocacao(self, item: _AlocacaoStream, status: str, motivo: dict[str, Any]) -> None:
+        if item.status in STATUS_SOMENTE_LEITURA or item.status == status:
+            return
+        metadata = {**item.metadata, "confirmacao": motivo}
+        alocacao = Alocacao(
+            id=item.id,
+            profissional_id=item.profissional_id,
+            local_id=item.local_id,
+            sala_id=item.sala_id,
+            data=item.data,
+            turno=item.turno,
+            status=item.status,
+            metadata=metadata,
+            updated_at=self.agora,
+            version=F("version") + 1,
+        )
+        alocacao.estado_lido = alocacao.estado()
+        alocacao.status = status
+        self.alocacoes.append(alocacao)
+        self.alteracoes.append(
+            entrada(alocacao, TipoAlteracao.ALTERADA, {"status": [item.status, status]})
+        )
+        self.auditorias.append(auditoria(alocacao))
+        if len(self.alocacoes) >= TAMANHO_LOTE:
+            self.descarregar()
+
+    def evento_em_conflito(self, evento: _EventoStream) -> None:
+        if evento.status == StatusEvento.CONFLITO:
+            return
+        self.eventos.append(EventoCalendar(id=evento.id, status=StatusEvento.CONFLITO))
+        if len(self.eventos) >= TAMANHO_LOTE:
+            self.descarregar()
+
+    def descarregar(self) -> None:
+        if not self.alocacoes and not self.eventos:
+            return
+        with transaction.atomic():
+            if self.alocacoes:
+                Alocacao.objects.bulk_update(
+                    self.alocacoes, ["status", "metadata", "updated_at", "version"]
+                )
+                registrar_em_lote(self.alteracoes, auditorias=self.auditorias)
+            if self.eventos:
+                EventoCalendar.objects.bulk_update(self.eventos, ["status"])
+        if self.alocacoes:
+            self.resultado.gravado_em = self.agora
+        self.resultado.status_alterados += len(self.alocacoes)
+        self.alocacoes = []
+        self.alteracoes = []
+        self.auditorias = []
+        self.eventos = []
+
+
+def _limites(inicio: date, fim: date) -> tuple[datetime, datetime]:
+    tz = timezone.get_default_timezone()
+    return (
+        timezone.make_aware(datetime.combine(inicio, time.min), tz),
+        timezone.make_aware(datetime.combine(fim + timedelta(days=1), time.min), tz),
+    )
+
+
+def _stream_alocacoes(
+    inicio: date, fim: date, filtro: Q | None = None
+) -> Iterator[_AlocacaoStream]:
+    queryset = Alocacao.objects.filter(data__gte=inicio, data__lte=fim)
+    if filtro is not None:
+        queryset = queryset.filter(filtro)
+    linhas = queryset.order_by("profissional_id", "data", "turno", "id").values_list(
+        "id", "profissional_id", "local_id", "sala_id", "data", "turno", "status", "metadata"
+    )
+    for linha in linhas.iterator(chunk_size=2000):
+        yield _AlocacaoStream(*linha)
+
+
+def _stream_eventos(inicio: date, fim: date, filtro: Q | None = None) -> Iterator[_EventoStream]:
+    limite_inicio, limite_fim = _limites(inicio, fim)
+    # Eventos vinculados entram mesmo fora da janela para detectar os que foram movidos.
+    queryset = EventoCalendar.objects.filter(
+        Q(data_inicio__lt=limite_fim, data_fim__gt=limite_inicio)
+        | Q(alocacao__data__gte=inicio, alocacao__data__lte=fim),
+        agenda__profissional__isnull=False,
+        agenda__ativa=True,
+    )
+    if filtro is not None:
+        queryset = queryset.filter(filtro)
+    linhas = queryset.order_by("agenda__profissional_id", "data_inicio", "id").values_list(
+        "id",
+        "agenda__profissional_id",
+        "alocacao_id",
+        "titulo",
+        "data_inicio",
+        "data_fim",
+        "status",
+        "origem",
+    )
+    for linha in linhas.iterator(chunk_size=2000):
+        yield _EventoStream(*linha)
+
+
+def _merge_por_profissional(
+    alocacoes: Iterator[_AlocacaoStream], eventos: Iterator[_EventoStream]
+) -> Iterator[tuple[list[_AlocacaoStream], list[_EventoStream]]]:
+    """Merge-join dos dois streams agrupados por profissional."""
+    grupos_aloc = groupby(alocacoes, key=lambda item: item.profissional_id)
+    grupos_ev = groupby(eventos, key=lambda item: item.profissional_id)
+    atual_aloc = next(grupos_aloc, None)
+    atual_ev = next(grupos_ev, None)
+
+    while atual_aloc is not None:
+        prof_aloc, itens_aloc = atual_aloc
+        while atual_ev is not None and atual_ev[0] < prof_aloc:
+            atual_ev = next(grupos_ev, None)
+        lista_ev: list[_EventoStream] = []
+        if atual_ev is not None and atual_ev[0] == prof_aloc:
+            lista_ev = list(atual_ev[1])
+            atual_ev = next(grupos_ev, None)
+        yield list(itens_aloc), lista_ev
+        atual_aloc = next(grupos_aloc, None)
+
+
+def _reconciliar_profissional(
+    alocacoes: list[_AlocacaoStream],
+    eventos: list[_EventoStream],
+    locais: dict[int, Local],
+    gravador: _Gravador,
+    resultado: ResultadoConfirmacao,
+) -> None:
+    vinculados = {evento.alocacao_id: evento for evento in eventos if evento.alocacao_id}
+    externos = [
+        evento
+        for evento in eventos
+        if evento.alocacao_id is None
+        and evento.origem != OrigemEvento.SISTEMA
+        and evento.status != StatusEvento.DELETADO
+    ]
+
+    janelas = sorted(
+        ((janela_turno(locais[item.local_id], item.data, item.turno), item) for item in alocacoes),
+        key=lambda par: (par[0][0], par[1].id),
+    )
+
+    # Varredura: `ativos` guarda os eventos externos que ainda podem sobrepor.
+    proximo = 0
+    ativos: list[_EventoStream] = []
+    for (inicio, fim), item in janelas:
+        while proximo < len(externos) and externos[proximo].inicio < fim:
+            ativos.append(externos[proximo])
+            proximo += 1
+        ativos = [evento for evento in ativos if evento.fim > inicio]
+        sobrepostos = [evento for evento in ativos if evento.inicio < fim]
+
+        if sobrepostos:
+            for evento in sobrepostos:
+                gravador.evento_em_conflito(evento)
+            resultado.registrar("conflitos", item.id)
+            gravador.alocacao(
+                item,
+                StatusAlocacao.CONFLITO,
+                {"tipo": "sobreposicao", "eventos": [evento.id for evento in sobrepostos]},
+            )
+            continue
+
+        vinculado = vinculados.get(item.id)
+        if vinculado is None:
+            resultado.registrar("sem_evento", item.id)
+        elif vinculado.status == StatusEvento.DELETADO:
+            resultado.registrar("conflitos", item.id)
+            gravador.alocacao(
+                item, StatusAlocacao.CONFLITO, {"tipo": "evento_removido", "evento": vinculado.id}
+            )
+        elif vinculado.inicio == inicio and vinculado.fim == fim:
+            resultado.registrar("confirmadas", item.id)
+            gravador.alocacao(item, StatusAlocacao.CONFIRMADO, {"tipo": "confirmado"})
+        else:
+            # O Google prevalece: a alocação fica ajustada e guarda o novo horário.
+            resultado.registrar("ajustadas", item.id)
+            gravador.alocacao(
+                item,
+                StatusAlocacao.AJUSTADO,
+                {
+                    "tipo": "movido",
+                    "evento": vinculado.id,
+                    "inicio": vinculado.inicio.isoformat(),
+                    "fim": vinculado.fim.isoformat(),
+                },
+            )
+
+
+def reconciliar(
+    inicio: date,
+    fim: date,
+    *,
+    filtro_alocacoes: Q | None = None,
+    filtro_eventos: Q | None = None,
+) -> ResultadoConfirmacao:
+    """Reconcilia alocações e eventos do período e aplica as mudanças de status."""
+    resultado = ResultadoConfirmacao(inicio=inicio, fim=fim)
+    locais = cache.locais()
+    gravador = _Gravador(resultado)
+
+    alocacoes = _stream_alocacoes(inicio, fim, filtro_alocacoes)
+    eventos = _stream_eventos(inicio, fim, filtro_eventos)
+    for grupo_aloc, grupo_ev in _merge_por_profissional(alocacoes, eventos):
+        resultado.alocacoes_lidas += len(grupo_aloc)
+        resultado.eventos_lidos += len(grupo_ev)
+        _reconciliar_profissional(grupo_aloc, grupo_ev, locais, gravador, resultado)
+
+    gravador.descarregar()
+    return resultado
+
+
+def horizonte_padrao(hoje: date | None = None) -> tuple[date, date]:
+    """Período padrão: de hoje até o fim da janela de planejamento."""
+    hoje = hoje or timezone.localdate()
+    return hoje, hoje + timedelta(weeks=cache.premissas().janela_planejamento_semanas)
+
+
+def _marca_atual() -> dict[str, str | None]:
+    """Maiores `data_sync`/`updated_at` existentes (consultas indexadas)."""
+    eventos = EventoCalendar.objects.aggregate(marca=Max("data_sync"))["marca"]
+    alocacoes = Alocacao.objects.aggregate(marca=Max("updated_at"))["marca"]
+    return {
+        "eventos": eventos.isoformat() if eventos else None,
+        "alocacoes": alocacoes.isoformat() if alocacoes else None,
+    }
+
+
+def _execucao_anterior() -> dict[str, Any] | None:
+    """Log da última confirmação concluída que registrou marca d'água."""
+    return (
+        ExecucaoJob.objects.filter(
+            tipo=TipoJob.CONFIRMACAO_DIARIA,
+            status=StatusJob.CONCLUIDO,
+            log_json__has_key="marca_dagua",
+        )
+        .order_by("-iniciou_em")
+        .values_list("log_json", flat=True)
+        .first()
+    )
+
+
+def _desde(valor: str | None) -> datetime | None:
+    if not valor:
+        return None
+    return datetime.fromisoformat(valor) - MARGEM_MARCA_DAGUA
+
+
+def _slots_alterados(marca: dict[str, str | None]) -> dict[int, set[date]]:
+    """(profissional, data) tocados por eventos/alocações alterados após a marca."""
+    slots: dict[int, set[date]] = defaultdict(set)
+
+    eventos = EventoCalendar.objects.filter(agenda__profissional__isnull=False)
+    desde_eventos = _desde(marca.get("eventos"))
+    if desde_eventos is not None:
+        eventos = eventos.filter(data_sync__gt=desde_eventos)
+    linhas_eventos = eventos.values_list("agenda__profissional_id", "data_inicio", "alocacao__data")
+    for prof_id, data_inicio, data_alocacao in linhas_eventos.iterator():
+        slots[prof_id].add(timezone.localdate(data_inicio))
+        if data_alocacao is not None:
+            slots[prof_id].add(data_alocacao)
+
+    alocacoes = Alocacao.objects.all()
+    desde_alocacoes = _desde(marca.get("alocacoes"))
+    if desde_alocacoes is not None:
+        alocacoes = alocacoes.filter(updated_at__gt=desde_alocacoes)
+    if gravacoes := marca.get("gravacoes"):
+        # Gravadas pela confirmação anterior e não tocadas depois.
+        alocacoes = alocacoes.exclude(updated_at=datetime.fromisoformat(gravacoes))
+    for prof_id, data in alocacoes.values_list("profissional_id", "data").iterator():
+        slots[prof_id].add(data)
+
+    return slots
+
+
+def _filtros_incrementais(slots: dict[int, set[date]], fim_anterior: date | None) -> tuple[Q, Q]:
+    """Restringe a reconciliação aos slots alterados e aos dias novos no horizonte."""
+    filtro_alocacoes = Q(pk__in=[])
+    filtro_eventos = Q(pk__in=[])
+    for prof_id, datas in slots.items():
+        filtro_alocacoes |= Q(profissional_id=prof_id, data__in=datas)
+        filtro_eventos |= Q(agenda__profissional_id=prof_id) & (
+            Q(data_inicio__date__in=datas) | Q(alocacao__data__in=datas)
+        )
+    if fim_anterior is not None:
+        # Dias que entraram no horizonte desde a última execução ainda não foram vistos.
+        filtro_alocacoes |= Q(data__gt=fim_anterior)
+        filtro_eventos |= Q(data_inicio__date__gt=fim_anterior)
+    return filtro_alocacoes, filtro_eventos
+
+
+def confirmar_periodo(
+    inicio: date | None = None,
+    fim: date | None = None,
+    *,
+    completo: bool = False,
+) -> tuple[str, dict[str, Any]]:
+    """Roda a confirmação e devolve o resumo e o log (com a marca d'água).
+
+    Por padrão é incremental: só reexamina os slots tocados por eventos e
+    alocações alterados desde a marca d'água da última execução concluída.
+    `completo=True` força a varredura de todo o horizonte (recuperação).
+    """
+    padrao_inicio, padrao_fim = horizonte_padrao()
+    inicio = inicio or padrao_inicio
+    fim = fim or padrao_fim
+
+    # A marca é lida antes da varredura: o que mudar durante a execução entra
+    # na próxima rodada, menos as gravações da própria confirmação.
+    marca = _marca_atual()
+    anterior = None if completo else _execucao_anterior()
+    if anterior is None:
+        resultado = reconciliar(inicio, fim)
+        modo, total_slots = "completo", None
+    else:
+        slots = _slots_alterados(anterior["marca_dagua"])
+        fim_anterior = date.fromisoformat(anterior["periodo"]["fim"])
+        filtro_alocacoes, filtro_eventos = _filtros_incrementais(
+            slots, fim_anterior if fim > fim_anterior else None
+        )
+        resultado = reconciliar(
+            inicio, fim, filtro_alocacoes=filtro_alocacoes, filtro_eventos=filtro_eventos
+        )
+        modo, total_slots = "incremental", sum(len(datas) for datas in slots.values())
+
+    log = {
+        **resultado.como_log(),
+        "modo": modo,
+        "slots_alterados": total_slots,
+        "marca_dagua": {
+            **marca,
+            "gravacoes": resultado.gravado_em.isoformat() if resultado.gravado_em else None,
+        },
+    }
+    return f"[{modo}] {resultado.resumo()}", log
+
+
+def executar_confirmacao_diaria(
+    inicio: date | None = None,
+    fim: date | None = None,
+    *,
+    autor: str = "job",
+    completo: bool = False,
+) -> ExecucaoJob:
+    """Executa a confirmação diária agora, registrando o resultado em ExecucaoJob."""
+    job = ExecucaoJob.objects.create(
+        tipo=TipoJob.CONFIRMACAO_DIARIA, status=StatusJob.EXECUTANDO, autor=autor
+    )
+    try:
+        with auditando(FonteAlteracao.JOB, autor=autor, job_id=job.pk):
+            resumo, log = confirmar_periodo(inicio, fim, completo=completo)
+    except Exception as exc:
+        logger.exception("confirmacao_diaria falhou (job %s)", job.pk)
+        job.status = StatusJob.ERRO
+        job.terminou_em = timezone.now()
+        job.log_json = {"erro": str(exc)}
+        job.save(update_fields=["status", "terminou_em", "log_json"])
+        raise
+
+    job.status = StatusJob.CONCLUIDO
+    job.terminou_em = timezone.now()
+    job.diff_resumo = resumo
+    job.log_json = log
+    job.save(update_fields=["status", "terminou_em", "diff_resumo", "log_json"])
+    return job
@@ -0,0 +1,132 @@
+"""Detecção de conflitos entre alocações e eventos do Google Calendar."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+from .horarios import janela_turno
+from .models import Alocacao, EventoCalendar, OrigemEvento, StatusEvento
+
+
+@dataclass(frozen=True)
+class EventoConflitante:
+    """Evento externo que se sobrepõe à janela de uma alocação."""
+
+    titulo: str
+    inicio: datetime
+    fim: datetime
+
+    def descricao(self) -> str:
+        inicio = timezone.localtime(self.inicio)
+        fim = timezone.localtime(self.fim)
+        titulo = self.titulo or "Evento sem título"
+        return f"{titulo} ({inicio:%d/%m %H:%M}–{fim:%H:%M})"
+
+
+class _IntervalosProfissional:
+    """Intervalos ordenados por início com o índice do maior fim em cada prefixo."""
+
+    def __init__(self, eventos: list[EventoConflitante]) -> None:
+        eventos.sort(key=lambda evento: evento.inicio)
+        self.eventos = eventos
+        self.inicios = [evento.inicio for evento in eventos]
+        self.maior_fim: list[int] = []
+        melhor = 0
+        for idx, evento in enumerate(eventos):
+            if evento.fim > eventos[melhor].fim:
+                melhor = idx
+            self.maior_fim.append(melhor)
+
+    def sobreposto(self, inicio: datetime, fim: datetime) -> EventoConflitante | None:
+        # Eventos [0, k) começam antes do fim da janela; basta o de maior fim
+        # entre eles terminar depois do início para haver sobreposição.
+        k = bisect_left(self.inicios, fim)
+        if k == 0:
+            return None
+        candidato = self.eventos[self.maior_fim[k - 1]]
+        return candidato if candidato.fim > inicio else None
+
+
+class IndiceEventosGoogle:
+    """Índice de intervalos dos eventos externos nas agendas dos profissionais.
+
+    Construído uma única vez por requisição/lote (uma consulta, O(E log E));
+    cada verificação custa O(log E).
+    """
+
+    def __init__(
+        self,
+        eventos_por_profissional: dict[int, list[EventoConflitante]],
+        profissionais: set[int],
+        inicio: date | None,
+        fim: date | None,
+    ) -> None:
+        self._intervalos = {
+            prof_id: _IntervalosProfissional(eventos)
+            for prof_id, eventos in eventos_por_profissional.items()
+        }
+        self._profissionais = profissionais
+        self._inicio = inicio
+        self._fim = fim
+
+    @classmethod
+    def para_alocacoes(cls, alocacoes: Iterable[Alocacao]) -> IndiceEventosGoogle:
+        """Carrega os eventos que podem conflitar com o conjunto de alocações."""
+        profissionais: set[int] = set()
+        datas: list[date] = []
+        for alocacao in alocacoes:
+            profissionais.add(alocacao.profissional_id)
+            datas.append(alocacao.data)
+
+        if not profissionais:
+            return cls({}, set(), None, None)
+
+        inicio, fim = min(datas), max(datas)
+        tz = timezone.get_default_timezone()
+        limite_inicio = timezone.make_aware(datetime.combine(inicio, time.min), tz)
+        limite_fim = timezone.make_aware(datetime.combine(fim + timedelta(days=1), time.min), tz)
+
+        # Só eventos externos contam como conflito: os do sistema espelham
+        # alocações e são tratados pela confirmação diária.
+        linhas = (
+            EventoCalendar.objects.filter(
+                agenda__profissional_id__in=profissionais,
+                agenda__ativa=True,
+                alocacao__isnull=True,
+                data_inicio__lt=limite_fim,
+                data_fim__gt=limite_inicio,
+            )
+            .exclude(status=StatusEvento.DELETADO)
+            .exclude(origem=OrigemEvento.SISTEMA)
+            .values_list("agenda__profissional_id", "titulo", "data_inicio", "data_fim")
+        )
+
+        eventos_por_profissional: dict[int, list[EventoConflitante]] = {}
+        for prof_id, titulo, data_inicio, data_fim in linhas:
+            eventos_por_profissional.setdefault(prof_id, []).append(
+                EventoConflitante(titulo=titulo, inicio=data_inicio, fim=data_fim)
+            )
+
+        return cls(eventos_por_profissional, profissionais, inicio, fim)
+
+    def cobre(self, alocacao: Alocacao) -> bool:
+        """Indica se o índice foi carregado para o profissional/data da alocação."""
+        return (
+            self._inicio is not None
+            and self._fim is not None
+            and alocacao.profissional_id in self._profissionais
+            and self._inicio <= alocacao.data <= self._fim
+        )
+
+    def conflito(self, alocacao: Alocacao) -> EventoConflitante | None:
+        """Retorna um evento externo sobreposto à janela do turno, se houver."""
+        intervalos = self._intervalos.get(alocacao.profissional_id)
+        if intervalos is None:
+            return None
+        inicio, fim = janela_turno(alocacao.local, alocacao.data, alocacao.turno)
+        return intervalos.sobreposto(inicio, fim)
@@ -0,0 +1,311 @@
+"""Cópia de semana e aplicação de modelo de semana.
+
+A maioria das semanas repete a anterior. `copiar_semana` duplica as
+alocações de uma semana nas semanas de destino e `aplicar_modelo` faz o
+mesmo a partir de um ModeloSemana (salvo de uma semana com `salvar_modelo`).
+Cada operação é um único `INSERT ... SELECT`: as linhas de origem são
+cruzadas com os deslocamentos de data (ou com as segundas-feiras de destino)
+e só entram as que não colidem com o que já existe, isto é, sala ocupada no
+turno (entradas manuais e de sábado nunca são sobrescritas) ou profissional
+já alocado no turno. Entradas manuais de sábado (status `manual`) não são
+copiadas nem entram em modelos: a escala de sábado é combinada à parte.
+Profissionais inativos e salas inativas ficam de fora.
+
+As alocações inseridas voltam pelo `RETURNING` e, numa passada, entram no
+log de alterações e no livro de carga (`registrar_em_lote`) e são validadas
+em conjunto: conflitos com o Google Calendar, disponibilidade e locais
+proibidos (bitsets em memória), horas e dobras da semana (livro de carga),
+no formato da listagem de inconsistências.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any
+
+from cadastros import cache
+from cadastros.disponibilidade import Disponibilidade
+from cadastros.models import Profissional, Sala
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import alteracoes
+from .carga import semana_de
+from .conflitos import IndiceEventosGoogle
+from .models import (
+    Alocacao,
+    CargaSemanal,
+    ItemModeloSemana,
+    ModeloSemana,
+    NivelInseguranca,
+    OrigemAlocacao,
+    StatusAlocacao,
+    TipoAlteracao,
+)
+
+
+@dataclass
+class ResultadoCopia:
+    criadas: int = 0
+    ignoradas: int = 0
+    alocacoes: list[int] = field(default_factory=list)
+    inconsistencias: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _semanas(destinos: Iterable[date]) -> list[date]:
+    return sorted({semana_de(destino) for destino in destinos})
+
+
+def _somar_dias(data: str, dias: str) -> str:
+    if connection.vendor == "sqlite":
+        return f"date({data}, '+' || {dias} || ' days')"
+    return f"({data} + {dias})"
+
+
+def _uniao(coluna: str, quantidade: int) -> str:
+    return " UNION ALL ".join([f"SELECT %s AS {coluna}"] * quantidade)
+
+
+def _inserir(fonte: str, params: list[Any], detalhes: dict[str, Any]) -> list[int]:
+    """INSERT ... SELECT das linhas de `fonte` que não colidem; ids inseridos.
+
+    `fonte` devolve (profissional_id, local_id, sala_id, data, turno,
+    permite_sobreposicao) já com a data de destino.
+    """
+    alocacoes = Alocacao._meta.db_table
+    profissionais = Profissional._meta.db_table
+    salas = Sala._meta.db_table
+    agora = connection.ops.adapt_datetimefield_value(timezone.now())
+    # Parâmetro de texto não vira jsonb sozinho no Postgres.
+    metadata = "%s" if connection.vendor == "sqlite" else "CAST(%s AS jsonb)"
+    sql = f"""
+        INSERT INTO {alocacoes} (
+            profissional_id, local_id, sala_id, data, turno, origem, status, inseguranca,
+            metadata, observacoes, permite_sobreposicao, version, created_at, updated_at
+        )
+        SELECT n.profissional_id, n.local_id, n.sala_id, n.data, n.turno, %s, %s, %s,
+            {metadata}, '', n.permite_sobreposicao, 1, %s, %s
+        FROM ({fonte}) n
+        JOIN {profissionais} p ON p.id = n.profissional_id AND p.ativo
+        JOIN {salas} s ON s.id = n.sala_id AND s.ativa
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {alocacoes} e
+            WHERE e.sala_id = n.sala_id AND e.data = n.data AND e.turno = n.turno
+        )
+        AND (n.permite_sobreposicao OR NOT EXISTS (
+            SELECT 1 FROM {alocacoes} e
+            WHERE e.profissional_id = n.profissional_id AND e.data = n.data
+                AND e.turno = n.turno AND NOT e.permite_sobreposicao
+        ))
+        RETURNING id
+    """  # noqa: S608 - só nomes de tabela interpolados; valores vão como parâmetros
+    valores = [
+        OrigemAlocacao.SISTEMA,
+        StatusAlocacao.GERADO,
+        NivelInseguranca.BAIXA,
+        json.dumps(detalhes),
+        agora,
+        agora,
+        *params,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, valores)
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def _concluir(ids: list[int], candidatas: int, detalhes: dict[str, Any]) -> ResultadoCopia:
+    """Log, livro de carga e validação do conjunto inserido."""
+    alocacoes = list(
+        Alocacao.objects.filter(pk__in=ids)
+        .select_related("profissional", "local")
+        .order_by("data", "turno", "pk")
+    )
+    alteracoes.registrar_em_lote(
+        [alteracoes.entrada(alocacao, TipoAlteracao.CRIADA, detalhes) for alocacao in alocacoes],
+        chaves_carga={(alocacao.profissional_id, alocacao.data) for alocacao in alocacoes},
+        auditorias=[alteracoes.auditoria(alocacao, criada=True) for alocacao in alocacoes],
+    )
+    return ResultadoCopia(
+        criadas=len(alocacoes),
+        ignoradas=candidatas - len(alocacoes),
+        alocacoes=[alocacao.pk for alocacao in alocacoes],
+        inconsistencias=validar(alocacoes),
+    )
+
+
+def copiar_semana(origem: date, destinos: Iterable[date]) -> ResultadoCopia:
+    """Copia as alocações da semana de `origem` para as semanas de `destinos`."""
+    inicio = semana_de(origem)
+    deslocamentos = [(semana - inicio).days for semana in _semanas(destinos) if semana != inicio]
+    if not deslocamentos:
+        return ResultadoCopia()
+    da_semana = Alocacao.objects.filter(
+        data__gte=inicio, data__lt=inicio + timedelta(days=7)
+    ).exclude(status=StatusAlocacao.MANUAL)
+    tabela = Alocacao._meta.db_table
+    fonte = f"""
+        SELECT a.profissional_id, a.local_id, a.sala_id, {_somar_dias("a.data", "d.dias")} AS data,
+            a.turno, a.permite_sobreposicao
+        FROM {tabela} a CROSS JOIN ({_uniao("dias", len(deslocamentos))}) d
+        WHERE a.data >= %s AND a.data < %s AND a.status <> %s
+    """  # noqa: S608
+    params = [
+        *deslocamentos,
+        connection.ops.adapt_datefield_value(inicio),
+        connection.ops.adapt_datefield_value(inicio + timedelta(days=7)),
+        StatusAlocacao.MANUAL,
+    ]
+    detalhes = {"copia_da_semana": inicio.isoformat()}
+    with transaction.atomic():
+        ids = _inserir(fonte, params, detalhes)
+        return _concluir(ids, da_semana.count() * len(deslocamentos), detalhes)
+
+
+def aplicar_modelo(modelo: ModeloSemana, destinos: Iterable[date]) -> ResultadoCopia:
+    """Preenche as semanas de `destinos` com os itens do modelo."""
+    semanas = _semanas(destinos)
+    if not semanas:
+        return ResultadoCopia()
+    tabela = ItemModeloSemana._meta.db_table
+    fonte = f"""
+        SELECT i.profissional_id, i.local_id, i.sala_id,
+            {_somar_dias("d.segunda", "i.dia_semana")} AS data, i.turno,
+            FALSE AS permite_sobreposicao
+        FROM {tabela} i CROSS JOIN ({_uniao("segunda", len(semanas))}) d
+        WHERE i.modelo_id = %s
+    """  # noqa: S608
+    params = [*(connection.ops.adapt_datefield_value(semana) for semana in semanas), modelo.pk]
+    detalhes = {"modelo_semana": modelo.pk}
+    with transaction.atomic():
+        ids = _inserir(fonte, params, detalhes)
+        return _concluir(ids, modelo.itens.count() * len(semanas), detalhes)
+
+
+def salvar_modelo(nome: str, semana: date, descricao: str = "") -> ModeloSemana:
+    """Cria (ou refaz) o modelo com as alocações da semana.
+
+    Ficam de fora as entradas manuais de sábado e as exceções deliberadas de
+    sobreposição.
+    """
+    inicio = semana_de(semana)
+    alocacoes = (
+        Alocacao.objects.filter(
+            data__gte=inicio, data__lt=inicio + timedelta(days=7), permite_sobreposicao=False
+        )
+        .exclude(status=StatusAlocacao.MANUAL)
+        .order_by()
+        .values_list("profissional_id", "local_id", "sala_id", "data", "turno")
+    )
+    with transaction.atomic():
+        modelo, _ = ModeloSemana.objects.update_or_create(
+            nome=nome, defaults={"descricao": descricao}
+        )
+        modelo.itens.all().delete()
+        ItemModeloSemana.objects.bulk_create(
+            ItemModeloSemana(
+                modelo=modelo,
+                dia_semana=data.weekday(),
+                turno=turno,
+                local_id=local_id,
+                sala_id=sala_id,
+                profissional_id=profissional_id,
+            )
+            for profissional_id, local_id, sala_id, data, turno in alocacoes
+        )
+    return modelo
+
+
+def validar(alocacoes: list[Alocacao]) -> list[dict[str, Any]]:
+    """Inconsistências do conjunto, no formato de `alocacoes/inconsistencias/`.
+
+    Uma consulta para os eventos Google e outra para o livro de carga das
+    semanas tocadas; disponibilidade e locais proibidos vêm da memória.
+    """
+    if not alocacoes:
+        return []
+    indice = IndiceEventosGoogle.para_alocacoes(alocacoes)
+    disponibilidades = cache.disponibilidades()
+    semanas = [semana_de(alocacao.data) for alocacao in alocacoes]
+    cargas = {
+        (profissional_id, semana): (horas, dobras, alvo, limite_dobras)
+        for profissional_id, semana, horas, dobras, alvo, limite_dobras in (
+            CargaSemanal.objects.filter(
+                profissional_id__in={alocacao.profissional_id for alocacao in alocacoes},
+                semana__gte=min(semanas),
+                semana__lte=max(semanas),
+            ).values_list(
+                "profissional_id",
+                "semana",
+                "horas",
+                "dobras",
+                "profissional__carga_semanal_alvo",
+                "profissional__limite_dobras_semana",
+            )
+        )
+    }
+
+    inconsistencias = []
+    for alocacao in alocacoes:
+        issues = []
+        evento = indice.conflito(alocacao)
+        if evento:
+            issues.append(
+                {
+                    "severity": "ERROR",
+                    "message": f"Conflito com Google Calendar: {evento.descricao()}",
+                    "field": "data",
+                }
+            )
+        disponibilidade = disponibilidades.get(alocacao.profissional_id, Disponibilidade())
+        if not disponibilidade.livre(alocacao.data.weekday(), alocacao.turno):
+            issues.append(
+                {
+                    "severity": "WARNING",
+                    "message": "Profissional indisponível neste dia/turno.",
+                    "field": "profissional",
+                }
+            )
+        elif disponibilidade.proibido(alocacao.local_id):
+            issues.append(
+                {
+                    "severity": "WARNING",
+                    "message": "Local proibido para este profissional.",
+                    "field": "profissional",
+                }
+            )
+        carga = cargas.get((alocacao.profissional_id, semana_de(alocacao.data)))
+        if carga is not None:
+            horas, dobras, alvo, limite_dobras = carga
+            if horas > alvo:
+                issues.append(
+                    {
+                        "severity": "WARNING",
+                        "message": f"Limite de {alvo}h/semana excedido "
+                        f"({horas.normalize():f}h total)",
+                        "field": "profissional",
+                    }
+                )
+            if dobras > limite_dobras:
+                issues.append(
+                    {
+                        "severity": "WARNING",
+                        "message": f"Limite de {limite_dobras} dobras/semana excedido "
+                        f"({dobras} total)",
+                        "field": "turno",
+                    }
+                )
+        if issues:
+            inconsistencias.append(
+                {
+                    "alocacao_id": alocacao.pk,
+                    "profissional": alocacao.profissional.nome,
+                    "local": alocacao.local.nome,
+                    "data": alocacao.data,
+                    "turno": alocacao.get_turno_display(),
+                    "issues": issues,
+                }
+            )
+    return inconsistencias
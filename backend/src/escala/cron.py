@@ -0,0 +1,123 @@
+"""Expressões cron de 5 campos (minuto hora dia mês dia-da-semana).
+
+Suporta `*`, listas (`1,15`), intervalos (`1-5`) e passos (`*/15`, `8-18/2`).
+Dia da semana vai de 0 (domingo) a 6; 7 também vale domingo. Como no cron
+tradicional, se dia do mês e dia da semana forem ambos restritos, basta
+um deles bater. Os horários são avaliados no fuso do projeto (TIME_ZONE).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+# Limite de busca: nenhuma expressão válida fica mais de ~4 anos sem disparar (29/02).
+_MAX_DIAS_BUSCA = 366 * 5
+
+
+class CronInvalido(ValueError):
+    """Expressão cron mal formada."""
+
+
+def _campo(texto: str, minimo: int, maximo: int) -> frozenset[int]:
+    valores: set[int] = set()
+    for parte in texto.split(","):
+        faixa, _, passo_texto = parte.partition("/")
+        passo = int(passo_texto) if passo_texto else 1
+        if faixa == "*":
+            inicio, fim = minimo, maximo
+        elif "-" in faixa:
+            inicio_texto, fim_texto = faixa.split("-", 1)
+            inicio, fim = int(inicio_texto), int(fim_texto)
+        else:
+            inicio = int(faixa)
+            fim = maximo if passo_texto else inicio
+        if passo < 1 or inicio < minimo or fim > maximo or inicio > fim:
+            raise CronInvalido(f"Campo fora do intervalo {minimo}-{maximo}: {parte!r}")
+        valores.update(range(inicio, fim + 1, passo))
+    return frozenset(valores)
+
+
+@dataclass(frozen=True)
+class Cron:
+    minutos: frozenset[int]
+    horas: frozenset[int]
+    dias: frozenset[int]
+    meses: frozenset[int]
+    dias_semana: frozenset[int]
+    dia_restrito: bool
+    dia_semana_restrito: bool
+
+    @classmethod
+    def parse(cls, expressao: str) -> Cron:
+        campos = expressao.split()
+        if len(campos) != 5:
+            raise CronInvalido(f"Esperados 5 campos, recebidos {len(campos)}: {expressao!r}")
+        try:
+            dias_semana = _campo(campos[4], 0, 7)
+            return cls(
+                minutos=_campo(campos[0], 0, 59),
+                horas=_campo(campos[1], 0, 23),
+                dias=_campo(campos[2], 1, 31),
+                meses=_campo(campos[3], 1, 12),
+                dias_semana=frozenset(d % 7 for d in dias_semana),
+                # Como no Vixie cron, campo que começa com `*` (inclusive `*/2`)
+                # não restringe: dia e dia da semana só se somam (OU) se ambos restringem.
+                dia_restrito=not campos[2].startswith("*"),
+                dia_semana_restrito=not campos[4].startswith("*"),
+            )
+        except ValueError as exc:
+            if isinstance(exc, CronInvalido):
+                raise
+            raise CronInvalido(f"Expressão inválida: {expressao!r}") from exc
+
+    def _dia_bate(self, momento: datetime) -> bool:
+        # isoweekday: segunda=1 ... domingo=7 -> cron: domingo=0
+        dia_semana = momento.isoweekday() % 7
+        bate_dia = momento.day in self.dias
+        bate_semana = dia_semana in self.dias_semana
+        if self.dia_restrito and self.dia_semana_restrito:
+            return bate_dia or bate_semana
+        return bate_dia and bate_semana
+
+    def proxima(self, apos: datetime) -> datetime:
+        """Primeiro disparo estritamente depois de `apos` (datetime aware)."""
+        fuso = timezone.get_default_timezone()
+        local = timezone.localtime(apos, fuso).replace(tzinfo=None, second=0, microsecond=0)
+        momento = local + timedelta(minutes=1)
+        limite = momento + timedelta(days=_MAX_DIAS_BUSCA)
+        while momento < limite:
+            if momento.month not in self.meses:
+                ano, mes = divmod(momento.month, 12)
+                momento = momento.replace(
+                    year=momento.year + ano, month=mes + 1, day=1, hour=0, minute=0
+                )
+            elif not self._dia_bate(momento):
+                momento = (momento + timedelta(days=1)).replace(hour=0, minute=0)
+            elif momento.hour not in self.horas:
+                momento = (momento + timedelta(hours=1)).replace(minute=0)
+            elif momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+            else:
+                return timezone.make_aware(momento, fuso)
+        raise CronInvalido("Expressão nunca dispara.")
+
+    def disparos(self, desde: datetime, ate: datetime, limite: int = 100) -> list[datetime]:
+        """Até `limite` disparos em (desde, ate], os mais antigos primeiro."""
+        resultado: list[datetime] = []
+        momento = self.proxima(desde)
+        while momento <= ate and len(resultado) < limite:
+            resultado.append(momento)
+            momento = self.proxima(momento)
+        return resultado
+
+
+def validar_cron(expressao: str) -> None:
+    """Validador de campo para expressões cron."""
+    try:
+        Cron.parse(expressao)
+    except CronInvalido as exc:
+        raise ValidationError(str(exc)) from exc
@@ -0,0 +1,263 @@
+"""Serviço falso do Google Calendar, em processo, para desenvolvimento e benchmarks.
+
+Implementa o contrato de `ClienteCalendar` com o comportamento relevante da
+API real: paginação, `syncToken` incremental (com 410 quando expira), etags
+com escrita condicional, eventos cancelados como tombstones, canais de push
+e injeção configurável de latência e erros 403/429.
+
+Para usar no lugar da API real:
+`GOOGLE_CALENDAR_CLIENT=escala.fake_calendar.cliente_padrao`.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from .google_calendar import ErroCalendarAPI
+
+
+@dataclass
+class ConfiguracaoFalhas:
+    """Latência e erros injetados em cada chamada."""
+
+    latencia_segundos: float = 0.0
+    taxa_403: float = 0.0
+    taxa_429: float = 0.0
+    # Limite por calendário em chamadas/segundo (None = sem limite).
+    limite_por_segundo: float | None = None
+    semente: int | None = None
+
+
+@dataclass
+class _Calendario:
+    eventos: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # Sequência da última alteração de cada evento (para o sync incremental).
+    alteracoes: dict[str, int] = field(default_factory=dict)
+    # Tokens emitidos antes desta geração recebem 410.
+    geracao: int = 0
+    chamadas: list[float] = field(default_factory=list)
+
+
+@dataclass
+class Estatisticas:
+    chamadas: int = 0
+    erros_injetados: int = 0
+    tokens_expirados: int = 0
+    por_operacao: dict[str, int] = field(default_factory=dict)
+
+
+class ServicoCalendarFalso:
+    """Implementação em memória (thread-safe) da API de eventos."""
+
+    def __init__(self, falhas: ConfiguracaoFalhas | None = None) -> None:
+        self.falhas = falhas or ConfiguracaoFalhas()
+        self.estatisticas = Estatisticas()
+        self._calendarios: dict[str, _Calendario] = {}
+        self._sequencia = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(self.falhas.semente)  # noqa: S311
+
+    # -- utilitários de teste/benchmark -------------------------------------------------
+
+    def calendario(self, calendar_id: str) -> _Calendario:
+        with self._lock:
+            return self._calendarios.setdefault(calendar_id, _Calendario())
+
+    def eventos(self, calendar_id: str, *, incluir_cancelados: bool = False) -> list[dict]:
+        with self._lock:
+            cal = self._calendarios.get(calendar_id)
+            if cal is None:
+                return []
+            return [
+                dict(evento)
+                for evento in cal.eventos.values()
+                if incluir_cancelados or evento["status"] != "cancelled"
+            ]
+
+    def expirar_tokens(self, calendar_id: str) -> None:
+        """Invalida todos os syncTokens emitidos para o calendário (410)."""
+        with self._lock:
+            self._calendarios.setdefault(calendar_id, _Calendario()).geracao += 1
+
+    def semear(
+        self,
+        calendar_id: str,
+        quantidade: int,
+        *,
+        inicio: datetime,
+        duracao: timedelta = timedelta(hours=1),
+        intervalo: timedelta = timedelta(hours=3),
+        titulo: str = "Compromisso",
+    ) -> None:
+        """Cria eventos manuais sem passar pela injeção de falhas."""
+        with self._lock:
+            cal = self._calendarios.setdefault(calendar_id, _Calendario())
+            for indice in range(quantidade):
+                comeco = inicio + intervalo * indice
+                self._gravar(
+                    cal,
+                    {
+                        "id": uuid.uuid4().hex,
+                        "summary": f"{titulo} {indice}",
+                        "start": {"dateTime": comeco.isoformat()},
+                        "end": {"dateTime": (comeco + duracao).isoformat()},
+                    },
+                )
+
+    def alterar(self, calendar_id: str, event_id: str, campos: dict[str, Any]) -> None:
+        """Simula uma edição feita diretamente no Google (sem injeção de falhas)."""
+        with self._lock:
+            cal = self._calendarios[calendar_id]
+            self._gravar(cal, {**cal.eventos[event_id], **campos})
+
+    # -- infraestrutura ---------------------------------------------------------------
+
+    def _gravar(self, cal: _Calendario, evento: dict[str, Any]) -> dict[str, Any]:
+        self._sequencia += 1
+        evento.setdefault("status", "confirmed")
+        evento["etag"] = f'"{self._sequencia}"'
+        evento["updated"] = datetime.now(UTC).isoformat()
+        cal.eventos[evento["id"]] = evento
+        cal.alteracoes[evento["id"]] = self._sequencia
+        return dict(evento)
+
+    def _entrar(self, operacao: str, calendar_id: str) -> _Calendario:
+        """Aplica latência, limite de taxa e erros injetados; retorna o calendário."""
+        if self.falhas.latencia_segundos:
+            time.sleep(self.falhas.latencia_segundos)
+        with self._lock:
+            self.estatisticas.chamadas += 1
+            por_operacao = self.estatisticas.por_operacao
+            por_operacao[operacao] = por_operacao.get(operacao, 0) + 1
+            cal = self._calendarios.setdefault(calendar_id, _Calendario())
+
+            limite = self.falhas.limite_por_segundo
+            if limite:
+                agora = time.monotonic()
+                cal.chamadas = [t for t in cal.chamadas if agora - t < 1.0]
+                if len(cal.chamadas) >= limite:
+                    self.estatisticas.erros_injetados += 1
+                    raise ErroCalendarAPI(403, "rateLimitExceeded")
+                cal.chamadas.append(agora)
+
+            sorteio = self._random.random()
+            if sorteio < self.falhas.taxa_429:
+                self.estatisticas.erros_injetados += 1
+                raise ErroCalendarAPI(429, "tooManyRequests")
+            if sorteio < self.falhas.taxa_429 + self.falhas.taxa_403:
+                self.estatisticas.erros_injetados += 1
+                raise ErroCalendarAPI(403, "userRateLimitExceeded")
+            return cal
+
+    # -- ClienteCalendar --------------------------------------------------------------
+
+    def list_events(
+        self,
+        calendar_id: str,
+        *,
+        sync_token: str | None = None,
+        page_token: str | None = None,
+        time_min: str | None = None,
+        max_results: int = 250,
+    ) -> dict[str, Any]:
+        cal = self._entrar("list", calendar_id)
+        with self._lock:
+            if page_token:
+                geracao, desde, corte, offset = (int(p) for p in page_token.split(":"))
+                incremental = desde >= 0
+            elif sync_token:
+                geracao, desde = (int(p) for p in sync_token.split(":"))
+                corte, offset, incremental = self._sequencia, 0, True
+            else:
+                geracao, desde, corte, offset = cal.geracao, -1, self._sequencia, 0
+                incremental = False
+
+            if geracao != cal.geracao:
+                self.estatisticas.tokens_expirados += 1
+                raise ErroCalendarAPI(410, "fullSyncRequired")
+
+            if incremental:
+                ids = [event_id for event_id, seq in cal.alteracoes.items() if desde < seq <= corte]
+            else:
+                limite = datetime.fromisoformat(time_min) if time_min else None
+                ids = [
+                    event_id
+                    for event_id, evento in cal.eventos.items()
+                    if evento["status"] != "cancelled"
+                    and cal.alteracoes[event_id] <= corte
+                    and (
+                        limite is None or datetime.fromisoformat(evento["end"]["dateTime"]) > limite
+                    )
+                ]
+            ids.sort(key=lambda event_id: cal.alteracoes[event_id])
+
+            pagina = ids[offset : offset + max_results]
+            resposta: dict[str, Any] = {"items": [dict(cal.eventos[i]) for i in pagina]}
+            if offset + max_results < len(ids):
+                resposta["nextPageToken"] = f"{geracao}:{desde}:{corte}:{offset + max_results}"
+            else:
+                resposta["nextSyncToken"] = f"{geracao}:{corte}"
+            return resposta
+
+    def insert_event(self, calendar_id: str, corpo: dict[str, Any]) -> dict[str, Any]:
+        cal = self._entrar("insert", calendar_id)
+        with self._lock:
+            evento = {**corpo, "id": corpo.get("id") or uuid.uuid4().hex}
+            evento.pop("status", None)
+            return self._gravar(cal, evento)
+
+    def patch_event(
+        self,
+        calendar_id: str,
+        event_id: str,
+        corpo: dict[str, Any],
+        etag: str | None = None,
+    ) -> dict[str, Any]:
+        cal = self._entrar("patch", calendar_id)
+        with self._lock:
+            atual = cal.eventos.get(event_id)
+            if atual is None or atual["status"] == "cancelled":
+                raise ErroCalendarAPI(404, "notFound")
+            if etag is not None and etag != atual["etag"]:
+                raise ErroCalendarAPI(412, "conditionNotMet")
+            return self._gravar(cal, {**atual, **corpo, "id": event_id})
+
+    def delete_event(self, calendar_id: str, event_id: str) -> None:
+        cal = self._entrar("delete", calendar_id)
+        with self._lock:
+            atual = cal.eventos.get(event_id)
+            if atual is None or atual["status"] == "cancelled":
+                raise ErroCalendarAPI(410, "deleted")
+            # Como na API real, o tombstone só carrega id e status.
+            self._gravar(cal, {"id": event_id, "status": "cancelled"})
+
+    def watch_events(
+        self, calendar_id: str, channel_id: str, token: str, endereco: str
+    ) -> dict[str, Any]:
+        self._entrar("watch", calendar_id)
+        expiracao = datetime.now(UTC) + timedelta(days=7)
+        return {
+            "id": channel_id,
+            "resourceId": f"recurso-{calendar_id}",
+            "expiration": str(int(expiracao.timestamp() * 1000)),
+        }
+
+    def stop_channel(self, channel_id: str, resource_id: str) -> None:
+        self._entrar("stop", resource_id)
+
+
+_servico_padrao: ServicoCalendarFalso | None = None
+
+
+def cliente_padrao() -> ServicoCalendarFalso:
+    """Fábrica para `GOOGLE_CALENDAR_CLIENT`: instância única por processo."""
+    global _servico_padrao
+    if _servico_padrao is None:
+        _servico_padrao = ServicoCalendarFalso()
+    return _servico_padrao
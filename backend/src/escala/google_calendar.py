@@ -0,0 +1,94 @@
+"""Contrato do cliente da API do Google Calendar usado pela integração.
+
+O cliente concreto é configurado por `GOOGLE_CALENDAR_CLIENT` (caminho
+pontuado para uma fábrica sem argumentos), o que permite trocar a API real
+por um serviço falso em desenvolvimento e testes.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Protocol
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ErroCalendarAPI(Exception):
+    """Erro devolvido pela API do Google Calendar."""
+
+    def __init__(self, status: int, mensagem: str = "") -> None:
+        super().__init__(f"Google Calendar API {status}: {mensagem}".strip())
+        self.status = status
+        self.mensagem = mensagem
+
+
+class ClienteIndisponivel(Exception):
+    """Nenhum cliente do Google Calendar configurado."""
+
+
+# Motivos de 403 que indicam limite de taxa (demais 403 são permanentes).
+MOTIVOS_RATE_LIMIT = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+def erro_temporario(exc: ErroCalendarAPI) -> bool:
+    """Indica se vale tentar de novo (rate limit ou falha do servidor)."""
+    if exc.status == 403:
+        return exc.mensagem in MOTIVOS_RATE_LIMIT
+    return exc.status == 429 or exc.status >= 500
+
+
+class ClienteCalendar(Protocol):
+    """Operações da API do Google Calendar usadas pelo agendador."""
+
+    def list_events(
+        self,
+        calendar_id: str,
+        *,
+        sync_token: str | None = None,
+        page_token: str | None = None,
+        time_min: str | None = None,
+        max_results: int = 250,
+    ) -> dict[str, Any]:
+        """`events.list`: `items`, `nextPageToken` ou, na última página, `nextSyncToken`.
+
+        Com `sync_token` devolve só as mudanças (inclusive `status=cancelled`);
+        token expirado gera erro 410.
+        """
+        ...
+
+    def insert_event(self, calendar_id: str, corpo: dict[str, Any]) -> dict[str, Any]:
+        """`events.insert`: retorna o evento criado (com `id` e `etag`)."""
+        ...
+
+    def patch_event(
+        self,
+        calendar_id: str,
+        event_id: str,
+        corpo: dict[str, Any],
+        etag: str | None = None,
+    ) -> dict[str, Any]:
+        """`events.patch`; com `etag` a escrita é condicional (412 se divergir)."""
+        ...
+
+    def delete_event(self, calendar_id: str, event_id: str) -> None:
+        """`events.delete`."""
+        ...
+
+    def watch_events(
+        self, calendar_id: str, channel_id: str, token: str, endereco: str
+    ) -> dict[str, Any]:
+        """Abre um canal de push; retorna `resourceId` e `expiration` (ms epoch)."""
+        ...
+
+    def stop_channel(self, channel_id: str, resource_id: str) -> None:
+        """Encerra um canal de push."""
+        ...
+
+
+def obter_cliente() -> ClienteCalendar:
+    """Instancia o cliente configurado em `GOOGLE_CALENDAR_CLIENT`."""
+    caminho = getattr(settings, "GOOGLE_CALENDAR_CLIENT", "")
+    if not caminho:
+        raise ClienteIndisponivel("GOOGLE_CALENDAR_CLIENT não configurado.")
+    fabrica = import_string(caminho)
+    return fabrica()
@@ -0,0 +1,23 @@
+"""Janelas de horário dos turnos a partir da configuração de cada Local."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time
+
+from cadastros.models import Local
+from django.utils import timezone
+
+
+def horario_turno(local: Local, data: date, turno: str) -> tuple[time, time]:
+    """Retorna (início, fim) do turno no local; sábados usam `sabado_*`."""
+    return local.horario(data.weekday(), turno)
+
+
+def janela_turno(local: Local, data: date, turno: str) -> tuple[datetime, datetime]:
+    """Retorna a janela do turno como datetimes aware no fuso do projeto."""
+    inicio, fim = horario_turno(local, data, turno)
+    tz = timezone.get_default_timezone()
+    return (
+        timezone.make_aware(datetime.combine(data, inicio), tz),
+        timezone.make_aware(datetime.combine(data, fim), tz),
+    )
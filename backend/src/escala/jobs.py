@@ -0,0 +1,423 @@
+"""Fila durável de jobs da escala sobre ExecucaoJob.
+
+Cada job é uma linha de ExecucaoJob. Workers (`manage.py worker_jobs`)
+reivindicam jobs pendentes com `SELECT ... FOR UPDATE SKIP LOCKED` no
+Postgres; no SQLite, onde não há lock de linha, a reivindicação é um UPDATE
+condicional no status. O worker detém o job por um lease renovado por
+heartbeat: se o processo morrer, o lease expira e o job volta para a fila
+como uma tentativa com falha. Falhas são repetidas com backoff exponencial
+até `max_tentativas`; depois o job vai para `dead_letter`, de onde pode ser
+reprocessado em lote (`reprocessar`), agrupado pela assinatura do erro.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, QuerySet
+from django.db.models.fields.json import KT
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .alteracoes import auditando
+from .models import AgendaGoogle, ExecucaoJob, FonteAlteracao, StatusJob, TipoJob
+
+logger = logging.getLogger(__name__)
+
+# Handlers por tipo: recebem o job, podem atualizar `job.log_json` e
+# retornam o resumo gravado em `diff_resumo`.
+HANDLERS: dict[str, str] = {
+    TipoJob.SYNC_GOOGLE: "escala.tarefas.sincronizar",
+    TipoJob.PUBLICACAO_GOOGLE: "escala.tarefas.publicar",
+    TipoJob.CONFIRMACAO_DIARIA: "escala.tarefas.confirmar",
+    TipoJob.RENOVACAO_WEBHOOK: "escala.tarefas.renovar_webhooks",
+    TipoJob.POLLING_GOOGLE: "escala.tarefas.polling",
+}
+
+
+# Partes variáveis das mensagens de erro (UUIDs, hexadecimais, números).
+_VARIAVEIS_ERRO = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|\d+",
+    re.IGNORECASE,
+)
+
+
+class FalhaPermanente(Exception):
+    """Erro que não melhora com nova tentativa: o job vai direto para dead-letter."""
+
+
+@dataclass
+class ResultadoReprocessamento:
+    reenfileirados: list[int] = field(default_factory=list)
+    # Syncs repetidos da mesma agenda: um só basta, os demais são cancelados.
+    substituidos: list[int] = field(default_factory=list)
+    # Segundos entre a liberação do primeiro e do último job reprocessado.
+    janela_segundos: float = 0.0
+
+
+def _config(nome: str, padrao: Any) -> Any:
+    return getattr(settings, nome, padrao)
+
+
+def _duracao_lease() -> timedelta:
+    return timedelta(seconds=_config("JOB_LEASE_SEGUNDOS", 300))
+
+
+def limite_concorrencia(tipo: str) -> int | None:
+    """Máximo de jobs do tipo executando ao mesmo tempo (None = sem limite)."""
+    return _config("JOB_CONCORRENCIA", {}).get(tipo)
+
+
+def backoff(tentativa: int) -> timedelta:
+    """Espera antes da próxima tentativa: exponencial com jitter, limitada."""
+    base = _config("JOB_BACKOFF_BASE_SEGUNDOS", 30)
+    teto = _config("JOB_BACKOFF_MAX_SEGUNDOS", 3600)
+    espera = min(teto, base * 2 ** max(0, tentativa - 1))
+    return timedelta(seconds=espera / 2 + random.uniform(0, espera / 2))  # noqa: S311
+
+
+def enfileirar(
+    tipo: str,
+    *,
+    payload: dict[str, Any] | None = None,
+    autor: str = "job",
+    executar_apos: datetime | None = None,
+    max_tentativas: int | None = None,
+) -> ExecucaoJob:
+    """Registra um job pendente; `payload` vai para `log_json`."""
+    return ExecucaoJob.objects.create(
+        tipo=tipo,
+        status=StatusJob.PENDENTE,
+        autor=autor,
+        log_json=payload or {},
+        executar_apos=executar_apos or timezone.now(),
+        max_tentativas=max_tentativas or _config("JOB_MAX_TENTATIVAS", 5),
+    )
+
+
+def enfileirar_sync_agenda(
+    agenda_id: int, *, motivo: str, executar_apos: datetime | None = None
+) -> ExecucaoJob:
+    """Registra um sync incremental pendente para a agenda."""
+    return enfileirar(
+        TipoJob.SYNC_GOOGLE,
+        payload={"agenda_id": agenda_id, "motivo": motivo},
+        autor=motivo,
+        executar_apos=executar_apos,
+    )
+
+
+def liberar_coalescencia(agenda_id: int) -> None:
+    """Chamado no início do sync: notificações seguintes agendam um novo sync."""
+    AgendaGoogle.objects.filter(pk=agenda_id).update(sync_pendente_desde=None)
+
+
+def _liberar_sync_encerrado(job: ExecucaoJob) -> None:
+    """Sync que terminou sem rodar não pode deixar a agenda marcada como pendente.
+
+    Sem isso a marcação ficaria para sempre e webhooks e polling deixariam de
+    agendar syncs da agenda. Se outro sync dela ainda está na fila, a
+    marcação é dele e fica.
+    """
+    agenda_id = job.log_json.get("agenda_id")
+    if job.tipo != TipoJob.SYNC_GOOGLE or not isinstance(agenda_id, int):
+        return
+    outro_sync = (
+        ExecucaoJob.objects.filter(
+            tipo=TipoJob.SYNC_GOOGLE,
+            status__in=[StatusJob.PENDENTE, StatusJob.EXECUTANDO],
+            log_json__agenda_id=agenda_id,
+        )
+        .exclude(pk=job.pk)
+        .exists()
+    )
+    if not outro_sync:
+        liberar_coalescencia(agenda_id)
+
+
+def _tipos_com_vaga(tipos: list[str] | None) -> list[str]:
+    executando = dict(
+        ExecucaoJob.objects.filter(status=StatusJob.EXECUTANDO)
+        .values_list("tipo")
+        .annotate(total=Count("id"))
+    )
+    candidatos = tipos or [valor for valor, _ in TipoJob.choices]
+    return [
+        tipo
+        for tipo in candidatos
+        if (limite := limite_concorrencia(tipo)) is None or executando.get(tipo, 0) < limite
+    ]
+
+
+def _bloquear_tipos(tipos: list[str]) -> None:
+    """Serializa a contagem de concorrência por tipo entre workers (Postgres)."""
+    with connection.cursor() as cursor:
+        for tipo in sorted(tipos):
+            if limite_concorrencia(tipo) is not None:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [zlib.crc32(tipo.encode())])
+
+
+def reivindicar(worker: str, tipos: list[str] | None = None) -> ExecucaoJob | None:
+    """Reivindica o próximo job pendente vencido para o worker, se houver."""
+    agora = timezone.now()
+    com_lock = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        if com_lock:
+            _bloquear_tipos(tipos or [valor for valor, _ in TipoJob.choices])
+        permitidos = _tipos_com_vaga(tipos)
+        if not permitidos:
+            return None
+        pendentes = ExecucaoJob.objects.filter(
+            status=StatusJob.PENDENTE, executar_apos__lte=agora, tipo__in=permitidos
+        ).order_by("executar_apos", "id")
+
+        if com_lock:
+            job = pendentes.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+        else:
+            # Sem lock de linha: quem vencer o UPDATE condicional leva o job.
+            for candidato in pendentes.values_list("id", flat=True)[:10]:
+                if pendentes.filter(pk=candidato).update(status=StatusJob.EXECUTANDO):
+                    break
+            else:
+                return None
+            job = ExecucaoJob.objects.get(pk=candidato)
+
+        job.status = StatusJob.EXECUTANDO
+        job.worker = worker
+        job.tentativas = F("tentativas") + 1
+        job.heartbeat_em = agora
+        job.lease_ate = agora + _duracao_lease()
+        job.save(update_fields=["status", "worker", "tentativas", "heartbeat_em", "lease_ate"])
+    job.refresh_from_db(fields=["tentativas"])
+    return job
+
+
+def _do_worker(job: ExecucaoJob) -> QuerySet[ExecucaoJob]:
+    return ExecucaoJob.objects.filter(pk=job.pk, status=StatusJob.EXECUTANDO, worker=job.worker)
+
+
+def heartbeat(job: ExecucaoJob) -> bool:
+    """Renova o lease; False se o job não pertence mais ao worker."""
+    agora = timezone.now()
+    return bool(_do_worker(job).update(heartbeat_em=agora, lease_ate=agora + _duracao_lease()))
+
+
+def concluir(job: ExecucaoJob, resumo: str = "") -> bool:
+    """Marca o job como concluído se o worker ainda detém o lease."""
+    return bool(
+        _do_worker(job).update(
+            status=StatusJob.CONCLUIDO,
+            terminou_em=timezone.now(),
+            diff_resumo=resumo,
+            log_json=job.log_json,
+            lease_ate=None,
+        )
+    )
+
+
+def assinatura_erro(tipo: str, mensagem: str, codigo: int | None = None) -> str:
+    """Agrupa falhas equivalentes: ids, números e UUIDs da mensagem não contam.
+
+    `codigo` (o status HTTP de um ErroCalendarAPI, por exemplo) entra na
+    assinatura, para que 404 e 410 da mesma chamada não se misturem.
+    """
+    normalizada = _VARIAVEIS_ERRO.sub("#", mensagem.strip())
+    chave = f"{tipo}:{codigo or ''}:{normalizada}"
+    return hashlib.blake2b(chave.encode(), digest_size=6).hexdigest()
+
+
+def _registrar_falha(
+    job: ExecucaoJob, linha: QuerySet[ExecucaoJob], erro: dict[str, Any], *, permanente: bool
+) -> str | None:
+    """Devolve o job à fila com backoff ou o envia para dead-letter.
+
+    `linha` restringe o UPDATE ao estado em que o job foi visto, para que
+    dois processos não registrem a mesma falha.
+    """
+    agora = timezone.now()
+    erro.setdefault("assinatura", assinatura_erro(erro["tipo"], erro["mensagem"]))
+    log_json = {**job.log_json, "erro": erro}
+    if permanente or job.tentativas >= job.max_tentativas:
+        campos: dict[str, Any] = {"status": StatusJob.DEAD_LETTER, "terminou_em": agora}
+    else:
+        campos = {"status": StatusJob.PENDENTE, "executar_apos": agora + backoff(job.tentativas)}
+    if not linha.update(log_json=log_json, lease_ate=None, worker="", **campos):
+        return None
+    job.log_json = log_json
+    if campos["status"] == StatusJob.DEAD_LETTER:
+        _liberar_sync_encerrado(job)
+    return campos["status"]
+
+
+def falhar(job: ExecucaoJob, exc: BaseException) -> str | None:
+    """Registra a falha de uma tentativa; retorna o novo status (None se perdeu o lease)."""
+    codigo = getattr(exc, "status", None)
+    erro = {
+        "tipo": type(exc).__name__,
+        "mensagem": str(exc)[:500],
+        "tentativa": job.tentativas,
+        "assinatura": assinatura_erro(
+            type(exc).__name__, str(exc), codigo if isinstance(codigo, int) else None
+        ),
+    }
+    return _registrar_falha(job, _do_worker(job), erro, permanente=isinstance(exc, FalhaPermanente))
+
+
+def recuperar_expirados() -> int:
+    """Jobs cujo worker parou de mandar heartbeat contam como tentativa falha."""
+    agora = timezone.now()
+    expirados = ExecucaoJob.objects.filter(status=StatusJob.EXECUTANDO, lease_ate__lt=agora)
+    total = 0
+    for job in expirados:
+        erro = {
+            "tipo": "LeaseExpirado",
+            "mensagem": job.worker,
+            "tentativa": job.tentativas,
+            "assinatura": assinatura_erro("LeaseExpirado", ""),
+        }
+        linha = expirados.filter(pk=job.pk, worker=job.worker)
+        if _registrar_falha(job, linha, erro, permanente=False):
+            total += 1
+    return total
+
+
+def falhas_agrupadas(jobs: QuerySet[ExecucaoJob]) -> list[dict[str, Any]]:
+    """Dead-letters agrupados por tipo de job e assinatura do erro, maiores grupos primeiro."""
+    grupos = (
+        jobs.filter(status=StatusJob.DEAD_LETTER)
+        .values("tipo", assinatura=KT("log_json__erro__assinatura"))
+        .annotate(
+            total=Count("id"),
+            erro=Max(KT("log_json__erro__tipo")),
+            exemplo=Max(KT("log_json__erro__mensagem")),
+            primeira=Min("terminou_em"),
+            ultima=Max("terminou_em"),
+        )
+        .order_by("-total", "tipo", "assinatura")
+    )
+    return [dict(grupo) for grupo in grupos]
+
+
+def reprocessar(
+    jobs: QuerySet[ExecucaoJob],
+    *,
+    autor: str,
+    limite: int | None = None,
+    por_minuto: int | None = None,
+) -> ResultadoReprocessamento:
+    """Devolve dead-letters à fila com tentativas zeradas, espaçados no tempo.
+
+    Os jobs são liberados a `por_minuto` (JOB_REPROCESSAMENTO_POR_MINUTO),
+    para que reprocessar centenas de falhas de uma vez não vire uma rajada
+    contra o Google. Syncs da mesma agenda são incrementais: só o primeiro
+    volta para a fila, e nenhum volta se a agenda já tem sync pendente.
+    """
+    ritmo = por_minuto or _config("JOB_REPROCESSAMENTO_POR_MINUTO", 30)
+    intervalo = timedelta(seconds=60 / ritmo)
+    agora = timezone.now()
+    resultado = ResultadoReprocessamento()
+    with transaction.atomic():
+        selecionados = list(
+            jobs.filter(status=StatusJob.DEAD_LETTER)
+            .select_for_update()
+            .order_by("terminou_em", "id")[:limite]
+        )
+        agendas_com_sync = {
+            str(agenda_id)
+            for agenda_id in ExecucaoJob.objects.filter(
+                tipo=TipoJob.SYNC_GOOGLE, status__in=[StatusJob.PENDENTE, StatusJob.EXECUTANDO]
+            ).values_list(KT("log_json__agenda_id"), flat=True)
+        }
+        reenfileirados: list[ExecucaoJob] = []
+        substituidos: list[ExecucaoJob] = []
+        for job in selecionados:
+            registro = {"autor": autor, "em": agora.isoformat(), "erro": job.log_json.get("erro")}
+            job.log_json = {
+                **{chave: valor for chave, valor in job.log_json.items() if chave != "erro"},
+                "reprocessamento": registro,
+            }
+            if job.tipo == TipoJob.SYNC_GOOGLE:
+                agenda_id = str(job.log_json.get("agenda_id"))
+                if agenda_id in agendas_com_sync:
+                    job.status = StatusJob.CANCELADO
+                    job.diff_resumo = "Substituído por outro sync da mesma agenda"
+                    substituidos.append(job)
+                    continue
+                agendas_com_sync.add(agenda_id)
+            job.status = StatusJob.PENDENTE
+            job.tentativas = 0
+            job.terminou_em = None
+            job.executar_apos = agora + intervalo * len(reenfileirados)
+            reenfileirados.append(job)
+
+        ExecucaoJob.objects.bulk_update(
+            reenfileirados,
+            ["status", "tentativas", "terminou_em", "executar_apos", "log_json"],
+            batch_size=500,
+        )
+        ExecucaoJob.objects.bulk_update(
+            substituidos, ["status", "diff_resumo", "log_json"], batch_size=500
+        )
+    resultado.reenfileirados = [job.pk for job in reenfileirados]
+    resultado.substituidos = [job.pk for job in substituidos]
+    if reenfileirados:
+        resultado.janela_segundos = (intervalo * (len(reenfileirados) - 1)).total_seconds()
+    return resultado
+
+
+class _Batimento(threading.Thread):
+    """Renova o lease do job enquanto o handler roda."""
+
+    def __init__(self, job: ExecucaoJob) -> None:
+        super().__init__(daemon=True, name=f"heartbeat-job-{job.pk}")
+        self.job = job
+        self.parar = threading.Event()
+
+    def run(self) -> None:
+        intervalo = _duracao_lease().total_seconds() / 3
+        try:
+            while not self.parar.wait(intervalo):
+                if not heartbeat(self.job):
+                    return
+        finally:
+            connection.close()
+
+
+def obter_handler(tipo: str) -> Callable[[ExecucaoJob], str]:
+    caminho = HANDLERS.get(tipo)
+    if caminho is None:
+        raise FalhaPermanente(f"Nenhum handler registrado para jobs do tipo {tipo}.")
+    return import_string(caminho)
+
+
+def executar(job: ExecucaoJob) -> str | None:
+    """Roda o handler do job já reivindicado e registra o resultado."""
+    batimento = _Batimento(job)
+    batimento.start()
+    # Alterações de alocação do handler entram na auditoria com o id do job.
+    fonte = FonteAlteracao.PROMPT if job.tipo == TipoJob.REPLANEJAMENTO else FonteAlteracao.JOB
+    try:
+        with auditando(fonte, autor=job.autor, job_id=job.pk):
+            resumo = obter_handler(job.tipo)(job)
+    except Exception as exc:
+        logger.exception("Job %s (%s) falhou na tentativa %s", job.pk, job.tipo, job.tentativas)
+        return falhar(job, exc)
+    finally:
+        batimento.parar.set()
+    if not concluir(job, resumo):
+        logger.warning("Job %s perdeu o lease antes de concluir", job.pk)
+        return None
+    return StatusJob.CONCLUIDO
@@ -0,0 +1,58 @@
+"""Agendador das rotinas periódicas (geração, confirmação, webhooks, polling)."""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from escala.agendador import disparar_vencidos, liberar_lideranca, obter_lideranca
+
+
+class Command(BaseCommand):
+    help = (
+        "Enfileira ExecucaoJob conforme os AgendamentoJob ativos. Pode rodar em mais de "
+        "uma instância: só a líder dispara."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--intervalo", type=float, default=30.0, help="Segundos entre verificações"
+        )
+        parser.add_argument("--uma-vez", action="store_true", help="Uma verificação e encerra")
+        parser.add_argument("--id", default="", help="Identificação desta instância")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        dono = options["id"] or f"{socket.gethostname()}:{os.getpid()}"
+        # O lease cobre algumas verificações perdidas antes de outra instância assumir.
+        duracao = timedelta(seconds=options["intervalo"] * 3)
+        self._parar = False
+        signal.signal(signal.SIGTERM, self._sinal)
+        signal.signal(signal.SIGINT, self._sinal)
+
+        try:
+            while not self._parar:
+                close_old_connections()
+                if obter_lideranca(dono, duracao):
+                    resultado = disparar_vencidos()
+                    if resultado.enfileirados or resultado.ignorados_em_execucao:
+                        self.stdout.write(
+                            f"Enfileirados: {resultado.enfileirados}; "
+                            f"ignorados (anterior em execução): "
+                            f"{resultado.ignorados_em_execucao}; "
+                            f"perdidos descartados: {resultado.descartados}"
+                        )
+                if options["uma_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+        finally:
+            liberar_lideranca(dono)
+
+    def _sinal(self, *_: Any) -> None:
+        self._parar = True
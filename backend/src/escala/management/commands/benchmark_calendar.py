@@ -0,0 +1,180 @@
+"""Mede sync/publish contra o Google Calendar falso em escala de produção."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+from cadastros.models import Local, Profissional, Sala, TurnoChoices
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.utils import timezone
+
+from escala.fake_calendar import ConfiguracaoFalhas, ServicoCalendarFalso
+from escala.models import AgendaGoogle, Alocacao, StatusAlocacao
+from escala.sync import Retentador, publicar_agenda, sincronizar_agenda
+
+
+class _Desfazer(Exception):
+    """Força o rollback dos dados criados pelo benchmark."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de sync/publish com o Google Calendar falso (latência e 403/429 "
+        "configuráveis). Os dados criados são descartados ao final."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--agendas", type=int, default=80)
+        parser.add_argument("--eventos", type=int, default=500, help="Eventos por agenda")
+        parser.add_argument("--alocacoes", type=int, default=20, help="Alocações por agenda")
+        parser.add_argument("--latencia-ms", type=float, default=0.0)
+        parser.add_argument("--taxa-403", type=float, default=0.0)
+        parser.add_argument("--taxa-429", type=float, default=0.0)
+        parser.add_argument("--backoff-base", type=float, default=0.01, help="Segundos")
+        parser.add_argument("--semente", type=int, default=42)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        servico = ServicoCalendarFalso(
+            ConfiguracaoFalhas(
+                latencia_segundos=options["latencia_ms"] / 1000,
+                taxa_403=options["taxa_403"],
+                taxa_429=options["taxa_429"],
+                semente=options["semente"],
+            )
+        )
+        retentador = Retentador(tentativas=8, base=options["backoff_base"])
+        try:
+            with transaction.atomic():
+                self._executar(servico, retentador, options)
+                raise _Desfazer
+        except _Desfazer:
+            pass
+
+    def _executar(
+        self, servico: ServicoCalendarFalso, retentador: Retentador, options: dict[str, Any]
+    ) -> None:
+        total_agendas = options["agendas"]
+        agendas = self._preparar(servico, total_agendas, options["eventos"])
+        self.stdout.write(
+            f"{total_agendas} agendas x {options['eventos']} eventos "
+            f"(latência {options['latencia_ms']} ms, 403 {options['taxa_403']:.0%}, "
+            f"429 {options['taxa_429']:.0%})"
+        )
+
+        self._fase(
+            "sync completo",
+            servico,
+            retentador,
+            lambda: sum(
+                sincronizar_agenda(a, servico, retentador=retentador).recebidos for a in agendas
+            ),
+        )
+
+        # ~5% dos eventos alterados no Google entre dois syncs.
+        for agenda in agendas:
+            for evento in servico.eventos(agenda.calendar_id)[::20]:
+                servico.alterar(agenda.calendar_id, evento["id"], {"summary": "Alterado"})
+        self._fase(
+            "sync incremental",
+            servico,
+            retentador,
+            lambda: sum(
+                sincronizar_agenda(a, servico, retentador=retentador).recebidos for a in agendas
+            ),
+        )
+
+        for agenda in agendas:
+            servico.expirar_tokens(agenda.calendar_id)
+        self._fase(
+            "resync após 410",
+            servico,
+            retentador,
+            lambda: sum(
+                sincronizar_agenda(a, servico, retentador=retentador).recebidos for a in agendas
+            ),
+        )
+
+        inicio, fim = self._alocar(agendas, options["alocacoes"])
+
+        def publicar() -> int:
+            total = 0
+            for agenda in agendas:
+                r = publicar_agenda(agenda, servico, inicio, fim, retentador=retentador)
+                total += r.inseridos + r.atualizados + r.inalterados
+            return total
+
+        self._fase("publish", servico, retentador, publicar)
+        self._fase("publish sem mudanças", servico, retentador, publicar)
+
+    def _preparar(
+        self, servico: ServicoCalendarFalso, total_agendas: int, eventos: int
+    ) -> list[AgendaGoogle]:
+        local = Local.objects.create(nome="Benchmark Calendar")
+        profissionais = Profissional.objects.bulk_create(
+            Profissional(nome=f"Bench {n}", email=f"bench{n}@example.com")
+            for n in range(total_agendas)
+        )
+        Sala.objects.bulk_create(Sala(local=local, nome=f"Bench {n}") for n in range(total_agendas))
+        agendas = AgendaGoogle.objects.bulk_create(
+            AgendaGoogle(profissional=p, calendar_id=f"bench-{p.pk}@cal", nome=p.nome)
+            for p in profissionais
+        )
+        inicio = timezone.now() - timedelta(days=7)
+        for agenda in agendas:
+            servico.semear(agenda.calendar_id, eventos, inicio=inicio)
+        return list(AgendaGoogle.objects.filter(pk__in=[a.pk for a in agendas]))
+
+    def _alocar(self, agendas: list[AgendaGoogle], por_agenda: int) -> tuple[Any, Any]:
+        salas = list(Sala.objects.filter(local__nome="Benchmark Calendar").order_by("pk"))
+        inicio = timezone.localdate() + timedelta(days=1)
+        dias = [inicio + timedelta(days=n) for n in range((por_agenda + 1) // 2)]
+        Alocacao.objects.bulk_create(
+            Alocacao(
+                profissional=agenda.profissional,
+                local=sala.local,
+                sala=sala,
+                data=dia,
+                turno=turno,
+                status=StatusAlocacao.REVISADO,
+            )
+            for agenda, sala in zip(agendas, salas, strict=False)
+            for dia in dias
+            for turno in (TurnoChoices.MANHA, TurnoChoices.TARDE)
+        )
+        return inicio, dias[-1]
+
+    def _fase(
+        self,
+        nome: str,
+        servico: ServicoCalendarFalso,
+        retentador: Retentador,
+        operacao: Callable[[], int],
+    ) -> None:
+        chamadas = servico.estatisticas.chamadas
+        erros = servico.estatisticas.erros_injetados
+        expirados = servico.estatisticas.tokens_expirados
+        retentativas = retentador.retentativas
+        queries = 0
+
+        def contar(execute: Callable[..., Any], *args: Any) -> Any:
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        with connection.execute_wrapper(contar):
+            comeco = time.perf_counter()
+            eventos = operacao()
+            duracao = time.perf_counter() - comeco
+        self.stdout.write(
+            f"{nome:<22} {duracao:8.2f}s {eventos:>7} eventos "
+            f"{eventos / duracao if duracao else 0:>9.0f}/s "
+            f"api={servico.estatisticas.chamadas - chamadas} "
+            f"erros={servico.estatisticas.erros_injetados - erros} "
+            f"retentativas={retentador.retentativas - retentativas} "
+            f"410={servico.estatisticas.tokens_expirados - expirados} "
+            f"queries={queries}"
+        )
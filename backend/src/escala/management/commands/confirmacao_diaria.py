@@ -0,0 +1,33 @@
+"""Executa a confirmação diária contra os eventos do Google Calendar."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from escala.confirmacao import executar_confirmacao_diaria
+
+
+class Command(BaseCommand):
+    help = "Reconcilia alocações com eventos do Google Calendar (confirmação diária)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--inicio", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+        parser.add_argument("--fim", type=date.fromisoformat, help="Data final (AAAA-MM-DD)")
+        parser.add_argument("--autor", default="job", help="Autor registrado na execução")
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Ignora a marca d'água e reexamina todo o horizonte",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        job = executar_confirmacao_diaria(
+            options["inicio"],
+            options["fim"],
+            autor=options["autor"],
+            completo=options["completo"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Job {job.pk}: {job.diff_resumo}"))
@@ -0,0 +1,28 @@
+"""Regenera a dimensão de vagas (VagaSala) a partir da capacidade das salas."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from escala.confirmacao import horizonte_padrao
+from escala.vagas import gerar
+
+
+class Command(BaseCommand):
+    help = "Gera as vagas por data, turno e sala (padrão: janela de planejamento)."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--inicio", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+        parser.add_argument("--fim", type=date.fromisoformat, help="Data final (AAAA-MM-DD)")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        padrao_inicio, padrao_fim = horizonte_padrao()
+        resultado = gerar(options["inicio"] or padrao_inicio, options["fim"] or padrao_fim)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado.gravadas} vagas gravadas, {resultado.removidas} removidas"
+            )
+        )
@@ -0,0 +1,32 @@
+"""Importa trocas de uma conversa exportada do WhatsApp (arquivo .txt)."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from escala.whatsapp import importar
+
+
+class Command(BaseCommand):
+    help = "Registra as trocas encontradas na exportação de uma conversa do WhatsApp."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("arquivo", type=Path, help="Exportação da conversa (.txt)")
+        parser.add_argument("--simular", action="store_true", help="Só conta as trocas, sem gravar")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        caminho: Path = options["arquivo"]
+        if not caminho.is_file():
+            raise CommandError(f"Arquivo não encontrado: {caminho}")
+        with caminho.open(encoding="utf-8-sig", errors="replace") as linhas:
+            resultado = importar(linhas, gravar=not options["simular"])
+        acao = "encontradas" if options["simular"] else "registradas"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado.mensagens} mensagens lidas, {resultado.criadas} trocas {acao}, "
+                f"{resultado.duplicadas} já registradas"
+            )
+        )
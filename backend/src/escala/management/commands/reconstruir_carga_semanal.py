@@ -0,0 +1,22 @@
+"""Refaz o livro de carga semanal (CargaSemanal) a partir das alocações."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from escala.carga import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a carga semanal por profissional a partir das alocações."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--inicio", type=date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+        parser.add_argument("--fim", type=date.fromisoformat, help="Data final (AAAA-MM-DD)")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        total = reconstruir(options["inicio"], options["fim"])
+        self.stdout.write(self.style.SUCCESS(f"{total} semanas recalculadas"))
@@ -0,0 +1,30 @@
+"""Renova os canais de push do Google Calendar próximos da expiração."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from escala.webhooks import renovar_canais
+
+
+class Command(BaseCommand):
+    help = "Reabre canais de webhook que expiram em breve; falhas caem para polling."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--antecedencia-horas",
+            type=int,
+            default=6,
+            help="Renova canais que expiram dentro deste número de horas",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        resultado = renovar_canais(antecedencia=timedelta(hours=options["antecedencia_horas"]))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['renovadas']} canais renovados, {resultado['falhas']} falhas"
+            )
+        )
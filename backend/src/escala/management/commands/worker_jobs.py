@@ -0,0 +1,64 @@
+"""Worker da fila de jobs: rode um processo por worker para escalar."""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from escala.jobs import executar, recuperar_expirados, reivindicar
+from escala.models import TipoJob
+
+
+class Command(BaseCommand):
+    help = "Reivindica e executa jobs pendentes de ExecucaoJob."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--tipos",
+            nargs="+",
+            choices=[valor for valor, _ in TipoJob.choices],
+            help="Restringe o worker a estes tipos de job",
+        )
+        parser.add_argument(
+            "--intervalo", type=float, default=2.0, help="Espera (s) quando a fila está vazia"
+        )
+        parser.add_argument(
+            "--uma-vez", action="store_true", help="Esvazia a fila e encerra (útil em cron/testes)"
+        )
+        parser.add_argument("--worker-id", default="", help="Identificação gravada no job")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        worker = options["worker_id"] or f"{socket.gethostname()}:{os.getpid()}"
+        self._parar = False
+        signal.signal(signal.SIGTERM, self._sinal)
+        signal.signal(signal.SIGINT, self._sinal)
+
+        executados = 0
+        while not self._parar:
+            close_old_connections()
+            recuperados = recuperar_expirados()
+            if recuperados:
+                self.stdout.write(f"{recuperados} job(s) com lease expirado devolvidos à fila")
+
+            job = reivindicar(worker, options["tipos"])
+            if job is None:
+                if options["uma_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+                continue
+
+            status = executar(job)
+            executados += 1
+            self.stdout.write(f"Job {job.pk} ({job.tipo}) tentativa {job.tentativas}: {status}")
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker} encerrado ({executados} jobs)"))
+
+    def _sinal(self, *_: Any) -> None:
+        # Termina o job atual antes de sair; o lease cobre o caso de kill -9.
+        self._parar = True
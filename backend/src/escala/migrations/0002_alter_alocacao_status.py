@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alocacao',
+            name='status',
+            field=models.CharField(choices=[('gerado', 'Gerado'), ('revisado', 'Revisado'), ('confirmado', 'Confirmado'), ('ajustado', 'Ajustado manualmente'), ('manual', 'Manual (sábados)'), ('conflito', 'Conflito com Google Calendar')], default='gerado', help_text='Status da alocação', max_length=20),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0011_alter_profissional_options_profissional_destacado'),
+        ('escala', '0002_alter_alocacao_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alocacao',
+            index=models.Index(fields=['updated_at'], name='escala_aloc_updated_cf78b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventocalendar',
+            index=models.Index(fields=['data_sync'], name='escala_even_data_sy_5754d3_idx'),
+        ),
+    ]
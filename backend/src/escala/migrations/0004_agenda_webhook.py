@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0003_indices_marca_dagua'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='erro_mensagem',
+            field=models.TextField(blank=True, help_text='Último erro da integração'),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='status',
+            field=models.CharField(choices=[('ok', 'OK'), ('needs_reauth', 'Requer nova autorização'), ('webhook_expired', 'Webhook expirado (polling)')], default='ok', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='sync_pendente_desde',
+            field=models.DateTimeField(blank=True, help_text='Notificações coalescidas aguardando sync (limpo quando o sync inicia)', null=True),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='ultimo_webhook_em',
+            field=models.DateTimeField(blank=True, help_text='Última notificação recebida', null=True),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='webhook_channel_id',
+            field=models.CharField(blank=True, db_index=True, help_text='ID do canal de push (watch)', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='webhook_expiracao',
+            field=models.DateTimeField(blank=True, help_text='Expiração do canal de push', null=True),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='webhook_resource_id',
+            field=models.CharField(blank=True, help_text='resourceId devolvido pelo Google', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='webhook_token',
+            field=models.CharField(blank=True, help_text='Nonce conferido em cada notificação', max_length=64),
+        ),
+    ]
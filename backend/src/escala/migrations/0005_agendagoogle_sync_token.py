@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0004_agenda_webhook'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendagoogle',
+            name='sync_token',
+            field=models.CharField(blank=True, help_text='syncToken do último sync incremental', max_length=255),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 23:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0005_agendagoogle_sync_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='execucaojob',
+            name='executar_apos',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Não é reivindicado por workers antes deste momento'),
+        ),
+        migrations.AddField(
+            model_name='execucaojob',
+            name='heartbeat_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='execucaojob',
+            name='lease_ate',
+            field=models.DateTimeField(blank=True, help_text='Sem heartbeat até aqui, o job volta para a fila', null=True),
+        ),
+        migrations.AddField(
+            model_name='execucaojob',
+            name='max_tentativas',
+            field=models.PositiveIntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='execucaojob',
+            name='tentativas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='execucaojob',
+            name='worker',
+            field=models.CharField(blank=True, help_text='Worker que detém o job', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='execucaojob',
+            name='status',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluido', 'Concluído'), ('erro', 'Erro'), ('cancelado', 'Cancelado'), ('dead_letter', 'Falha definitiva')], default='pendente', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='execucaojob',
+            index=models.Index(fields=['status', 'executar_apos'], name='escala_exec_status_7bde6c_idx'),
+        ),
+    ]
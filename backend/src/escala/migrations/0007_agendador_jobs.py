@@ -0,0 +1,65 @@
+# Generated by Django 6.0 on 2026-10-18 23:40
+
+import django.db.models.deletion
+import escala.cron
+from django.db import migrations, models
+
+# geracao_semanal nasce inativa: o gerador ainda não tem handler na fila.
+AGENDAMENTOS_PADRAO = [
+    ("geracao-semanal", "geracao_semanal", "0 6 * * 6", {"semanas": 4}, False),
+    ("confirmacao-diaria", "confirmacao_diaria", "0 5 * * *", {}, True),
+    ("renovacao-webhooks", "renovacao_webhook", "0 */6 * * *", {}, True),
+    ("polling-google", "polling_google", "*/15 * * * *", {}, True),
+]
+
+
+def criar_agendamentos(apps, schema_editor):
+    AgendamentoJob = apps.get_model("escala", "AgendamentoJob")
+    for nome, tipo, cron, payload, ativo in AGENDAMENTOS_PADRAO:
+        AgendamentoJob.objects.get_or_create(
+            nome=nome, defaults={"tipo": tipo, "cron": cron, "payload": payload, "ativo": ativo}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0006_fila_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiderancaAgendador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=50, unique=True)),
+                ('dono', models.CharField(max_length=100)),
+                ('expira_em', models.DateTimeField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='execucaojob',
+            name='tipo',
+            field=models.CharField(choices=[('geracao_semanal', 'Geração semanal'), ('confirmacao_diaria', 'Confirmação diária'), ('sync_google', 'Sincronização Google Calendar'), ('publicacao_google', 'Publicação no Google Calendar'), ('replanejamento', 'Replanejamento via prompt'), ('renovacao_webhook', 'Renovação de webhooks'), ('polling_google', 'Polling de agendas sem webhook')], max_length=30),
+        ),
+        migrations.CreateModel(
+            name='AgendamentoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.SlugField(unique=True)),
+                ('tipo', models.CharField(choices=[('geracao_semanal', 'Geração semanal'), ('confirmacao_diaria', 'Confirmação diária'), ('sync_google', 'Sincronização Google Calendar'), ('publicacao_google', 'Publicação no Google Calendar'), ('replanejamento', 'Replanejamento via prompt'), ('renovacao_webhook', 'Renovação de webhooks'), ('polling_google', 'Polling de agendas sem webhook')], max_length=30)),
+                ('cron', models.CharField(help_text='minuto hora dia mês dia-da-semana (fuso do projeto)', max_length=100, validators=[escala.cron.validar_cron])),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='Parâmetros do job')),
+                ('ativo', models.BooleanField(default=True)),
+                ('recuperacao', models.CharField(choices=[('pular', 'Pular (só o próximo horário)'), ('ultimo', 'Executar uma vez'), ('todos', 'Executar cada disparo perdido')], default='ultimo', max_length=10)),
+                ('max_atrasados', models.PositiveIntegerField(default=10, help_text="Máximo de disparos perdidos enfileirados no modo 'todos'")),
+                ('proxima_execucao', models.DateTimeField(blank=True, null=True)),
+                ('ultima_execucao', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='escala.execucaojob')),
+            ],
+            options={
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.RunPython(criar_agendamentos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 23:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0011_alter_profissional_options_profissional_destacado'),
+        ('escala', '0007_agendador_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlocacaoRemovida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alocacao_id', models.BigIntegerField(help_text='ID da alocação apagada')),
+                ('profissional_id', models.BigIntegerField()),
+                ('local_id', models.BigIntegerField()),
+                ('data', models.DateField()),
+                ('turno', models.CharField(choices=[('manha', 'Manhã'), ('tarde', 'Tarde')], max_length=12)),
+                ('removida_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Alocação removida',
+                'verbose_name_plural': 'Alocações removidas',
+                'ordering': ['removida_em'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='alocacao',
+            index=models.Index(fields=['data', 'updated_at'], name='escala_aloc_data_cd1c98_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alocacaoremovida',
+            index=models.Index(fields=['removida_em', 'data'], name='escala_aloc_removid_ce59d2_idx'),
+        ),
+    ]
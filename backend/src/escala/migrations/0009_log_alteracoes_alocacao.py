@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 23:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0008_alocacoes_delta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlteracaoAlocacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alocacao_id', models.BigIntegerField(help_text='ID da alocação alterada')),
+                ('tipo', models.CharField(choices=[('criada', 'Criada'), ('alterada', 'Alterada'), ('removida', 'Removida'), ('troca', 'Troca aplicada')], max_length=12)),
+                ('profissional_id', models.BigIntegerField()),
+                ('local_id', models.BigIntegerField()),
+                ('sala_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.DateField()),
+                ('turno', models.CharField(choices=[('manha', 'Manhã'), ('tarde', 'Tarde')], max_length=12)),
+                ('detalhes', models.JSONField(blank=True, default=dict)),
+                ('criada_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Alteração de alocação',
+                'verbose_name_plural': 'Alterações de alocações',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.DeleteModel(
+            name='AlocacaoRemovida',
+        ),
+        migrations.AddIndex(
+            model_name='alteracaoalocacao',
+            index=models.Index(fields=['criada_em', 'data'], name='escala_alte_criada__5fa0ed_idx'),
+        ),
+    ]
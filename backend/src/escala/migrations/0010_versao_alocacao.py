@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0009_log_alteracoes_alocacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alocacao',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Versão da linha para controle otimista de concorrência'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-19 00:35
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def liberar_sobreposicoes_existentes(apps, schema_editor):
+    """Sobreposições já gravadas viram exceções explícitas, exceto a mais antiga."""
+    Alocacao = apps.get_model("escala", "Alocacao")
+    grupos = (
+        Alocacao.objects.values("profissional_id", "data", "turno")
+        .annotate(total=Count("id"), primeira=Min("id"))
+        .filter(total__gt=1)
+    )
+    for grupo in grupos:
+        Alocacao.objects.filter(
+            profissional_id=grupo["profissional_id"], data=grupo["data"], turno=grupo["turno"]
+        ).exclude(pk=grupo["primeira"]).update(permite_sobreposicao=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0011_alter_profissional_options_profissional_destacado'),
+        ('escala', '0010_versao_alocacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alocacao',
+            name='permite_sobreposicao',
+            field=models.BooleanField(default=False, help_text='Exceção deliberada: fica fora da restrição de um turno por profissional'),
+        ),
+        migrations.RunPython(liberar_sobreposicoes_existentes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='alocacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('permite_sobreposicao', False)), fields=('profissional', 'data', 'turno'), name='unica_alocacao_profissional_turno'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-19 00:50
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_carga(apps, schema_editor):
+    """Carga inicial; depois, `manage.py reconstruir_carga_semanal` refaz o livro."""
+    Alocacao = apps.get_model("escala", "Alocacao")
+    CargaSemanal = apps.get_model("escala", "CargaSemanal")
+    por_semana = defaultdict(Counter)
+    for profissional_id, data in Alocacao.objects.values_list("profissional_id", "data").iterator():
+        por_semana[profissional_id, data - timedelta(days=data.weekday())][data] += 1
+    CargaSemanal.objects.bulk_create(
+        [
+            CargaSemanal(
+                profissional_id=profissional_id,
+                semana=semana,
+                turnos=sum(dias.values()),
+                horas=Decimal(6) * sum(dias.values()),
+                dobras=sum(1 for total in dias.values() if total >= 2),
+                sabados=sum(total for dia, total in dias.items() if dia.weekday() == 5),
+            )
+            for (profissional_id, semana), dias in por_semana.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0011_alter_profissional_options_profissional_destacado'),
+        ('escala', '0011_restricao_sobreposicao_profissional'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargaSemanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField(help_text='Segunda-feira da semana ISO')),
+                ('turnos', models.PositiveIntegerField(default=0)),
+                ('horas', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('dobras', models.PositiveIntegerField(default=0, help_text='Dias com dois ou mais turnos')),
+                ('sabados', models.PositiveIntegerField(default=0, help_text='Turnos em sábados')),
+                ('atualizada_em', models.DateTimeField(auto_now=True)),
+                ('profissional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cargas_semanais', to='cadastros.profissional')),
+            ],
+            options={
+                'verbose_name': 'Carga semanal',
+                'verbose_name_plural': 'Cargas semanais',
+                'ordering': ['semana', 'profissional'],
+                'constraints': [models.UniqueConstraint(fields=('profissional', 'semana'), name='unica_carga_profissional_semana')],
+            },
+        ),
+        migrations.RunPython(preencher_carga, migrations.RunPython.noop),
+    ]
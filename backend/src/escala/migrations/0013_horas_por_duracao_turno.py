@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 01:10
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def recalcular_horas(apps, schema_editor):
+    """Horas do livro pela duração de cada turno no local, não 6h fixas."""
+    Alocacao = apps.get_model("escala", "Alocacao")
+    CargaSemanal = apps.get_model("escala", "CargaSemanal")
+    DuracaoTurno = apps.get_model("cadastros", "DuracaoTurno")
+    duracoes = {
+        (local_id, turno, dia): horas
+        for local_id, turno, dia, horas in DuracaoTurno.objects.values_list(
+            "local_id", "turno", "dia_semana", "horas"
+        )
+    }
+    horas = defaultdict(Decimal)
+    linhas = Alocacao.objects.values_list("profissional_id", "data", "local_id", "turno")
+    for profissional_id, data, local_id, turno in linhas.iterator():
+        semana = data - timedelta(days=data.weekday())
+        horas[profissional_id, semana] += duracoes.get(
+            (local_id, turno, data.weekday()), Decimal(6)
+        )
+    cargas = list(CargaSemanal.objects.all())
+    for linha in cargas:
+        linha.horas = horas[linha.profissional_id, linha.semana]
+    CargaSemanal.objects.bulk_update(cargas, ["horas"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0012_duracao_turno'),
+        ('escala', '0012_carga_semanal'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular_horas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0012_duracao_turno'),
+        ('escala', '0013_horas_por_duracao_turno'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VagaSala',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('turno', models.CharField(choices=[('manha', 'Manhã'), ('tarde', 'Tarde')], max_length=12)),
+                ('capacidade', models.PositiveSmallIntegerField()),
+                ('inicio', models.DateTimeField()),
+                ('fim', models.DateTimeField()),
+                ('local', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vagas', to='cadastros.local')),
+                ('sala', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vagas', to='cadastros.sala')),
+            ],
+            options={
+                'verbose_name': 'Vaga de sala',
+                'verbose_name_plural': 'Vagas de sala',
+                'ordering': ['data', 'turno', 'local', 'sala'],
+                'indexes': [models.Index(fields=['data', 'local'], name='escala_vaga_data_c12842_idx')],
+                'constraints': [models.UniqueConstraint(fields=('sala', 'data', 'turno'), name='unica_vaga_sala_turno')],
+            },
+        ),
+    ]
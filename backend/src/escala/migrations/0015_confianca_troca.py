@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0014_vaga_sala'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='troca',
+            name='confianca',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Confiança (0 a 1) da troca extraída automaticamente, para revisão', max_digits=3, null=True),
+        ),
+    ]
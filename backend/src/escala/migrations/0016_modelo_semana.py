@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-19 02:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0013_turnos_disponiveis'),
+        ('escala', '0015_confianca_troca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModeloSemana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=120, unique=True)),
+                ('descricao', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Modelo de semana',
+                'verbose_name_plural': 'Modelos de semana',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemModeloSemana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia_semana', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')])),
+                ('turno', models.CharField(choices=[('manha', 'Manhã'), ('tarde', 'Tarde')], max_length=12)),
+                ('local', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_modelo', to='cadastros.local')),
+                ('profissional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_modelo', to='cadastros.profissional')),
+                ('sala', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_modelo', to='cadastros.sala')),
+                ('modelo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='escala.modelosemana')),
+            ],
+            options={
+                'ordering': ['modelo', 'dia_semana', 'turno', 'sala'],
+                'constraints': [models.UniqueConstraint(fields=('modelo', 'sala', 'dia_semana', 'turno'), name='unico_item_modelo_sala_turno'), models.UniqueConstraint(fields=('modelo', 'profissional', 'dia_semana', 'turno'), name='unico_item_modelo_profissional_turno')],
+            },
+        ),
+    ]
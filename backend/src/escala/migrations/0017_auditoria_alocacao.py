@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-19 02:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escala', '0016_modelo_semana'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditoriaAlocacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alocacao_id', models.BigIntegerField(help_text='ID da alocação alterada')),
+                ('antes', models.JSONField(blank=True, null=True)),
+                ('depois', models.JSONField(blank=True, null=True)),
+                ('sala_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.DateField()),
+                ('turno', models.CharField(choices=[('manha', 'Manhã'), ('tarde', 'Tarde')], max_length=12)),
+                ('autor', models.CharField(blank=True, max_length=100)),
+                ('motivo', models.TextField(blank=True)),
+                ('fonte', models.CharField(choices=[('ui', 'Interface'), ('prompt', 'Prompt'), ('job', 'Job'), ('troca', 'Troca'), ('sistema', 'Sistema')], default='sistema', max_length=10)),
+                ('job_id', models.BigIntegerField(blank=True, help_text='ExecucaoJob que fez a alteração', null=True)),
+                ('criada_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Auditoria de alocação',
+                'verbose_name_plural': 'Auditoria de alocações',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['alocacao_id', 'criada_em'], name='escala_audi_alocaca_0bfbfd_idx'), models.Index(fields=['sala_id', 'data', 'turno', 'criada_em'], name='escala_audi_sala_id_287028_idx'), models.Index(condition=models.Q(('job_id__isnull', False)), fields=['job_id', 'criada_em'], name='auditoria_alocacao_job')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-19 02:40
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def preencher_vagas(apps, schema_editor):
+    """Vagas de hoje até o fim da janela; histórico com `manage.py gerar_vagas`."""
+    CapacidadeSala = apps.get_model("cadastros", "CapacidadeSala")
+    PremissasGlobais = apps.get_model("cadastros", "PremissasGlobais")
+    VagaSala = apps.get_model("escala", "VagaSala")
+    premissas = PremissasGlobais.objects.filter(singleton=True).first()
+    semanas = premissas.janela_planejamento_semanas if premissas else 4
+    inicio = timezone.localdate()
+    fim = inicio + timedelta(weeks=semanas)
+
+    por_dia = defaultdict(list)
+    capacidades = CapacidadeSala.objects.filter(
+        sala__ativa=True, sala__local__ativo=True, capacidade__gt=0
+    ).select_related("sala__local")
+    for capacidade in capacidades:
+        por_dia[capacidade.dia_semana].append(capacidade)
+
+    tz = timezone.get_default_timezone()
+    vagas = []
+    data = inicio
+    while data <= fim:
+        for capacidade in por_dia[data.weekday()]:
+            local = capacidade.sala.local
+            # Mesma regra de `Local.horario`: sábado tem horário próprio.
+            if data.weekday() == 5:
+                horario = (local.sabado_inicio, local.sabado_fim)
+            elif capacidade.turno == "tarde":
+                horario = (local.tarde_inicio, local.tarde_fim)
+            else:
+                horario = (local.manha_inicio, local.manha_fim)
+            vagas.append(
+                VagaSala(
+                    local_id=local.pk,
+                    sala_id=capacidade.sala_id,
+                    data=data,
+                    turno=capacidade.turno,
+                    capacidade=capacidade.capacidade,
+                    inicio=timezone.make_aware(datetime.combine(data, horario[0]), tz),
+                    fim=timezone.make_aware(datetime.combine(data, horario[1]), tz),
+                )
+            )
+        data += timedelta(days=1)
+    VagaSala.objects.bulk_create(vagas, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0013_turnos_disponiveis'),
+        ('escala', '0017_auditoria_alocacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_vagas, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,17 @@
 
 from __future__ import annotations
 
-from cadastros.models import Local, Profissional, Sala, TurnoChoices
-from django.db import models
+from datetime import date
+from typing import Any
+
+from cadastros.models import DiaSemana, Local, Profissional, Sala, TurnoChoices
+from django.core.exceptions import PermissionDenied
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .cron import validar_cron
+
 
 class OrigemAlocacao(models.TextChoices):
     """Origem da alocação."""
@@ -23,6 +30,7 @@ class StatusAlocacao(models.TextChoices):
     CONFIRMADO = "confirmado", _("Confirmado")
     AJUSTADO = "ajustado", _("Ajustado manualmente")
     MANUAL = "manual", _("Manual (sábados)")
+    CONFLITO = "conflito", _("Conflito com Google Calendar")
 
 
 class NivelInseguranca(models.TextChoices):
@@ -33,6 +41,9 @@ class NivelInseguranca(models.TextChoices):
     ALTA = "alta", _("Alta (semanas 3-4)")
 
 
+CAMPOS_ESTADO = frozenset(["profissional_id", "local_id", "sala_id", "data", "turno", "status"])
+
+
 class Alocacao(models.Model):
     """Alocação de profissional em local/sala/turno."""
 
@@ -67,6 +78,13 @@ class Alocacao(models.Model):
         help_text="Metadados: pesos da heurística, motivo, autor, etc.",
     )
     observacoes = models.TextField(blank=True, help_text="Observações adicionais")
+    permite_sobreposicao = models.BooleanField(
+        default=False,
+        help_text="Exceção deliberada: fica fora da restrição de um turno por profissional",
+    )
+    version = models.PositiveIntegerField(
+        default=1, help_text="Versão da linha para controle otimista de concorrência"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -77,11 +95,19 @@ class Alocacao(models.Model):
                 fields=["sala", "data", "turno"],
                 name="unica_alocacao_sala_turno",
             ),
+            models.UniqueConstraint(
+                fields=["profissional", "data", "turno"],
+                condition=models.Q(permite_sobreposicao=False),
+                name="unica_alocacao_profissional_turno",
+            ),
         ]
         indexes = [
             models.Index(fields=["data", "turno"]),
             models.Index(fields=["profissional", "data"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["updated_at"]),
+            # ETag da listagem por período: max(updated_at) sai do índice.
+            models.Index(fields=["data", "updated_at"]),
         ]
 
     def __str__(self) -> str:
@@ -91,6 +117,273 @@ class Alocacao(models.Model):
             f"{self.data} ({turno_display})"
         )
 
+    # Profissional e data como lidos do banco: ao mudar, a carga semanal
+    # anterior (`carga.py`) também precisa ser recalculada.
+    chave_carga_lida: tuple[int, date] | None = None
+    # Estado como lido do banco: o "antes" da auditoria (AuditoriaAlocacao).
+    estado_lido: list[Any] | None = None
+
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Any, values: Any, **kwargs: Any) -> Alocacao:
+        instance = super().from_db(db, field_names, values, **kwargs)
+        if "profissional_id" in instance.__dict__ and "data" in instance.__dict__:
+            instance.chave_carga_lida = (instance.profissional_id, instance.data)
+        if CAMPOS_ESTADO.issubset(instance.__dict__):
+            instance.estado_lido = instance.estado()
+        return instance
+
+    def estado(self) -> list[Any]:
+        """Tupla compacta [profissional, local, sala, data, turno, status]."""
+        return [
+            self.profissional_id,
+            self.local_id,
+            self.sala_id,
+            str(self.data),
+            self.turno,
+            self.status,
+        ]
+
+    # O log de alterações é gravado pelos sinais post_save/post_delete
+    # (`alteracoes.py`); a transação garante que edição e log andem juntos.
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding:
+            # Toda gravação avança a versão: clientes que leram a anterior
+            # recebem 409 (ver `alteracoes.atualizar_com_versao`).
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        with transaction.atomic(savepoint=False):
+            return super().delete(*args, **kwargs)
+
+
+class CargaSemanal(models.Model):
+    """Carga de um profissional numa semana ISO, mantida a cada gravação de alocação.
+
+    As linhas são recalculadas na transação da edição (`carga.py`); semanas
+    sem alocações não têm linha.
+    """
+
+    profissional = models.ForeignKey(
+        Profissional, on_delete=models.CASCADE, related_name="cargas_semanais"
+    )
+    semana = models.DateField(help_text="Segunda-feira da semana ISO")
+    turnos = models.PositiveIntegerField(default=0)
+    horas = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    dobras = models.PositiveIntegerField(default=0, help_text="Dias com dois ou mais turnos")
+    sabados = models.PositiveIntegerField(default=0, help_text="Turnos em sábados")
+    atualizada_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["semana", "profissional"]
+        verbose_name = "Carga semanal"
+        verbose_name_plural = "Cargas semanais"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profissional", "semana"], name="unica_carga_profissional_semana"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.profissional_id} - semana de {self.semana}: {self.turnos} turnos"
+
+
+class VagaSala(models.Model):
+    """Turno de uma sala numa data, que deveria ter alguém alocado.
+
+    Dimensão materializada da recorrência semanal de CapacidadeSala sobre as
+    datas da janela de planejamento (`vagas.py`), com a janela do turno em
+    datetimes do fuso do projeto. Cobertura e gaps saem de uma junção (ou
+    anti-junção) com Alocacao por (sala, data, turno).
+    """
+
+    local = models.ForeignKey(Local, on_delete=models.CASCADE, related_name="vagas")
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE, related_name="vagas")
+    data = models.DateField()
+    turno = models.CharField(max_length=12, choices=TurnoChoices.choices)
+    capacidade = models.PositiveSmallIntegerField()
+    inicio = models.DateTimeField()
+    fim = models.DateTimeField()
+
+    class Meta:
+        ordering = ["data", "turno", "local", "sala"]
+        verbose_name = "Vaga de sala"
+        verbose_name_plural = "Vagas de sala"
+        constraints = [
+            models.UniqueConstraint(fields=["sala", "data", "turno"], name="unica_vaga_sala_turno"),
+        ]
+        indexes = [
+            models.Index(fields=["data", "local"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.sala_id} - {self.data} ({self.turno})"
+
+
+class ModeloSemana(models.Model):
+    """Semana-modelo salva para preencher semanas futuras (`copia.py`)."""
+
+    nome = models.CharField(max_length=120, unique=True)
+    descricao = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["nome"]
+        verbose_name = "Modelo de semana"
+        verbose_name_plural = "Modelos de semana"
+
+    def __str__(self) -> str:
+        return self.nome
+
+
+class ItemModeloSemana(models.Model):
+    """Alocação do modelo por dia da semana, turno e sala."""
+
+    modelo = models.ForeignKey(ModeloSemana, on_delete=models.CASCADE, related_name="itens")
+    dia_semana = models.PositiveSmallIntegerField(choices=DiaSemana.choices)
+    turno = models.CharField(max_length=12, choices=TurnoChoices.choices)
+    local = models.ForeignKey(Local, on_delete=models.CASCADE, related_name="itens_modelo")
+    sala = models.ForeignKey(Sala, on_delete=models.CASCADE, related_name="itens_modelo")
+    profissional = models.ForeignKey(
+        Profissional, on_delete=models.CASCADE, related_name="itens_modelo"
+    )
+
+    class Meta:
+        ordering = ["modelo", "dia_semana", "turno", "sala"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["modelo", "sala", "dia_semana", "turno"],
+                name="unico_item_modelo_sala_turno",
+            ),
+            models.UniqueConstraint(
+                fields=["modelo", "profissional", "dia_semana", "turno"],
+                name="unico_item_modelo_profissional_turno",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.modelo_id} {self.get_dia_semana_display()} ({self.turno}): {self.sala_id}"
+
+
+class TipoAlteracao(models.TextChoices):
+    """Tipo de entrada no log de alterações de alocações."""
+
+    CRIADA = "criada", _("Criada")
+    ALTERADA = "alterada", _("Alterada")
+    REMOVIDA = "removida", _("Removida")
+    TROCA = "troca", _("Troca aplicada")
+
+
+class AlteracaoAlocacao(models.Model):
+    """Log de alterações de alocações, gravado na mesma transação da edição.
+
+    Alimenta o stream do quadro ao vivo e, com as entradas `removida`, os
+    tombstones do modo delta da listagem.
+    """
+
+    alocacao_id = models.BigIntegerField(help_text="ID da alocação alterada")
+    tipo = models.CharField(max_length=12, choices=TipoAlteracao.choices)
+    profissional_id = models.BigIntegerField()
+    local_id = models.BigIntegerField()
+    sala_id = models.BigIntegerField(null=True, blank=True)
+    data = models.DateField()
+    turno = models.CharField(max_length=12, choices=TurnoChoices.choices)
+    detalhes = models.JSONField(default=dict, blank=True)
+    criada_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Alteração de alocação"
+        verbose_name_plural = "Alterações de alocações"
+        indexes = [
+            models.Index(fields=["criada_em", "data"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Alocação {self.alocacao_id} {self.tipo} em {self.criada_em:%Y-%m-%d %H:%M}"
+
+
+class FonteAlteracao(models.TextChoices):
+    """De onde veio uma alteração de alocação (auditoria)."""
+
+    UI = "ui", _("Interface")
+    PROMPT = "prompt", _("Prompt")
+    JOB = "job", _("Job")
+    TROCA = "troca", _("Troca")
+    SISTEMA = "sistema", _("Sistema")
+
+
+class SomenteInsercaoQuerySet(models.QuerySet):
+    """QuerySet que recusa UPDATE e DELETE em massa."""
+
+    def update(self, **kwargs: Any) -> int:
+        raise PermissionDenied("Auditoria de alocações não pode ser alterada")
+
+    def delete(self) -> tuple[int, dict[str, int]]:
+        raise PermissionDenied("Auditoria de alocações não pode ser apagada")
+
+
+class AuditoriaAlocacao(models.Model):
+    """Auditoria das alterações de alocação: só inserção, sem retenção.
+
+    Uma linha por mudança, gravada na mesma transação (sinais de Alocacao ou
+    `bulk_create` junto do lote), com o estado de antes e de depois como
+    tupla compacta `[profissional, local, sala, data, turno, status]` (antes
+    nulo na criação, depois nulo na remoção), autor, motivo e fonte. O slot
+    (sala, data, turno) é o de depois; numa remoção, o de antes. Diferente de
+    AlteracaoAlocacao, nunca é limpa: ids são inteiros soltos (não FKs) para
+    sobreviver à remoção da alocação e do job.
+    """
+
+    alocacao_id = models.BigIntegerField(help_text="ID da alocação alterada")
+    antes = models.JSONField(null=True, blank=True)
+    depois = models.JSONField(null=True, blank=True)
+    sala_id = models.BigIntegerField(null=True, blank=True)
+    data = models.DateField()
+    turno = models.CharField(max_length=12, choices=TurnoChoices.choices)
+    autor = models.CharField(max_length=100, blank=True)
+    motivo = models.TextField(blank=True)
+    fonte = models.CharField(
+        max_length=10, choices=FonteAlteracao.choices, default=FonteAlteracao.SISTEMA
+    )
+    job_id = models.BigIntegerField(
+        null=True, blank=True, help_text="ExecucaoJob que fez a alteração"
+    )
+    criada_em = models.DateTimeField(default=timezone.now)
+
+    objects = SomenteInsercaoQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Auditoria de alocação"
+        verbose_name_plural = "Auditoria de alocações"
+        indexes = [
+            models.Index(fields=["alocacao_id", "criada_em"]),
+            # Histórico do slot.
+            models.Index(fields=["sala_id", "data", "turno", "criada_em"]),
+            # Tudo o que um job alterou.
+            models.Index(
+                fields=["job_id", "criada_em"],
+                condition=models.Q(job_id__isnull=False),
+                name="auditoria_alocacao_job",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Alocação {self.alocacao_id} ({self.fonte}) em {self.criada_em:%Y-%m-%d %H:%M}"
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding:
+            raise PermissionDenied("Auditoria de alocações não pode ser alterada")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        raise PermissionDenied("Auditoria de alocações não pode ser apagada")
+
 
 class TipoJob(models.TextChoices):
     """Tipo de job executado."""
@@ -100,6 +393,8 @@ class TipoJob(models.TextChoices):
     SYNC_GOOGLE = "sync_google", _("Sincronização Google Calendar")
     PUBLICACAO_GOOGLE = "publicacao_google", _("Publicação no Google Calendar")
     REPLANEJAMENTO = "replanejamento", _("Replanejamento via prompt")
+    RENOVACAO_WEBHOOK = "renovacao_webhook", _("Renovação de webhooks")
+    POLLING_GOOGLE = "polling_google", _("Polling de agendas sem webhook")
 
 
 class StatusJob(models.TextChoices):
@@ -110,6 +405,7 @@ class StatusJob(models.TextChoices):
     CONCLUIDO = "concluido", _("Concluído")
     ERRO = "erro", _("Erro")
     CANCELADO = "cancelado", _("Cancelado")
+    DEAD_LETTER = "dead_letter", _("Falha definitiva")
 
 
 class ExecucaoJob(models.Model):
@@ -128,18 +424,79 @@ class ExecucaoJob(models.Model):
         help_text="Log estruturado: eventos, erros, métricas",
     )
     autor = models.CharField(max_length=100, blank=True, help_text="job/prompt/manual/usuario")
+    executar_apos = models.DateTimeField(
+        default=timezone.now, help_text="Não é reivindicado por workers antes deste momento"
+    )
+    tentativas = models.PositiveIntegerField(default=0)
+    max_tentativas = models.PositiveIntegerField(default=5)
+    worker = models.CharField(max_length=100, blank=True, help_text="Worker que detém o job")
+    lease_ate = models.DateTimeField(
+        null=True, blank=True, help_text="Sem heartbeat até aqui, o job volta para a fila"
+    )
+    heartbeat_em = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-iniciou_em"]
         indexes = [
             models.Index(fields=["-iniciou_em"]),
             models.Index(fields=["tipo", "status"]),
+            models.Index(fields=["status", "executar_apos"]),
         ]
 
     def __str__(self) -> str:
         return f"{self.get_tipo_display()} - {self.get_status_display()} ({self.iniciou_em})"
 
 
+class RecuperacaoAtrasos(models.TextChoices):
+    """O que fazer com disparos perdidos enquanto o agendador esteve parado."""
+
+    PULAR = "pular", _("Pular (só o próximo horário)")
+    ULTIMO = "ultimo", _("Executar uma vez")
+    TODOS = "todos", _("Executar cada disparo perdido")
+
+
+class AgendamentoJob(models.Model):
+    """Rotina periódica: enfileira um ExecucaoJob a cada disparo da expressão cron."""
+
+    nome = models.SlugField(max_length=50, unique=True)
+    tipo = models.CharField(max_length=30, choices=TipoJob.choices)
+    cron = models.CharField(
+        max_length=100,
+        validators=[validar_cron],
+        help_text="minuto hora dia mês dia-da-semana (fuso do projeto)",
+    )
+    payload = models.JSONField(default=dict, blank=True, help_text="Parâmetros do job")
+    ativo = models.BooleanField(default=True)
+    recuperacao = models.CharField(
+        max_length=10, choices=RecuperacaoAtrasos.choices, default=RecuperacaoAtrasos.ULTIMO
+    )
+    max_atrasados = models.PositiveIntegerField(
+        default=10, help_text="Máximo de disparos perdidos enfileirados no modo 'todos'"
+    )
+    proxima_execucao = models.DateTimeField(null=True, blank=True)
+    ultima_execucao = models.DateTimeField(null=True, blank=True)
+    ultimo_job = models.ForeignKey(
+        ExecucaoJob, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        ordering = ["nome"]
+
+    def __str__(self) -> str:
+        return f"{self.nome} ({self.cron})"
+
+
+class LiderancaAgendador(models.Model):
+    """Lease do agendador: só a instância dona enfileira disparos."""
+
+    nome = models.CharField(max_length=50, unique=True)
+    dono = models.CharField(max_length=100)
+    expira_em = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.nome}: {self.dono} até {self.expira_em}"
+
+
 class AcaoPrompt(models.TextChoices):
     """Ação do prompt."""
 
@@ -228,6 +585,13 @@ class Troca(models.Model):
         choices=StatusTroca.choices,
         default=StatusTroca.REGISTRADA,
     )
+    confianca = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Confiança (0 a 1) da troca extraída automaticamente, para revisão",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -245,6 +609,14 @@ class Troca(models.Model):
         )
 
 
+class StatusAgenda(models.TextChoices):
+    """Estado da integração de uma agenda."""
+
+    OK = "ok", _("OK")
+    NEEDS_REAUTH = "needs_reauth", _("Requer nova autorização")
+    WEBHOOK_EXPIRADO = "webhook_expired", _("Webhook expirado (polling)")
+
+
 class AgendaGoogle(models.Model):
     """Configuração de agenda Google Calendar por profissional."""
 
@@ -272,6 +644,31 @@ class AgendaGoogle(models.Model):
         default=True, help_text="Se pode publicar eventos nesta agenda"
     )
     ativa = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=StatusAgenda.choices, default=StatusAgenda.OK)
+    erro_mensagem = models.TextField(blank=True, help_text="Último erro da integração")
+    sync_token = models.CharField(
+        max_length=255, blank=True, help_text="syncToken do último sync incremental"
+    )
+    webhook_channel_id = models.CharField(
+        max_length=64, blank=True, db_index=True, help_text="ID do canal de push (watch)"
+    )
+    webhook_resource_id = models.CharField(
+        max_length=255, blank=True, help_text="resourceId devolvido pelo Google"
+    )
+    webhook_token = models.CharField(
+        max_length=64, blank=True, help_text="Nonce conferido em cada notificação"
+    )
+    webhook_expiracao = models.DateTimeField(
+        null=True, blank=True, help_text="Expiração do canal de push"
+    )
+    ultimo_webhook_em = models.DateTimeField(
+        null=True, blank=True, help_text="Última notificação recebida"
+    )
+    sync_pendente_desde = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Notificações coalescidas aguardando sync (limpo quando o sync inicia)",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -337,6 +734,7 @@ class EventoCalendar(models.Model):
         indexes = [
             models.Index(fields=["data_inicio"]),
             models.Index(fields=["agenda", "data_inicio"]),
+            models.Index(fields=["data_sync"]),
         ]
 
     def __str__(self) -> str:
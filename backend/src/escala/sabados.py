@@ -0,0 +1,285 @@
+"""Importação da escala mensal de sábado (Savassi/Lourdes) por planilha.
+
+A escala combinada entre as profissionais chega como uma grade: a primeira
+coluna traz a data (`07/03/2026` ou `2026-03-07`), uma coluna opcional
+`turno` (padrão: manhã, o turno único de sábado) e as demais colunas são as
+salas, com o cabeçalho como na listagem (`Savassi - Sala 1` ou
+`Savassi/Sala 1`). Cada célula preenchida é o nome da profissional naquela
+sala e sábado. Aceita CSV (`,` ou `;`) e XLSX.
+
+Salas e nomes são resolvidos pelo cache de cadastros, sem consulta por
+célula. O mês inteiro é validado em conjunto, com uma consulta para as
+alocações existentes nas datas da planilha e outra para as trocas
+registradas: sala ocupada por outra pessoa, profissional em dois lugares no
+mesmo turno (na planilha ou no banco) e data que não é sábado são erros;
+troca registrada que envolve a célula vira aviso. Com algum erro nada é
+gravado. Sem erros, as alocações entram com um `bulk_create` (origem e
+status manuais) na mesma transação do log de alterações e do livro de
+carga; células já lançadas com a mesma profissional são mantidas.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import chain
+from typing import IO, Any
+
+from cadastros import cache
+from cadastros.models import DiaSemana, Profissional, Sala, TurnoChoices
+from cadastros.nomes import normalizar
+from django.db import transaction
+
+from . import alteracoes
+from .models import Alocacao, OrigemAlocacao, StatusAlocacao, StatusTroca, TipoAlteracao, Troca
+
+TAMANHO_LOTE = 500
+
+CRIADA = "criada"
+EXISTENTE = "existente"
+ERRO = "erro"
+
+
+class PlanilhaInvalida(Exception):
+    """Arquivo ou cabeçalho que não descreve uma grade de sábados."""
+
+
+@dataclass
+class LinhaRelatorio:
+    linha: int
+    coluna: str
+    data: date | None = None
+    turno: str = TurnoChoices.MANHA
+    sala: int | None = None
+    profissional: int | None = None
+    situacao: str = CRIADA
+    erros: list[str] = field(default_factory=list)
+    avisos: list[str] = field(default_factory=list)
+
+    def erro(self, mensagem: str) -> None:
+        self.situacao = ERRO
+        self.erros.append(mensagem)
+
+
+@dataclass
+class ResultadoSabados:
+    criadas: int = 0
+    existentes: int = 0
+    erros: int = 0
+    avisos: int = 0
+    alocacoes: list[int] = field(default_factory=list)
+    linhas: list[LinhaRelatorio] = field(default_factory=list)
+
+
+def ler_planilha(arquivo: IO[bytes], nome: str) -> Iterator[Sequence[Any]]:
+    """Linhas (listas de células) de um CSV ou XLSX, lidas em streaming."""
+    if nome.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+        if planilha is None:
+            raise PlanilhaInvalida("Planilha vazia")
+        yield from planilha.iter_rows(values_only=True)
+        return
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace", newline="")
+    primeira = texto.readline()
+    delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+    yield from csv.reader(chain([primeira], texto), delimiter=delimitador)
+
+
+def _texto(celula: Any) -> str:
+    return "" if celula is None else str(celula).strip()
+
+
+def _data(celula: Any) -> date | None:
+    if isinstance(celula, datetime):
+        return celula.date()
+    if isinstance(celula, date):
+        return celula
+    texto = _texto(celula)
+    for formato in ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _salas_por_nome() -> dict[tuple[str, str], Sala]:
+    return {
+        (normalizar(sala.local.nome), normalizar(sala.nome)): sala
+        for sala in cache.salas().values()
+        if sala.ativa and sala.local.ativo
+    }
+
+
+def _cabecalho(cabecalho: Sequence[Any]) -> tuple[int | None, dict[int, tuple[str, Sala]]]:
+    """Coluna do turno (se houver) e sala de cada coluna de salas."""
+    if not cabecalho or normalizar(_texto(cabecalho[0])) != "data":
+        raise PlanilhaInvalida("A primeira coluna do cabeçalho deve ser 'data'")
+    por_nome = _salas_por_nome()
+    coluna_turno = None
+    salas: dict[int, tuple[str, Sala]] = {}
+    for coluna, celula in enumerate(cabecalho[1:], start=1):
+        rotulo = _texto(celula)
+        if not rotulo:
+            continue
+        if normalizar(rotulo) == "turno":
+            coluna_turno = coluna
+            continue
+        partes = [normalizar(parte) for parte in re.split(r"\s*[/\-–]\s*", rotulo, maxsplit=1)]
+        sala = por_nome.get((partes[0], partes[-1])) if len(partes) == 2 else None
+        if sala is None:
+            raise PlanilhaInvalida(f"Sala não encontrada no cabeçalho: '{rotulo}'")
+        salas[coluna] = (rotulo, sala)
+    if not salas:
+        raise PlanilhaInvalida("O cabeçalho não tem colunas de salas")
+    return coluna_turno, salas
+
+
+def _celulas(linhas: Iterable[Sequence[Any]]) -> Iterator[LinhaRelatorio]:
+    """Uma entrada por célula preenchida, com os erros de leitura já marcados."""
+    iterador = iter(linhas)
+    cabecalho = next((linha for linha in iterador if any(map(_texto, linha))), None)
+    if cabecalho is None:
+        raise PlanilhaInvalida("Planilha vazia")
+    coluna_turno, salas = _cabecalho(cabecalho)
+    indice = cache.indice_nomes()
+    for numero, linha in enumerate(iterador, start=2):
+        if not any(map(_texto, linha)):
+            continue
+        data = _data(linha[0])
+        turno = (
+            normalizar(_texto(linha[coluna_turno]))
+            if coluna_turno is not None and coluna_turno < len(linha)
+            else ""
+        )
+        for coluna, (rotulo, sala) in salas.items():
+            nome = _texto(linha[coluna]) if coluna < len(linha) else ""
+            if not nome:
+                continue
+            item = LinhaRelatorio(linha=numero, coluna=rotulo, data=data, sala=sala.pk)
+            if data is None:
+                item.erro(f"Data inválida: '{_texto(linha[0])}'")
+            elif data.weekday() != DiaSemana.SABADO:
+                item.erro(f"{data:%d/%m/%Y} não é sábado")
+            if turno and turno not in TurnoChoices.values:
+                item.erro(f"Turno inválido: '{turno}'")
+            elif turno:
+                item.turno = turno
+            item.profissional = indice.profissional(nome)
+            if item.profissional is None:
+                item.erro(f"Profissional não encontrado: '{nome}'")
+            yield item
+
+
+def _validar(itens: list[LinhaRelatorio]) -> None:
+    """Confere o mês inteiro contra a própria planilha, as alocações e as trocas."""
+    validos = [item for item in itens if item.situacao != ERRO]
+    datas = {item.data for item in validos if item.data is not None}
+    if not datas:
+        return
+
+    salas = cache.salas()
+    por_sala: dict[tuple[int | None, date | None, str], LinhaRelatorio] = {}
+    por_profissional: dict[tuple[int | None, date | None, str], LinhaRelatorio] = {}
+    for item in validos:
+        chave_sala = (item.sala, item.data, item.turno)
+        chave_profissional = (item.profissional, item.data, item.turno)
+        if chave_sala in por_sala:
+            item.erro(f"Sala repetida na planilha (linha {por_sala[chave_sala].linha})")
+        elif chave_profissional in por_profissional:
+            outra = por_profissional[chave_profissional]
+            item.erro(f"Profissional já está em {outra.coluna} (linha {outra.linha})")
+        por_sala.setdefault(chave_sala, item)
+        por_profissional.setdefault(chave_profissional, item)
+
+    existentes = Alocacao.objects.filter(data__in=datas).order_by()
+    ocupadas: list[tuple[LinhaRelatorio, int]] = []
+    for sala_id, profissional_id, data, turno, sobreposicao in existentes.values_list(
+        "sala_id", "profissional_id", "data", "turno", "permite_sobreposicao"
+    ):
+        na_sala = por_sala.get((sala_id, data, turno))
+        if na_sala is not None and na_sala.situacao != ERRO:
+            if na_sala.profissional == profissional_id:
+                na_sala.situacao = EXISTENTE
+            else:
+                ocupadas.append((na_sala, profissional_id))
+        do_profissional = por_profissional.get((profissional_id, data, turno))
+        if do_profissional is not None and do_profissional.sala != sala_id and not sobreposicao:
+            do_profissional.erro(f"Profissional já alocado neste horário em {salas.get(sala_id)}")
+
+    trocas = (
+        Troca.objects.filter(data__in=datas, status=StatusTroca.REGISTRADA)
+        .order_by()
+        .values_list("pk", "data", "turno", "profissional_origem_id", "profissional_destino_id")
+    )
+    avisos_troca: list[tuple[LinhaRelatorio, int, int, bool]] = []
+    for pk, data, turno, origem, destino in trocas:
+        if sai := por_profissional.get((origem, data, turno)):
+            avisos_troca.append((sai, pk, destino, True))
+        if entra := por_profissional.get((destino, data, turno)):
+            avisos_troca.append((entra, pk, origem, False))
+
+    ids = {pk for _, pk in ocupadas} | {pk for _, _, pk, _ in avisos_troca}
+    nomes = dict(Profissional.objects.filter(pk__in=ids).values_list("pk", "nome")) if ids else {}
+    for ocupada, profissional_id in ocupadas:
+        ocupada.erro(f"Sala já ocupada por {nomes.get(profissional_id)}")
+    for celula, pk, outro_id, saindo in avisos_troca:
+        if saindo:
+            celula.avisos.append(f"Troca #{pk} registrada: passa para {nomes.get(outro_id)}")
+        else:
+            celula.avisos.append(
+                f"Troca #{pk} registrada: assume o turno de {nomes.get(outro_id)} "
+                "(dois lugares se aplicada)"
+            )
+
+
+def importar(linhas: Iterable[Sequence[Any]], *, gravar: bool = True) -> ResultadoSabados:
+    """Valida a grade e, sem erros, grava as alocações novas de uma vez.
+
+    Levanta PlanilhaInvalida se o cabeçalho não puder ser lido.
+    """
+    itens = list(_celulas(linhas))
+    _validar(itens)
+    resultado = ResultadoSabados(linhas=itens)
+    resultado.erros = sum(1 for item in itens if item.situacao == ERRO)
+    resultado.avisos = sum(1 for item in itens if item.avisos)
+    resultado.existentes = sum(1 for item in itens if item.situacao == EXISTENTE)
+    novas = [item for item in itens if item.situacao == CRIADA]
+    resultado.criadas = len(novas)
+    if resultado.erros or not gravar or not novas:
+        return resultado
+
+    salas = cache.salas()
+    with transaction.atomic():
+        alocacoes = Alocacao.objects.bulk_create(
+            [
+                Alocacao(
+                    profissional_id=item.profissional,
+                    local_id=salas[item.sala].local_id,
+                    sala_id=item.sala,
+                    data=item.data,
+                    turno=item.turno,
+                    origem=OrigemAlocacao.MANUAL,
+                    status=StatusAlocacao.MANUAL,
+                )
+                for item in novas
+                if item.sala is not None and item.profissional is not None and item.data is not None
+            ],
+            batch_size=TAMANHO_LOTE,
+        )
+        alteracoes.registrar_em_lote(
+            [
+                alteracoes.entrada(alocacao, TipoAlteracao.CRIADA, {"importacao": "sabados"})
+                for alocacao in alocacoes
+            ],
+            chaves_carga={(alocacao.profissional_id, alocacao.data) for alocacao in alocacoes},
+            auditorias=[alteracoes.auditoria(alocacao, criada=True) for alocacao in alocacoes],
+        )
+    resultado.alocacoes = [alocacao.pk for alocacao in alocacoes]
+    return resultado
@@ -2,18 +2,35 @@
 
 from __future__ import annotations
 
-from datetime import date, timedelta
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date
 from typing import Any, cast
 
-from cadastros.models import Local, Profissional, Sala
-from cadastros.serializers import LocalSerializer, ProfissionalSerializer, SalaSerializer
+from cadastros import cache
+from cadastros.disponibilidade import Disponibilidade
+from cadastros.models import Local, Profissional, Sala, mascara_turnos
+from cadastros.serializers import (
+    CadastroCacheadoField,
+    LocalSerializer,
+    ProfissionalSerializer,
+    SalaSerializer,
+)
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 
+from . import alteracoes, copia
+from .carga import Carga, carga, duracao, semana_de
+from .conflitos import IndiceEventosGoogle
 from .models import (
     AgendaGoogle,
     Alocacao,
+    AuditoriaAlocacao,
     EventoCalendar,
     ExecucaoJob,
+    ItemModeloSemana,
+    ModeloSemana,
     PromptHistory,
     Troca,
 )
@@ -32,9 +49,12 @@ class AlocacaoSerializer(serializers.ModelSerializer):
     """Serializer para Alocacao com validações e severidades."""
 
     profissional_detail = ProfissionalSerializer(source="profissional", read_only=True)
+    local = CadastroCacheadoField(cache.locais, queryset=Local.objects.all())
     local_detail = LocalSerializer(source="local", read_only=True)
+    sala = CadastroCacheadoField(cache.salas, queryset=Sala.objects.all())
     sala_detail = SalaSerializer(source="sala", read_only=True)
     validation_issues = serializers.SerializerMethodField()
+    version = serializers.IntegerField(min_value=1, required=False)
 
     class Meta:
         model = Alocacao
@@ -53,11 +73,57 @@ class AlocacaoSerializer(serializers.ModelSerializer):
             "inseguranca",
             "metadata",
             "observacoes",
+            "permite_sobreposicao",
             "validation_issues",
+            "version",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["created_at", "updated_at", "validation_issues"]
+        # Sem o validador gerado para `unica_alocacao_profissional_turno`: a
+        # restrição do banco decide e `_sobreposicao_como_erro` traduz o erro.
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Alocacao.objects.all(), fields=["sala", "data", "turno"]
+            )
+        ]
+
+    @contextmanager
+    def _sobreposicao_como_erro(self, alocacao: Alocacao) -> Iterator[None]:
+        """Converte a violação da restrição de profissional/turno em erro de validação."""
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError:
+            # Só no caminho de erro: busca onde o profissional já está alocado.
+            overlap = self._check_professional_overlap(alocacao)
+            if overlap is None:
+                raise
+            raise serializers.ValidationError(
+                {"profissional": [f"Profissional já alocado neste horário em {overlap}"]}
+            ) from None
+
+    def create(self, validated_data: dict[str, Any]) -> Alocacao:
+        validated_data.pop("version", None)
+        with self._sobreposicao_como_erro(Alocacao(**validated_data)):
+            return super().create(validated_data)
+
+    def update(self, instance: Alocacao, validated_data: dict[str, Any]) -> Alocacao:
+        """Grava com UPDATE condicional na versão que o cliente leu.
+
+        A versão vem do campo `version` ou do If-Match (`versao_esperada` no
+        contexto); sem nenhum dos dois, vale a lida nesta requisição.
+        """
+        versao = (
+            validated_data.pop("version", None)
+            or self.context.get("versao_esperada")
+            or instance.version
+        )
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        with self._sobreposicao_como_erro(instance):
+            alteracoes.atualizar_com_versao(instance, versao, validated_data)
+        return instance
 
     def get_validation_issues(self, obj: Alocacao) -> list[dict[str, str]]:
         """Retorna issues de validação com severidades."""
@@ -120,10 +186,29 @@ class AlocacaoSerializer(serializers.ModelSerializer):
 
         return issues
 
+    def _indice_google(self, alocacao: Alocacao) -> IndiceEventosGoogle:
+        """Índice de eventos Google compartilhado pelo lote serializado."""
+        indice = self.context.get("indice_google")
+        if isinstance(indice, IndiceEventosGoogle) and indice.cobre(alocacao):
+            return indice
+
+        # Em listagens o índice cobre todo o lote do ListSerializer pai.
+        lote: Any = None
+        if isinstance(self.parent, serializers.ListSerializer):
+            lote = self.parent.instance
+        alocacoes = list(lote) if lote is not None else [alocacao]
+        if alocacao not in alocacoes:
+            alocacoes.append(alocacao)
+
+        indice = IndiceEventosGoogle.para_alocacoes(alocacoes)
+        self.context["indice_google"] = indice
+        return indice
+
     def _check_google_conflicts(self, alocacao: Alocacao) -> str | None:
-        """Verifica conflitos com Google Calendar."""
-        # TODO: implementar verificação real com Google Calendar
-        # Por enquanto retorna None (será implementado no Sprint 5)
+        """Verifica sobreposição com eventos externos na agenda do profissional."""
+        evento = self._indice_google(alocacao).conflito(alocacao)
+        if evento:
+            return evento.descricao()
         return None
 
     def _check_professional_overlap(self, alocacao: Alocacao) -> str | None:
@@ -141,64 +226,38 @@ class AlocacaoSerializer(serializers.ModelSerializer):
             return f"{conflito.local.nome}/{conflito.sala.nome}"
         return None
 
+    def _carga_semana(self, alocacao: Alocacao) -> Carga:
+        """Linha do livro de carga da semana (memorizada no contexto do lote)."""
+        memo = self.context.setdefault("cargas_semanais", {})
+        chave = (alocacao.profissional_id, semana_de(alocacao.data))
+        if chave not in memo:
+            memo[chave] = carga(*chave)
+        return cast(Carga, memo[chave])
+
     def _check_weekly_hours(self, alocacao: Alocacao) -> str | None:
         """Verifica se limite de horas semanais será excedido (WARNING)."""
-        # Calcular início e fim da semana
-        data = alocacao.data
-        inicio_semana = data - timedelta(days=data.weekday())
-        fim_semana = inicio_semana + timedelta(days=6)
-
-        # Buscar todas as alocações do profissional na semana
-        alocacoes_semana = Alocacao.objects.filter(
-            profissional=alocacao.profissional,
-            data__gte=inicio_semana,
-            data__lte=fim_semana,
-        )
-        if alocacao.pk is not None:
-            alocacoes_semana = alocacoes_semana.exclude(pk=alocacao.pk)
-
-        # Calcular horas (assumindo 6h por turno)
-        horas_atuais = alocacoes_semana.count() * 6
-        horas_com_nova = horas_atuais + 6
+        horas_com_nova = self._carga_semana(alocacao).horas
+        if alocacao.pk is None:
+            horas_com_nova += duracao(alocacao.local_id, alocacao.data, alocacao.turno)
 
         limite = alocacao.profissional.carga_semanal_alvo
         if horas_com_nova > limite:
-            return f"Limite de {limite}h/semana será excedido ({horas_com_nova}h total)"
+            return (
+                f"Limite de {limite}h/semana será excedido ({horas_com_nova.normalize():f}h total)"
+            )
 
         return None
 
     def _check_double_shifts(self, alocacao: Alocacao) -> str | None:
         """Verifica se limite de dobras será excedido (WARNING)."""
-        # Calcular início e fim da semana
-        data = alocacao.data
-        inicio_semana = data - timedelta(days=data.weekday())
-        fim_semana = inicio_semana + timedelta(days=6)
-
-        # Contar dobras na semana (dias com 2 turnos)
-        from django.db.models import Count
-
-        dobras_base_qs = Alocacao.objects.filter(
-            profissional=alocacao.profissional,
-            data__gte=inicio_semana,
-            data__lte=fim_semana,
-        )
-        if alocacao.pk is not None:
-            dobras_base_qs = dobras_base_qs.exclude(pk=alocacao.pk)
-        dobras_semana = (
-            dobras_base_qs.values("data").annotate(turnos=Count("id")).filter(turnos__gte=2).count()
-        )
-
-        # Verificar se esta alocação criará uma dobra
-        turnos_dia_qs = Alocacao.objects.filter(
-            profissional=alocacao.profissional,
-            data=alocacao.data,
-        )
-        if alocacao.pk is not None:
-            turnos_dia_qs = turnos_dia_qs.exclude(pk=alocacao.pk)
-        turnos_no_dia = turnos_dia_qs.count()
-
-        if turnos_no_dia >= 1:
-            dobras_semana += 1
+        dobras_semana = self._carga_semana(alocacao).dobras
+        if alocacao.pk is None:
+            # Alocação ainda não gravada: vira dobra se o dia já tem um turno.
+            turnos_no_dia = Alocacao.objects.filter(
+                profissional=alocacao.profissional, data=alocacao.data
+            ).count()
+            if turnos_no_dia == 1:
+                dobras_semana += 1
 
         limite = alocacao.profissional.limite_dobras_semana
         if dobras_semana > limite:
@@ -209,20 +268,20 @@ class AlocacaoSerializer(serializers.ModelSerializer):
     def _check_blocks_and_preferences(self, alocacao: Alocacao) -> str | None:
         """Verifica bloqueios e preferências não respeitados (WARNING)."""
         prof = alocacao.profissional
+        # Bitsets em memória (`cadastros.disponibilidade`): sem consultas.
+        disponibilidade = cache.disponibilidades().get(prof.pk) or Disponibilidade(
+            mascara_turnos(prof.indisponibilidades)
+        )
 
         # Verificar indisponibilidades (bloqueios hard)
-        for indisp in prof.indisponibilidades:
-            if (
-                indisp.get("dia_semana") == alocacao.data.weekday()
-                and indisp.get("turno") == alocacao.turno
-            ):
-                return (
-                    "Profissional indisponível neste dia/turno. "
-                    "Premissa mais forte mantida para cobrir gap."
-                )
+        if not disponibilidade.livre(alocacao.data.weekday(), alocacao.turno):
+            return (
+                "Profissional indisponível neste dia/turno. "
+                "Premissa mais forte mantida para cobrir gap."
+            )
 
         # Verificar locais proibidos
-        if prof.locais_proibidos.filter(pk=alocacao.local.pk).exists():
+        if disponibilidade.proibido(alocacao.local_id):
             return (
                 "Local proibido para este profissional. "
                 "Premissa mais forte mantida para cobrir gap."
@@ -267,10 +326,8 @@ class AlocacaoSerializer(serializers.ModelSerializer):
 
         errors = {}
 
-        # ERRO: Sobreposição de profissional/turno
-        overlap = self._check_professional_overlap(temp_alocacao)
-        if overlap:
-            errors["profissional"] = f"Profissional já alocado neste horário em {overlap}"
+        # A sobreposição de profissional/turno (ERRO) é barrada pela restrição
+        # `unica_alocacao_profissional_turno` na gravação, sem consulta prévia.
 
         # ERRO: Conflitos com Google Calendar
         google_conflict = self._check_google_conflicts(temp_alocacao)
@@ -289,6 +346,28 @@ class AlocacaoSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class AuditoriaAlocacaoSerializer(serializers.ModelSerializer):
+    """Serializer (somente leitura) para AuditoriaAlocacao."""
+
+    class Meta:
+        model = AuditoriaAlocacao
+        fields = [
+            "id",
+            "alocacao_id",
+            "antes",
+            "depois",
+            "sala_id",
+            "data",
+            "turno",
+            "autor",
+            "motivo",
+            "fonte",
+            "job_id",
+            "criada_em",
+        ]
+        read_only_fields = fields
+
+
 class ExecucaoJobSerializer(serializers.ModelSerializer):
     """Serializer para ExecucaoJob."""
 
@@ -303,8 +382,14 @@ class ExecucaoJobSerializer(serializers.ModelSerializer):
             "diff_resumo",
             "log_json",
             "autor",
+            "executar_apos",
+            "tentativas",
+            "max_tentativas",
+            "worker",
+            "lease_ate",
+            "heartbeat_em",
         ]
-        read_only_fields = ["iniciou_em"]
+        read_only_fields = ["iniciou_em", "tentativas", "worker", "lease_ate", "heartbeat_em"]
 
 
 class PromptHistorySerializer(serializers.ModelSerializer):
@@ -327,6 +412,46 @@ class PromptHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at"]
 
 
+class ItemModeloSemanaSerializer(serializers.ModelSerializer):
+    """Serializer (somente leitura) para ItemModeloSemana."""
+
+    class Meta:
+        model = ItemModeloSemana
+        fields = ["id", "dia_semana", "turno", "local", "sala", "profissional"]
+        read_only_fields = fields
+
+
+class ModeloSemanaSerializer(serializers.ModelSerializer):
+    """Serializer para ModeloSemana; `semana` (na gravação) define os itens."""
+
+    itens = ItemModeloSemanaSerializer(many=True, read_only=True)
+    semana = serializers.DateField(write_only=True, required=False)
+
+    class Meta:
+        model = ModeloSemana
+        fields = ["id", "nome", "descricao", "semana", "itens", "created_at", "updated_at"]
+        read_only_fields = ["created_at", "updated_at"]
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if self.instance is None and "semana" not in attrs:
+            raise serializers.ValidationError({"semana": ["Informe a semana de origem."]})
+        return attrs
+
+    def create(self, validated_data: dict[str, Any]) -> ModeloSemana:
+        return copia.salvar_modelo(
+            validated_data["nome"],
+            validated_data["semana"],
+            validated_data.get("descricao", ""),
+        )
+
+    def update(self, instance: ModeloSemana, validated_data: dict[str, Any]) -> ModeloSemana:
+        semana = validated_data.pop("semana", None)
+        instance = super().update(instance, validated_data)
+        if semana is not None:
+            instance = copia.salvar_modelo(instance.nome, semana, instance.descricao)
+        return instance
+
+
 class TrocaSerializer(serializers.ModelSerializer):
     """Serializer para Troca."""
 
@@ -336,7 +461,13 @@ class TrocaSerializer(serializers.ModelSerializer):
     profissional_destino_detail = ProfissionalSerializer(
         source="profissional_destino", read_only=True
     )
+    local = CadastroCacheadoField(
+        cache.locais, queryset=Local.objects.all(), required=False, allow_null=True
+    )
     local_detail = LocalSerializer(source="local", read_only=True)
+    sala = CadastroCacheadoField(
+        cache.salas, queryset=Sala.objects.all(), required=False, allow_null=True
+    )
     sala_detail = SalaSerializer(source="sala", read_only=True)
 
     class Meta:
@@ -356,10 +487,11 @@ class TrocaSerializer(serializers.ModelSerializer):
             "motivo",
             "origem",
             "status",
+            "confianca",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at"]
+        read_only_fields = ["confianca", "created_at", "updated_at"]
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         """Validação: profissionais diferentes."""
@@ -391,10 +523,22 @@ class AgendaGoogleSerializer(serializers.ModelSerializer):
             "source_tag",
             "pode_publicar",
             "ativa",
+            "status",
+            "erro_mensagem",
+            "webhook_expiracao",
+            "ultimo_webhook_em",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = [
             "created_at",
             "updated_at",
+            "ultima_sync",
+            "status",
+            "erro_mensagem",
+            "webhook_expiracao",
+            "ultimo_webhook_em",
         ]
-        read_only_fields = ["created_at", "updated_at", "ultima_sync"]
 
 
 class EventoCalendarSerializer(serializers.ModelSerializer):
@@ -0,0 +1,396 @@
+"""Leitura (sync) e escrita (publish) de eventos no Google Calendar."""
+
+from __future__ import annotations
+
+import logging
+import random
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, TypeVar
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .google_calendar import ClienteCalendar, ErroCalendarAPI, erro_temporario
+from .horarios import janela_turno
+from .jobs import liberar_coalescencia
+from .models import (
+    AgendaGoogle,
+    Alocacao,
+    EventoCalendar,
+    OrigemEvento,
+    StatusAgenda,
+    StatusAlocacao,
+    StatusEvento,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Janela da primeira leitura completa (e do resync após 410).
+DIAS_PASSADO_RESYNC = 30
+# Só alocações revisadas/ajustadas são publicadas.
+STATUS_PUBLICAVEIS = [StatusAlocacao.REVISADO, StatusAlocacao.AJUSTADO]
+# Colunas que o sync escreve e campos do evento guardados em `metadata`.
+CAMPOS_SYNC = ("titulo", "data_inicio", "data_fim", "origem", "alocacao_id", "metadata")
+CAMPOS_METADATA = ("etag", "updated")
+TAMANHO_LOTE_UPSERT = 500
+
+
+class Retentador:
+    """Executa chamadas à API com backoff exponencial e jitter em erros temporários."""
+
+    def __init__(
+        self,
+        tentativas: int = 6,
+        base: float = 0.5,
+        teto: float = 32.0,
+        dormir: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.tentativas = tentativas
+        self.base = base
+        self.teto = teto
+        self.dormir = dormir
+        self.retentativas = 0
+
+    def executar(self, operacao: Callable[[], T]) -> T:
+        for tentativa in range(self.tentativas):
+            try:
+                return operacao()
+            except ErroCalendarAPI as exc:
+                if not erro_temporario(exc) or tentativa == self.tentativas - 1:
+                    raise
+                self.retentativas += 1
+                espera = min(self.teto, self.base * 2**tentativa)
+                self.dormir(espera / 2 + random.uniform(0, espera / 2))  # noqa: S311
+        raise AssertionError("inalcançável")
+
+
+@dataclass
+class ResultadoSync:
+    paginas: int = 0
+    recebidos: int = 0
+    criados: int = 0
+    atualizados: int = 0
+    inalterados: int = 0
+    removidos: int = 0
+    resync_completo: bool = False
+
+
+@dataclass
+class ResultadoPublicacao:
+    inseridos: int = 0
+    atualizados: int = 0
+    inalterados: int = 0
+    preservados: int = 0
+    conflitos: int = 0
+
+
+def _momento(valor: dict[str, Any]) -> datetime:
+    """Converte `start`/`end` do Google (dateTime ou date) para datetime aware."""
+    if valor.get("dateTime"):
+        momento = parse_datetime(valor["dateTime"])
+        if momento is not None:
+            if timezone.is_naive(momento):
+                return timezone.make_aware(momento)
+            return momento
+    dia = parse_date(valor.get("date", ""))
+    if dia is None:
+        raise ValueError(f"Horário inválido no evento: {valor!r}")
+    return timezone.make_aware(datetime.combine(dia, datetime.min.time()))
+
+
+def _privado(item: dict[str, Any]) -> dict[str, Any]:
+    return item.get("extendedProperties", {}).get("private", {}) or {}
+
+
+def metadata_compacta(item: dict[str, Any]) -> dict[str, Any]:
+    """Só o que usamos do evento do Google: versão (etag) e marca do sistema."""
+    metadata = {campo: item[campo] for campo in CAMPOS_METADATA if campo in item}
+    privado = _privado(item)
+    if privado.get("source"):
+        metadata["source"] = privado["source"]
+    if privado.get("alocacao_id"):
+        metadata["alocacao_id"] = str(privado["alocacao_id"])
+    return metadata
+
+
+def _campos_evento(
+    agenda: AgendaGoogle, item: dict[str, Any], alocacoes_validas: set[int]
+) -> dict[str, Any]:
+    privado = _privado(item)
+    do_sistema = privado.get("source") == agenda.source_tag
+    alocacao_id = None
+    if do_sistema and str(privado.get("alocacao_id", "")).isdigit():
+        alocacao_id = int(privado["alocacao_id"])
+        if alocacao_id not in alocacoes_validas:
+            alocacao_id = None
+    return {
+        "titulo": (item.get("summary") or "")[:255],
+        "data_inicio": _momento(item["start"]),
+        "data_fim": _momento(item["end"]),
+        "origem": OrigemEvento.SISTEMA if do_sistema else OrigemEvento.MANUAL,
+        "alocacao_id": alocacao_id,
+        "metadata": metadata_compacta(item),
+    }
+
+
+def _alocacoes_referenciadas(agenda: AgendaGoogle, itens: list[dict[str, Any]]) -> set[int]:
+    """IDs de alocação citados pelos eventos do sistema que existem no banco."""
+    ids = {
+        int(privado["alocacao_id"])
+        for privado in map(_privado, itens)
+        if privado.get("source") == agenda.source_tag
+        and str(privado.get("alocacao_id", "")).isdigit()
+    }
+    if not ids:
+        return set()
+    return set(Alocacao.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+
+def gravar_eventos(agenda: AgendaGoogle, itens: list[dict[str, Any]]) -> ResultadoSync:
+    """Upsert em lote dos eventos recebidos do Google, chaveado por `google_event_id`.
+
+    Lê as linhas existentes numa consulta, descarta as que não mudaram e grava
+    o restante com `bulk_create(update_conflicts=True)`, um comando por
+    conjunto de colunas alteradas. Cancelados viram `DELETADO` num único UPDATE.
+    """
+    resultado = ResultadoSync(recebidos=len(itens))
+    cancelados = {item["id"] for item in itens if item.get("status") == "cancelled"}
+    # O Google pode repetir um id na mesma resposta; vale a última versão.
+    ativos = {item["id"]: item for item in itens if item["id"] not in cancelados}
+
+    if cancelados:
+        resultado.removidos = (
+            EventoCalendar.objects.filter(agenda=agenda, google_event_id__in=cancelados)
+            .exclude(status=StatusEvento.DELETADO)
+            .update(status=StatusEvento.DELETADO, data_sync=timezone.now())
+        )
+    if not ativos:
+        return resultado
+
+    existentes = {
+        linha["google_event_id"]: linha
+        for linha in EventoCalendar.objects.filter(
+            agenda=agenda, google_event_id__in=list(ativos)
+        ).values("google_event_id", "status", *CAMPOS_SYNC)
+    }
+    alocacoes_validas = _alocacoes_referenciadas(agenda, list(ativos.values()))
+
+    novos: list[EventoCalendar] = []
+    alterados: dict[tuple[str, ...], list[EventoCalendar]] = defaultdict(list)
+    for event_id, item in ativos.items():
+        campos = _campos_evento(agenda, item, alocacoes_validas)
+        atual = existentes.get(event_id)
+        if atual is None:
+            novos.append(EventoCalendar(agenda=agenda, google_event_id=event_id, **campos))
+            continue
+        if atual["status"] == StatusEvento.DELETADO:
+            # Evento restaurado no Google.
+            campos["status"] = StatusEvento.GRAVADO
+        mudancas = tuple(campo for campo, valor in campos.items() if atual.get(campo) != valor)
+        if not mudancas:
+            resultado.inalterados += 1
+            continue
+        alterados[mudancas].append(
+            EventoCalendar(agenda=agenda, google_event_id=event_id, **campos)
+        )
+
+    if novos:
+        EventoCalendar.objects.bulk_create(novos, batch_size=TAMANHO_LOTE_UPSERT)
+        resultado.criados = len(novos)
+    for mudancas, eventos in alterados.items():
+        EventoCalendar.objects.bulk_create(
+            eventos,
+            batch_size=TAMANHO_LOTE_UPSERT,
+            update_conflicts=True,
+            unique_fields=["agenda", "google_event_id"],
+            update_fields=[*mudancas, "data_sync"],
+        )
+        resultado.atualizados += len(eventos)
+    return resultado
+
+
+def _paginas(
+    cliente: ClienteCalendar,
+    agenda: AgendaGoogle,
+    retentador: Retentador,
+    sync_token: str | None,
+) -> Iterator[dict[str, Any]]:
+    time_min = None
+    if not sync_token:
+        time_min = (timezone.now() - timedelta(days=DIAS_PASSADO_RESYNC)).isoformat()
+    page_token: str | None = None
+    while True:
+        pagina = retentador.executar(
+            partial(
+                cliente.list_events,
+                agenda.calendar_id,
+                sync_token=sync_token,
+                page_token=page_token,
+                time_min=time_min,
+            )
+        )
+        yield pagina
+        page_token = pagina.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def sincronizar_agenda(
+    agenda: AgendaGoogle,
+    cliente: ClienteCalendar,
+    *,
+    retentador: Retentador | None = None,
+) -> ResultadoSync:
+    """Sync incremental por `syncToken`; refaz leitura completa se o token expirou."""
+    retentador = retentador or Retentador()
+    # Notificações a partir daqui agendam outro sync; jobs que não chegam
+    # até aqui liberam a marcação ao ir para dead-letter.
+    liberar_coalescencia(agenda.pk)
+    resultado = ResultadoSync()
+    sync_token = agenda.sync_token or None
+
+    while True:
+        proximo_token = ""
+        try:
+            for pagina in _paginas(cliente, agenda, retentador, sync_token):
+                resultado.paginas += 1
+                gravados = gravar_eventos(agenda, pagina.get("items", []))
+                resultado.recebidos += gravados.recebidos
+                resultado.criados += gravados.criados
+                resultado.atualizados += gravados.atualizados
+                resultado.inalterados += gravados.inalterados
+                resultado.removidos += gravados.removidos
+                proximo_token = pagina.get("nextSyncToken", "")
+        except ErroCalendarAPI as exc:
+            if exc.status != 410 or sync_token is None:
+                raise
+            logger.info("syncToken expirado na agenda %s; refazendo leitura completa", agenda.pk)
+            sync_token = None
+            resultado.resync_completo = True
+            continue
+        break
+
+    agenda.sync_token = proximo_token
+    agenda.ultima_sync = timezone.now()
+    if agenda.status == StatusAgenda.NEEDS_REAUTH:
+        agenda.status = StatusAgenda.OK
+    agenda.save(update_fields=["sync_token", "ultima_sync", "status", "updated_at"])
+    return resultado
+
+
+def _corpo_evento(agenda: AgendaGoogle, alocacao: Alocacao) -> dict[str, Any]:
+    inicio, fim = janela_turno(alocacao.local, alocacao.data, alocacao.turno)
+    return {
+        "summary": (
+            f"{alocacao.local.nome} / {alocacao.sala.nome} ({alocacao.get_turno_display()})"
+        ),
+        "start": {"dateTime": inicio.isoformat(), "timeZone": settings.TIME_ZONE},
+        "end": {"dateTime": fim.isoformat(), "timeZone": settings.TIME_ZONE},
+        "extendedProperties": {
+            "private": {"source": agenda.source_tag, "alocacao_id": str(alocacao.pk)}
+        },
+    }
+
+
+def publicar_agenda(
+    agenda: AgendaGoogle,
+    cliente: ClienteCalendar,
+    inicio: date,
+    fim: date,
+    *,
+    retentador: Retentador | None = None,
+) -> ResultadoPublicacao:
+    """Publica as alocações revisadas/ajustadas do profissional da agenda.
+
+    Eventos já publicados só são alterados se o horário/título mudou, com
+    escrita condicional pelo `etag`; se o Google tiver outra versão (412), o
+    evento fica marcado como conflito e a edição do Google prevalece.
+    """
+    retentador = retentador or Retentador()
+    resultado = ResultadoPublicacao()
+    if not agenda.pode_publicar or agenda.profissional_id is None:
+        return resultado
+
+    alocacoes = list(
+        Alocacao.objects.filter(
+            profissional_id=agenda.profissional_id,
+            data__gte=inicio,
+            data__lte=fim,
+            status__in=STATUS_PUBLICAVEIS,
+        ).select_related("local", "sala")
+    )
+    existentes = {
+        evento.alocacao_id: evento
+        for evento in EventoCalendar.objects.filter(
+            agenda=agenda, alocacao__in=alocacoes, origem=OrigemEvento.SISTEMA
+        ).exclude(status=StatusEvento.DELETADO)
+    }
+
+    for alocacao in alocacoes:
+        if alocacao.metadata.get("confirmacao", {}).get("tipo") == "movido":
+            # Horário alterado no Google: a confirmação diária já adotou a versão de lá.
+            resultado.preservados += 1
+            continue
+
+        corpo = _corpo_evento(agenda, alocacao)
+        inicio_evento, fim_evento = janela_turno(alocacao.local, alocacao.data, alocacao.turno)
+        evento = existentes.get(alocacao.pk)
+
+        if evento is None:
+            criado = retentador.executar(partial(cliente.insert_event, agenda.calendar_id, corpo))
+            EventoCalendar.objects.create(
+                agenda=agenda,
+                alocacao=alocacao,
+                google_event_id=criado["id"],
+                titulo=corpo["summary"],
+                data_inicio=inicio_evento,
+                data_fim=fim_evento,
+                origem=OrigemEvento.SISTEMA,
+                metadata=metadata_compacta(criado),
+            )
+            resultado.inseridos += 1
+            continue
+
+        if (
+            evento.titulo == corpo["summary"]
+            and evento.data_inicio == inicio_evento
+            and evento.data_fim == fim_evento
+        ):
+            resultado.inalterados += 1
+            continue
+
+        try:
+            atualizado = retentador.executar(
+                partial(
+                    cliente.patch_event,
+                    agenda.calendar_id,
+                    evento.google_event_id,
+                    corpo,
+                    etag=evento.metadata.get("etag"),
+                )
+            )
+        except ErroCalendarAPI as exc:
+            if exc.status != 412:
+                raise
+            evento.status = StatusEvento.CONFLITO
+            evento.save(update_fields=["status", "data_sync"])
+            resultado.conflitos += 1
+            continue
+
+        evento.titulo = corpo["summary"]
+        evento.data_inicio = inicio_evento
+        evento.data_fim = fim_evento
+        evento.status = StatusEvento.ATUALIZADO
+        evento.metadata = metadata_compacta(atualizado)
+        evento.save()
+        resultado.atualizados += 1
+
+    return resultado
@@ -0,0 +1,117 @@
+"""Handlers dos jobs executados pela fila (registrados em `jobs.HANDLERS`).
+
+Cada handler recebe o ExecucaoJob reivindicado, lê os parâmetros de
+`log_json`, grava o resultado de volta nele e retorna o resumo do job.
+Erros que não se resolvem com nova tentativa viram `FalhaPermanente`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import date
+
+from .alteracoes import limpar_tombstones
+from .confirmacao import confirmar_periodo
+from .google_calendar import (
+    ClienteCalendar,
+    ClienteIndisponivel,
+    ErroCalendarAPI,
+    erro_temporario,
+    obter_cliente,
+)
+from .jobs import FalhaPermanente
+from .models import AgendaGoogle, ExecucaoJob, StatusAgenda
+from .sync import publicar_agenda, sincronizar_agenda
+from .vagas import estender
+from .webhooks import enfileirar_polling, renovar_canais
+
+
+def _data(valor: object) -> date | None:
+    return date.fromisoformat(str(valor)) if valor else None
+
+
+def _agenda(job: ExecucaoJob) -> AgendaGoogle:
+    try:
+        return AgendaGoogle.objects.get(pk=job.log_json["agenda_id"], ativa=True)
+    except (KeyError, AgendaGoogle.DoesNotExist) as exc:
+        raise FalhaPermanente(f"Agenda inexistente ou inativa: {exc}") from exc
+
+
+def _cliente() -> ClienteCalendar:
+    try:
+        return obter_cliente()
+    except ClienteIndisponivel as exc:
+        raise FalhaPermanente(str(exc)) from exc
+
+
+@contextmanager
+def _erros_google(agenda: AgendaGoogle) -> Iterator[None]:
+    """Erros temporários seguem para o backoff da fila; os demais são permanentes."""
+    try:
+        yield
+    except ErroCalendarAPI as exc:
+        if erro_temporario(exc):
+            raise
+        if exc.status == 401:
+            AgendaGoogle.objects.filter(pk=agenda.pk).update(
+                status=StatusAgenda.NEEDS_REAUTH, erro_mensagem=str(exc)
+            )
+        raise FalhaPermanente(str(exc)) from exc
+
+
+def sincronizar(job: ExecucaoJob) -> str:
+    agenda = _agenda(job)
+    cliente = _cliente()
+    with _erros_google(agenda):
+        resultado = sincronizar_agenda(agenda, cliente)
+    job.log_json = {**job.log_json, "resultado": asdict(resultado)}
+    return (
+        f"Sync {agenda.nome}: {resultado.criados} novos, {resultado.atualizados} atualizados, "
+        f"{resultado.removidos} removidos"
+    )
+
+
+def publicar(job: ExecucaoJob) -> str:
+    agenda = _agenda(job)
+    cliente = _cliente()
+    inicio, fim = _data(job.log_json.get("inicio")), _data(job.log_json.get("fim"))
+    if inicio is None or fim is None:
+        raise FalhaPermanente("Publicação exige `inicio` e `fim`.")
+    with _erros_google(agenda):
+        resultado = publicar_agenda(agenda, cliente, inicio, fim)
+    job.log_json = {**job.log_json, "resultado": asdict(resultado)}
+    return (
+        f"Publicação {agenda.nome}: {resultado.inseridos} inseridos, "
+        f"{resultado.atualizados} atualizados, {resultado.conflitos} conflitos"
+    )
+
+
+def confirmar(job: ExecucaoJob) -> str:
+    resumo, log = confirmar_periodo(
+        _data(job.log_json.get("inicio")),
+        _data(job.log_json.get("fim")),
+        completo=bool(job.log_json.get("completo", False)),
+    )
+    # Rotina diária: aproveita para podar os tombstones além da retenção e
+    # estender as vagas até o novo fim da janela de planejamento.
+    job.log_json = {
+        **job.log_json,
+        **log,
+        "tombstones_removidos": limpar_tombstones(),
+        "vagas": asdict(estender()),
+    }
+    return resumo
+
+
+def renovar_webhooks(job: ExecucaoJob) -> str:
+    resultado = renovar_canais(_cliente())
+    job.log_json = {**job.log_json, "resultado": resultado}
+    return f"Webhooks: {resultado['renovadas']} renovados, {resultado['falhas']} falhas"
+
+
+def polling(job: ExecucaoJob) -> str:
+    total = enfileirar_polling()
+    job.log_json = {**job.log_json, "syncs_enfileirados": total}
+    return f"Polling: {total} agenda(s) sem webhook enfileirada(s) para sync"
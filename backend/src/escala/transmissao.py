@@ -0,0 +1,189 @@
+"""Quadro ao vivo: stream SSE das alterações de alocações.
+
+Cada processo ASGI mantém, por event loop, um único `Difusor`: uma tarefa
+asyncio que consulta o log de alterações (AlteracaoAlocacao) a cada
+intervalo e distribui as entradas novas para as filas dos assinantes cujo
+período contém a data alterada. Um assinante ocioso custa uma fila e uma
+corrotina suspensa, não uma thread nem uma conexão com o banco; com
+centenas de quadros abertos a carga no banco continua sendo uma consulta
+por intervalo.
+
+As linhas do log ganham id no insert mas ficam visíveis só no commit, fora
+de ordem quando há transações concorrentes. A consulta relê, além dos ids
+novos, a janela de folga de `ALOCACOES_DELTA_FOLGA_SEGUNDOS` e descarta os
+ids já distribuídos.
+
+O id do evento SSE é o id da linha no log: na reconexão o navegador manda
+`Last-Event-ID` e o stream reenvia o que ficou para trás antes de seguir ao
+vivo. Assinante que não consome a fila a tempo recebe `recarregar` e o
+stream é encerrado: o quadro deve reler a listagem e assinar de novo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import weakref
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import AlteracaoAlocacao
+
+EVENTO_RECARREGAR = "event: recarregar\ndata: {}\n\n"
+
+
+def _config(nome: str, padrao: float) -> float:
+    return float(getattr(settings, nome, padrao))
+
+
+def formatar(alteracao: AlteracaoAlocacao) -> str:
+    """Serializa a entrada do log como evento SSE `alocacao`."""
+    dados = {
+        "id": alteracao.pk,
+        "tipo": alteracao.tipo,
+        "alocacao_id": alteracao.alocacao_id,
+        "profissional_id": alteracao.profissional_id,
+        "local_id": alteracao.local_id,
+        "sala_id": alteracao.sala_id,
+        "data": alteracao.data.isoformat(),
+        "turno": alteracao.turno,
+        "detalhes": alteracao.detalhes,
+        "criada_em": alteracao.criada_em.isoformat(),
+    }
+    return f"id: {alteracao.pk}\nevent: alocacao\ndata: {json.dumps(dados)}\n\n"
+
+
+class Assinatura:
+    """Fila de eventos de um cliente conectado, filtrada pelo período."""
+
+    def __init__(self, inicio: date, fim: date, limite: int) -> None:
+        self.inicio = inicio
+        self.fim = fim
+        self.fila: asyncio.Queue[str] = asyncio.Queue(maxsize=limite)
+        self.entregues: set[int] = set()
+        self.atrasada = False
+
+    def aceita(self, alteracao: AlteracaoAlocacao) -> bool:
+        return self.inicio <= alteracao.data <= self.fim and alteracao.pk not in self.entregues
+
+    def entregar(self, evento: str) -> None:
+        if self.atrasada:
+            return
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Descarta o acumulado: o cliente relê a listagem inteira.
+            while not self.fila.empty():
+                self.fila.get_nowait()
+            self.fila.put_nowait(EVENTO_RECARREGAR)
+            self.atrasada = True
+
+
+class Difusor:
+    """Uma consulta ao log por intervalo, distribuída a todos os assinantes."""
+
+    def __init__(self) -> None:
+        self.assinaturas: set[Assinatura] = set()
+        self.ultimo_id: int | None = None
+        self.vistos: dict[int, datetime] = {}
+        self._tarefa: asyncio.Task[None] | None = None
+
+    def assinar(self, inicio: date, fim: date) -> Assinatura:
+        assinatura = Assinatura(inicio, fim, int(_config("SSE_FILA_MAXIMA", 500)))
+        self.assinaturas.add(assinatura)
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._consultar())
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        self.assinaturas.discard(assinatura)
+
+    def novas(self) -> list[AlteracaoAlocacao]:
+        """Entradas do log ainda não distribuídas por este processo."""
+        close_old_connections()
+        if self.ultimo_id is None:
+            self.ultimo_id = AlteracaoAlocacao.objects.aggregate(ultimo=Max("id"))["ultimo"] or 0
+            return []
+        limite = timezone.now() - timedelta(seconds=_config("ALOCACOES_DELTA_FOLGA_SEGUNDOS", 30))
+        self.vistos = {pk: criada for pk, criada in self.vistos.items() if criada >= limite}
+        linhas = AlteracaoAlocacao.objects.filter(
+            Q(id__gt=self.ultimo_id) | Q(criada_em__gte=limite)
+        ).exclude(id__in=list(self.vistos))
+        novas = list(linhas.order_by("id"))
+        for alteracao in novas:
+            self.vistos[alteracao.pk] = alteracao.criada_em
+            self.ultimo_id = max(self.ultimo_id, alteracao.pk)
+        return novas
+
+    def distribuir(self, novas: list[AlteracaoAlocacao]) -> None:
+        for alteracao in novas:
+            evento = formatar(alteracao)
+            for assinatura in self.assinaturas:
+                if assinatura.aceita(alteracao):
+                    assinatura.entregar(evento)
+
+    async def _consultar(self) -> None:
+        intervalo = _config("SSE_INTERVALO_SEGUNDOS", 1)
+        while self.assinaturas:
+            self.distribuir(await sync_to_async(self.novas)())
+            await asyncio.sleep(intervalo)
+        # Sem assinantes a marca é refeita na próxima assinatura.
+        self.ultimo_id = None
+        self.vistos = {}
+
+
+_difusores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Difusor] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def difusor() -> Difusor:
+    """Difusor do event loop corrente."""
+    loop = asyncio.get_running_loop()
+    if loop not in _difusores:
+        _difusores[loop] = Difusor()
+    return _difusores[loop]
+
+
+def _perdidas(ultimo_id: int, inicio: date, fim: date, limite: int) -> list[AlteracaoAlocacao]:
+    return list(
+        AlteracaoAlocacao.objects.filter(
+            id__gt=ultimo_id, data__gte=inicio, data__lte=fim
+        ).order_by("id")[:limite]
+    )
+
+
+async def transmitir(inicio: date, fim: date, ultimo_id: int | None = None) -> AsyncIterator[str]:
+    """Eventos SSE do período; retoma depois de `ultimo_id` quando informado."""
+    alvo = difusor()
+    assinatura = alvo.assinar(inicio, fim)
+    try:
+        yield f"retry: {int(_config('SSE_RECONEXAO_MS', 3000))}\n\n"
+        if ultimo_id is not None:
+            limite = int(_config("SSE_FILA_MAXIMA", 500))
+            perdidas = await sync_to_async(_perdidas)(ultimo_id, inicio, fim, limite)
+            if len(perdidas) >= limite:
+                yield EVENTO_RECARREGAR
+                return
+            for alteracao in perdidas:
+                assinatura.entregues.add(alteracao.pk)
+                yield formatar(alteracao)
+        espera = _config("SSE_HEARTBEAT_SEGUNDOS", 15)
+        while True:
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), timeout=espera)
+            except TimeoutError:
+                # Comentário SSE: mantém proxies e o navegador com a conexão viva.
+                yield ": ping\n\n"
+                continue
+            yield evento
+            if evento == EVENTO_RECARREGAR:
+                return
+    finally:
+        alvo.cancelar(assinatura)
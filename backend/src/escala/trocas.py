@@ -0,0 +1,206 @@
+"""Aplicação em lote de trocas registradas (cadeias e ciclos).
+
+Trocas chegam em grupo (ex.: os sábados de um mês combinados no WhatsApp) e
+muitas vezes dependem umas das outras: A→B e B→A no mesmo turno (ciclo) ou
+A→B seguida de B→C no mesmo slot (cadeia). Aplicadas uma a uma, os estados
+intermediários violam a restrição de um turno por profissional.
+
+`aplicar_em_lote` resolve o grupo em memória, em ordem de registro: cada
+troca pega a alocação do profissional de origem no turno, preferindo as que
+o lote ainda não tocou (ciclos) e depois as que acabou de passar para ele
+(cadeias). O estado final é validado de uma vez e gravado com `bulk_update`
+numa transação, com trocas e alocações bloqueadas (`select_for_update`) em
+ordem de id, para dois lotes concorrentes não se travarem.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import alteracoes
+from .models import (
+    Alocacao,
+    AlteracaoAlocacao,
+    AuditoriaAlocacao,
+    OrigemAlocacao,
+    StatusAlocacao,
+    StatusTroca,
+    TipoAlteracao,
+    Troca,
+)
+
+
+class TrocasInvalidas(Exception):
+    """Lote recusado; `erros` traz a mensagem por troca (id)."""
+
+    def __init__(self, erros: dict[int, str], conflito: bool = False) -> None:
+        super().__init__(erros)
+        self.erros = erros
+        self.conflito = conflito
+
+
+@dataclass(frozen=True)
+class ResultadoTrocas:
+    trocas: list[int]
+    alocacoes: list[int]
+
+
+def _filtro_origem(troca: Troca) -> Q:
+    filtro = Q(profissional_id=troca.profissional_origem_id, data=troca.data, turno=troca.turno)
+    if troca.local_id:
+        filtro &= Q(local_id=troca.local_id)
+    if troca.sala_id:
+        filtro &= Q(sala_id=troca.sala_id)
+    return filtro
+
+
+def _casa(troca: Troca, alocacao: Alocacao, dono: int) -> bool:
+    return (
+        dono == troca.profissional_origem_id
+        and alocacao.data == troca.data
+        and alocacao.turno == troca.turno
+        and troca.local_id in (None, alocacao.local_id)
+        and troca.sala_id in (None, alocacao.sala_id)
+    )
+
+
+def _resolver(
+    trocas: list[Troca], alocacoes: list[Alocacao]
+) -> tuple[dict[int, int], dict[int, list[int]], dict[int, str]]:
+    """Dono final por alocação, trocas aplicadas em cada uma e erros por troca."""
+    donos = {alocacao.pk: alocacao.profissional_id for alocacao in alocacoes}
+    por_alocacao: dict[int, list[int]] = defaultdict(list)
+    erros: dict[int, str] = {}
+    for troca in trocas:
+        livres = [a for a in alocacoes if a.pk not in por_alocacao]
+        recebidas = [a for a in alocacoes if a.pk in por_alocacao]
+        alvo = next(
+            (a for a in [*livres, *recebidas] if _casa(troca, a, donos[a.pk])),
+            None,
+        )
+        if alvo is None:
+            erros[troca.pk] = "Alocação original não encontrada"
+            continue
+        donos[alvo.pk] = troca.profissional_destino_id
+        por_alocacao[alvo.pk].append(troca.pk)
+    return donos, por_alocacao, erros
+
+
+def _conflitos(alteradas: list[Alocacao]) -> dict[int, int]:
+    """Alocações alteradas cujo novo dono já tem outro turno igual (id -> conflitante)."""
+    restritas = [a for a in alteradas if not a.permite_sobreposicao]
+    if not restritas:
+        return {}
+    chaves: dict[tuple[int, date, str], list[int]] = defaultdict(list)
+    for alocacao in restritas:
+        chaves[alocacao.profissional_id, alocacao.data, alocacao.turno].append(alocacao.pk)
+    filtro = Q()
+    for profissional_id, data, turno in chaves:
+        filtro |= Q(profissional_id=profissional_id, data=data, turno=turno)
+    outras = (
+        Alocacao.objects.filter(filtro, permite_sobreposicao=False)
+        .exclude(pk__in=[a.pk for a in alteradas])
+        .order_by()
+        .values_list("pk", "profissional_id", "data", "turno")
+    )
+    for pk, profissional_id, data, turno in outras:
+        chaves[profissional_id, data, turno].append(pk)
+    return {ids[0]: ids[1] for ids in chaves.values() if len(ids) > 1}
+
+
+def aplicar_em_lote(ids: Iterable[int]) -> ResultadoTrocas:
+    """Aplica as trocas registradas de uma vez; tudo ou nada.
+
+    Levanta TrocasInvalidas (sem gravar nada) se alguma troca não estiver
+    registrada, não achar a alocação de origem ou deixar um profissional em
+    dois lugares no mesmo turno (`conflito=True`).
+    """
+    ids = sorted(set(ids))
+    with transaction.atomic():
+        trocas = list(Troca.objects.select_for_update().filter(pk__in=ids).order_by("pk"))
+        erros = {pk: "Troca não encontrada" for pk in set(ids) - {t.pk for t in trocas}}
+        for troca in trocas:
+            if troca.status != StatusTroca.REGISTRADA:
+                erros[troca.pk] = "Troca já foi aplicada ou cancelada"
+        if erros:
+            raise TrocasInvalidas(erros)
+
+        filtro = Q()
+        for troca in trocas:
+            filtro |= _filtro_origem(troca)
+        alocacoes = list(Alocacao.objects.select_for_update().filter(filtro).order_by("pk"))
+        donos, por_alocacao, erros = _resolver(trocas, alocacoes)
+        if erros:
+            raise TrocasInvalidas(erros)
+
+        agora = timezone.now()
+        alteradas = []
+        entradas: list[AlteracaoAlocacao] = []
+        auditorias: list[AuditoriaAlocacao] = []
+        chaves_carga: set[tuple[int, date]] = set()
+        anteriores: dict[int, tuple[int, date, str]] = {}
+        for alocacao in alocacoes:
+            if alocacao.pk not in por_alocacao:
+                continue
+            anterior = alocacao.profissional_id
+            chaves_carga.add((anterior, alocacao.data))
+            anteriores[alocacao.pk] = (anterior, alocacao.data, alocacao.turno)
+            alocacao.profissional_id = donos[alocacao.pk]
+            alocacao.origem = OrigemAlocacao.MANUAL
+            alocacao.status = StatusAlocacao.AJUSTADO
+            alocacao.version += 1
+            alocacao.updated_at = agora
+            chaves_carga.add((alocacao.profissional_id, alocacao.data))
+            alteradas.append(alocacao)
+            auditorias.append(alteracoes.auditoria(alocacao))
+            entradas.append(
+                alteracoes.entrada(
+                    alocacao,
+                    TipoAlteracao.TROCA,
+                    {"troca_ids": por_alocacao[alocacao.pk], "profissional_anterior": anterior},
+                )
+            )
+
+        conflitos = _conflitos(alteradas)
+        if conflitos:
+            raise TrocasInvalidas(
+                {
+                    troca_id: "Profissional de destino já alocado neste horário"
+                    for pk in conflitos
+                    for troca_id in por_alocacao.get(pk, [])
+                },
+                conflito=True,
+            )
+
+        # A restrição única (parcial) é checada linha a linha: num ciclo, o
+        # UPDATE da primeira linha colidiria com a que ainda não mudou. Essas
+        # linhas saem da restrição antes e voltam já com os donos finais.
+        saindo = set(anteriores.values())
+        chegando = {(a.profissional_id, a.data, a.turno) for a in alteradas}
+        em_ciclo = [
+            a.pk
+            for a in alteradas
+            if not a.permite_sobreposicao
+            and ((a.profissional_id, a.data, a.turno) in saindo or anteriores[a.pk] in chegando)
+        ]
+        if em_ciclo:
+            Alocacao.objects.filter(pk__in=em_ciclo).update(permite_sobreposicao=True)
+        Alocacao.objects.bulk_update(
+            alteradas,
+            ["profissional", "origem", "status", "version", "updated_at", "permite_sobreposicao"],
+        )
+        alteracoes.registrar_em_lote(entradas, chaves_carga=chaves_carga, auditorias=auditorias)
+
+        for troca in trocas:
+            troca.status = StatusTroca.APLICADA
+            troca.updated_at = agora
+        Troca.objects.bulk_update(trocas, ["status", "updated_at"])
+
+    return ResultadoTrocas(trocas=ids, alocacoes=[a.pk for a in alteradas])
@@ -8,8 +8,11 @@ from .views import (
     AlocacaoViewSet,
     EventoCalendarViewSet,
     ExecucaoJobViewSet,
+    ModeloSemanaViewSet,
     PromptHistoryViewSet,
     TrocaViewSet,
+    calendar_webhook,
+    eventos_alocacoes,
 )
 
 router = DefaultRouter()
@@ -17,9 +20,13 @@ router.register(r"alocacoes", AlocacaoViewSet, basename="alocacao")
 router.register(r"jobs", ExecucaoJobViewSet, basename="job")
 router.register(r"prompts", PromptHistoryViewSet, basename="prompt")
 router.register(r"trocas", TrocaViewSet, basename="troca")
+router.register(r"modelos-semana", ModeloSemanaViewSet, basename="modelo-semana")
 router.register(r"agendas-google", AgendaGoogleViewSet, basename="agenda-google")
 router.register(r"eventos-calendar", EventoCalendarViewSet, basename="evento-calendar")
 
 urlpatterns = [
+    path("calendar/webhook/", calendar_webhook, name="calendar-webhook"),
+    # Antes do router: senão "eventos" casaria com alocacoes/{pk}/.
+    path("alocacoes/eventos/", eventos_alocacoes, name="alocacao-eventos"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,190 @@
+"""Dimensão de vagas (VagaSala): um registro por data × turno × sala a cobrir.
+
+A recorrência semanal de CapacidadeSala (salas e locais ativos, capacidade
+maior que zero) é expandida sobre as datas com a janela do turno do Local
+(`horarios.janela_turno`, fuso do projeto). Consultas de cobertura e gaps
+juntam VagaSala com Alocacao por (sala, data, turno), os dois lados pela
+restrição única, sem expandir a recorrência a cada consulta.
+
+`gerar` compara o desejado com o gravado e só escreve a diferença. Gravações
+de CapacidadeSala, Sala e Local regeneram as salas afetadas de hoje até o fim
+da janela de planejamento, na mesma transação; datas passadas ficam como
+estavam. A migração `0018_preencher_vagas` preenche a janela no deploy, a
+confirmação diária a estende (`estender`) e `manage.py gerar_vagas`
+regenera qualquer período (inclusive o histórico). Consultas de cobertura
+fora da janela chamam `completar`, que gera só as datas ainda sem vagas.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from cadastros import cache
+from cadastros.models import CapacidadeSala, Local, Sala
+from django.db import models, transaction
+from django.db.models import Count, F, FilteredRelation, Q, QuerySet
+
+from .confirmacao import horizonte_padrao
+from .horarios import janela_turno
+from .models import VagaSala
+
+TAMANHO_LOTE = 1000
+
+
+@dataclass(frozen=True)
+class ResultadoVagas:
+    gravadas: int = 0
+    removidas: int = 0
+
+
+def _desejadas(
+    inicio: date, fim: date, salas: Iterable[int] | None
+) -> dict[tuple[int, date, str], tuple[int, int, datetime, datetime]]:
+    capacidades = CapacidadeSala.objects.filter(
+        sala__ativa=True, sala__local__ativo=True, capacidade__gt=0
+    ).select_related("sala__local")
+    if salas is not None:
+        capacidades = capacidades.filter(sala_id__in=salas)
+    por_dia: dict[int, list[CapacidadeSala]] = defaultdict(list)
+    for capacidade in capacidades:
+        por_dia[capacidade.dia_semana].append(capacidade)
+
+    desejadas = {}
+    data = inicio
+    while data <= fim:
+        for capacidade in por_dia[data.weekday()]:
+            local = capacidade.sala.local
+            desejadas[capacidade.sala_id, data, capacidade.turno] = (
+                local.pk,
+                capacidade.capacidade,
+                *janela_turno(local, data, capacidade.turno),
+            )
+        data += timedelta(days=1)
+    return desejadas
+
+
+def _vaga(chave: tuple[int, date, str], valores: tuple[int, int, datetime, datetime]) -> VagaSala:
+    sala_id, data, turno = chave
+    local_id, capacidade, inicio, fim = valores
+    return VagaSala(
+        local_id=local_id,
+        sala_id=sala_id,
+        data=data,
+        turno=turno,
+        capacidade=capacidade,
+        inicio=inicio,
+        fim=fim,
+    )
+
+
+def gerar(inicio: date, fim: date, salas: Iterable[int] | None = None) -> ResultadoVagas:
+    """Regenera as vagas do período (das salas informadas, ou de todas).
+
+    Só grava as linhas novas ou alteradas e remove as que deixaram de valer.
+    """
+    if salas is not None:
+        salas = list(salas)
+    desejadas = _desejadas(inicio, fim, salas)
+    existentes = VagaSala.objects.filter(data__gte=inicio, data__lte=fim)
+    if salas is not None:
+        existentes = existentes.filter(sala_id__in=salas)
+    gravadas = {
+        (sala_id, data, turno): (pk, (local_id, capacidade, vaga_inicio, vaga_fim))
+        for pk, sala_id, data, turno, local_id, capacidade, vaga_inicio, vaga_fim in (
+            existentes.values_list(
+                "pk", "sala_id", "data", "turno", "local_id", "capacidade", "inicio", "fim"
+            )
+        )
+    }
+    remover = [pk for chave, (pk, _) in gravadas.items() if chave not in desejadas]
+    escrever = [
+        _vaga(chave, valores)
+        for chave, valores in desejadas.items()
+        if chave not in gravadas or gravadas[chave][1] != valores
+    ]
+    with transaction.atomic(savepoint=False):
+        for posicao in range(0, len(remover), TAMANHO_LOTE):
+            VagaSala.objects.filter(pk__in=remover[posicao : posicao + TAMANHO_LOTE]).delete()
+        VagaSala.objects.bulk_create(
+            escrever,
+            batch_size=TAMANHO_LOTE,
+            update_conflicts=True,
+            unique_fields=["sala", "data", "turno"],
+            update_fields=["local", "capacidade", "inicio", "fim"],
+        )
+    return ResultadoVagas(gravadas=len(escrever), removidas=len(remover))
+
+
+def completar(inicio: date, fim: date) -> int:
+    """Gera as vagas das datas do período que ainda não têm nenhuma.
+
+    Fora da janela mantida (passado, além do horizonte) as vagas só existem
+    se alguém as gerou. As datas já gravadas não são tocadas: o histórico
+    fica como estava. Sem datas faltando, custa uma consulta.
+    """
+    dias = {dia_semana for _, dia_semana, _ in cache.capacidades()}
+    gravadas = set(VagaSala.objects.filter(data__gte=inicio, data__lte=fim).dates("data", "day"))
+    faltando = {
+        inicio + timedelta(days=deslocamento)
+        for deslocamento in range((fim - inicio).days + 1)
+        if (inicio + timedelta(days=deslocamento)).weekday() in dias
+    } - gravadas
+    if not faltando:
+        return 0
+    novas = [
+        _vaga(chave, valores)
+        for chave, valores in _desejadas(min(faltando), max(faltando), None).items()
+        if chave[1] in faltando
+    ]
+    VagaSala.objects.bulk_create(novas, batch_size=TAMANHO_LOTE, ignore_conflicts=True)
+    return len(novas)
+
+
+def cobertura_por_turno(inicio: date, fim: date) -> QuerySet[Any, Mapping[str, Any]]:
+    """Vagas e vagas cobertas por local, data e turno, numa consulta agrupada.
+
+    LEFT JOIN da vaga com a alocação da mesma (sala, data, turno); as duas
+    chaves únicas garantem no máximo uma alocação por vaga. Ordenado pela
+    prioridade de cobertura do local.
+    """
+    return (
+        VagaSala.objects.filter(data__gte=inicio, data__lte=fim)
+        .annotate(
+            alocacao=FilteredRelation(
+                "sala__alocacoes",
+                condition=Q(sala__alocacoes__data=F("data"), sala__alocacoes__turno=F("turno")),
+            )
+        )
+        .values("local_id", "local__nome", "local__prioridade_cobertura", "data", "turno")
+        .annotate(vagas=Count("id"), cobertas=Count("alocacao__id"))
+        .order_by("local__prioridade_cobertura", "local__nome", "local_id", "data", "turno")
+    )
+
+
+def estender() -> ResultadoVagas:
+    """Garante as vagas de hoje até o fim da janela de planejamento."""
+    return gerar(*horizonte_padrao())
+
+
+def _salas_afetadas(instance: models.Model) -> list[int]:
+    if isinstance(instance, CapacidadeSala):
+        return [instance.sala_id]
+    if isinstance(instance, Sala):
+        return [instance.pk]
+    return list(Sala.objects.filter(local_id=instance.pk).values_list("pk", flat=True))
+
+
+def regenerar(sender: type[models.Model], instance: Any, raw: bool = False, **kwargs: Any) -> None:
+    """post_save/post_delete de CapacidadeSala, Sala e Local."""
+    if raw:
+        return
+    salas = _salas_afetadas(instance)
+    if salas:
+        gerar(*horizonte_padrao(), salas=salas)
+
+
+MODELOS_DE_ORIGEM: tuple[type[models.Model], ...] = (CapacidadeSala, Sala, Local)
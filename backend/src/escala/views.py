@@ -2,27 +2,121 @@
 
 from __future__ import annotations
 
-from datetime import date, timedelta
+import io
+from contextlib import ExitStack
+from dataclasses import asdict
+from datetime import UTC, date, datetime, timedelta
 from typing import Any
+from urllib.parse import unquote
 
+from cadastros.cache import salas, versao
+from cadastros.models import Local, Profissional, Sala, TurnoChoices
+from django.db import IntegrityError, transaction
 from django.db.models import Count, QuerySet
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import AgendaGoogle, Alocacao, EventoCalendar, ExecucaoJob, PromptHistory, Troca
+from . import alteracoes, copia
+from .candidatos import candidatos_para
+from .carga import carga_no_periodo
+from .confirmacao import executar_confirmacao_diaria, horizonte_padrao
+from .conflitos import IndiceEventosGoogle
+from .google_calendar import ClienteIndisponivel, obter_cliente
+from .jobs import enfileirar_sync_agenda, falhas_agrupadas, reprocessar
+from .models import (
+    AgendaGoogle,
+    Alocacao,
+    AuditoriaAlocacao,
+    EventoCalendar,
+    ExecucaoJob,
+    FonteAlteracao,
+    ModeloSemana,
+    PromptHistory,
+    StatusJob,
+    TipoAlteracao,
+    Troca,
+)
+from .sabados import PlanilhaInvalida, ler_planilha
+from .sabados import importar as importar_sabados
 from .serializers import (
     AgendaGoogleSerializer,
     AlocacaoSerializer,
+    AuditoriaAlocacaoSerializer,
     EventoCalendarSerializer,
     ExecucaoJobSerializer,
+    ModeloSemanaSerializer,
     PromptHistorySerializer,
     TrocaSerializer,
 )
+from .transmissao import transmitir
+from .trocas import TrocasInvalidas, aplicar_em_lote
+from .vagas import cobertura_por_turno
+from .vagas import completar as completar_vagas
+from .webhooks import NotificacaoInvalida, registrar_notificacao
+from .whatsapp import importar
+
+
+def _parse_data(valor: Any) -> date | None:
+    """Converte data ISO opcional vinda do corpo da requisição."""
+    if not valor:
+        return None
+    return date.fromisoformat(str(valor))
+
+
+def _copia_concorrente() -> Response:
+    """409 de cópia/modelo que colidiu com alocações gravadas ao mesmo tempo."""
+    return Response(
+        {"error": "Alocações alteradas durante a operação; envie de novo"},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+class AuditadoMixin:
+    """Autoria das alterações de alocação feitas durante a requisição.
+
+    Autor é o usuário; motivo vem do campo `motivo` do corpo ou do header
+    `X-Motivo` (URL-encoded, para corpos em lista); `X-Fonte: prompt` marca
+    chamadas da plataforma de prompts.
+    """
+
+    fonte_auditoria: str = FonteAlteracao.UI
+
+    def initial(self, request: Any, *args: Any, **kwargs: Any) -> None:
+        super().initial(request, *args, **kwargs)  # type: ignore[misc]
+        dados = request.data
+        motivo = dados.get("motivo") if isinstance(dados, dict) else None
+        if not isinstance(motivo, str):
+            motivo = unquote(request.headers.get("X-Motivo", ""))
+        fonte = self.fonte_auditoria
+        if request.headers.get("X-Fonte") == FonteAlteracao.PROMPT:
+            fonte = FonteAlteracao.PROMPT
+        self._auditoria = ExitStack()
+        self._auditoria.enter_context(
+            alteracoes.auditando(fonte, autor=request.user.get_username(), motivo=motivo)
+        )
+
+    def finalize_response(self, request: Any, response: Any, *args: Any, **kwargs: Any) -> Any:
+        auditoria = getattr(self, "_auditoria", None)
+        if auditoria is not None:
+            auditoria.close()
+        return super().finalize_response(request, response, *args, **kwargs)  # type: ignore[misc]
 
 
-class AlocacaoViewSet(viewsets.ModelViewSet):
+class AlocacaoViewSet(AuditadoMixin, viewsets.ModelViewSet):
     """ViewSet para Alocações com filtros avançados."""
 
     queryset = Alocacao.objects.select_related("profissional", "local", "sala", "sala__local").all()
@@ -56,6 +150,231 @@ class AlocacaoViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def _filtros_remocao(self) -> dict[str, Any]:
+        """Os filtros de `get_queryset` aplicados aos tombstones."""
+        params = self.request.query_params
+        filtros: dict[str, Any] = {}
+        if params.get("data_inicio"):
+            filtros["data__gte"] = params["data_inicio"]
+        if params.get("data_fim"):
+            filtros["data__lte"] = params["data_fim"]
+        if params.getlist("profissionais[]"):
+            filtros["profissional_id__in"] = params.getlist("profissionais[]")
+        if params.getlist("locais[]"):
+            filtros["local_id__in"] = params.getlist("locais[]")
+        return filtros
+
+    def get_serializer_context(self) -> dict[str, Any]:
+        context = dict(super().get_serializer_context())
+        # If-Match: "<version>" (o ETag do detalhe) vale como versão esperada.
+        if_match = self.request.headers.get("If-Match", "").removeprefix("W/").strip('"')
+        if if_match.isdigit():
+            context["versao_esperada"] = int(if_match)
+        return context
+
+    def _conflito(self, atuais: Any) -> Response:
+        """409 com o estado atual das alocações alteradas por outra edição."""
+        return Response(
+            {
+                "error": "Alocação alterada por outra edição; recarregue e tente de novo",
+                "atuais": self.get_serializer(atuais, many=True).data,
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    def retrieve(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = f'"{response.data["version"]}"'
+        return response
+
+    def update(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        """Atualização com controle otimista: versão desatualizada devolve 409."""
+        try:
+            response = super().update(request, *args, **kwargs)
+        except alteracoes.VersaoDesatualizada:
+            return self._conflito([self.get_object()])
+        response["ETag"] = f'"{response.data["version"]}"'
+        return response
+
+    @action(detail=False, methods=["patch"])
+    def lote(self, request: Any) -> Response:
+        """Atualização em lote (`[{"id", "version", ...campos}]`), tudo ou nada.
+
+        Cada item é gravado com UPDATE condicional na sua versão; se algum
+        estiver desatualizado nada é gravado e a resposta 409 traz as linhas
+        atuais dos conflitantes.
+        """
+        itens = request.data
+        try:
+            ids = [int(item["id"]) for item in itens]
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {"error": "Envie uma lista de objetos com id"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        alocacoes = self.get_queryset().in_bulk(ids)
+        if faltando := sorted(set(ids) - set(alocacoes)):
+            return Response(
+                {"error": f"Alocações não encontradas: {faltando}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        edicoes = [
+            self.get_serializer(alocacoes[pk], data=item, partial=True)
+            for pk, item in zip(ids, itens, strict=True)
+        ]
+        erros = {pk: s.errors for pk, s in zip(ids, edicoes, strict=True) if not s.is_valid()}
+        if erros:
+            return Response(erros, status=status.HTTP_400_BAD_REQUEST)
+
+        conflitos = []
+        with transaction.atomic():
+            for pk, serializer in zip(ids, edicoes, strict=True):
+                try:
+                    serializer.save()
+                except alteracoes.VersaoDesatualizada:
+                    conflitos.append(pk)
+            if conflitos:
+                transaction.set_rollback(True)
+        if conflitos:
+            return self._conflito(self.get_queryset().filter(pk__in=conflitos))
+        return Response(self.get_serializer([s.instance for s in edicoes], many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def historico(self, request: Any) -> Response:
+        """Auditoria de uma alocação, de um slot ou de um job, em ordem cronológica.
+
+        Filtros: `alocacao`, `job` ou o slot (`sala`, `data`, `turno`).
+        """
+        params = request.query_params
+        filtros: dict[str, Any] = {}
+        try:
+            if params.get("alocacao"):
+                filtros["alocacao_id"] = int(params["alocacao"])
+            if params.get("job"):
+                filtros["job_id"] = int(params["job"])
+            if params.get("sala"):
+                filtros.update(
+                    sala_id=int(params["sala"]),
+                    data=date.fromisoformat(params.get("data", "")),
+                    turno=params.get("turno", ""),
+                )
+        except ValueError:
+            filtros = {}
+        if not filtros:
+            return Response(
+                {"error": "Informe 'alocacao', 'job' ou o slot ('sala', 'data', 'turno')"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        registros = AuditoriaAlocacao.objects.filter(**filtros).order_by("criada_em", "id")
+        return Response(AuditoriaAlocacaoSerializer(registros, many=True).data)
+
+    @action(detail=False, methods=["post"], url_path="copiar-semana")
+    def copiar_semana(self, request: Any) -> Response:
+        """Copia a semana de `origem` para as semanas de `destinos` (datas ISO).
+
+        Slots já ocupados e profissionais já alocados no turno são pulados;
+        a resposta traz as inconsistências das alocações criadas.
+        """
+        try:
+            origem = _parse_data(request.data.get("origem"))
+            destinos = [_parse_data(valor) for valor in request.data.get("destinos") or []]
+        except (TypeError, ValueError):
+            origem, destinos = None, []
+        if origem is None or not destinos or None in destinos:
+            return Response(
+                {"error": "Informe 'origem' e a lista 'destinos' (datas ISO)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            resultado = copia.copiar_semana(origem, [d for d in destinos if d is not None])
+        except IntegrityError:
+            return _copia_concorrente()
+        return Response(asdict(resultado), status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="importar-sabados",
+        parser_classes=[MultiPartParser],
+    )
+    def importar_sabados(self, request: Any) -> Response:
+        """Lança a escala de sábados do mês a partir de uma planilha CSV/XLSX (`arquivo`).
+
+        Valida o mês inteiro e devolve o relatório por célula; com erros
+        (400) nada é gravado. `simular=1` só valida.
+        """
+        arquivo = request.FILES.get("arquivo")
+        if arquivo is None:
+            return Response(
+                {"error": "Envie a planilha do mês em 'arquivo'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        gravar = request.data.get("simular") not in ("1", "true")
+        try:
+            resultado = importar_sabados(ler_planilha(arquivo.file, arquivo.name), gravar=gravar)
+        except PlanilhaInvalida as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response(
+                {"error": "Alocações alteradas durante a importação; envie de novo"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        codigo: int
+        if resultado.erros:
+            codigo = status.HTTP_400_BAD_REQUEST
+        elif gravar and resultado.alocacoes:
+            codigo = status.HTTP_201_CREATED
+        else:
+            codigo = status.HTTP_200_OK
+        return Response(asdict(resultado), status=codigo)
+
+    def list(self, request: Any, *args: Any, **kwargs: Any) -> Any:
+        """Listagem com ETag do período; `?alterado_desde=<cursor>` devolve só o delta."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if "alterado_desde" in request.query_params:
+            return self._delta(request.query_params["alterado_desde"], queryset)
+
+        marca = alteracoes.marca(queryset)
+        etag = marca.etag(versao(Local, Sala))
+        alterado = marca.ultima_alteracao
+        ultima = int(alterado.timestamp()) if alterado else None
+        response = get_conditional_response(request._request, etag=etag, last_modified=ultima)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        if ultima is not None:
+            response["Last-Modified"] = http_date(ultima)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _delta(self, cursor: str, queryset: QuerySet[Alocacao]) -> Response:
+        agora = timezone.now()
+        try:
+            desde = datetime.fromisoformat(cursor)
+        except ValueError:
+            return Response(
+                {"error": "alterado_desde deve ser o cursor ISO devolvido pela listagem"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if timezone.is_naive(desde):
+            desde = timezone.make_aware(desde)
+        try:
+            alteradas, removidas = alteracoes.delta(queryset, desde, self._filtros_remocao())
+        except alteracoes.CursorExpirado:
+            return Response(
+                {"error": "Cursor expirado: recarregue a listagem completa"},
+                status=status.HTTP_410_GONE,
+            )
+        return Response(
+            {
+                # Em UTC com "Z": o cursor volta na query string sem escapar "+".
+                "cursor": agora.astimezone(UTC).isoformat().replace("+00:00", "Z"),
+                "alteradas": self.get_serializer(alteradas, many=True).data,
+                "removidas": sorted(set(removidas.values_list("alocacao_id", flat=True))),
+            }
+        )
+
     @action(detail=False, methods=["get"])
     def inconsistencias(self, request: Any) -> Response:
         """Lista inconsistências com severidades (ERROR, WARNING)."""
@@ -71,10 +390,15 @@ class AlocacaoViewSet(viewsets.ModelViewSet):
         if data_fim:
             queryset = queryset.filter(data__lte=data_fim)
 
+        # Índice de eventos Google montado uma vez para todo o lote
+        alocacoes = list(queryset)
+        context = dict(self.get_serializer_context())
+        context["indice_google"] = IndiceEventosGoogle.para_alocacoes(alocacoes)
+
         # Coletar inconsistências
         inconsistencias = []
-        for alocacao in queryset:
-            serializer = self.get_serializer(alocacao)
+        for alocacao in alocacoes:
+            serializer = self.get_serializer(alocacao, context=context)
             issues = serializer.data.get("validation_issues", [])
 
             # Filtrar por severidade se especificado
@@ -95,59 +419,118 @@ class AlocacaoViewSet(viewsets.ModelViewSet):
 
         return Response(inconsistencias)
 
+    @action(detail=False, methods=["get"])
+    def cobertura(self, request: Any) -> Response:
+        """Gaps e percentual de cobertura por local, dia e turno no período.
+
+        Agregado no banco sobre a dimensão de vagas (`vagas.py`); datas do
+        período ainda sem vagas (fora da janela mantida) são geradas antes.
+        Locais na ordem de `prioridade_cobertura`. Padrão: a janela de
+        planejamento.
+        """
+        try:
+            inicio = _parse_data(request.query_params.get("data_inicio"))
+            fim = _parse_data(request.query_params.get("data_fim"))
+        except ValueError:
+            return Response({"error": "Datas inválidas"}, status=status.HTTP_400_BAD_REQUEST)
+        if inicio is None or fim is None:
+            padrao_inicio, padrao_fim = horizonte_padrao()
+            inicio, fim = inicio or padrao_inicio, fim or padrao_fim
+        if fim < inicio:
+            return Response(
+                {"error": "data_fim anterior a data_inicio"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        completar_vagas(inicio, fim)
+
+        def _percentual(cobertas: int, total: int) -> float:
+            return round(100 * cobertas / total, 1) if total else 100.0
+
+        locais: dict[int, dict[str, Any]] = {}
+        for linha in cobertura_por_turno(inicio, fim):
+            local = locais.setdefault(
+                linha["local_id"],
+                {
+                    "local_id": linha["local_id"],
+                    "nome": linha["local__nome"],
+                    "prioridade_cobertura": linha["local__prioridade_cobertura"],
+                    "vagas": 0,
+                    "cobertas": 0,
+                    "turnos": [],
+                },
+            )
+            local["vagas"] += linha["vagas"]
+            local["cobertas"] += linha["cobertas"]
+            local["turnos"].append(
+                {
+                    "data": linha["data"],
+                    "turno": linha["turno"],
+                    "vagas": linha["vagas"],
+                    "cobertas": linha["cobertas"],
+                    "gaps": linha["vagas"] - linha["cobertas"],
+                    "cobertura": _percentual(linha["cobertas"], linha["vagas"]),
+                }
+            )
+        for local in locais.values():
+            local["gaps"] = local["vagas"] - local["cobertas"]
+            local["cobertura"] = _percentual(local["cobertas"], local["vagas"])
+
+        vagas = sum(local["vagas"] for local in locais.values())
+        cobertas = sum(local["cobertas"] for local in locais.values())
+        return Response(
+            {
+                "periodo": {"inicio": inicio, "fim": fim},
+                "vagas": vagas,
+                "cobertas": cobertas,
+                "gaps": vagas - cobertas,
+                "cobertura": _percentual(cobertas, vagas),
+                "locais": list(locais.values()),
+            }
+        )
+
     @action(detail=False, methods=["get"])
     def estatisticas(self, request: Any) -> Response:
-        """Estatísticas das últimas semanas (1, 2, 3, 4 semanas)."""
+        """Estatísticas das últimas semanas (1, 2, 3, 4 semanas).
+
+        Turnos, horas e dobras das semanas ISO inteiras do período vêm do
+        livro de carga semanal; os dias das semanas parciais nas pontas e a
+        contagem por local consultam as alocações.
+        """
         semanas = int(request.query_params.get("semanas", 4))
 
         hoje = date.today()
         inicio = hoje - timedelta(weeks=semanas)
-
-        # Buscar alocações no período
-        alocacoes = Alocacao.objects.filter(data__gte=inicio, data__lte=hoje).select_related(
-            "profissional", "local"
+        fim = hoje
+
+        cargas = carga_no_periodo(inicio, fim)
+        nomes = dict(Profissional.objects.filter(pk__in=cargas).values_list("pk", "nome"))
+        stats_profissionais: dict[int, dict[str, Any]] = {
+            prof_id: {
+                "nome": nomes[prof_id],
+                "total_turnos": cargas[prof_id].turnos,
+                "horas_total": cargas[prof_id].horas,
+                "locais": {},
+                "dobras": cargas[prof_id].dobras,
+            }
+            for prof_id in sorted(cargas, key=lambda prof_id: (nomes[prof_id], prof_id))
+        }
+
+        # Contar por local
+        por_local = (
+            Alocacao.objects.filter(data__gte=inicio, data__lte=fim)
+            .values_list("profissional_id", "local__nome")
+            .annotate(total=Count("id"))
+            .order_by()
         )
-
-        # Estatísticas por profissional
-        stats_profissionais: dict[int, dict[str, Any]] = {}
-        for alocacao in alocacoes:
-            prof_id = alocacao.profissional.id
-            prof_nome = alocacao.profissional.nome
-
-            if prof_id not in stats_profissionais:
-                stats_profissionais[prof_id] = {
-                    "nome": prof_nome,
-                    "total_turnos": 0,
-                    "horas_total": 0,
-                    "locais": {},
-                    "dobras": 0,
-                }
-
-            stats_profissionais[prof_id]["total_turnos"] += 1
-            stats_profissionais[prof_id]["horas_total"] += 6  # 6h por turno
-
-            # Contar por local
-            local_nome = alocacao.local.nome
-            if local_nome not in stats_profissionais[prof_id]["locais"]:
-                stats_profissionais[prof_id]["locais"][local_nome] = 0
-            stats_profissionais[prof_id]["locais"][local_nome] += 1
-
-        # Contar dobras (dias com 2+ turnos)
-        for prof_id in stats_profissionais:
-            dobras = (
-                alocacoes.filter(profissional_id=prof_id)
-                .values("data")
-                .annotate(turnos=Count("id"))
-                .filter(turnos__gte=2)
-                .count()
-            )
-            stats_profissionais[prof_id]["dobras"] = dobras
+        for prof_id, local_nome, total in por_local:
+            if prof_id in stats_profissionais:
+                stats_profissionais[prof_id]["locais"][local_nome] = total
 
         return Response(
             {
                 "periodo": {
                     "inicio": inicio,
-                    "fim": hoje,
+                    "fim": fim,
                     "semanas": semanas,
                 },
                 "profissionais": list(stats_profissionais.values()),
@@ -164,6 +547,76 @@ class ExecucaoJobViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ["tipo", "status", "autor"]
     ordering = ["-iniciou_em"]
 
+    @action(detail=False, methods=["post"], url_path="confirmacao-diaria")
+    def confirmacao_diaria(self, request: Any) -> Response:
+        """Força a execução manual da confirmação diária."""
+        try:
+            inicio = _parse_data(request.data.get("inicio"))
+            fim = _parse_data(request.data.get("fim"))
+        except ValueError:
+            return Response(
+                {"error": "Datas devem estar no formato AAAA-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = executar_confirmacao_diaria(
+            inicio,
+            fim,
+            autor=request.user.get_username(),
+            completo=request.data.get("completo") in (True, "1", "true"),
+        )
+        return Response(self.get_serializer(job).data, status=status.HTTP_201_CREATED)
+
+    def _dead_letters(self, filtros: Any) -> QuerySet[ExecucaoJob]:
+        """Dead-letters filtrados por tipo, assinatura, ids e período de falha."""
+        queryset = ExecucaoJob.objects.filter(status=StatusJob.DEAD_LETTER)
+        if filtros.get("tipo"):
+            queryset = queryset.filter(tipo=filtros["tipo"])
+        if filtros.get("assinatura"):
+            queryset = queryset.filter(log_json__erro__assinatura=filtros["assinatura"])
+        if ids := filtros.get("ids"):
+            queryset = queryset.filter(pk__in=ids.split(",") if isinstance(ids, str) else ids)
+        if filtros.get("desde"):
+            queryset = queryset.filter(terminou_em__date__gte=_parse_data(filtros["desde"]))
+        if filtros.get("ate"):
+            queryset = queryset.filter(terminou_em__date__lte=_parse_data(filtros["ate"]))
+        return queryset
+
+    @action(detail=False, methods=["get"], url_path="dead-letter")
+    def dead_letter(self, request: Any) -> Response:
+        """Falhas definitivas agrupadas por tipo de job e assinatura do erro."""
+        try:
+            grupos = falhas_agrupadas(self._dead_letters(request.query_params))
+        except ValueError:
+            return Response(
+                {"error": "Datas devem estar no formato AAAA-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"total": sum(grupo["total"] for grupo in grupos), "grupos": grupos})
+
+    @action(detail=False, methods=["post"], url_path="dead-letter/reprocessar")
+    def reprocessar_dead_letter(self, request: Any) -> Response:
+        """Devolve à fila, em ritmo controlado, os dead-letters filtrados."""
+        try:
+            jobs = self._dead_letters(request.data)
+            limite = int(request.data.get("limite") or 500)
+            por_minuto = int(request.data.get("por_minuto") or 0) or None
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Filtros inválidos: datas em AAAA-MM-DD, limite e por_minuto inteiros"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if limite < 1 or (por_minuto is not None and por_minuto < 1):
+            return Response(
+                {"error": "limite e por_minuto devem ser positivos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        resultado = reprocessar(
+            jobs, autor=request.user.get_username(), limite=limite, por_minuto=por_minuto
+        )
+        return Response(asdict(resultado), status=status.HTTP_202_ACCEPTED)
+
 
 class PromptHistoryViewSet(viewsets.ModelViewSet):
     """ViewSet para Histórico de Prompts."""
@@ -175,9 +628,38 @@ class PromptHistoryViewSet(viewsets.ModelViewSet):
     ordering = ["-created_at"]
 
 
-class TrocaViewSet(viewsets.ModelViewSet):
+class ModeloSemanaViewSet(AuditadoMixin, viewsets.ModelViewSet):
+    """ViewSet para modelos de semana (criados a partir de uma semana existente)."""
+
+    queryset = ModeloSemana.objects.prefetch_related("itens").all()
+    serializer_class = ModeloSemanaSerializer
+    permission_classes = [IsAuthenticated]
+
+    @action(detail=True, methods=["post"])
+    def aplicar(self, request: Any, pk: int | None = None) -> Response:
+        """Preenche as `semanas` (datas ISO; vale a semana de cada uma) com o modelo."""
+        modelo = self.get_object()
+        try:
+            semanas = [_parse_data(valor) for valor in request.data.get("semanas") or []]
+        except (TypeError, ValueError):
+            semanas = []
+        if not semanas or None in semanas:
+            return Response(
+                {"error": "Informe a lista 'semanas' (datas ISO)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            resultado = copia.aplicar_modelo(modelo, [s for s in semanas if s is not None])
+        except IntegrityError:
+            return _copia_concorrente()
+        return Response(asdict(resultado), status=status.HTTP_201_CREATED)
+
+
+class TrocaViewSet(AuditadoMixin, viewsets.ModelViewSet):
     """ViewSet para Trocas."""
 
+    fonte_auditoria = FonteAlteracao.TROCA
+
     queryset = Troca.objects.select_related(
         "profissional_origem",
         "profissional_destino",
@@ -189,6 +671,85 @@ class TrocaViewSet(viewsets.ModelViewSet):
     filterset_fields = ["status", "origem", "data"]
     ordering = ["-data"]
 
+    @action(detail=False, methods=["get"])
+    def candidatos(self, request: Any) -> Response:
+        """Substitutos para (data, turno, sala), ordenados pela heurística.
+
+        Cada candidato traz as horas e dobras da semana com o turno e as
+        violações (bloqueios, estouro de horas ou dobras); ver `candidatos.py`.
+        """
+        params = request.query_params
+        try:
+            data = _parse_data(params.get("data"))
+            sala = salas().get(int(params.get("sala", "")))
+        except ValueError:
+            data = sala = None
+        turno = params.get("turno")
+        if data is None or sala is None or turno not in TurnoChoices.values:
+            return Response(
+                {"error": "Informe data, turno e sala válidos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "data": data,
+                "turno": turno,
+                "sala": sala.pk,
+                "local": sala.local_id,
+                "candidatos": [
+                    {**asdict(candidato), "bloqueado": candidato.bloqueado}
+                    for candidato in candidatos_para(data, turno, sala)
+                ],
+            }
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="importar-whatsapp",
+        parser_classes=[MultiPartParser],
+    )
+    def importar_whatsapp(self, request: Any) -> Response:
+        """Registra as trocas de uma conversa exportada do WhatsApp (campo `arquivo`).
+
+        O arquivo é lido em streaming; `simular=1` só conta, sem gravar.
+        """
+        arquivo = request.FILES.get("arquivo")
+        if arquivo is None:
+            return Response(
+                {"error": "Envie a exportação da conversa em 'arquivo'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        gravar = request.data.get("simular") not in ("1", "true")
+        linhas = io.TextIOWrapper(arquivo.file, encoding="utf-8-sig", errors="replace")
+        resultado = importar(linhas, gravar=gravar)
+        return Response(
+            asdict(resultado), status=status.HTTP_201_CREATED if gravar else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=["post"], url_path="aplicar-lote")
+    def aplicar_lote(self, request: Any) -> Response:
+        """Aplica várias trocas registradas de uma vez (cadeias e ciclos); tudo ou nada."""
+        ids = request.data.get("trocas") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return Response(
+                {"error": "Informe a lista de ids em 'trocas'"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            resultado = aplicar_em_lote(ids)
+        except TrocasInvalidas as exc:
+            return Response(
+                {"error": "Lote não aplicado", "trocas": exc.erros},
+                status=status.HTTP_409_CONFLICT if exc.conflito else status.HTTP_400_BAD_REQUEST,
+            )
+        except IntegrityError:
+            return Response(
+                {"error": "Profissional de destino já alocado neste horário"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(asdict(resultado))
+
     @action(detail=True, methods=["post"])
     def aplicar(self, request: Any, pk: int | None = None) -> Response:
         """Aplica a troca, atualizando alocações correspondentes."""
@@ -218,15 +779,35 @@ class TrocaViewSet(viewsets.ModelViewSet):
                 {"error": "Alocação original não encontrada"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # Atualizar profissional
-        alocacao_obj.profissional = troca.profissional_destino
-        alocacao_obj.origem = "manual"
-        alocacao_obj.status = "ajustado"
-        alocacao_obj.save()
-
-        # Marcar troca como aplicada
-        troca.status = "aplicada"
-        troca.save()
+        try:
+            with (
+                transaction.atomic(),
+                alteracoes.auditando(
+                    FonteAlteracao.TROCA,
+                    autor=request.user.get_username(),
+                    motivo=troca.motivo,
+                ),
+                alteracoes.registrando_como(
+                    TipoAlteracao.TROCA,
+                    troca_id=troca.pk,
+                    profissional_anterior=alocacao_obj.profissional_id,
+                ),
+            ):
+                # Atualizar profissional
+                alocacao_obj.profissional = troca.profissional_destino
+                alocacao_obj.origem = "manual"
+                alocacao_obj.status = "ajustado"
+                alocacao_obj.save()
+
+                # Marcar troca como aplicada
+                troca.status = "aplicada"
+                troca.save()
+        except IntegrityError:
+            # Restrição `unica_alocacao_profissional_turno`.
+            return Response(
+                {"error": "Profissional de destino já alocado neste horário"},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         return Response({"message": "Troca aplicada com sucesso", "alocacao_id": alocacao_obj.id})
 
@@ -242,22 +823,21 @@ class AgendaGoogleViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def sincronizar(self, request: Any, pk: int | None = None) -> Response:
-        """Sincroniza agenda específica com Google Calendar."""
+        """Enfileira a sincronização da agenda com o Google Calendar."""
         agenda = self.get_object()
 
-        # TODO: Implementar sincronização real com Google Calendar (Sprint 5)
-        # Por enquanto retorna sucesso simulado
-
-        from django.utils import timezone
-
-        agenda.ultima_sync = timezone.now()
-        agenda.save()
+        try:
+            obter_cliente()
+        except ClienteIndisponivel as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
+        job = enfileirar_sync_agenda(agenda.pk, motivo="manual")
         return Response(
             {
-                "message": f"Agenda '{agenda.nome}' sincronizada com sucesso",
-                "ultima_sync": agenda.ultima_sync,
-            }
+                "message": f"Sincronização da agenda '{agenda.nome}' enfileirada",
+                "job": ExecucaoJobSerializer(job).data,
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
 
 
@@ -269,3 +849,52 @@ class EventoCalendarViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filterset_fields = ["agenda", "status", "origem"]
     ordering = ["-data_inicio"]
+
+
+@csrf_exempt
+@require_POST
+def calendar_webhook(request: HttpRequest) -> HttpResponse:
+    """Recebe notificações de push do Google Calendar.
+
+    View Django simples (sem autenticação/throttling do DRF): o Google envia
+    rajadas de chamadas e a resposta precisa sair rápido, só enfileirando o sync.
+    """
+    try:
+        registrar_notificacao(
+            request.headers.get("X-Goog-Channel-ID", ""),
+            request.headers.get("X-Goog-Resource-ID", ""),
+            request.headers.get("X-Goog-Channel-Token", ""),
+            request.headers.get("X-Goog-Resource-State", ""),
+        )
+    except NotificacaoInvalida:
+        return HttpResponse(status=412)
+    return HttpResponse(status=200)
+
+
+@require_GET
+async def eventos_alocacoes(request: HttpRequest) -> HttpResponse | StreamingHttpResponse:
+    """Stream SSE das alterações de alocações do período (quadro ao vivo).
+
+    View Django assíncrona: cada cliente conectado é uma corrotina suspensa
+    no event loop do servidor ASGI, não uma thread (ver `transmissao.py`).
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"error": "Autenticação necessária"}, status=401)
+    try:
+        inicio = _parse_data(request.GET.get("data_inicio"))
+        fim = _parse_data(request.GET.get("data_fim"))
+        ultimo = request.headers.get("Last-Event-ID") or request.GET.get("ultimo_evento")
+        ultimo_id = int(ultimo) if ultimo else None
+    except ValueError:
+        return JsonResponse({"error": "Parâmetros inválidos"}, status=400)
+    if inicio is None or fim is None or fim < inicio:
+        return JsonResponse({"error": "Informe data_inicio e data_fim"}, status=400)
+
+    response = StreamingHttpResponse(
+        transmitir(inicio, fim, ultimo_id), content_type="text/event-stream"
+    )
+    patch_cache_control(response, no_cache=True)
+    # Sem buffer no proxy (nginx): cada evento sai assim que é gerado.
+    response["X-Accel-Buffering"] = "no"
+    return response
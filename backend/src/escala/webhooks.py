@@ -0,0 +1,179 @@
+"""Canais de push do Google Calendar: recebimento, coalescência, renovação e polling."""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import secrets
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .google_calendar import ClienteCalendar, ErroCalendarAPI, obter_cliente
+from .jobs import enfileirar_sync_agenda
+from .models import AgendaGoogle, StatusAgenda
+
+logger = logging.getLogger(__name__)
+
+# Estados enviados pelo Google; "sync" apenas confirma a abertura do canal.
+ESTADO_SYNC = "sync"
+
+
+class NotificacaoInvalida(Exception):
+    """Canal desconhecido ou credenciais da notificação não conferem."""
+
+
+@dataclass(frozen=True)
+class ResultadoNotificacao:
+    agenda_id: int
+    enfileirado: bool
+
+
+def _confere(recebido: str, esperado: str) -> bool:
+    return bool(esperado) and hmac.compare_digest(recebido.encode(), esperado.encode())
+
+
+def _janela_coalescencia() -> timedelta:
+    return timedelta(seconds=getattr(settings, "CALENDAR_WEBHOOK_DEBOUNCE_SEGUNDOS", 5))
+
+
+def registrar_notificacao(
+    channel_id: str, resource_id: str, token: str, estado: str
+) -> ResultadoNotificacao:
+    """Valida a notificação e agenda no máximo um sync pendente por agenda.
+
+    Só faz consultas indexadas e no máximo uma inserção: o sync em si roda
+    fora da requisição. Enquanto houver sync pendente (não iniciado) para a
+    agenda, novas notificações apenas atualizam `ultimo_webhook_em`.
+    """
+    if not channel_id:
+        raise NotificacaoInvalida("Canal não informado.")
+
+    canal = (
+        AgendaGoogle.objects.filter(webhook_channel_id=channel_id, ativa=True)
+        .values_list("id", "webhook_resource_id", "webhook_token")
+        .first()
+    )
+    if canal is None:
+        raise NotificacaoInvalida("Canal desconhecido.")
+    agenda_id, resource_esperado, token_esperado = canal
+    if not _confere(resource_id, resource_esperado) or not _confere(token, token_esperado):
+        raise NotificacaoInvalida("Credenciais do canal não conferem.")
+
+    agora = timezone.now()
+    if estado == ESTADO_SYNC:
+        AgendaGoogle.objects.filter(pk=agenda_id).update(ultimo_webhook_em=agora)
+        return ResultadoNotificacao(agenda_id=agenda_id, enfileirado=False)
+
+    # UPDATE condicional: só a primeira notificação da rajada marca a agenda.
+    marcou = AgendaGoogle.objects.filter(pk=agenda_id, sync_pendente_desde__isnull=True).update(
+        sync_pendente_desde=agora, ultimo_webhook_em=agora
+    )
+    if not marcou:
+        AgendaGoogle.objects.filter(pk=agenda_id).update(ultimo_webhook_em=agora)
+        return ResultadoNotificacao(agenda_id=agenda_id, enfileirado=False)
+
+    enfileirar_sync_agenda(
+        agenda_id, motivo="webhook", executar_apos=agora + _janela_coalescencia()
+    )
+    return ResultadoNotificacao(agenda_id=agenda_id, enfileirado=True)
+
+
+def _expiracao(valor: object) -> datetime | None:
+    """Converte `expiration` (ms desde epoch) para datetime aware."""
+    if valor in (None, ""):
+        return None
+    return datetime.fromtimestamp(int(str(valor)) / 1000, tz=UTC)
+
+
+def abrir_canal(agenda: AgendaGoogle, cliente: ClienteCalendar) -> AgendaGoogle:
+    """Abre um novo canal de push para a agenda e encerra o anterior."""
+    endereco = getattr(settings, "GOOGLE_CALENDAR_WEBHOOK_URL", "")
+    channel_id = uuid.uuid4().hex
+    token = secrets.token_urlsafe(32)
+    resposta = cliente.watch_events(agenda.calendar_id, channel_id, token, endereco)
+
+    canal_antigo = (agenda.webhook_channel_id, agenda.webhook_resource_id)
+    agenda.webhook_channel_id = channel_id
+    agenda.webhook_resource_id = str(resposta.get("resourceId", ""))
+    agenda.webhook_token = token
+    agenda.webhook_expiracao = _expiracao(resposta.get("expiration"))
+    agenda.status = StatusAgenda.OK
+    agenda.erro_mensagem = ""
+    agenda.save(
+        update_fields=[
+            "webhook_channel_id",
+            "webhook_resource_id",
+            "webhook_token",
+            "webhook_expiracao",
+            "status",
+            "erro_mensagem",
+            "updated_at",
+        ]
+    )
+
+    if all(canal_antigo):
+        try:
+            cliente.stop_channel(*canal_antigo)
+        except ErroCalendarAPI:
+            # O canal antigo expira sozinho; notificações dele serão rejeitadas.
+            logger.warning("Falha ao encerrar canal antigo da agenda %s", agenda.pk)
+    return agenda
+
+
+def renovar_canais(
+    cliente: ClienteCalendar | None = None,
+    *,
+    antecedencia: timedelta = timedelta(hours=6),
+) -> dict[str, int]:
+    """Renova canais que expiram dentro da antecedência (ou que não existem).
+
+    Falhas marcam a agenda como `webhook_expired`, o que a coloca no polling.
+    """
+    cliente = cliente or obter_cliente()
+    limite = timezone.now() + antecedencia
+    agendas = AgendaGoogle.objects.filter(ativa=True).exclude(
+        webhook_expiracao__gt=limite, webhook_channel_id__gt=""
+    )
+
+    renovadas = falhas = 0
+    for agenda in agendas.iterator():
+        try:
+            abrir_canal(agenda, cliente)
+            renovadas += 1
+        except ErroCalendarAPI as exc:
+            falhas += 1
+            logger.warning("Renovação de webhook falhou para agenda %s: %s", agenda.pk, exc)
+            AgendaGoogle.objects.filter(pk=agenda.pk).update(
+                status=StatusAgenda.WEBHOOK_EXPIRADO,
+                erro_mensagem=str(exc),
+                updated_at=timezone.now(),
+            )
+    return {"renovadas": renovadas, "falhas": falhas}
+
+
+def enfileirar_polling() -> int:
+    """Agenda sync para agendas sem canal de push válido (fallback de polling).
+
+    Usa a mesma marcação de coalescência do webhook: agendas com sync
+    pendente não recebem outro.
+    """
+    agora = timezone.now()
+    sem_canal = AgendaGoogle.objects.filter(ativa=True, sync_pendente_desde__isnull=True).filter(
+        Q(status=StatusAgenda.WEBHOOK_EXPIRADO)
+        | Q(webhook_channel_id="")
+        | Q(webhook_expiracao__lt=agora)
+    )
+    total = 0
+    for agenda_id in sem_canal.values_list("id", flat=True):
+        marcou = AgendaGoogle.objects.filter(pk=agenda_id, sync_pendente_desde__isnull=True).update(
+            sync_pendente_desde=agora
+        )
+        if marcou:
+            enfileirar_sync_agenda(agenda_id, motivo="polling")
+            total += 1
+    return total
@@ -0,0 +1,220 @@
+"""Importação de trocas a partir da exportação de conversa do WhatsApp.
+
+A exportação ("Exportar conversa", sem mídia) é um texto com uma mensagem
+por linha, no formato `07/03/2026 09:15 - Ana Souza: texto` (Android) ou
+`[07/03/2026, 09:15:22] Ana Souza: texto` (iOS); linhas sem cabeçalho
+continuam a mensagem anterior. O arquivo é lido linha a linha e só a
+mensagem corrente fica em memória, além das trocas encontradas.
+
+Cada mensagem que fala em troca/cobertura e traz uma data vira uma troca
+candidata: o remetente e os nomes citados são casados com o índice de
+nomes dos profissionais ativos (`cadastros.nomes`, em memória). As trocas
+são gravadas com `bulk_create` como REGISTRADAS, com `confianca` entre 0 e
+1 para a revisão de quem administra; as já registradas para o mesmo
+(data, turno, origem, destino) são ignoradas.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from cadastros import cache
+from cadastros.models import DiaSemana, TurnoChoices
+from cadastros.nomes import IndiceNomes, normalizar
+
+from .models import StatusTroca, Troca
+
+TAMANHO_LOTE = 500
+
+_CABECALHO = re.compile(
+    r"^\u200e?\[?(?P<data>\d{1,2}/\d{1,2}/\d{2,4}),? (?P<hora>\d{1,2}:\d{2})(?::\d{2})?\]?"
+    r"(?: -)? (?P<autor>[^:]+): (?P<texto>.*)$"
+)
+_DATA = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")
+_PALAVRAS_TROCA = re.compile(
+    r"\b(troca|trocar|troco|trocou|cobre|cobrir|cubro|cobrindo|substitui\w*|no (meu|seu) lugar)\b"
+)
+# Remetente assume o turno de quem foi citado ("eu cubro a Bia").
+_REMETENTE_ASSUME = re.compile(
+    r"\b(cubro|vou cobrir|posso cobrir|fico no (seu )?lugar|assumo|pego o turno)\b"
+)
+_MANHA = re.compile(r"\bmanha\b")
+_TARDE = re.compile(r"\btarde\b")
+_SABADO = re.compile(r"\bsabado\b")
+
+
+@dataclass
+class Mensagem:
+    enviada_em: datetime
+    autor: str
+    linhas: list[str] = field(default_factory=list)
+
+    @property
+    def texto(self) -> str:
+        return "\n".join(self.linhas)
+
+
+def _data_cabecalho(data: str, hora: str) -> datetime | None:
+    for formato in ("%d/%m/%Y %H:%M", "%d/%m/%y %H:%M"):
+        try:
+            return datetime.strptime(f"{data} {hora}", formato)
+        except ValueError:
+            continue
+    return None
+
+
+def mensagens(linhas: Iterable[str]) -> Iterator[Mensagem]:
+    """Mensagens da exportação, uma por vez (continuações juntadas)."""
+    atual: Mensagem | None = None
+    for linha in linhas:
+        linha = linha.rstrip("\r\n")
+        casou = _CABECALHO.match(linha)
+        enviada_em = casou and _data_cabecalho(casou["data"], casou["hora"])
+        if casou and enviada_em:
+            if atual is not None:
+                yield atual
+            atual = Mensagem(enviada_em, casou["autor"].strip(), [casou["texto"]])
+        elif atual is not None:
+            atual.linhas.append(linha)
+    if atual is not None:
+        yield atual
+
+
+@dataclass(frozen=True)
+class TrocaEncontrada:
+    data: date
+    turno: str
+    origem: int
+    destino: int
+    confianca: Decimal
+    mensagem: str
+
+
+def _data_citada(texto: str, enviada: date) -> tuple[date | None, bool]:
+    """Data da troca e se veio explícita (dd/mm[/aaaa]) ou de "sábado"."""
+    for dia, mes, ano in _DATA.findall(texto):
+        ano_completo = int(ano) + (2000 if len(ano) == 2 else 0) if ano else enviada.year
+        try:
+            citada = date(ano_completo, int(mes), int(dia))
+        except ValueError:
+            continue
+        if not ano and citada < enviada - timedelta(days=180):
+            citada = citada.replace(year=citada.year + 1)
+        return citada, True
+    if _SABADO.search(texto):
+        dias = (DiaSemana.SABADO - enviada.weekday()) % 7 or 7
+        return enviada + timedelta(days=dias), False
+    return None, False
+
+
+def extrair(mensagem: Mensagem, indice: IndiceNomes) -> TrocaEncontrada | None:
+    """Troca candidata da mensagem, ou None se ela não descreve uma troca."""
+    texto = normalizar(mensagem.texto)
+    if not _PALAVRAS_TROCA.search(texto):
+        return None
+    data, data_explicita = _data_citada(texto, mensagem.enviada_em.date())
+    if data is None:
+        return None
+
+    confianca = Decimal("1.00")
+    autor, autor_certo = indice.autor(mensagem.autor)
+    citados = [(pk, completo) for pk, completo in indice.citados(texto) if pk != autor]
+    if autor is not None and citados:
+        outro, completo = citados[0]
+        if _REMETENTE_ASSUME.search(texto):
+            origem, destino = outro, autor
+        else:
+            origem, destino = autor, outro
+        if not autor_certo:
+            confianca -= Decimal("0.15")
+    elif len(citados) >= 2:
+        # Mensagem de terceiros ("Ana troca com a Bia"): citados em ordem.
+        (origem, completo), (destino, completo_destino) = citados[:2]
+        completo = completo and completo_destino
+        confianca -= Decimal("0.20")
+    else:
+        return None
+    if not completo:
+        confianca -= Decimal("0.10")
+    if not data_explicita:
+        confianca -= Decimal("0.20")
+
+    manha, tarde = bool(_MANHA.search(texto)), bool(_TARDE.search(texto))
+    if manha != tarde:
+        turno = TurnoChoices.TARDE if tarde else TurnoChoices.MANHA
+    else:
+        # Sábado é turno único; fora dele, sem turno claro, fica a manhã.
+        turno = TurnoChoices.MANHA
+        if data.weekday() != DiaSemana.SABADO:
+            confianca -= Decimal("0.25")
+
+    cabecalho = f"[{mensagem.enviada_em:%d/%m/%Y %H:%M}] {mensagem.autor}: "
+    return TrocaEncontrada(
+        data=data,
+        turno=turno,
+        origem=origem,
+        destino=destino,
+        confianca=max(confianca, Decimal("0.05")),
+        mensagem=cabecalho + mensagem.texto,
+    )
+
+
+@dataclass
+class ResultadoImportacao:
+    mensagens: int = 0
+    encontradas: int = 0
+    criadas: int = 0
+    duplicadas: int = 0
+    trocas: list[int] = field(default_factory=list)
+
+
+def importar(linhas: Iterable[str], *, gravar: bool = True) -> ResultadoImportacao:
+    """Lê a exportação em streaming e registra as trocas encontradas."""
+    indice = cache.indice_nomes()
+    resultado = ResultadoImportacao()
+    encontradas: dict[tuple[date, str, int, int], TrocaEncontrada] = {}
+    for mensagem in mensagens(linhas):
+        resultado.mensagens += 1
+        troca = extrair(mensagem, indice)
+        if troca is None:
+            continue
+        resultado.encontradas += 1
+        chave = (troca.data, troca.turno, troca.origem, troca.destino)
+        # A mesma troca repetida na conversa: fica a mensagem mais confiável.
+        if chave not in encontradas or troca.confianca > encontradas[chave].confianca:
+            encontradas[chave] = troca
+
+    if encontradas:
+        datas = [data for data, _, _, _ in encontradas]
+        existentes = set(
+            Troca.objects.filter(data__gte=min(datas), data__lte=max(datas))
+            .exclude(status=StatusTroca.CANCELADA)
+            .order_by()
+            .values_list("data", "turno", "profissional_origem_id", "profissional_destino_id")
+        )
+        novas = [troca for chave, troca in encontradas.items() if chave not in existentes]
+        resultado.duplicadas = len(encontradas) - len(novas)
+        if gravar:
+            criadas = Troca.objects.bulk_create(
+                [
+                    Troca(
+                        data=troca.data,
+                        turno=troca.turno,
+                        profissional_origem_id=troca.origem,
+                        profissional_destino_id=troca.destino,
+                        motivo=troca.mensagem,
+                        origem="whatsapp",
+                        status=StatusTroca.REGISTRADA,
+                        confianca=troca.confianca,
+                    )
+                    for troca in novas
+                ],
+                batch_size=TAMANHO_LOTE,
+            )
+            resultado.trocas = [troca.pk for troca in criadas if troca.pk is not None]
+        resultado.criadas = len(novas)
+    return resultado
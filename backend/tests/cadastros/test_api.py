@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import pytest
-from cadastros.models import CapacidadeSala, Local, PremissasGlobais, Profissional
+from cadastros import cache as cadastros_cache
+from cadastros.models import CapacidadeSala, Local, PremissasGlobais, Profissional, Sala
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.db import transaction
+from pytest_django import DjangoAssertNumQueries
 from rest_framework.test import APIClient
 
 
@@ -105,3 +108,50 @@ def test_premissas_globais_singleton(client: APIClient) -> None:
     premissas = PremissasGlobais.objects.get(singleton=True)
     assert premissas.janela_planejamento_semanas == 6
     assert premissas.limite_horas_semana == 60
+
+
+@pytest.mark.django_db(transaction=True)
+def test_listagem_de_locais_responde_304_sem_consultas(
+    client: APIClient, django_assert_num_queries: DjangoAssertNumQueries
+) -> None:
+    Local.objects.create(nome="Savassi")
+
+    primeira = client.get("/api/cadastros/locais/")
+    assert primeira.status_code == 200
+    etag = primeira["ETag"]
+    assert primeira["Last-Modified"]
+    assert cadastros_cache.locais()
+
+    with django_assert_num_queries(0):
+        assert client.get("/api/cadastros/locais/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+        repetida = client.get("/api/cadastros/locais/")
+        assert [local["nome"] for local in repetida.json()] == ["Savassi"]
+        assert list(cadastros_cache.locais().values())[0].nome == "Savassi"
+
+    Local.objects.create(nome="Lourdes")
+    nova = client.get("/api/cadastros/locais/", HTTP_IF_NONE_MATCH=etag)
+    assert nova.status_code == 200
+    assert nova["ETag"] != etag
+    assert {local["nome"] for local in nova.json()} == {"Savassi", "Lourdes"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lookup_em_memoria_acompanha_alteracoes_e_rollback() -> None:
+    cache.clear()
+    local = Local.objects.create(nome="Savassi")
+    sala = Sala.objects.create(local=local, nome="Sala 1")
+    CapacidadeSala.objects.create(sala=sala, dia_semana=5, turno="manha", capacidade=2)
+
+    assert cadastros_cache.salas()[sala.pk].local.nome == "Savassi"
+    assert cadastros_cache.capacidades() == {(sala.pk, 5, "manha"): 2}
+    assert cadastros_cache.premissas().janela_planejamento_semanas == 4
+
+    local.nome = "Savassi II"
+    local.save()
+    assert cadastros_cache.salas()[sala.pk].local.nome == "Savassi II"
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        Local.objects.create(nome="Provisório")
+        assert len(cadastros_cache.locais()) == 2
+        raise RuntimeError
+    assert [local.nome for local in cadastros_cache.locais().values()] == ["Savassi II"]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from cadastros import cache as cadastros_cache
+from cadastros.models import Local, Profissional, Sala
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from escala.models import Alocacao
+from escala.serializers import AlocacaoSerializer
+from pytest_django import DjangoAssertNumQueries
+
+SEGUNDA = date(2026, 3, 2)
+
+
+@pytest.mark.django_db
+def test_bitsets_derivados_no_save_e_nas_relacoes() -> None:
+    cache.clear()
+    savassi = Local.objects.create(nome="Savassi")
+    lourdes = Local.objects.create(nome="Lourdes")
+    ana = Profissional.objects.create(
+        nome="Ana",
+        email="ana@example.com",
+        indisponibilidades=[
+            {"dia_semana": 0, "turno": "tarde"},
+            {"dia_semana": 5, "turno": "manha"},
+        ],
+    )
+    assert ana.turnos_disponiveis == 0b11_1011_1111_1101
+
+    ana.locais_proibidos.add(lourdes)
+    ana.locais_preferidos.add(savassi)
+    disponibilidade = cadastros_cache.disponibilidades()[ana.pk]
+
+    assert not disponibilidade.livre(0, "tarde")
+    assert disponibilidade.livre(0, "manha")
+    assert not disponibilidade.livre(5, "manha")
+    assert disponibilidade.proibido(lourdes.pk)
+    assert not disponibilidade.proibido(savassi.pk)
+    assert disponibilidade.preferido(savassi.pk)
+
+    ana.indisponibilidades = []
+    ana.save(update_fields=["indisponibilidades"])
+    ana.locais_proibidos.clear()
+    ana.refresh_from_db()
+    assert ana.turnos_disponiveis == (1 << 14) - 1
+    assert cadastros_cache.disponibilidades()[ana.pk].proibidos == 0
+
+    # JSON malformado vindo do admin: o save ignora, o formulário rejeita.
+    ana.indisponibilidades = [{"dia": 1}, "segunda", {"dia_semana": 1, "turno": "manha"}]
+    ana.save()
+    assert ana.turnos_disponiveis == ((1 << 14) - 1) & ~(1 << 2)
+    with pytest.raises(ValidationError, match="indisponibilidades"):
+        ana.full_clean()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_verificacao_de_bloqueios_sem_consultas(
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    cache.clear()
+    local = Local.objects.create(nome="Savassi")
+    ana = Profissional.objects.create(
+        nome="Ana",
+        email="ana@example.com",
+        indisponibilidades=[{"dia_semana": 0, "turno": "manha"}],
+    )
+    alocacao = Alocacao.objects.create(
+        profissional=ana,
+        local=local,
+        sala=Sala.objects.create(local=local, nome="Sala 1"),
+        data=SEGUNDA,
+        turno="manha",
+    )
+    alocacao = Alocacao.objects.select_related("profissional").get(pk=alocacao.pk)
+    serializer = AlocacaoSerializer()
+    assert serializer._check_blocks_and_preferences(alocacao)
+
+    with django_assert_num_queries(0):
+        mensagem = serializer._check_blocks_and_preferences(alocacao)
+
+    assert mensagem is not None
+    assert mensagem.startswith("Profissional indisponível neste dia/turno.")
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from django.utils import timezone
+from escala.agendador import disparar_vencidos, obter_lideranca
+from escala.cron import Cron, CronInvalido
+from escala.models import (
+    AgendaGoogle,
+    AgendamentoJob,
+    ExecucaoJob,
+    RecuperacaoAtrasos,
+    StatusAgenda,
+    StatusJob,
+    TipoJob,
+)
+from escala.webhooks import enfileirar_polling
+
+
+def _local(*args: int) -> datetime:
+    return timezone.make_aware(datetime(*args))
+
+
+def test_cron_calcula_proximos_disparos() -> None:
+    sabado = Cron.parse("0 6 * * 6")
+    # 2026-03-04 é quarta-feira.
+    assert sabado.proxima(_local(2026, 3, 4, 12, 0)) == _local(2026, 3, 7, 6, 0)
+    assert sabado.proxima(_local(2026, 3, 7, 6, 0)) == _local(2026, 3, 14, 6, 0)
+
+    quinze = Cron.parse("*/15 8-9 * * 1-5")
+    assert quinze.disparos(_local(2026, 3, 6, 9, 40), _local(2026, 3, 9, 8, 20)) == [
+        _local(2026, 3, 6, 9, 45),
+        _local(2026, 3, 9, 8, 0),
+        _local(2026, 3, 9, 8, 15),
+    ]
+
+    # `*/2` não restringe o dia: só as segundas de dia ímpar, não um OU dos dois.
+    segundas_impares = Cron.parse("0 6 */2 * 1")
+    assert segundas_impares.proxima(_local(2026, 3, 4, 12, 0)) == _local(2026, 3, 9, 6, 0)
+
+    with pytest.raises(CronInvalido):
+        Cron.parse("61 * * * *")
+
+
+@pytest.mark.django_db
+def test_apenas_uma_instancia_e_lider() -> None:
+    assert obter_lideranca("a", timedelta(seconds=90))
+    assert not obter_lideranca("b", timedelta(seconds=90))
+    assert obter_lideranca("a", timedelta(seconds=90))
+
+    # Lease expirado: a reserva assume.
+    assert obter_lideranca("a", timedelta(seconds=-1))
+    assert obter_lideranca("b", timedelta(seconds=90))
+    assert not obter_lideranca("a", timedelta(seconds=90))
+
+
+@pytest.mark.django_db
+def test_recuperacao_de_atrasos_e_sem_duplicar_em_execucao() -> None:
+    AgendamentoJob.objects.all().delete()
+    agora = _local(2026, 3, 10, 12, 0)
+    diario = AgendamentoJob.objects.create(
+        nome="diario",
+        tipo=TipoJob.CONFIRMACAO_DIARIA,
+        cron="0 5 * * *",
+        proxima_execucao=_local(2026, 3, 7, 5, 0),
+    )
+    todos = AgendamentoJob.objects.create(
+        nome="todos",
+        tipo=TipoJob.RENOVACAO_WEBHOOK,
+        cron="0 5 * * *",
+        recuperacao=RecuperacaoAtrasos.TODOS,
+        max_atrasados=2,
+        proxima_execucao=_local(2026, 3, 7, 5, 0),
+    )
+    pular = AgendamentoJob.objects.create(
+        nome="pular",
+        tipo=TipoJob.POLLING_GOOGLE,
+        cron="0 5 * * *",
+        recuperacao=RecuperacaoAtrasos.PULAR,
+        proxima_execucao=_local(2026, 3, 7, 5, 0),
+    )
+
+    resultado = disparar_vencidos(agora)
+
+    jobs = ExecucaoJob.objects.all()
+    assert sorted(jobs.values_list("tipo", "log_json__previsto_para")) == [
+        (TipoJob.CONFIRMACAO_DIARIA, _local(2026, 3, 10, 5, 0).isoformat()),
+        (TipoJob.RENOVACAO_WEBHOOK, _local(2026, 3, 9, 5, 0).isoformat()),
+        (TipoJob.RENOVACAO_WEBHOOK, _local(2026, 3, 10, 5, 0).isoformat()),
+    ]
+    assert resultado.descartados == 3 + 2 + 4
+    for agendamento in (diario, todos, pular):
+        agendamento.refresh_from_db()
+        assert agendamento.proxima_execucao == _local(2026, 3, 11, 5, 0)
+
+    # No dia seguinte a confirmação ainda roda e as renovações seguem pendentes:
+    # nada é empilhado para esses tipos.
+    ExecucaoJob.objects.filter(tipo=TipoJob.CONFIRMACAO_DIARIA).update(status=StatusJob.EXECUTANDO)
+    seguinte = disparar_vencidos(_local(2026, 3, 11, 5, 0, 30))
+    assert seguinte.ignorados_em_execucao == 2
+    assert ExecucaoJob.objects.filter(tipo=TipoJob.CONFIRMACAO_DIARIA).count() == 1
+    # O polling está em dia (dentro da tolerância) e dispara.
+    assert ExecucaoJob.objects.filter(tipo=TipoJob.POLLING_GOOGLE).count() == 1
+
+
+@pytest.mark.django_db
+def test_polling_enfileira_agendas_sem_webhook_uma_vez() -> None:
+    AgendaGoogle.objects.create(calendar_id="sem-canal@cal", nome="Sem canal")
+    AgendaGoogle.objects.create(
+        calendar_id="expirado@cal",
+        nome="Expirado",
+        webhook_channel_id="c1",
+        status=StatusAgenda.WEBHOOK_EXPIRADO,
+    )
+    AgendaGoogle.objects.create(
+        calendar_id="ok@cal",
+        nome="Ok",
+        webhook_channel_id="c2",
+        webhook_expiracao=timezone.now() + timedelta(days=3),
+    )
+
+    assert enfileirar_polling() == 2
+    assert enfileirar_polling() == 0
+    assert ExecucaoJob.objects.filter(tipo=TipoJob.SYNC_GOOGLE).count() == 2
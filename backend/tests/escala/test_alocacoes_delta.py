@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from escala.models import Alocacao, AlteracaoAlocacao, TipoAlteracao
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+URL = "/api/escala/alocacoes/"
+PERIODO = {"data_inicio": "2026-03-02", "data_fim": "2026-03-29"}
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def alocacoes() -> list[Alocacao]:
+    local = Local.objects.create(nome="Savassi")
+    salas = [Sala.objects.create(local=local, nome=f"Sala {i}") for i in (1, 2)]
+    ana = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    return [
+        Alocacao.objects.create(
+            profissional=ana,
+            local=local,
+            sala=sala,
+            data=SEGUNDA + timedelta(days=dia),
+            turno=turno,
+        )
+        for dia in range(3)
+        for sala, turno in zip(salas, ("manha", "tarde"), strict=True)
+    ]
+
+
+@pytest.mark.django_db
+def test_listagem_responde_304_com_uma_consulta_agregada(
+    client: APIClient,
+    alocacoes: list[Alocacao],
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    primeira = client.get(URL, PERIODO)
+    assert primeira.status_code == 200
+    assert len(primeira.data) == 6
+    etag = primeira["ETag"]
+
+    with django_assert_num_queries(1):
+        assert client.get(URL, PERIODO, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # Fora do período a alteração não invalida o validador.
+    Alocacao.objects.create(
+        profissional=alocacoes[0].profissional,
+        local=alocacoes[0].local,
+        sala=alocacoes[0].sala,
+        data=date(2026, 5, 4),
+        turno="tarde",
+    )
+    assert client.get(URL, PERIODO, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    alocacoes[0].observacoes = "trocou de sala"
+    alocacoes[0].save()
+    alterada = client.get(URL, PERIODO, HTTP_IF_NONE_MATCH=etag)
+    assert alterada.status_code == 200
+    assert alterada["ETag"] != etag
+
+    alocacoes[1].delete()
+    assert client.get(URL, PERIODO, HTTP_IF_NONE_MATCH=alterada["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_delta_traz_alteradas_e_tombstones_do_filtro(
+    client: APIClient, alocacoes: list[Alocacao], settings: Any
+) -> None:
+    settings.ALOCACOES_DELTA_FOLGA_SEGUNDOS = 0
+    cursor = client.get(URL, {**PERIODO, "alterado_desde": timezone.now().isoformat()}).data[
+        "cursor"
+    ]
+
+    alocacoes[0].status = "revisado"
+    alocacoes[0].save()
+    removida_id = alocacoes[1].pk
+    alocacoes[1].delete()
+    fora = AlteracaoAlocacao.objects.create(
+        alocacao_id=999,
+        tipo=TipoAlteracao.REMOVIDA,
+        profissional_id=1,
+        local_id=1,
+        data=date(2026, 6, 1),
+        turno="manha",
+    )
+
+    response = client.get(URL, {**PERIODO, "alterado_desde": cursor})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["alteradas"]] == [alocacoes[0].pk]
+    assert response.data["removidas"] == [removida_id]
+    assert fora.alocacao_id not in response.data["removidas"]
+    assert response.data["cursor"] > cursor
+
+    vazio = client.get(URL, {**PERIODO, "alterado_desde": response.data["cursor"]})
+    assert (vazio.data["alteradas"], vazio.data["removidas"]) == ([], [])
+
+    antigo = (timezone.now() - timedelta(days=31)).isoformat()
+    assert client.get(URL, {"alterado_desde": antigo}).status_code == 410
+    assert client.get(URL, {"alterado_desde": "ontem"}).status_code == 400
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from escala import alteracoes, copia
+from escala.models import Alocacao, AuditoriaAlocacao, ExecucaoJob, FonteAlteracao, Troca
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+HISTORICO = "/api/escala/alocacoes/historico/"
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    local = Local.objects.create(nome="Savassi")
+    return {
+        "local": local,
+        "salas": [Sala.objects.create(local=local, nome=f"Sala {i}") for i in (1, 2)],
+        **{
+            nome: Profissional.objects.create(nome=nome, email=f"{nome.lower()}@example.com")
+            for nome in ("Ana", "Bia", "Carla")
+        },
+    }
+
+
+def _alocar(dados: dict[str, Any], nome: str, sala: int, data: date = SEGUNDA) -> Alocacao:
+    return Alocacao.objects.create(
+        profissional=dados[nome],
+        local=dados["local"],
+        sala=dados["salas"][sala],
+        data=data,
+        turno="manha",
+    )
+
+
+@pytest.mark.django_db
+def test_historico_do_slot_com_autor_motivo_e_diff(
+    client: APIClient, dados: dict[str, Any]
+) -> None:
+    alocacao = _alocar(dados, "Ana", 0)
+    url = f"/api/escala/alocacoes/{alocacao.pk}/"
+    editada = client.patch(
+        url,
+        {"profissional": dados["Bia"].pk, "version": 1, "motivo": "Ana de atestado"},
+        format="json",
+    )
+    assert editada.status_code == 200
+    assert client.delete(url, HTTP_X_MOTIVO="Sala%20em%20reforma").status_code == 204
+
+    response = client.get(
+        HISTORICO, {"sala": dados["salas"][0].pk, "data": SEGUNDA.isoformat(), "turno": "manha"}
+    )
+
+    assert response.status_code == 200, response.data
+    ana, bia, sala = dados["Ana"].pk, dados["Bia"].pk, dados["salas"][0].pk
+    estado = [dados["local"].pk, sala, SEGUNDA.isoformat(), "manha", "gerado"]
+    assert [
+        (r["fonte"], r["autor"], r["motivo"], r["antes"], r["depois"]) for r in response.data
+    ] == [
+        ("sistema", "", "", None, [ana, *estado]),
+        ("ui", "admin", "Ana de atestado", [ana, *estado], [bia, *estado]),
+        ("ui", "admin", "Sala em reforma", [bia, *estado], None),
+    ]
+    assert {r["alocacao_id"] for r in response.data} == {alocacao.pk}
+    assert client.get(HISTORICO).status_code == 400
+
+    registro = AuditoriaAlocacao.objects.first()
+    assert registro is not None
+    registro.motivo = "reescrito"
+    with pytest.raises(PermissionDenied):
+        registro.save()
+    with pytest.raises(PermissionDenied):
+        AuditoriaAlocacao.objects.all().delete()
+    with pytest.raises(PermissionDenied):
+        AuditoriaAlocacao.objects.update(motivo="reescrito")
+
+
+@pytest.mark.django_db
+def test_lotes_gravam_auditoria_em_bulk_com_fonte(
+    client: APIClient, dados: dict[str, Any], django_assert_max_num_queries: Any
+) -> None:
+    alocacoes = [_alocar(dados, "Ana", 0), _alocar(dados, "Bia", 1)]
+    trocas = [
+        Troca.objects.create(
+            data=SEGUNDA,
+            turno="manha",
+            profissional_origem=dados[origem],
+            profissional_destino=dados[destino],
+        )
+        for origem, destino in (("Ana", "Bia"), ("Bia", "Ana"))
+    ]
+
+    response = client.post(
+        "/api/escala/trocas/aplicar-lote/",
+        {"trocas": [t.pk for t in trocas], "motivo": "Troca combinada no grupo"},
+        format="json",
+    )
+
+    assert response.status_code == 200, response.data
+    aplicadas = AuditoriaAlocacao.objects.filter(fonte=FonteAlteracao.TROCA)
+    assert {(r.alocacao_id, r.antes[0], r.depois[0]) for r in aplicadas} == {
+        (alocacoes[0].pk, dados["Ana"].pk, dados["Bia"].pk),
+        (alocacoes[1].pk, dados["Bia"].pk, dados["Ana"].pk),
+    }
+    assert {(r.autor, r.motivo) for r in aplicadas} == {("admin", "Troca combinada no grupo")}
+
+    job = ExecucaoJob.objects.create(tipo="replanejamento", autor="job")
+    proxima = SEGUNDA + timedelta(days=7)
+    with (
+        alteracoes.auditando(FonteAlteracao.JOB, autor="job", job_id=job.pk),
+        django_assert_max_num_queries(15),
+    ):
+        resultado = copia.copiar_semana(SEGUNDA, [proxima])
+
+    assert resultado.criadas == 2
+    response = client.get(HISTORICO, {"job": job.pk})
+    assert [(r["alocacao_id"], r["antes"], r["depois"][3]) for r in response.data] == [
+        (pk, None, proxima.isoformat()) for pk in sorted(resultado.alocacoes)
+    ]
+    assert {r["fonte"] for r in response.data} == {"job"}
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from escala.models import Alocacao
+from pytest_django import DjangoAssertNumQueries
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+URL = "/api/escala/trocas/candidatos/"
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    savassi = Local.objects.create(nome="Savassi")
+    lourdes = Local.objects.create(nome="Lourdes")
+    salas = [Sala.objects.create(local=savassi, nome=f"Sala {i}") for i in (1, 2, 3)]
+    profissionais = {
+        nome: Profissional.objects.create(nome=nome, email=f"{nome.lower()}@example.com", **extra)
+        for nome, extra in (
+            ("Ana", {}),
+            ("Bia", {"turno_preferencial": "manha"}),
+            ("Carla", {"indisponibilidades": [{"dia_semana": 0, "turno": "manha"}]}),
+            ("Dora", {"limite_dobras_semana": 0}),
+            ("Eva", {"carga_semanal_alvo": 10}),
+            ("Fabi", {}),
+        )
+    }
+    profissionais["Fabi"].locais_proibidos.add(lourdes)
+    profissionais["Fabi"].locais_preferidos.add(savassi)
+
+    def alocar(nome: str, sala: Sala, data: date, turno: str) -> None:
+        Alocacao.objects.create(
+            profissional=profissionais[nome], local=sala.local, sala=sala, data=data, turno=turno
+        )
+
+    alocar("Ana", salas[0], SEGUNDA, "manha")
+    alocar("Dora", salas[1], SEGUNDA, "tarde")
+    alocar("Eva", salas[2], SEGUNDA + timedelta(days=1), "manha")
+    alocar("Fabi", salas[1], SEGUNDA, "manha")
+    alocar("Bia", salas[0], SEGUNDA - timedelta(days=7), "tarde")
+    return {"sala": salas[0], **profissionais}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_candidatos_ordenados_com_violacoes_marcadas(
+    client: APIClient, dados: dict[str, Any], django_assert_max_num_queries: DjangoAssertNumQueries
+) -> None:
+    # Primeira chamada carrega os cadastros em memória.
+    client.get(URL, {"data": "2026-03-02", "turno": "manha", "sala": dados["sala"].pk})
+
+    with django_assert_max_num_queries(5):
+        response = client.get(
+            URL, {"data": "2026-03-02", "turno": "manha", "sala": dados["sala"].pk}
+        )
+
+    assert response.status_code == 200
+    linhas = {linha["nome"]: linha for linha in response.data["candidatos"]}
+    assert "Ana" not in linhas  # quem está saindo
+    assert linhas["Carla"]["violacoes"] == ["indisponivel"]
+    assert linhas["Dora"]["violacoes"] == ["excede_dobras"]
+    assert linhas["Eva"]["violacoes"] == ["excede_horas"]
+    assert linhas["Eva"]["horas_semana"] == 12
+    assert linhas["Fabi"]["violacoes"] == ["ocupado"]
+    assert linhas["Fabi"]["bloqueado"]
+    # Bia prefere a manhã, mas repete o local da semana anterior.
+    assert linhas["Bia"]["pontuacao"] == 100 - 40 * (6 / 160) + 10 - 20
+    assert [linha["nome"] for linha in response.data["candidatos"]] == [
+        "Bia",
+        "Eva",
+        "Dora",  # a dobra pesa na pontuação
+        "Fabi",  # bloqueados por último; Fabi prefere Savassi
+        "Carla",
+    ]
+
+
+@pytest.mark.django_db
+def test_parametros_obrigatorios(client: APIClient) -> None:
+    assert client.get(URL, {"data": "2026-03-02", "turno": "noite", "sala": 1}).status_code == 400
+    assert client.get(URL, {"data": "2026-03-02", "turno": "manha"}).status_code == 400
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from datetime import date, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from cadastros import cache as cadastros_cache
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from escala.carga import Carga, carga_no_periodo, semana_de
+from escala.models import Alocacao, CargaSemanal, Troca
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+SABADO = date(2026, 3, 7)
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    local = Local.objects.create(nome="Savassi")
+    return {
+        "local": local,
+        "salas": [Sala.objects.create(local=local, nome=f"Sala {i}") for i in (1, 2, 3)],
+        "ana": Profissional.objects.create(
+            nome="Ana", email="ana@example.com", carga_semanal_alvo=12, limite_dobras_semana=0
+        ),
+        "bia": Profissional.objects.create(nome="Bia", email="bia@example.com"),
+    }
+
+
+def _alocar(dados: dict[str, Any], sala: int, data: date, turno: str) -> Alocacao:
+    return Alocacao.objects.create(
+        profissional=dados["ana"],
+        local=dados["local"],
+        sala=dados["salas"][sala],
+        data=data,
+        turno=turno,
+    )
+
+
+def _livro() -> list[tuple[str, date, int, int, int, int]]:
+    return [
+        (
+            linha.profissional.nome,
+            linha.semana,
+            linha.turnos,
+            int(linha.horas),
+            linha.dobras,
+            linha.sabados,
+        )
+        for linha in CargaSemanal.objects.select_related("profissional")
+    ]
+
+
+@pytest.mark.django_db
+def test_livro_acompanha_gravacoes_troca_e_remocao(dados: dict[str, Any]) -> None:
+    manha = _alocar(dados, 0, SEGUNDA, "manha")
+    _alocar(dados, 1, SEGUNDA, "tarde")
+    sabado = _alocar(dados, 2, SABADO, "manha")
+
+    assert _livro() == [("Ana", SEGUNDA, 3, 17, 1, 1)]
+
+    Troca.objects.create(
+        data=SEGUNDA,
+        turno="manha",
+        profissional_origem=dados["ana"],
+        profissional_destino=dados["bia"],
+    )
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", password="secret123"))  # noqa: S106
+    troca_id = Troca.objects.get().pk
+    assert client.post(f"/api/escala/trocas/{troca_id}/aplicar/").status_code == 200
+
+    assert _livro() == [("Ana", SEGUNDA, 2, 11, 0, 1), ("Bia", SEGUNDA, 1, 6, 0, 0)]
+
+    sabado.data = date(2026, 3, 14)
+    sabado.save()
+    manha.refresh_from_db()
+    manha.delete()
+
+    assert _livro() == [("Ana", SEGUNDA, 1, 6, 0, 0), ("Ana", date(2026, 3, 9), 1, 5, 0, 1)]
+
+
+@pytest.mark.django_db
+def test_verificacoes_leem_o_livro_e_comando_reconstroi(dados: dict[str, Any]) -> None:
+    cache.clear()
+    _alocar(dados, 0, SEGUNDA, "manha")
+    tarde = _alocar(dados, 1, SEGUNDA, "tarde")
+    _alocar(dados, 2, SABADO, "manha")
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", password="secret123"))  # noqa: S106
+
+    issues = client.get(f"/api/escala/alocacoes/{tarde.pk}/").data["validation_issues"]
+
+    mensagens = {issue["message"] for issue in issues}
+    assert "Limite de 12h/semana será excedido (17h total)" in mensagens
+    assert "Limite de 0 dobras/semana será excedido (1 total)" in mensagens
+
+    esperado = _livro()
+    CargaSemanal.objects.update(turnos=99)
+    call_command("reconstruir_carga_semanal")
+    assert _livro() == esperado
+
+
+@pytest.mark.django_db
+def test_horas_seguem_a_duracao_do_turno_no_local(dados: dict[str, Any]) -> None:
+    cache.clear()
+    local = dados["local"]
+    local.manha_inicio, local.manha_fim = time(7), time(12, 30)
+    local.save()
+    _alocar(dados, 0, SEGUNDA, "manha")
+    _alocar(dados, 1, SABADO, "tarde")
+
+    assert CargaSemanal.objects.get().horas == Decimal("10.50")
+    assert cadastros_cache.duracoes()[local.pk, "manha", 0] == Decimal("5.50")
+
+    # Novo horário vale para as semanas a partir da corrente.
+    semana = date.today()
+    _alocar(dados, 2, semana, "manha")
+    local.manha_fim = time(13)
+    local.save()
+
+    assert cadastros_cache.duracoes()[local.pk, "manha", 0] == Decimal("6.00")
+    assert CargaSemanal.objects.get(semana=semana_de(semana)).horas == (
+        Decimal(6) if semana.weekday() != 5 else Decimal(5)
+    )
+    assert CargaSemanal.objects.get(semana=SEGUNDA).horas == Decimal("10.50")
+    call_command("reconstruir_carga_semanal")
+    assert CargaSemanal.objects.get(semana=SEGUNDA).horas == Decimal("11.00")
+
+
+@pytest.mark.django_db
+def test_carga_no_periodo_soma_o_livro_e_conta_as_pontas(dados: dict[str, Any]) -> None:
+    cache.clear()
+    quarta = SEGUNDA + timedelta(days=2)
+    for data, turno in [
+        (SEGUNDA, "manha"),
+        (quarta, "manha"),
+        (quarta, "tarde"),
+        (SABADO, "manha"),
+        (SEGUNDA + timedelta(days=8), "manha"),
+        (SEGUNDA + timedelta(days=14), "manha"),
+        (SEGUNDA + timedelta(days=16), "manha"),
+    ]:
+        _alocar(dados, 0, data, turno)
+
+    # Quarta a terça: a semana de 9/3 vem do livro, as pontas das alocações.
+    cargas = carga_no_periodo(quarta, SEGUNDA + timedelta(days=15))
+
+    assert list(cargas) == [dados["ana"].pk]
+    assert cargas[dados["ana"].pk] == Carga(turnos=5, horas=Decimal(29), dobras=1, sabados=1)
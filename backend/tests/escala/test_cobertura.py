@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from cadastros.models import CapacidadeSala, DiaSemana, Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from escala.models import Alocacao, VagaSala
+from escala.vagas import gerar
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+URL = "/api/escala/alocacoes/cobertura/"
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def _local(nome: str, prioridade: int, salas: int) -> list[Sala]:
+    local = Local.objects.create(nome=nome, prioridade_cobertura=prioridade)
+    criadas = []
+    for numero in range(1, salas + 1):
+        sala = Sala.objects.create(local=local, nome=f"Sala {numero}")
+        CapacidadeSala.objects.bulk_create(
+            CapacidadeSala(sala=sala, dia_semana=dia, turno=turno)
+            for dia in range(DiaSemana.SABADO)
+            for turno in ("manha", "tarde")
+        )
+        criadas.append(sala)
+    return criadas
+
+
+@pytest.mark.django_db
+def test_gaps_por_local_dia_e_turno_em_ordem_de_prioridade(
+    client: APIClient, django_assert_max_num_queries: Any
+) -> None:
+    lourdes = _local("Lourdes", 2, 2)
+    savassi = _local("Savassi", 1, 1)
+    gerar(SEGUNDA, SEGUNDA + timedelta(days=6))
+    ana = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    bia = Profissional.objects.create(nome="Bia", email="bia@example.com")
+    for profissional, sala in ((ana, lourdes[0]), (bia, savassi[0])):
+        Alocacao.objects.create(
+            profissional=profissional, local=sala.local, sala=sala, data=SEGUNDA, turno="manha"
+        )
+
+    # Datas com vagas já geradas: a agregação, a consulta que confere as datas
+    # e, se ainda não estiverem em memória, as capacidades.
+    with django_assert_max_num_queries(3):
+        response = client.get(URL, {"data_inicio": "2026-03-02", "data_fim": "2026-03-02"})
+
+    assert response.status_code == 200
+    assert (response.data["vagas"], response.data["gaps"]) == (6, 4)
+    assert response.data["cobertura"] == 33.3
+    savassi_linha, lourdes_linha = response.data["locais"]
+    assert (savassi_linha["nome"], savassi_linha["cobertura"]) == ("Savassi", 50.0)
+    assert [
+        (turno["turno"], turno["vagas"], turno["gaps"]) for turno in lourdes_linha["turnos"]
+    ] == [("manha", 2, 1), ("tarde", 2, 2)]
+    assert (
+        client.get(URL, {"data_inicio": "2026-03-09", "data_fim": "2026-03-02"}).status_code == 400
+    )
+
+
+@pytest.mark.django_db
+def test_periodo_sem_vagas_geradas_e_completado(client: APIClient) -> None:
+    (sala,) = _local("Savassi", 1, 1)
+    ana = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    Alocacao.objects.create(
+        profissional=ana, local=sala.local, sala=sala, data=SEGUNDA, turno="manha"
+    )
+    params = {"data_inicio": SEGUNDA.isoformat(), "data_fim": "2026-03-15"}
+
+    response = client.get(URL, params)
+
+    # Duas semanas, segunda a sexta, manhã e tarde.
+    assert response.status_code == 200
+    assert (response.data["vagas"], response.data["cobertas"]) == (20, 1)
+    assert VagaSala.objects.count() == 20
+    assert client.get(URL, params).data["vagas"] == 20
+
+
+@pytest.mark.django_db
+def test_janela_de_doze_semanas_em_menos_de_100ms(client: APIClient) -> None:
+    for numero in range(1, 7):
+        _local(f"Local {numero}", numero, 4)
+    fim = SEGUNDA + timedelta(weeks=12, days=-1)
+    gerar(SEGUNDA, fim)
+    profissionais = Profissional.objects.bulk_create(
+        Profissional(nome=f"P{numero}", email=f"p{numero}@example.com") for numero in range(24)
+    )
+    salas = list(Sala.objects.select_related("local"))
+    dias = [dia for dia in range(0, 84, 2) if dia % 7 < DiaSemana.SABADO]
+    Alocacao.objects.bulk_create(
+        Alocacao(
+            profissional=profissionais[indice],
+            local=sala.local,
+            sala=sala,
+            data=SEGUNDA + timedelta(days=dia),
+            turno="manha",
+        )
+        for dia in dias
+        for indice, sala in enumerate(salas)
+    )
+    params = {"data_inicio": SEGUNDA.isoformat(), "data_fim": fim.isoformat()}
+    client.get(URL, params)
+
+    inicio = time.perf_counter()
+    response = client.get(URL, params)
+    duracao = time.perf_counter() - inicio
+
+    assert response.data["vagas"] == len(salas) * 12 * 5 * 2
+    assert response.data["cobertas"] == len(salas) * len(dias)
+    assert duracao < 0.1
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from escala.confirmacao import reconciliar
+from escala.models import (
+    AgendaGoogle,
+    Alocacao,
+    EventoCalendar,
+    ExecucaoJob,
+    OrigemEvento,
+    StatusAlocacao,
+    StatusEvento,
+    StatusJob,
+    TipoJob,
+)
+from rest_framework.test import APIClient
+
+INICIO = date(2026, 3, 2)
+FIM = date(2026, 3, 8)
+
+
+def _aware(dia: date, hora: int) -> datetime:
+    return timezone.make_aware(datetime(dia.year, dia.month, dia.day, hora))
+
+
+@pytest.fixture()
+def cenario() -> dict:
+    local = Local.objects.create(nome="Savassi")
+    salas = [Sala.objects.create(local=local, nome=f"Sala {n}") for n in range(1, 4)]
+    ana = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    bia = Profissional.objects.create(nome="Bia", email="bia@example.com")
+    agendas = {
+        prof.id: AgendaGoogle.objects.create(
+            profissional=prof, calendar_id=f"{prof.nome}@cal", nome=prof.nome
+        )
+        for prof in (ana, bia)
+    }
+    return {"local": local, "salas": salas, "ana": ana, "bia": bia, "agendas": agendas}
+
+
+def _alocar(cenario: dict, prof: Profissional, dia: date, turno: str, sala: int = 0, **kw: object):
+    return Alocacao.objects.create(
+        profissional=prof,
+        local=cenario["local"],
+        sala=cenario["salas"][sala],
+        data=dia,
+        turno=turno,
+        **kw,
+    )
+
+
+def _evento(cenario: dict, prof: Profissional, inicio: datetime, fim: datetime, **kw: object):
+    return EventoCalendar.objects.create(
+        agenda=cenario["agendas"][prof.id],
+        google_event_id=f"{prof.id}-{inicio.isoformat()}",
+        data_inicio=inicio,
+        data_fim=fim,
+        **kw,
+    )
+
+
+@pytest.mark.django_db
+def test_reconciliacao_classifica_e_aplica_status(cenario: dict) -> None:
+    ana, bia = cenario["ana"], cenario["bia"]
+    terca, quarta = date(2026, 3, 3), date(2026, 3, 4)
+
+    confirmada = _alocar(cenario, ana, INICIO, "manha")
+    _evento(cenario, ana, _aware(INICIO, 8), _aware(INICIO, 14), alocacao=confirmada)
+
+    movida = _alocar(cenario, ana, terca, "tarde")
+    _evento(cenario, ana, _aware(terca, 15), _aware(terca, 20), alocacao=movida)
+
+    sem_evento = _alocar(cenario, ana, quarta, "manha")
+
+    em_conflito = _alocar(cenario, bia, INICIO, "tarde", sala=1)
+    externo = _evento(
+        cenario, bia, _aware(INICIO, 19), _aware(INICIO, 21), origem=OrigemEvento.MANUAL
+    )
+
+    resultado = reconciliar(INICIO, FIM)
+
+    assert (resultado.confirmadas, resultado.ajustadas) == (1, 1)
+    assert (resultado.conflitos, resultado.sem_evento) == (1, 1)
+    confirmada.refresh_from_db()
+    movida.refresh_from_db()
+    sem_evento.refresh_from_db()
+    em_conflito.refresh_from_db()
+    externo.refresh_from_db()
+    assert confirmada.status == StatusAlocacao.CONFIRMADO
+    assert movida.status == StatusAlocacao.AJUSTADO
+    assert movida.metadata["confirmacao"]["tipo"] == "movido"
+    assert sem_evento.status == StatusAlocacao.GERADO
+    assert em_conflito.status == StatusAlocacao.CONFLITO
+    assert externo.status == StatusEvento.CONFLITO
+
+
+@pytest.mark.django_db
+def test_sabado_manual_nao_e_reescrito(cenario: dict) -> None:
+    sabado = date(2026, 3, 7)
+    manual = _alocar(cenario, cenario["ana"], sabado, "manha", status=StatusAlocacao.MANUAL)
+    _evento(
+        cenario, cenario["ana"], _aware(sabado, 10), _aware(sabado, 11), origem=OrigemEvento.MANUAL
+    )
+
+    resultado = reconciliar(INICIO, FIM)
+
+    manual.refresh_from_db()
+    assert resultado.conflitos == 1
+    assert resultado.status_alterados == 0
+    assert manual.status == StatusAlocacao.MANUAL
+
+
+@pytest.mark.django_db
+def test_endpoint_confirmacao_diaria_registra_job(cenario: dict) -> None:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    client = APIClient()
+    client.force_authenticate(user=user)
+    alocacao = _alocar(cenario, cenario["ana"], INICIO, "manha")
+    _evento(cenario, cenario["ana"], _aware(INICIO, 8), _aware(INICIO, 14), alocacao=alocacao)
+
+    response = client.post(
+        "/api/escala/jobs/confirmacao-diaria/",
+        {"inicio": INICIO.isoformat(), "fim": FIM.isoformat()},
+        format="json",
+    )
+
+    assert response.status_code == 201
+    job = ExecucaoJob.objects.get(pk=response.data["id"])
+    assert job.tipo == TipoJob.CONFIRMACAO_DIARIA
+    assert job.status == StatusJob.CONCLUIDO
+    assert job.log_json["confirmadas"] == 1
+    assert job.autor == "admin"
+
+    # "false" como texto não força a varredura completa.
+    response = client.post(
+        "/api/escala/jobs/confirmacao-diaria/",
+        {"inicio": INICIO.isoformat(), "fim": FIM.isoformat(), "completo": "false"},
+        format="json",
+    )
+    assert response.status_code == 201, response.data
+    assert response.data["log_json"]["modo"] == "incremental"
+
+
+@pytest.mark.django_db
+def test_execucao_incremental_reexamina_apenas_slots_alterados(cenario: dict) -> None:
+    from datetime import timedelta
+
+    from escala.confirmacao import executar_confirmacao_diaria
+
+    ana, bia = cenario["ana"], cenario["bia"]
+    antiga = _alocar(cenario, ana, INICIO, "manha")
+    _evento(cenario, ana, _aware(INICIO, 8), _aware(INICIO, 14), alocacao=antiga)
+    alterada = _alocar(cenario, bia, INICIO, "tarde", sala=1)
+
+    uma_hora_atras = timezone.now() - timedelta(hours=1)
+    Alocacao.objects.update(updated_at=uma_hora_atras)
+    EventoCalendar.objects.update(data_sync=uma_hora_atras)
+
+    primeira = executar_confirmacao_diaria(INICIO, FIM)
+    assert primeira.log_json["modo"] == "completo"
+    assert primeira.log_json["alocacoes_lidas"] == 2
+
+    # Eventos para antes da folga da marca; as escritas da própria confirmação
+    # (status da Ana) não contam como alteração.
+    assert primeira.log_json["status_alterados"] == 1
+    EventoCalendar.objects.update(data_sync=uma_hora_atras - timedelta(hours=1))
+    alterada.observacoes = "trocou de sala"
+    alterada.save()
+
+    segunda = executar_confirmacao_diaria(INICIO, FIM)
+    assert segunda.log_json["modo"] == "incremental"
+    assert segunda.log_json["alocacoes_lidas"] == 1
+    assert segunda.log_json["slots_alterados"] == 1
+
+    completa = executar_confirmacao_diaria(INICIO, FIM, completo=True)
+    assert completa.log_json["modo"] == "completo"
+    assert completa.log_json["alocacoes_lidas"] == 2
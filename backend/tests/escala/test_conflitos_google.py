@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from escala.models import AgendaGoogle, Alocacao, EventoCalendar, OrigemEvento
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+SABADO = date(2026, 3, 7)
+
+
+def _aware(dia: date, hora: int, minuto: int = 0) -> datetime:
+    return timezone.make_aware(datetime(dia.year, dia.month, dia.day, hora, minuto))
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def cenario() -> dict:
+    local = Local.objects.create(nome="Savassi")
+    sala = Sala.objects.create(local=local, nome="Sala 1")
+    profissional = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    agenda = AgendaGoogle.objects.create(
+        profissional=profissional, calendar_id="ana@group.calendar.google.com", nome="Ana"
+    )
+    return {"local": local, "sala": sala, "profissional": profissional, "agenda": agenda}
+
+
+def _evento(agenda: AgendaGoogle, inicio: datetime, fim: datetime, **extra: object) -> None:
+    EventoCalendar.objects.create(
+        agenda=agenda,
+        google_event_id=f"ev-{inicio.isoformat()}",
+        titulo="Consulta particular",
+        data_inicio=inicio,
+        data_fim=fim,
+        origem=extra.pop("origem", OrigemEvento.MANUAL),
+        **extra,
+    )
+
+
+def _payload(cenario: dict, dia: date, turno: str) -> dict:
+    return {
+        "profissional": cenario["profissional"].id,
+        "local": cenario["local"].id,
+        "sala": cenario["sala"].id,
+        "data": dia.isoformat(),
+        "turno": turno,
+    }
+
+
+@pytest.mark.django_db
+def test_alocacao_bloqueada_por_evento_sobreposto(client: APIClient, cenario: dict) -> None:
+    _evento(cenario["agenda"], _aware(SEGUNDA, 13), _aware(SEGUNDA, 15))
+
+    response = client.post(
+        "/api/escala/alocacoes/", _payload(cenario, SEGUNDA, "manha"), format="json"
+    )
+
+    assert response.status_code == 400
+    assert "Conflito com Google Calendar" in str(response.data["data"])
+
+
+@pytest.mark.django_db
+def test_evento_adjacente_ou_do_sistema_nao_conflita(client: APIClient, cenario: dict) -> None:
+    _evento(cenario["agenda"], _aware(SEGUNDA, 14), _aware(SEGUNDA, 16))
+    _evento(cenario["agenda"], _aware(SEGUNDA, 9), _aware(SEGUNDA, 10), origem=OrigemEvento.SISTEMA)
+
+    response = client.post(
+        "/api/escala/alocacoes/", _payload(cenario, SEGUNDA, "manha"), format="json"
+    )
+
+    assert response.status_code == 201
+    assert response.data["validation_issues"] == []
+
+
+@pytest.mark.django_db
+def test_sabado_usa_horario_de_sabado(client: APIClient, cenario: dict) -> None:
+    # Sábado vai das 9h às 14h: evento às 8h não conflita, às 13h30 conflita.
+    _evento(cenario["agenda"], _aware(SABADO, 7), _aware(SABADO, 9))
+    ok = client.post("/api/escala/alocacoes/", _payload(cenario, SABADO, "manha"), format="json")
+    assert ok.status_code == 201
+
+    _evento(cenario["agenda"], _aware(SABADO, 13, 30), _aware(SABADO, 15))
+    listagem = client.get("/api/escala/alocacoes/inconsistencias/")
+    assert listagem.status_code == 200
+    assert listagem.data[0]["issues"][0]["severity"] == "ERROR"
+    assert "13:30" in listagem.data[0]["issues"][0]["message"]
+
+
+@pytest.mark.django_db
+def test_listagem_monta_indice_uma_unica_vez(client: APIClient, cenario: dict) -> None:
+    for offset in range(5):
+        dia = date(2026, 3, 2 + offset)
+        Alocacao.objects.create(
+            profissional=cenario["profissional"],
+            local=cenario["local"],
+            sala=cenario["sala"],
+            data=dia,
+            turno="manha",
+        )
+        _evento(cenario["agenda"], _aware(dia, 19), _aware(dia, 20))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/escala/alocacoes/")
+
+    assert response.status_code == 200
+    # A consulta do ETag (COUNT/MAX com subconsulta em eventos) não monta índice.
+    consultas_eventos = [
+        q
+        for q in queries
+        if "escala_eventocalendar" in q["sql"] and not q["sql"].startswith("SELECT COUNT(")
+    ]
+    assert len(consultas_eventos) == 1
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from escala.models import Alocacao, AlteracaoAlocacao, CargaSemanal, ModeloSemana
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+PROXIMA = SEGUNDA + timedelta(days=7)
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    local = Local.objects.create(nome="Savassi")
+    dados: dict[str, Any] = {
+        "local": local,
+        "salas": [Sala.objects.create(local=local, nome=f"Sala {i}") for i in (1, 2)],
+        "ana": Profissional.objects.create(nome="Ana", email="ana@example.com"),
+        "bia": Profissional.objects.create(
+            nome="Bia",
+            email="bia@example.com",
+            indisponibilidades=[{"dia_semana": 2, "turno": "tarde"}],
+        ),
+        "caio": Profissional.objects.create(nome="Caio", email="caio@example.com"),
+    }
+    return dados
+
+
+def _alocar(
+    dados: dict[str, Any], nome: str, sala: int, data: date, turno: str, **extra: Any
+) -> Alocacao:
+    return Alocacao.objects.create(
+        profissional=dados[nome],
+        local=dados["local"],
+        sala=dados["salas"][sala],
+        data=data,
+        turno=turno,
+        **extra,
+    )
+
+
+def _semana(inicio: date) -> list[tuple[str, int, str, str]]:
+    return [
+        (a.profissional.nome, (a.data - inicio).days, a.sala.nome, a.turno)
+        for a in Alocacao.objects.filter(data__gte=inicio, data__lt=inicio + timedelta(days=7))
+        .select_related("profissional", "sala")
+        .order_by("data", "turno", "sala__nome")
+    ]
+
+
+@pytest.mark.django_db
+def test_copiar_semana_pula_conflitos_e_sabados_manuais(
+    client: APIClient, dados: dict[str, Any]
+) -> None:
+    _alocar(dados, "ana", 0, SEGUNDA, "manha")
+    _alocar(dados, "bia", 1, SEGUNDA + timedelta(days=2), "tarde", permite_sobreposicao=True)
+    _alocar(dados, "caio", 0, SEGUNDA + timedelta(days=3), "manha")
+    _alocar(dados, "ana", 0, SEGUNDA + timedelta(days=5), "manha", status="manual")
+    # Na semana de destino: sala ocupada na quinta e a Ana já alocada na segunda.
+    _alocar(dados, "bia", 0, PROXIMA + timedelta(days=3), "manha", status="manual")
+    _alocar(dados, "ana", 1, PROXIMA, "manha")
+
+    resposta = client.post(
+        "/api/escala/alocacoes/copiar-semana/",
+        {"origem": "2026-03-04", "destinos": ["2026-03-09", "2026-03-18"]},
+        format="json",
+    )
+
+    assert resposta.status_code == 201
+    assert (resposta.data["criadas"], resposta.data["ignoradas"]) == (4, 2)
+    assert _semana(PROXIMA) == [
+        ("Ana", 0, "Sala 2", "manha"),
+        ("Bia", 2, "Sala 2", "tarde"),
+        ("Bia", 3, "Sala 1", "manha"),
+    ]
+    assert _semana(PROXIMA + timedelta(days=7)) == [
+        ("Ana", 0, "Sala 1", "manha"),
+        ("Bia", 2, "Sala 2", "tarde"),
+        ("Caio", 3, "Sala 1", "manha"),
+    ]
+    criadas = Alocacao.objects.filter(pk__in=resposta.data["alocacoes"])
+    assert set(criadas.values_list("origem", "status", "version")) == {("sistema", "gerado", 1)}
+    assert set(criadas.values_list("permite_sobreposicao", flat=True)) == {True, False}
+    assert AlteracaoAlocacao.objects.filter(detalhes__copia_da_semana="2026-03-02").count() == 4
+    assert CargaSemanal.objects.get(profissional=dados["caio"], semana=PROXIMA + timedelta(days=7))
+    assert [
+        (item["profissional"], [issue["message"] for issue in item["issues"]])
+        for item in resposta.data["inconsistencias"]
+    ] == [
+        ("Bia", ["Profissional indisponível neste dia/turno."]),
+        ("Bia", ["Profissional indisponível neste dia/turno."]),
+    ]
+
+
+@pytest.mark.django_db
+def test_modelo_de_semana_preenche_o_mes_numa_chamada(
+    client: APIClient, dados: dict[str, Any], django_assert_max_num_queries: Any
+) -> None:
+    _alocar(dados, "ana", 0, SEGUNDA, "manha")
+    _alocar(dados, "caio", 1, SEGUNDA, "manha")
+    _alocar(dados, "ana", 0, SEGUNDA + timedelta(days=1), "tarde")
+    _alocar(dados, "bia", 0, SEGUNDA + timedelta(days=5), "manha", status="manual")
+
+    criado = client.post(
+        "/api/escala/modelos-semana/", {"nome": "Padrão", "semana": "2026-03-04"}, format="json"
+    )
+    assert criado.status_code == 201
+    assert len(criado.data["itens"]) == 3
+    dados["caio"].ativo = False
+    dados["caio"].save()
+
+    semanas = [str(PROXIMA + timedelta(days=7 * i)) for i in range(4)]
+    with django_assert_max_num_queries(20):
+        resposta = client.post(
+            f"/api/escala/modelos-semana/{criado.data['id']}/aplicar/",
+            {"semanas": semanas},
+            format="json",
+        )
+
+    assert resposta.status_code == 201
+    assert (resposta.data["criadas"], resposta.data["ignoradas"]) == (8, 4)
+    for inicio in semanas:
+        assert _semana(date.fromisoformat(inicio)) == [
+            ("Ana", 0, "Sala 1", "manha"),
+            ("Ana", 1, "Sala 1", "tarde"),
+        ]
+    carga = CargaSemanal.objects.get(profissional=dados["ana"], semana=PROXIMA)
+    assert (carga.turnos, carga.dobras) == (2, 0)
+
+    # Reaplicar não duplica nada.
+    de_novo = client.post(
+        f"/api/escala/modelos-semana/{criado.data['id']}/aplicar/",
+        {"semanas": semanas},
+        format="json",
+    )
+    assert (de_novo.data["criadas"], de_novo.data["ignoradas"]) == (0, 12)
+    assert ModeloSemana.objects.get().itens.count() == 3
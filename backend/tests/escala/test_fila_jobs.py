@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from io import StringIO
+from typing import Any
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from escala.jobs import (
+    FalhaPermanente,
+    assinatura_erro,
+    enfileirar,
+    executar,
+    falhar,
+    recuperar_expirados,
+    reivindicar,
+    reprocessar,
+)
+from escala.models import AgendaGoogle, EventoCalendar, ExecucaoJob, StatusJob, TipoJob
+from rest_framework.test import APIClient
+
+
+def _dead_letter(tipo: str, exc: Exception, **payload: Any) -> ExecucaoJob:
+    enfileirar(tipo, payload=payload, max_tentativas=1)
+    job = reivindicar("w1", tipos=[tipo])
+    assert job is not None
+    assert falhar(job, exc) == StatusJob.DEAD_LETTER
+    return job
+
+
+@pytest.mark.django_db
+def test_reivindica_por_ordem_respeitando_agenda_e_limite_por_tipo(settings: Any) -> None:
+    settings.JOB_CONCORRENCIA = {TipoJob.SYNC_GOOGLE: 1}
+    futuro = enfileirar(TipoJob.SYNC_GOOGLE, executar_apos=timezone.now() + timedelta(hours=1))
+    primeiro = enfileirar(TipoJob.SYNC_GOOGLE)
+    segundo = enfileirar(TipoJob.SYNC_GOOGLE)
+    confirmacao = enfileirar(TipoJob.CONFIRMACAO_DIARIA)
+
+    job = reivindicar("w1")
+    assert job is not None
+    assert (job.pk, job.status, job.worker, job.tentativas) == (
+        primeiro.pk,
+        StatusJob.EXECUTANDO,
+        "w1",
+        1,
+    )
+    assert job.lease_ate is not None
+
+    # O limite de sync está ocupado: o próximo worker pega outro tipo.
+    outro = reivindicar("w2")
+    assert outro is not None and outro.pk == confirmacao.pk
+    assert reivindicar("w3") is None
+
+    ExecucaoJob.objects.filter(pk=job.pk).update(status=StatusJob.CONCLUIDO)
+    proximo = reivindicar("w3")
+    assert proximo is not None and proximo.pk == segundo.pk
+    assert futuro.pk not in {job.pk, outro.pk, proximo.pk}
+
+
+@pytest.mark.django_db
+def test_falhas_voltam_com_backoff_e_terminam_em_dead_letter() -> None:
+    enfileirar(TipoJob.SYNC_GOOGLE, payload={"agenda_id": 1}, max_tentativas=2)
+
+    job = reivindicar("w1")
+    assert job is not None
+    assert falhar(job, RuntimeError("Google fora do ar")) == StatusJob.PENDENTE
+    job.refresh_from_db()
+    assert job.executar_apos > timezone.now()
+    assert job.log_json["erro"]["tipo"] == "RuntimeError"
+    assert job.log_json["agenda_id"] == 1
+
+    ExecucaoJob.objects.filter(pk=job.pk).update(executar_apos=timezone.now())
+    job = reivindicar("w1")
+    assert job is not None and job.tentativas == 2
+    assert falhar(job, RuntimeError("de novo")) == StatusJob.DEAD_LETTER
+
+    enfileirar(TipoJob.PUBLICACAO_GOOGLE)
+    permanente = reivindicar("w1")
+    assert permanente is not None
+    assert falhar(permanente, FalhaPermanente("sem agenda")) == StatusJob.DEAD_LETTER
+
+
+@pytest.mark.django_db
+def test_lease_expirado_devolve_job_e_ignora_conclusao_tardia() -> None:
+    enfileirar(TipoJob.CONFIRMACAO_DIARIA)
+    job = reivindicar("w1")
+    assert job is not None
+    ExecucaoJob.objects.filter(pk=job.pk).update(lease_ate=timezone.now() - timedelta(seconds=1))
+
+    assert recuperar_expirados() == 1
+    job.refresh_from_db()
+    assert job.status == StatusJob.PENDENTE
+    assert job.log_json["erro"]["tipo"] == "LeaseExpirado"
+    # O worker antigo não consegue mais registrar a falha.
+    job.worker = "w1"
+    assert falhar(job, RuntimeError("tarde demais")) is None
+
+
+@pytest.mark.django_db
+def test_worker_executa_sync_com_cliente_configurado(settings: Any) -> None:
+    settings.GOOGLE_CALENDAR_CLIENT = "escala.fake_calendar.ServicoCalendarFalso"
+    agenda = AgendaGoogle.objects.create(calendar_id="sala@cal", nome="Sala")
+    enfileirar(TipoJob.SYNC_GOOGLE, payload={"agenda_id": agenda.pk})
+    orfao = enfileirar(TipoJob.SYNC_GOOGLE, payload={"agenda_id": agenda.pk + 1})
+
+    call_command("worker_jobs", "--uma-vez", "--worker-id", "teste", stdout=StringIO())
+
+    job = ExecucaoJob.objects.exclude(pk=orfao.pk).get()
+    assert job.status == StatusJob.CONCLUIDO
+    assert job.log_json["resultado"]["paginas"] == 1
+    orfao.refresh_from_db()
+    assert orfao.status == StatusJob.DEAD_LETTER
+    assert EventoCalendar.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_handler_desconhecido_vai_para_dead_letter() -> None:
+    enfileirar(TipoJob.GERACAO_SEMANAL)
+    job = reivindicar("w1")
+    assert job is not None
+    assert executar(job) == StatusJob.DEAD_LETTER
+
+
+def test_assinatura_ignora_partes_variaveis_da_mensagem() -> None:
+    assert assinatura_erro("KeyError", "evento 123 de sala-7@cal") == assinatura_erro(
+        "KeyError", "evento 98 de sala-2@cal"
+    )
+    assert assinatura_erro("ErroCalendarAPI", "x", 404) != assinatura_erro(
+        "ErroCalendarAPI", "x", 410
+    )
+    assert assinatura_erro("KeyError", "x") != assinatura_erro("RuntimeError", "x")
+
+
+@pytest.mark.django_db
+def test_reprocessa_dead_letters_espacados_e_um_sync_por_agenda(settings: Any) -> None:
+    settings.JOB_REPROCESSAMENTO_POR_MINUTO = 1
+    primeiro = _dead_letter(TipoJob.SYNC_GOOGLE, RuntimeError("[500] backend"), agenda_id=1)
+    repetido = _dead_letter(TipoJob.SYNC_GOOGLE, RuntimeError("[500] backend"), agenda_id=1)
+    outra = _dead_letter(TipoJob.SYNC_GOOGLE, RuntimeError("[500] backend"), agenda_id=2)
+    com_pendente = _dead_letter(TipoJob.SYNC_GOOGLE, RuntimeError("[500] backend"), agenda_id=3)
+    enfileirar(TipoJob.SYNC_GOOGLE, payload={"agenda_id": 3})
+
+    resultado = reprocessar(ExecucaoJob.objects.all(), autor="admin")
+
+    assert resultado.reenfileirados == [primeiro.pk, outra.pk]
+    assert resultado.substituidos == [repetido.pk, com_pendente.pk]
+    assert resultado.janela_segundos == 60
+
+    primeiro.refresh_from_db()
+    outra.refresh_from_db()
+    assert (primeiro.status, primeiro.tentativas, primeiro.terminou_em) == (
+        StatusJob.PENDENTE,
+        0,
+        None,
+    )
+    assert outra.executar_apos - primeiro.executar_apos == timedelta(minutes=1)
+    assert "erro" not in primeiro.log_json
+    assert primeiro.log_json["reprocessamento"]["erro"]["tipo"] == "RuntimeError"
+    assert ExecucaoJob.objects.get(pk=repetido.pk).status == StatusJob.CANCELADO
+
+
+@pytest.mark.django_db
+def test_endpoint_agrupa_dead_letters_e_reprocessa_filtrados() -> None:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    client = APIClient()
+    client.force_authenticate(user=user)
+    for agenda_id in (10, 11, 12):
+        _dead_letter(
+            TipoJob.PUBLICACAO_GOOGLE,
+            FalhaPermanente(f"Agenda {agenda_id} inexistente"),
+            agenda_id=agenda_id,
+        )
+    _dead_letter(TipoJob.CONFIRMACAO_DIARIA, RuntimeError("database is locked"))
+
+    response = client.get("/api/escala/jobs/dead-letter/")
+
+    assert response.status_code == 200
+    assert response.data["total"] == 4
+    maior = response.data["grupos"][0]
+    assert (maior["tipo"], maior["total"], maior["erro"]) == (
+        TipoJob.PUBLICACAO_GOOGLE,
+        3,
+        "FalhaPermanente",
+    )
+
+    response = client.post(
+        "/api/escala/jobs/dead-letter/reprocessar/",
+        {"assinatura": maior["assinatura"], "limite": 2},
+        format="json",
+    )
+
+    assert response.status_code == 202
+    assert len(response.data["reenfileirados"]) == 2
+    assert ExecucaoJob.objects.filter(status=StatusJob.DEAD_LETTER).count() == 2
+    reprocessado = ExecucaoJob.objects.get(pk=response.data["reenfileirados"][0])
+    assert reprocessado.log_json["reprocessamento"]["autor"] == "admin"
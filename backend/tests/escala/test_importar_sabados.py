@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import io
+from datetime import date
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from escala.models import Alocacao, AlteracaoAlocacao, CargaSemanal, Troca
+from rest_framework.test import APIClient
+
+URL = "/api/escala/alocacoes/importar-sabados/"
+SABADO = date(2026, 3, 7)
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    savassi = Local.objects.create(nome="Savassi")
+    lourdes = Local.objects.create(nome="Lourdes")
+    dados: dict[str, Any] = {
+        "savassi": Sala.objects.create(local=savassi, nome="Sala 1"),
+        "lourdes": Sala.objects.create(local=lourdes, nome="Sala 1"),
+    }
+    for nome in ("Ana Souza", "Bia Lima", "Cecília Prado", "Dani Reis"):
+        chave = nome.split()[0].lower()
+        dados[chave] = Profissional.objects.create(nome=nome, email=f"{chave}@example.com")
+    return dados
+
+
+def _enviar(client: APIClient, conteudo: bytes, nome: str = "marco.csv", **extra: str) -> Any:
+    arquivo = SimpleUploadedFile(nome, conteudo)
+    return client.post(URL, {"arquivo": arquivo, **extra}, format="multipart")
+
+
+@pytest.mark.django_db
+def test_importa_o_mes_de_uma_vez_com_log_e_carga(
+    client: APIClient, dados: dict[str, Any], django_assert_max_num_queries: Any
+) -> None:
+    Alocacao.objects.create(
+        profissional=dados["ana"],
+        local=dados["savassi"].local,
+        sala=dados["savassi"],
+        data=SABADO,
+        turno="manha",
+    )
+    troca = Troca.objects.create(
+        data=date(2026, 3, 14),
+        turno="manha",
+        profissional_origem=dados["bia"],
+        profissional_destino=dados["dani"],
+    )
+    planilha = (
+        b"Data;Savassi - Sala 1;Lourdes/Sala 1\n"
+        b"07/03/2026;Ana Souza;cecilia prado\n"
+        b"14/03/2026;Bia;\n"
+        b"2026-03-21;Dani Reis;Ana\n"
+        b"28/03/2026;;Bia Lima\n"
+    )
+
+    simulacao = _enviar(client, planilha, simular="1")
+    assert simulacao.status_code == 200
+    assert (simulacao.data["criadas"], simulacao.data["existentes"]) == (5, 1)
+    assert Alocacao.objects.count() == 1
+
+    with django_assert_max_num_queries(30):
+        resposta = _enviar(client, planilha)
+
+    assert resposta.status_code == 201
+    assert resposta.data["erros"] == 0
+    assert len(resposta.data["alocacoes"]) == 5
+    aviso = next(linha for linha in resposta.data["linhas"] if linha["avisos"])
+    assert aviso["linha"] == 3
+    assert aviso["avisos"] == [f"Troca #{troca.pk} registrada: passa para Dani Reis"]
+
+    criadas = Alocacao.objects.filter(pk__in=resposta.data["alocacoes"])
+    assert set(criadas.values_list("origem", "status")) == {("manual", "manual")}
+    assert sorted(criadas.values_list("data", "local__nome", "profissional__nome")) == [
+        (SABADO, "Lourdes", "Cecília Prado"),
+        (date(2026, 3, 14), "Savassi", "Bia Lima"),
+        (date(2026, 3, 21), "Lourdes", "Ana Souza"),
+        (date(2026, 3, 21), "Savassi", "Dani Reis"),
+        (date(2026, 3, 28), "Lourdes", "Bia Lima"),
+    ]
+    assert AlteracaoAlocacao.objects.filter(detalhes__importacao="sabados").count() == 5
+    assert CargaSemanal.objects.get(profissional=dados["bia"], semana=date(2026, 3, 9)).sabados == 1
+
+
+@pytest.mark.django_db
+def test_erros_do_mes_voltam_por_celula_sem_gravar(
+    client: APIClient, dados: dict[str, Any]
+) -> None:
+    Alocacao.objects.create(
+        profissional=dados["ana"],
+        local=dados["savassi"].local,
+        sala=dados["savassi"],
+        data=SABADO,
+        turno="manha",
+    )
+    planilha = (
+        b"data,Savassi - Sala 1,Lourdes - Sala 1\n"
+        b"07/03/2026,Bia Lima,Ana Souza\n"
+        b"09/03/2026,Dani Reis,\n"
+        b"14/03/2026,Dani Reis,Dani\n"
+        b"21/03/2026,Zuleica,\n"
+    )
+
+    resposta = _enviar(client, planilha)
+
+    assert resposta.status_code == 400
+    assert [
+        (linha["linha"], linha["coluna"], linha["erros"])
+        for linha in resposta.data["linhas"]
+        if linha["erros"]
+    ] == [
+        (2, "Savassi - Sala 1", ["Sala já ocupada por Ana Souza"]),
+        (2, "Lourdes - Sala 1", ["Profissional já alocado neste horário em Savassi - Sala 1"]),
+        (3, "Savassi - Sala 1", ["09/03/2026 não é sábado"]),
+        (4, "Lourdes - Sala 1", ["Profissional já está em Savassi - Sala 1 (linha 4)"]),
+        (5, "Savassi - Sala 1", ["Profissional não encontrado: 'Zuleica'"]),
+    ]
+    assert Alocacao.objects.count() == 1
+
+    cabecalho_ruim = _enviar(client, b"data,Pampulha - Sala 9\n07/03/2026,Ana\n")
+    assert cabecalho_ruim.status_code == 400
+    assert cabecalho_ruim.data["error"] == "Sala não encontrada no cabeçalho: 'Pampulha - Sala 9'"
+
+    # Linha curta, sem a célula do turno: vale o padrão (manhã).
+    curta = _enviar(client, b"data,Savassi - Sala 1,turno\n14/03/2026,Bia Lima\n", simular="1")
+    assert curta.status_code == 200
+    assert [linha["turno"] for linha in curta.data["linhas"]] == ["manha"]
+
+
+@pytest.mark.django_db
+def test_importa_xlsx(client: APIClient, dados: dict[str, Any]) -> None:
+    openpyxl = pytest.importorskip("openpyxl")
+    livro = openpyxl.Workbook()
+    folha = livro.active
+    folha.append(["Data", "Turno", "Savassi - Sala 1"])
+    folha.append([SABADO, "Tarde", "Ana Souza"])
+    conteudo = io.BytesIO()
+    livro.save(conteudo)
+
+    resposta = _enviar(client, conteudo.getvalue(), nome="marco.xlsx")
+
+    assert resposta.status_code == 201
+    assert list(Alocacao.objects.values_list("data", "turno", "profissional__nome")) == [
+        (SABADO, "tarde", "Ana Souza")
+    ]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import tracemalloc
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from typing import Any
+
+import pytest
+from cadastros.models import Profissional
+from cadastros.nomes import IndiceNomes
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from escala.models import Troca
+from escala.whatsapp import Mensagem, extrair, mensagens
+from rest_framework.test import APIClient
+
+CONVERSA = """\
+02/03/2026 08:01 - Ana Souza: Bom dia!
+02/03/2026 08:05 - Ana Souza: Alguém troca comigo o sábado 07/03? Preciso muito
+de ir ao médico
+02/03/2026 08:07 - Bia Lima: Eu cubro a Ana no dia 07/03
+[02/03/2026, 09:12:40] +55 31 99999-0003: troco minha tarde de 10/03 com a Bia
+02/03/2026 10:00 - Dani: alguém cobre sábado?
+"""
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    return {
+        "ana": Profissional.objects.create(nome="Ana Souza", email="ana@example.com"),
+        "bia": Profissional.objects.create(nome="Bia Lima", email="bia@example.com"),
+        "caio": Profissional.objects.create(
+            nome="Caio Rocha", email="caio@example.com", celular="+5531999990003"
+        ),
+        "inativa": Profissional.objects.create(
+            nome="Dani Reis", email="dani@example.com", ativo=False
+        ),
+    }
+
+
+def _trocas() -> list[tuple[date, str, str, str, Decimal | None]]:
+    return [
+        (t.data, t.turno, t.profissional_origem.nome, t.profissional_destino.nome, t.confianca)
+        for t in Troca.objects.select_related(
+            "profissional_origem", "profissional_destino"
+        ).order_by("data", "pk")
+    ]
+
+
+def test_mensagens_juntam_continuacoes_e_extrator_pontua_confianca() -> None:
+    lidas = list(mensagens(StringIO(CONVERSA)))
+
+    assert [m.autor for m in lidas] == [
+        "Ana Souza",
+        "Ana Souza",
+        "Bia Lima",
+        "+55 31 99999-0003",
+        "Dani",
+    ]
+    assert lidas[1].texto.endswith("\nde ir ao médico")
+
+    indice = IndiceNomes([(1, "Ana Souza", ""), (2, "Bia Lima", ""), (3, "Bianca Lima", "")])
+    troca = extrair(
+        Mensagem(datetime(2026, 3, 2, 9), "Ana", ["Bianca troca com a Bia na quinta 05/03"]),
+        indice,
+    )
+    assert troca is not None
+    # Remetente só pelo primeiro nome, "Bianca" casado pelo primeiro nome
+    # e sem turno num dia de semana.
+    assert (troca.origem, troca.destino, troca.turno) == (1, 3, "manha")
+    assert troca.confianca == Decimal("0.50")
+    assert extrair(Mensagem(datetime(2026, 3, 2), "Ana", ["Bom dia 05/03"]), indice) is None
+
+
+@pytest.mark.django_db
+def test_comando_registra_trocas_sem_duplicar(dados: dict[str, Any], tmp_path: Path) -> None:
+    arquivo = tmp_path / "conversa.txt"
+    arquivo.write_text(CONVERSA, encoding="utf-8")
+
+    call_command("importar_whatsapp", arquivo, stdout=StringIO())
+
+    assert _trocas() == [
+        # O pedido sem nome não é troca; a Bia assume o sábado citando "Ana".
+        (date(2026, 3, 7), "manha", "Ana Souza", "Bia Lima", Decimal("0.90")),
+        (date(2026, 3, 10), "tarde", "Caio Rocha", "Bia Lima", Decimal("0.90")),
+    ]
+    assert set(Troca.objects.values_list("status", "origem")) == {("registrada", "whatsapp")}
+    assert "Eu cubro a Ana" in Troca.objects.get(data=date(2026, 3, 7)).motivo
+
+    saida = StringIO()
+    call_command("importar_whatsapp", arquivo, stdout=saida)
+    assert Troca.objects.count() == 2
+    assert "0 trocas registradas, 2 já registradas" in saida.getvalue()
+
+
+@pytest.mark.django_db
+def test_upload_em_streaming_com_memoria_constante(
+    client: APIClient, dados: dict[str, Any]
+) -> None:
+    conversa = CONVERSA.encode() + b"02/03/2026 11:00 - Bia Lima: bom dia a todos\n" * 20_000
+    url = "/api/escala/trocas/importar-whatsapp/"
+
+    assert client.post(url, {}, format="multipart").status_code == 400
+
+    tracemalloc.start()
+    resposta = client.post(
+        url,
+        {"arquivo": SimpleUploadedFile("conversa.txt", conversa), "simular": "1"},
+        format="multipart",
+    )
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert resposta.status_code == 200
+    assert resposta.data["mensagens"] == 20_005
+    assert resposta.data["criadas"] == 2
+    assert not Troca.objects.exists()
+    # O arquivo tem ~900 KB; a leitura não acumula as mensagens.
+    assert pico < len(conversa) * 4
+
+    resposta = client.post(
+        url, {"arquivo": SimpleUploadedFile("conversa.txt", CONVERSA.encode())}, format="multipart"
+    )
+    assert resposta.status_code == 201
+    assert len(resposta.data["trocas"]) == 2
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from asgiref.sync import sync_to_async
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import AsyncClient
+from escala.models import Alocacao, AlteracaoAlocacao, TipoAlteracao, Troca
+from escala.transmissao import EVENTO_RECARREGAR, Assinatura, difusor, transmitir
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+URL = "/api/escala/alocacoes/eventos/"
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    local = Local.objects.create(nome="Savassi")
+    return {
+        "local": local,
+        "sala": Sala.objects.create(local=local, nome="Sala 1"),
+        "ana": Profissional.objects.create(nome="Ana", email="ana@example.com"),
+        "bia": Profissional.objects.create(nome="Bia", email="bia@example.com"),
+    }
+
+
+def _alocar(dados: dict[str, Any], data: date, turno: str = "manha") -> Alocacao:
+    return Alocacao.objects.create(
+        profissional=dados["ana"], local=dados["local"], sala=dados["sala"], data=data, turno=turno
+    )
+
+
+def _dados_evento(evento: str) -> dict[str, Any]:
+    linha = next(linha for linha in evento.splitlines() if linha.startswith("data: "))
+    return json.loads(linha.removeprefix("data: "))
+
+
+@pytest.mark.django_db
+def test_log_gravado_na_transacao_de_cada_edicao(dados: dict[str, Any]) -> None:
+    alocacao = _alocar(dados, SEGUNDA)
+    alocacao.observacoes = "ajuste"
+    alocacao.save()
+    Troca.objects.create(
+        data=SEGUNDA,
+        turno="manha",
+        profissional_origem=dados["ana"],
+        profissional_destino=dados["bia"],
+        local=dados["local"],
+    )
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    client = APIClient()
+    client.force_authenticate(user=user)
+    troca_id = Troca.objects.get().pk
+    assert client.post(f"/api/escala/trocas/{troca_id}/aplicar/").status_code == 200
+    alocacao_id = alocacao.pk
+    alocacao.refresh_from_db()
+    alocacao.delete()
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        _alocar(dados, SEGUNDA, "tarde")
+        raise RuntimeError
+
+    log = list(AlteracaoAlocacao.objects.values_list("alocacao_id", "tipo", "profissional_id"))
+    assert log == [
+        (alocacao_id, TipoAlteracao.CRIADA, dados["ana"].pk),
+        (alocacao_id, TipoAlteracao.ALTERADA, dados["ana"].pk),
+        (alocacao_id, TipoAlteracao.TROCA, dados["bia"].pk),
+        (alocacao_id, TipoAlteracao.REMOVIDA, dados["bia"].pk),
+    ]
+    troca = AlteracaoAlocacao.objects.get(tipo=TipoAlteracao.TROCA)
+    assert troca.detalhes == {"troca_id": troca_id, "profissional_anterior": dados["ana"].pk}
+
+
+def test_assinante_lento_recebe_recarregar() -> None:
+    assinatura = Assinatura(SEGUNDA, SEGUNDA, limite=2)
+    for evento in ("a", "b", "c", "d"):
+        assinatura.entregar(evento)
+
+    assert assinatura.atrasada
+    assert assinatura.fila.qsize() == 1
+    assert assinatura.fila.get_nowait() == EVENTO_RECARREGAR
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_retoma_pelo_ultimo_evento_e_segue_ao_vivo(
+    dados: dict[str, Any], settings: Any
+) -> None:
+    settings.SSE_INTERVALO_SEGUNDOS = 0.01
+    ultimo = _alocar(dados, SEGUNDA - timedelta(days=7))
+    ultimo_id = AlteracaoAlocacao.objects.get(alocacao_id=ultimo.pk).pk
+    perdida = _alocar(dados, SEGUNDA)
+
+    async def cenario() -> list[str]:
+        stream = transmitir(SEGUNDA, SEGUNDA + timedelta(days=6), ultimo_id)
+        eventos = [await anext(stream), await anext(stream)]
+        # Espera o difusor marcar o ponto de partida antes de gravar.
+        proximo = asyncio.ensure_future(anext(stream))
+        while difusor().ultimo_id is None:  # noqa: ASYNC110
+            await asyncio.sleep(0.01)
+        await sync_to_async(_alocar)(dados, SEGUNDA + timedelta(days=14))
+        await sync_to_async(_alocar)(dados, SEGUNDA + timedelta(days=1))
+        eventos.append(await asyncio.wait_for(proximo, timeout=5))
+        await stream.aclose()
+        assert not difusor().assinaturas
+        return eventos
+
+    retry, replay, ao_vivo = asyncio.run(cenario())
+
+    assert retry.startswith("retry: ")
+    assert _dados_evento(replay)["alocacao_id"] == perdida.pk
+    assert replay.startswith(f"id: {AlteracaoAlocacao.objects.get(alocacao_id=perdida.pk).pk}\n")
+    evento = _dados_evento(ao_vivo)
+    assert (evento["tipo"], evento["data"]) == ("criada", "2026-03-03")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_endpoint_exige_sessao_e_periodo() -> None:
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+
+    async def cenario() -> tuple[int, int, str, bytes]:
+        client = AsyncClient()
+        anonimo = await client.get(URL, {"data_inicio": "2026-03-02", "data_fim": "2026-03-08"})
+        await client.aforce_login(user)
+        sem_periodo = await client.get(URL)
+        response = await client.get(URL, {"data_inicio": "2026-03-02", "data_fim": "2026-03-08"})
+        conteudo = response.streaming_content  # type: ignore[attr-defined]
+        primeiro = await anext(aiter(conteudo))
+        await conteudo.aclose()
+        return anonimo.status_code, sem_periodo.status_code, response["Content-Type"], primeiro
+
+    anonimo, sem_periodo, content_type, primeiro = asyncio.run(cenario())
+
+    assert (anonimo, sem_periodo) == (401, 400)
+    assert content_type == "text/event-stream"
+    assert primeiro.startswith(b"retry: ")
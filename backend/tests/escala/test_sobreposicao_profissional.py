@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from escala.models import Alocacao, Troca
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+URL = "/api/escala/alocacoes/"
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    local = Local.objects.create(nome="Savassi")
+    ana = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    sala = Sala.objects.create(local=local, nome="Sala 1")
+    Alocacao.objects.create(profissional=ana, local=local, sala=sala, data=SEGUNDA, turno="manha")
+    return {
+        "local": local,
+        "ana": ana,
+        "bia": Profissional.objects.create(nome="Bia", email="bia@example.com"),
+        "sala": Sala.objects.create(local=local, nome="Sala 2"),
+    }
+
+
+@pytest.mark.django_db
+def test_restricao_do_banco_vira_erro_de_validacao(
+    client: APIClient, dados: dict[str, Any]
+) -> None:
+    payload = {
+        "profissional": dados["ana"].pk,
+        "local": dados["local"].pk,
+        "sala": dados["sala"].pk,
+        "data": "2026-03-02",
+        "turno": "manha",
+    }
+
+    response = client.post(URL, payload, format="json")
+
+    assert response.status_code == 400
+    assert response.data["profissional"] == [
+        "Profissional já alocado neste horário em Savassi/Sala 1"
+    ]
+    with pytest.raises(IntegrityError):
+        Alocacao.objects.create(
+            profissional=dados["ana"],
+            local=dados["local"],
+            sala=dados["sala"],
+            data=SEGUNDA,
+            turno="manha",
+        )
+
+
+@pytest.mark.django_db
+def test_excecao_deliberada_e_troca_para_profissional_ocupado(
+    client: APIClient, dados: dict[str, Any]
+) -> None:
+    payload = {
+        "profissional": dados["ana"].pk,
+        "local": dados["local"].pk,
+        "sala": dados["sala"].pk,
+        "data": "2026-03-02",
+        "turno": "manha",
+        "permite_sobreposicao": True,
+    }
+    assert client.post(URL, payload, format="json").status_code == 201
+
+    Alocacao.objects.create(
+        profissional=dados["bia"],
+        local=dados["local"],
+        sala=dados["sala"],
+        data=SEGUNDA,
+        turno="tarde",
+    )
+    Alocacao.objects.create(
+        profissional=dados["ana"],
+        local=dados["local"],
+        sala=Sala.objects.create(local=dados["local"], nome="Sala 3"),
+        data=SEGUNDA,
+        turno="tarde",
+    )
+    troca = Troca.objects.create(
+        data=SEGUNDA,
+        turno="tarde",
+        profissional_origem=dados["bia"],
+        profissional_destino=dados["ana"],
+    )
+
+    response = client.post(f"/api/escala/trocas/{troca.pk}/aplicar/")
+
+    assert response.status_code == 409
+    troca.refresh_from_db()
+    assert troca.status == "registrada"
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.utils import timezone
+from escala.fake_calendar import ConfiguracaoFalhas, ServicoCalendarFalso
+from escala.google_calendar import ErroCalendarAPI
+from escala.models import (
+    AgendaGoogle,
+    Alocacao,
+    EventoCalendar,
+    OrigemEvento,
+    StatusAlocacao,
+    StatusEvento,
+)
+from escala.sync import Retentador, gravar_eventos, publicar_agenda, sincronizar_agenda
+from pytest_django import DjangoAssertNumQueries
+
+CAL = "ana@cal"
+
+
+def _sem_espera() -> Retentador:
+    return Retentador(dormir=lambda _: None)
+
+
+@pytest.fixture()
+def agenda() -> AgendaGoogle:
+    ana = Profissional.objects.create(nome="Ana", email="ana@example.com")
+    return AgendaGoogle.objects.create(profissional=ana, calendar_id=CAL, nome="Ana")
+
+
+def _inicio() -> datetime:
+    return timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+
+def test_servico_falso_pagina_e_entrega_apenas_mudancas() -> None:
+    servico = ServicoCalendarFalso()
+    servico.semear(CAL, 5, inicio=_inicio())
+
+    primeira = servico.list_events(CAL, max_results=3)
+    segunda = servico.list_events(CAL, page_token=primeira["nextPageToken"], max_results=3)
+    assert len(primeira["items"]) == 3
+    assert len(segunda["items"]) == 2
+    assert "nextSyncToken" in segunda
+
+    alvo = primeira["items"][0]
+    servico.delete_event(CAL, alvo["id"])
+    mudancas = servico.list_events(CAL, sync_token=segunda["nextSyncToken"])
+    assert mudancas["items"] == [{"id": alvo["id"], "status": "cancelled", **_meta(mudancas)}]
+
+    servico.expirar_tokens(CAL)
+    with pytest.raises(ErroCalendarAPI) as exc:
+        servico.list_events(CAL, sync_token=mudancas["nextSyncToken"])
+    assert exc.value.status == 410
+
+
+def _meta(resposta: dict) -> dict:
+    item = resposta["items"][0]
+    return {"etag": item["etag"], "updated": item["updated"]}
+
+
+def test_patch_com_etag_desatualizado_retorna_412() -> None:
+    servico = ServicoCalendarFalso()
+    criado = servico.insert_event(CAL, {"summary": "A", "start": {}, "end": {}})
+    servico.patch_event(CAL, criado["id"], {"summary": "B"}, etag=criado["etag"])
+
+    with pytest.raises(ErroCalendarAPI) as exc:
+        servico.patch_event(CAL, criado["id"], {"summary": "C"}, etag=criado["etag"])
+    assert exc.value.status == 412
+
+
+def test_retentador_repete_rate_limit_e_desiste_de_erro_permanente() -> None:
+    servico = ServicoCalendarFalso(ConfiguracaoFalhas(taxa_429=0.3, semente=1))
+    retentador = _sem_espera()
+    for _ in range(20):
+        retentador.executar(lambda: servico.list_events(CAL))
+    assert retentador.retentativas == servico.estatisticas.erros_injetados > 0
+
+    def proibido() -> None:
+        raise ErroCalendarAPI(403, "forbidden")
+
+    with pytest.raises(ErroCalendarAPI):
+        retentador.executar(proibido)
+
+
+@pytest.mark.django_db
+def test_sync_incremental_e_resync_apos_410(agenda: AgendaGoogle) -> None:
+    servico = ServicoCalendarFalso(ConfiguracaoFalhas(taxa_429=0.2, taxa_403=0.1, semente=7))
+    servico.semear(CAL, 300, inicio=_inicio())
+
+    completo = sincronizar_agenda(agenda, servico, retentador=_sem_espera())
+    assert completo.criados == 300
+    assert completo.paginas == 2
+    assert agenda.sync_token
+
+    eventos = servico.eventos(CAL)
+    servico.alterar(CAL, eventos[0]["id"], {"summary": "Editado no Google"})
+    servico.alterar(CAL, eventos[1]["id"], {"status": "cancelled"})
+    incremental = sincronizar_agenda(agenda, servico, retentador=_sem_espera())
+    assert (incremental.recebidos, incremental.atualizados, incremental.removidos) == (2, 1, 1)
+    assert EventoCalendar.objects.get(google_event_id=eventos[0]["id"]).titulo == (
+        "Editado no Google"
+    )
+    assert EventoCalendar.objects.get(google_event_id=eventos[1]["id"]).status == (
+        StatusEvento.DELETADO
+    )
+
+    servico.expirar_tokens(CAL)
+    resync = sincronizar_agenda(agenda, servico, retentador=_sem_espera())
+    assert resync.resync_completo
+    assert resync.recebidos == 299
+    assert EventoCalendar.objects.filter(agenda=agenda).count() == 300
+
+
+@pytest.mark.django_db
+def test_upsert_em_lote_grava_so_o_que_mudou(
+    agenda: AgendaGoogle, django_assert_max_num_queries: DjangoAssertNumQueries
+) -> None:
+    servico = ServicoCalendarFalso()
+    servico.semear(CAL, 2000, inicio=_inicio())
+    itens = servico.eventos(CAL)
+
+    # No SQLite o limite de parâmetros divide o INSERT em lotes de ~100 linhas.
+    with django_assert_max_num_queries(25):
+        criacao = gravar_eventos(agenda, itens)
+    assert criacao.criados == 2000
+
+    servico.alterar(CAL, itens[0]["id"], {"summary": "Editado"})
+    servico.alterar(CAL, itens[1]["id"], {"status": "cancelled"})
+    with django_assert_max_num_queries(5):
+        segunda = gravar_eventos(agenda, servico.eventos(CAL, incluir_cancelados=True))
+    assert (segunda.criados, segunda.atualizados, segunda.inalterados, segunda.removidos) == (
+        0,
+        1,
+        1998,
+        1,
+    )
+
+    evento = EventoCalendar.objects.get(google_event_id=itens[0]["id"])
+    assert evento.titulo == "Editado"
+    assert set(evento.metadata) == {"etag", "updated"}
+
+
+@pytest.mark.django_db
+def test_publicacao_insere_uma_vez_e_respeita_edicao_no_google(agenda: AgendaGoogle) -> None:
+    local = Local.objects.create(nome="Savassi")
+    sala = Sala.objects.create(local=local, nome="Sala 1")
+    dia = date.today() + timedelta(days=2)
+    alocacao = Alocacao.objects.create(
+        profissional=agenda.profissional,
+        local=local,
+        sala=sala,
+        data=dia,
+        turno="manha",
+        status=StatusAlocacao.REVISADO,
+    )
+    servico = ServicoCalendarFalso()
+
+    primeira = publicar_agenda(agenda, servico, dia, dia, retentador=_sem_espera())
+    segunda = publicar_agenda(agenda, servico, dia, dia, retentador=_sem_espera())
+    assert (primeira.inseridos, segunda.inalterados) == (1, 1)
+    evento = EventoCalendar.objects.get(alocacao=alocacao)
+    assert evento.origem == OrigemEvento.SISTEMA
+
+    # Alguém edita o evento no Google e a alocação muda de sala no sistema.
+    servico.alterar(CAL, evento.google_event_id, {"summary": "Editado"})
+    alocacao.sala = Sala.objects.create(local=local, nome="Sala 2")
+    alocacao.save()
+
+    terceira = publicar_agenda(agenda, servico, dia, dia, retentador=_sem_espera())
+    assert terceira.conflitos == 1
+    evento.refresh_from_db()
+    assert evento.status == StatusEvento.CONFLITO
+    assert servico.eventos(CAL)[0]["summary"] == "Editado"
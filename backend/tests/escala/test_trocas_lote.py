@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from escala.models import Alocacao, AlteracaoAlocacao, CargaSemanal, TipoAlteracao, Troca
+from rest_framework.test import APIClient
+
+SABADO = date(2026, 3, 7)
+URL = "/api/escala/trocas/aplicar-lote/"
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def dados() -> dict[str, Any]:
+    local = Local.objects.create(nome="Savassi")
+    salas = [Sala.objects.create(local=local, nome=f"Sala {i}") for i in (1, 2, 3)]
+    pessoas = {
+        nome: Profissional.objects.create(nome=nome, email=f"{nome.lower()}@example.com")
+        for nome in ("Ana", "Bia", "Carla", "Dora", "Eva")
+    }
+    alocacoes = [
+        Alocacao.objects.create(
+            profissional=pessoas[nome], local=local, sala=sala, data=SABADO, turno="manha"
+        )
+        for nome, sala in zip(("Ana", "Bia", "Carla"), salas, strict=True)
+    ]
+    return {"alocacoes": alocacoes, **pessoas}
+
+
+def _troca(dados: dict[str, Any], origem: str, destino: str) -> Troca:
+    return Troca.objects.create(
+        data=SABADO,
+        turno="manha",
+        profissional_origem=dados[origem],
+        profissional_destino=dados[destino],
+    )
+
+
+def _donos() -> list[str]:
+    return [alocacao.profissional.nome for alocacao in Alocacao.objects.order_by("pk")]
+
+
+@pytest.mark.django_db
+def test_ciclo_e_cadeia_aplicados_juntos(client: APIClient, dados: dict[str, Any]) -> None:
+    trocas = [
+        _troca(dados, "Ana", "Bia"),
+        _troca(dados, "Bia", "Ana"),
+        _troca(dados, "Carla", "Dora"),
+        _troca(dados, "Dora", "Eva"),
+    ]
+
+    response = client.post(URL, {"trocas": [t.pk for t in trocas]}, format="json")
+
+    assert response.status_code == 200
+    assert _donos() == ["Bia", "Ana", "Eva"]
+    assert set(Troca.objects.values_list("status", flat=True)) == {"aplicada"}
+    assert set(Alocacao.objects.values_list("version", "status")) == {(2, "ajustado")}
+    assert not Alocacao.objects.filter(permite_sobreposicao=True).exists()
+    cadeia = AlteracaoAlocacao.objects.get(
+        tipo=TipoAlteracao.TROCA, alocacao_id=dados["alocacoes"][2].pk
+    )
+    assert cadeia.detalhes == {
+        "troca_ids": [trocas[2].pk, trocas[3].pk],
+        "profissional_anterior": dados["Carla"].pk,
+    }
+    assert set(CargaSemanal.objects.values_list("profissional__nome", flat=True)) == {
+        "Ana",
+        "Bia",
+        "Eva",
+    }
+
+
+@pytest.mark.django_db
+def test_lote_e_tudo_ou_nada(client: APIClient, dados: dict[str, Any]) -> None:
+    valida = _troca(dados, "Carla", "Dora")
+    ocupada = _troca(dados, "Ana", "Bia")
+
+    conflito = client.post(URL, {"trocas": [valida.pk, ocupada.pk]}, format="json")
+
+    assert conflito.status_code == 409
+    assert list(conflito.data["trocas"]) == [ocupada.pk]
+    assert _donos() == ["Ana", "Bia", "Carla"]
+    assert set(Troca.objects.values_list("status", flat=True)) == {"registrada"}
+
+    assert client.post(URL, {"trocas": [valida.pk]}, format="json").status_code == 200
+    repetida = client.post(URL, {"trocas": [valida.pk]}, format="json")
+    assert repetida.status_code == 400
+    assert repetida.data["trocas"] == {valida.pk: "Troca já foi aplicada ou cancelada"}
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from cadastros.models import CapacidadeSala, DiaSemana, Local, Profissional, Sala
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from escala.models import Alocacao, VagaSala
+from escala.vagas import gerar
+
+SAO_PAULO = ZoneInfo("America/Sao_Paulo")
+
+
+@pytest.mark.django_db
+def test_vagas_seguem_capacidade_e_horarios_do_local() -> None:
+    cache.clear()
+    local = Local.objects.create(nome="Savassi", sabado_inicio=time(8), sabado_fim=time(12))
+    sala = Sala.objects.create(local=local, nome="Sala 1")
+    for dia in DiaSemana.values:
+        CapacidadeSala.objects.create(sala=sala, dia_semana=dia, turno="manha", capacidade=2)
+    CapacidadeSala.objects.create(
+        sala=Sala.objects.create(local=local, nome="Sala 2", ativa=False),
+        dia_semana=DiaSemana.SEGUNDA,
+        turno="tarde",
+    )
+
+    hoje = timezone.localdate()
+    sabado = hoje + timedelta(days=(DiaSemana.SABADO - hoje.weekday()) % 7)
+    vagas = VagaSala.objects.filter(data__gte=hoje, data__lt=hoje + timedelta(days=7))
+    assert vagas.count() == 7
+    assert set(vagas.values_list("sala_id", flat=True)) == {sala.pk}
+    vaga = vagas.get(data=sabado)
+    assert (vaga.capacidade, vaga.local_id) == (2, local.pk)
+    assert vaga.inicio.astimezone(SAO_PAULO).time() == time(8)
+    assert vaga.fim.astimezone(SAO_PAULO).time() == time(12)
+
+    # Horário novo do local e turno fechado: só as linhas afetadas mudam.
+    local.sabado_fim = time(13)
+    local.save()
+    CapacidadeSala.objects.get(dia_semana=DiaSemana.SEXTA).delete()
+
+    assert vagas.get(data=sabado).fim.astimezone(SAO_PAULO).time() == time(13)
+    assert vagas.count() == 6
+    # Gravação sem sinais: a próxima geração remove a vaga que deixou de valer.
+    CapacidadeSala.objects.filter(dia_semana=DiaSemana.DOMINGO).update(capacidade=0)
+    resultado = gerar(hoje, hoje + timedelta(days=6))
+    assert (resultado.gravadas, resultado.removidas) == (0, 1)
+    assert vagas.count() == 5
+
+
+@pytest.mark.django_db
+def test_gaps_sao_uma_anti_juncao_com_alocacoes() -> None:
+    cache.clear()
+    local = Local.objects.create(nome="Savassi")
+    salas = [Sala.objects.create(local=local, nome=f"Sala {i}") for i in (1, 2)]
+    hoje = timezone.localdate()
+    for sala in salas:
+        CapacidadeSala.objects.create(sala=sala, dia_semana=hoje.weekday(), turno="tarde")
+    Alocacao.objects.create(
+        profissional=Profissional.objects.create(nome="Ana", email="ana@example.com"),
+        local=local,
+        sala=salas[0],
+        data=hoje,
+        turno="tarde",
+    )
+    VagaSala.objects.all().delete()
+    call_command("gerar_vagas", inicio=hoje, fim=hoje)
+
+    gaps = VagaSala.objects.filter(data=hoje).exclude(
+        sala__alocacoes__data=hoje, sala__alocacoes__turno="tarde"
+    )
+
+    assert list(gaps.values_list("sala__nome", flat=True)) == ["Sala 2"]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from cadastros.models import Local, Profissional, Sala
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from escala.models import Alocacao, AlteracaoAlocacao, TipoAlteracao
+from rest_framework.test import APIClient
+
+SEGUNDA = date(2026, 3, 2)
+URL = "/api/escala/alocacoes/"
+
+
+@pytest.fixture()
+def client() -> APIClient:
+    cache.clear()
+    user = User.objects.create_user(username="admin", password="secret123")  # noqa: S106
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture()
+def alocacoes() -> list[Alocacao]:
+    local = Local.objects.create(nome="Savassi")
+    return [
+        Alocacao.objects.create(
+            profissional=Profissional.objects.create(nome=nome, email=f"{nome}@example.com"),
+            local=local,
+            sala=Sala.objects.create(local=local, nome=f"Sala {i}"),
+            data=SEGUNDA,
+            turno="manha",
+        )
+        for i, nome in enumerate(("ana", "bia"), start=1)
+    ]
+
+
+@pytest.mark.django_db
+def test_edicao_concorrente_recebe_409_com_linha_atual(
+    client: APIClient, alocacoes: list[Alocacao]
+) -> None:
+    url = f"{URL}{alocacoes[0].pk}/"
+    lida = client.get(url)
+    assert lida["ETag"] == '"1"'
+
+    primeira = client.patch(
+        url, {"observacoes": "primeiro admin"}, format="json", HTTP_IF_MATCH=lida["ETag"]
+    )
+    assert primeira.status_code == 200
+    assert (primeira.data["version"], primeira["ETag"]) == (2, '"2"')
+
+    segunda = client.patch(url, {"observacoes": "segundo admin", "version": 1}, format="json")
+    assert segunda.status_code == 409
+    assert segunda.data["atuais"][0]["observacoes"] == "primeiro admin"
+    assert segunda.data["atuais"][0]["version"] == 2
+
+    alocacoes[0].refresh_from_db()
+    assert (alocacoes[0].observacoes, alocacoes[0].version) == ("primeiro admin", 2)
+    assert (
+        AlteracaoAlocacao.objects.filter(
+            alocacao_id=alocacoes[0].pk, tipo=TipoAlteracao.ALTERADA
+        ).count()
+        == 1
+    )
+
+    # Gravações fora da API também avançam a versão.
+    alocacoes[0].status = "revisado"
+    alocacoes[0].save()
+    assert (
+        client.patch(url, {"status": "gerado"}, format="json", HTTP_IF_MATCH='"2"').status_code
+        == 409
+    )
+
+
+@pytest.mark.django_db
+def test_lote_e_tudo_ou_nada(client: APIClient, alocacoes: list[Alocacao]) -> None:
+    primeira, segunda = alocacoes
+    segunda.observacoes = "editada em outra aba"
+    segunda.save()
+
+    conflito = client.patch(
+        f"{URL}lote/",
+        [
+            {"id": primeira.pk, "version": 1, "status": "revisado"},
+            {"id": segunda.pk, "version": 1, "status": "revisado"},
+        ],
+        format="json",
+    )
+
+    assert conflito.status_code == 409
+    assert [linha["id"] for linha in conflito.data["atuais"]] == [segunda.pk]
+    assert set(Alocacao.objects.values_list("status", flat=True)) == {"gerado"}
+
+    aplicado = client.patch(
+        f"{URL}lote/",
+        [
+            {"id": primeira.pk, "version": 1, "status": "revisado"},
+            {"id": segunda.pk, "version": 2, "status": "revisado"},
+        ],
+        format="json",
+    )
+
+    assert aplicado.status_code == 200
+    assert [linha["version"] for linha in aplicado.data] == [2, 3]
+    assert set(Alocacao.objects.values_list("status", flat=True)) == {"revisado"}
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from escala.google_calendar import ErroCalendarAPI
+from escala.jobs import executar, liberar_coalescencia, reivindicar
+from escala.models import AgendaGoogle, ExecucaoJob, StatusAgenda, StatusJob, TipoJob
+from escala.webhooks import renovar_canais
+
+URL = "/api/escala/calendar/webhook/"
+
+
+@pytest.fixture()
+def agenda() -> AgendaGoogle:
+    return AgendaGoogle.objects.create(
+        calendar_id="sala1@group.calendar.google.com",
+        nome="Sala 1",
+        webhook_channel_id="canal-1",
+        webhook_resource_id="recurso-1",
+        webhook_token="nonce-1",  # noqa: S106
+    )
+
+
+def _notificar(client: Client, token: str = "nonce-1", estado: str = "exists") -> int:  # noqa: S107
+    response = client.post(
+        URL,
+        headers={
+            "X-Goog-Channel-ID": "canal-1",
+            "X-Goog-Resource-ID": "recurso-1",
+            "X-Goog-Channel-Token": token,
+            "X-Goog-Resource-State": estado,
+        },
+    )
+    return response.status_code
+
+
+def _syncs_pendentes() -> int:
+    return ExecucaoJob.objects.filter(tipo=TipoJob.SYNC_GOOGLE, status=StatusJob.PENDENTE).count()
+
+
+@pytest.mark.django_db
+def test_rajada_de_notificacoes_gera_um_unico_sync(agenda: AgendaGoogle) -> None:
+    client = Client()
+
+    codigos = {_notificar(client) for _ in range(30)}
+
+    assert codigos == {200}
+    assert _syncs_pendentes() == 1
+    agenda.refresh_from_db()
+    assert agenda.sync_pendente_desde is not None
+    assert agenda.ultimo_webhook_em is not None
+
+    # Depois que o sync começa, a próxima rajada agenda um novo sync.
+    liberar_coalescencia(agenda.pk)
+    _notificar(client)
+    assert _syncs_pendentes() == 2
+
+
+@pytest.mark.django_db
+def test_notificacao_invalida_e_rejeitada(agenda: AgendaGoogle) -> None:
+    client = Client()
+
+    assert _notificar(client, token="outro") == 412  # noqa: S106
+    assert client.post(URL, headers={"X-Goog-Channel-ID": "desconhecido"}).status_code == 412
+    assert _notificar(client, estado="sync") == 200
+    assert _syncs_pendentes() == 0
+
+
+class _ClienteFalso:
+    def __init__(self, falhar: bool = False) -> None:
+        self.falhar = falhar
+        self.encerrados: list[tuple[str, str]] = []
+
+    def watch_events(
+        self, calendar_id: str, channel_id: str, token: str, endereco: str
+    ) -> dict[str, Any]:
+        if self.falhar:
+            raise ErroCalendarAPI(403, "rateLimitExceeded")
+        expiracao = timezone.now() + timedelta(days=7)
+        return {"resourceId": f"r-{channel_id}", "expiration": int(expiracao.timestamp() * 1000)}
+
+    def stop_channel(self, channel_id: str, resource_id: str) -> None:
+        self.encerrados.append((channel_id, resource_id))
+
+
+@pytest.mark.django_db
+def test_renovacao_reabre_canais_e_cai_para_polling(agenda: AgendaGoogle) -> None:
+    valida = AgendaGoogle.objects.create(
+        calendar_id="ok@cal",
+        nome="Em dia",
+        webhook_channel_id="canal-ok",
+        webhook_expiracao=timezone.now() + timedelta(days=3),
+    )
+    cliente = _ClienteFalso()
+
+    assert renovar_canais(cliente) == {"renovadas": 1, "falhas": 0}
+    agenda.refresh_from_db()
+    valida.refresh_from_db()
+    assert agenda.webhook_channel_id != "canal-1"
+    assert agenda.webhook_expiracao is not None
+    assert cliente.encerrados == [("canal-1", "recurso-1")]
+    assert valida.webhook_channel_id == "canal-ok"
+
+    AgendaGoogle.objects.filter(pk=agenda.pk).update(webhook_expiracao=timezone.now())
+    assert renovar_canais(_ClienteFalso(falhar=True)) == {"renovadas": 0, "falhas": 1}
+    agenda.refresh_from_db()
+    assert agenda.status == StatusAgenda.WEBHOOK_EXPIRADO
+
+
+@pytest.mark.django_db
+def test_sync_que_falha_antes_de_rodar_libera_a_agenda(agenda: AgendaGoogle, settings: Any) -> None:
+    settings.GOOGLE_CALENDAR_CLIENT = ""
+    client = Client()
+    _notificar(client)
+    ExecucaoJob.objects.update(executar_apos=timezone.now())
+    job = reivindicar("w1", tipos=[TipoJob.SYNC_GOOGLE])
+    assert job is not None
+
+    assert executar(job) == StatusJob.DEAD_LETTER
+
+    agenda.refresh_from_db()
+    assert agenda.sync_pendente_desde is None
+    _notificar(client)
+    assert _syncs_pendentes() == 1
@@ -6,8 +6,17 @@ import { ensureCsrf } from './auth';
 import type {
   Alocacao,
   AlocacaoFilters,
+  AlocacoesDelta,
+  AlteracaoAlocacao,
+  AuditoriaAlocacao,
+  CandidatosTroca,
+  Cobertura,
   ExecucaoJob,
+  ImportacaoSabados,
+  ImportacaoWhatsapp,
+  ModeloSemana,
   PromptHistory,
+  ResultadoCopiaSemana,
   Troca,
   AgendaGoogle,
   EventoCalendar,
@@ -15,15 +24,14 @@ import type {
   DashboardMetrics,
   GerarEscalaParams,
   SyncResponse,
+  TurnoEscala,
 } from '../types/escala';
 
 const API_BASE = '/api/escala';
 
 //=== Alocações ===
 
-export async function fetchAlocacoes(
-  filters?: AlocacaoFilters,
-): Promise<Alocacao[]> {
+function alocacaoParams(filters?: AlocacaoFilters): URLSearchParams {
   const params = new URLSearchParams();
 
   if (filters) {
@@ -38,6 +46,15 @@ export async function fetchAlocacoes(
     });
   }
 
+  return params;
+}
+
+// O backend responde com ETag; o cache HTTP do navegador revalida e
+// reaproveita a resposta anterior quando o período não mudou (304).
+export async function fetchAlocacoes(
+  filters?: AlocacaoFilters,
+): Promise<Alocacao[]> {
+  const params = alocacaoParams(filters);
   const url = `${API_BASE}/alocacoes/${params.toString() ? '?' + params.toString() : ''}`;
   const response = await fetch(url, {
     credentials: 'include',
@@ -50,6 +67,52 @@ export async function fetchAlocacoes(
   return response.json();
 }
 
+/**
+ * Alterações desde `cursor` (devolvido pela chamada anterior).
+ * Status 410 indica cursor expirado: recarregar com fetchAlocacoes.
+ */
+export async function fetchAlocacoesDelta(
+  cursor: string,
+  filters?: AlocacaoFilters,
+): Promise<AlocacoesDelta> {
+  const params = alocacaoParams(filters);
+  params.set('alterado_desde', cursor);
+  const response = await fetch(`${API_BASE}/alocacoes/?${params.toString()}`, {
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    throw new Error(`Erro ao buscar alterações: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+/**
+ * Assina o stream SSE de alterações do período (quadro ao vivo).
+ * O EventSource reconecta sozinho e retoma pelo Last-Event-ID; o evento
+ * `recarregar` pede que a listagem seja relida com fetchAlocacoes.
+ * Devolve a função que encerra a assinatura.
+ */
+export function subscribeAlocacoes(
+  periodo: { data_inicio: string; data_fim: string },
+  onAlteracao: (alteracao: AlteracaoAlocacao) => void,
+  onRecarregar: () => void,
+): () => void {
+  const params = new URLSearchParams(periodo);
+  const source = new EventSource(`${API_BASE}/alocacoes/eventos/?${params.toString()}`, {
+    withCredentials: true,
+  });
+  source.addEventListener('alocacao', (event) => {
+    onAlteracao(JSON.parse((event as MessageEvent<string>).data));
+  });
+  source.addEventListener('recarregar', () => {
+    source.close();
+    onRecarregar();
+  });
+  return () => source.close();
+}
+
 export async function createAlocacao(
   data: Partial<Alocacao>,
 ): Promise<Alocacao> {
@@ -73,6 +136,18 @@ export async function createAlocacao(
   return response.json();
 }
 
+/**
+ * Alocação alterada por outra edição desde a versão enviada (HTTP 409).
+ * `atuais` traz as linhas como estão no servidor.
+ */
+export class AlocacaoDesatualizadaError extends Error {
+  constructor(public atuais: Alocacao[]) {
+    super('Alocação alterada por outra edição; recarregue e tente de novo');
+  }
+}
+
+// Envie `version` (a lida na listagem) para o servidor recusar edições
+// sobre uma versão desatualizada em vez de sobrescrevê-las.
 export async function updateAlocacao(
   id: number,
   data: Partial<Alocacao>,
@@ -89,6 +164,9 @@ export async function updateAlocacao(
     body: JSON.stringify(data),
   });
 
+  if (response.status === 409) {
+    throw new AlocacaoDesatualizadaError((await response.json()).atuais);
+  }
   if (!response.ok) {
     const error = await response.json();
     throw new Error(error.detail || 'Erro ao atualizar alocação');
@@ -97,6 +175,33 @@ export async function updateAlocacao(
   return response.json();
 }
 
+/** Atualização em lote, tudo ou nada; cada item leva `id` e `version`. */
+export async function updateAlocacoesLote(
+  itens: (Partial<Alocacao> & Pick<Alocacao, 'id' | 'version'>)[],
+): Promise<Alocacao[]> {
+  const csrf = await ensureCsrf();
+
+  const response = await fetch(`${API_BASE}/alocacoes/lote/`, {
+    method: 'PATCH',
+    headers: {
+      'Content-Type': 'application/json',
+      'X-CSRFToken': csrf,
+    },
+    credentials: 'include',
+    body: JSON.stringify(itens),
+  });
+
+  if (response.status === 409) {
+    throw new AlocacaoDesatualizadaError((await response.json()).atuais);
+  }
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || error.error || 'Erro ao atualizar alocações');
+  }
+
+  return response.json();
+}
+
 export async function deleteAlocacao(id: number): Promise<void> {
   const csrf = await ensureCsrf();
 
@@ -139,6 +244,28 @@ export async function fetchInconsistencias(
 
 //=== Estatísticas ===
 
+export async function fetchCobertura(
+  dataInicio?: string,
+  dataFim?: string,
+): Promise<Cobertura> {
+  const params = new URLSearchParams();
+  if (dataInicio) params.append('data_inicio', dataInicio);
+  if (dataFim) params.append('data_fim', dataFim);
+
+  const response = await fetch(
+    `${API_BASE}/alocacoes/cobertura/?${params.toString()}`,
+    {
+      credentials: 'include',
+    },
+  );
+
+  if (!response.ok) {
+    throw new Error('Erro ao buscar cobertura');
+  }
+
+  return response.json();
+}
+
 export async function fetchEstatisticas(
   semanas = 4,
 ): Promise<DashboardMetrics> {
@@ -263,6 +390,178 @@ export async function aplicarTroca(
   return response.json();
 }
 
+export async function aplicarTrocasLote(
+  ids: number[],
+): Promise<{ trocas: number[]; alocacoes: number[] }> {
+  const csrf = await ensureCsrf();
+
+  const response = await fetch(`${API_BASE}/trocas/aplicar-lote/`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'X-CSRFToken': csrf,
+    },
+    credentials: 'include',
+    body: JSON.stringify({ trocas: ids }),
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || 'Erro ao aplicar trocas');
+  }
+
+  return response.json();
+}
+
+/**
+ * Auditoria de uma alocação, de um slot (sala, data, turno) ou de um job,
+ * em ordem cronológica.
+ */
+export async function fetchHistoricoAlocacoes(
+  filtro:
+    | { alocacao: number }
+    | { job: number }
+    | { sala: number; data: string; turno: TurnoEscala },
+): Promise<AuditoriaAlocacao[]> {
+  const params = new URLSearchParams(
+    Object.entries(filtro).map(([key, value]) => [key, String(value)]),
+  );
+  const response = await fetch(`${API_BASE}/alocacoes/historico/?${params}`, {
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    throw new Error('Erro ao buscar histórico de alocações');
+  }
+
+  return response.json();
+}
+
+async function postCopia(url: string, body: unknown): Promise<ResultadoCopiaSemana> {
+  const csrf = await ensureCsrf();
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'X-CSRFToken': csrf,
+    },
+    credentials: 'include',
+    body: JSON.stringify(body),
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || 'Erro ao copiar semana');
+  }
+
+  return response.json();
+}
+
+/**
+ * Copia as alocações da semana de `origem` para as semanas de `destinos`
+ * (slots ocupados e sábados manuais são preservados).
+ */
+export function copiarSemana(origem: string, destinos: string[]): Promise<ResultadoCopiaSemana> {
+  return postCopia(`${API_BASE}/alocacoes/copiar-semana/`, { origem, destinos });
+}
+
+export async function fetchModelosSemana(): Promise<ModeloSemana[]> {
+  const response = await fetch(`${API_BASE}/modelos-semana/`, {
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    throw new Error('Erro ao buscar modelos de semana');
+  }
+
+  return response.json();
+}
+
+export function aplicarModeloSemana(
+  modeloId: number,
+  semanas: string[],
+): Promise<ResultadoCopiaSemana> {
+  return postCopia(`${API_BASE}/modelos-semana/${modeloId}/aplicar/`, { semanas });
+}
+
+/**
+ * Lança a escala de sábados do mês a partir de uma planilha (CSV ou XLSX).
+ * Com erros (400) nada é gravado e o relatório por célula é devolvido.
+ */
+export async function importarSabados(
+  arquivo: File,
+  simular = false,
+): Promise<ImportacaoSabados> {
+  const csrf = await ensureCsrf();
+  const body = new FormData();
+  body.append('arquivo', arquivo);
+  if (simular) {
+    body.append('simular', '1');
+  }
+
+  const response = await fetch(`${API_BASE}/alocacoes/importar-sabados/`, {
+    method: 'POST',
+    headers: {
+      'X-CSRFToken': csrf,
+    },
+    credentials: 'include',
+    body,
+  });
+
+  const resultado = await response.json();
+  if (!response.ok && !resultado.linhas) {
+    throw new Error(resultado.error || 'Erro ao importar planilha');
+  }
+
+  return resultado;
+}
+
+export async function importarTrocasWhatsapp(
+  arquivo: File,
+  simular = false,
+): Promise<ImportacaoWhatsapp> {
+  const csrf = await ensureCsrf();
+  const body = new FormData();
+  body.append('arquivo', arquivo);
+  if (simular) {
+    body.append('simular', '1');
+  }
+
+  const response = await fetch(`${API_BASE}/trocas/importar-whatsapp/`, {
+    method: 'POST',
+    headers: {
+      'X-CSRFToken': csrf,
+    },
+    credentials: 'include',
+    body,
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || 'Erro ao importar conversa');
+  }
+
+  return response.json();
+}
+
+export async function fetchCandidatosTroca(
+  data: string,
+  turno: TurnoEscala,
+  sala: number,
+): Promise<CandidatosTroca> {
+  const params = new URLSearchParams({ data, turno, sala: String(sala) });
+  const response = await fetch(`${API_BASE}/trocas/candidatos/?${params}`, {
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    throw new Error('Erro ao buscar candidatos para a troca');
+  }
+
+  return response.json();
+}
+
 //=== Agendas Google ===
 
 export async function fetchAgendasGoogle(): Promise<AgendaGoogle[]> {
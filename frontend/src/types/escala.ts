@@ -10,7 +10,8 @@ export type StatusAlocacao =
   | 'revisado'
   | 'confirmado'
   | 'ajustado'
-  | 'manual';
+  | 'manual'
+  | 'conflito';
 export type NivelInseguranca = 'baixa' | 'media' | 'alta';
 export type TurnoEscala = 'manha' | 'tarde';
 
@@ -35,7 +36,9 @@ export interface Alocacao {
   inseguranca: NivelInseguranca;
   metadata: Record<string, unknown>;
   observacoes: string;
+  permite_sobreposicao: boolean;
   validation_issues?: ValidationIssue[];
+  version: number;
   created_at: string;
   updated_at: string;
 }
@@ -45,14 +48,17 @@ export type TipoJob =
   | 'confirmacao_diaria'
   | 'sync_google'
   | 'publicacao_google'
-  | 'replanejamento';
+  | 'replanejamento'
+  | 'renovacao_webhook'
+  | 'polling_google';
 
 export type StatusJob =
   | 'pendente'
   | 'executando'
   | 'concluido'
   | 'erro'
-  | 'cancelado';
+  | 'cancelado'
+  | 'dead_letter';
 
 export interface ExecucaoJob {
   id: number;
@@ -63,6 +69,12 @@ export interface ExecucaoJob {
   diff_resumo: string;
   log_json: Record<string, unknown>;
   autor: string;
+  executar_apos: string;
+  tentativas: number;
+  max_tentativas: number;
+  worker: string;
+  lease_ate: string | null;
+  heartbeat_em: string | null;
 }
 
 export type AcaoPrompt =
@@ -102,10 +114,92 @@ export interface Troca {
   motivo: string;
   origem: string;
   status: StatusTroca;
+  confianca: string | null;
   created_at: string;
   updated_at: string;
 }
 
+export interface ItemModeloSemana {
+  id: number;
+  dia_semana: number;
+  turno: TurnoEscala;
+  local: number;
+  sala: number;
+  profissional: number;
+}
+
+export interface ModeloSemana {
+  id: number;
+  nome: string;
+  descricao: string;
+  itens: ItemModeloSemana[];
+  created_at: string;
+  updated_at: string;
+}
+
+export interface ResultadoCopiaSemana {
+  criadas: number;
+  ignoradas: number;
+  alocacoes: number[];
+  inconsistencias: Inconsistencia[];
+}
+
+export interface ImportacaoWhatsapp {
+  mensagens: number;
+  encontradas: number;
+  criadas: number;
+  duplicadas: number;
+  trocas: number[];
+}
+
+export interface LinhaImportacaoSabados {
+  linha: number;
+  coluna: string;
+  data: string | null;
+  turno: TurnoEscala;
+  sala: number | null;
+  profissional: number | null;
+  situacao: 'criada' | 'existente' | 'erro';
+  erros: string[];
+  avisos: string[];
+}
+
+export interface ImportacaoSabados {
+  criadas: number;
+  existentes: number;
+  erros: number;
+  avisos: number;
+  alocacoes: number[];
+  linhas: LinhaImportacaoSabados[];
+}
+
+export type ViolacaoCandidato =
+  | 'indisponivel'
+  | 'local_proibido'
+  | 'ocupado'
+  | 'excede_horas'
+  | 'excede_dobras';
+
+export interface CandidatoTroca {
+  profissional_id: number;
+  nome: string;
+  pontuacao: number;
+  horas_semana: string;
+  dobras_semana: number;
+  violacoes: ViolacaoCandidato[];
+  bloqueado: boolean;
+}
+
+export interface CandidatosTroca {
+  data: string;
+  turno: TurnoEscala;
+  sala: number;
+  local: number;
+  candidatos: CandidatoTroca[];
+}
+
+export type StatusAgenda = 'ok' | 'needs_reauth' | 'webhook_expired';
+
 export interface AgendaGoogle {
   id: number;
   profissional: number | null;
@@ -116,6 +210,10 @@ export interface AgendaGoogle {
   source_tag: string;
   pode_publicar: boolean;
   ativa: boolean;
+  status: StatusAgenda;
+  erro_mensagem: string;
+  webhook_expiracao: string | null;
+  ultimo_webhook_em: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -163,6 +261,38 @@ export interface DashboardMetrics {
   }[];
 }
 
+export interface CoberturaTurno {
+  data: string;
+  turno: TurnoEscala;
+  vagas: number;
+  cobertas: number;
+  gaps: number;
+  cobertura: number;
+}
+
+export interface CoberturaLocal {
+  local_id: number;
+  nome: string;
+  prioridade_cobertura: number;
+  vagas: number;
+  cobertas: number;
+  gaps: number;
+  cobertura: number;
+  turnos: CoberturaTurno[];
+}
+
+export interface Cobertura {
+  periodo: {
+    inicio: string;
+    fim: string;
+  };
+  vagas: number;
+  cobertas: number;
+  gaps: number;
+  cobertura: number;
+  locais: CoberturaLocal[];
+}
+
 // Filtros para alocações
 export interface AlocacaoFilters {
   profissional?: number;
@@ -178,6 +308,54 @@ export interface AlocacaoFilters {
   locais?: number[];
 }
 
+// Resposta de /alocacoes/?alterado_desde=<cursor>
+export interface AlocacoesDelta {
+  cursor: string;
+  alteradas: Alocacao[];
+  removidas: number[];
+}
+
+// Evento `alocacao` do stream /alocacoes/eventos/
+export interface AlteracaoAlocacao {
+  id: number;
+  tipo: 'criada' | 'alterada' | 'removida' | 'troca';
+  alocacao_id: number;
+  profissional_id: number;
+  local_id: number;
+  sala_id: number | null;
+  data: string;
+  turno: TurnoEscala;
+  detalhes: Record<string, unknown>;
+  criada_em: string;
+}
+
+export type FonteAlteracao = 'ui' | 'prompt' | 'job' | 'troca' | 'sistema';
+
+// [profissional, local, sala, data, turno, status]
+export type EstadoAlocacao = [
+  number,
+  number,
+  number | null,
+  string,
+  TurnoEscala,
+  StatusAlocacao,
+];
+
+export interface AuditoriaAlocacao {
+  id: number;
+  alocacao_id: number;
+  antes: EstadoAlocacao | null;
+  depois: EstadoAlocacao | null;
+  sala_id: number | null;
+  data: string;
+  turno: TurnoEscala;
+  autor: string;
+  motivo: string;
+  fonte: FonteAlteracao;
+  job_id: number | null;
+  criada_em: string;
+}
+
 // Parâmetros para geração de escala
 export interface GerarEscalaParams {
   data_inicio: string;